@@ -1,19 +1,26 @@
 import random
 from game_basics import Card, Player, Deck, SUITS
+from game_events import EventSource
+from game_state import Snapshottable
 
-class AmerikaiiGame:
+class AmerikaiiGame(EventSource, Snapshottable):
     """
     موتور و منطق اصلی بازی آمریکایی (Crazy Eights).
     """
-    def __init__(self, num_players=3, difficulty='medium'):
+    MOVE_HANDLERS = {'play': '_move_play', 'draw': '_move_draw'}
+    STATE_FIELDS = ('draw_pile', 'discard_pile', 'current_player_index', 'play_direction', 'declared_suit',
+                    'is_game_over', 'winner')
+
+    def __init__(self, num_players=3, difficulty='medium', rng=None):
         if num_players < 2:
             raise ValueError("تعداد بازیکنان باید حداقل ۲ نفر باشد.")
         
         self.difficulty = difficulty
+        self.rng = rng or random
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players)]
         
         self.draw_pile = Deck()
-        self.draw_pile.shuffle()
+        self.draw_pile.shuffle(self.rng)
         self.discard_pile = []
 
         self.current_player_index = 0
@@ -33,7 +40,7 @@ class AmerikaiiGame:
         start_card = self.draw_pile.deal()
         while start_card.rank == '8': # The first card cannot be a wild card
              self.draw_pile.cards.append(start_card)
-             self.draw_pile.shuffle()
+             self.draw_pile.shuffle(self.rng)
              start_card = self.draw_pile.deal()
         self.discard_pile.append(start_card)
 
@@ -66,6 +73,7 @@ class AmerikaiiGame:
             if len(self.draw_pile) == 0: self._refill_draw_pile()
             if len(self.draw_pile) > 0:
                 target_player.add_card(self.draw_pile.deal())
+        self._emit('cards_drawn', player=target_player, count=num_cards, penalty=True)
 
     def play_turn(self, player: Player, card: Card, declared_suit: str = None):
         """یک نوبت بازی را اجرا می‌کند: کارت را بازی کرده و اثر آن را اعمال می‌کند."""
@@ -74,11 +82,13 @@ class AmerikaiiGame:
 
         player.hand.remove(card)
         self.discard_pile.append(card)
+        self._emit('card_played', player=player, card=card, suit=declared_suit)
         self.declared_suit = None
 
         if not player.hand:
             self.is_game_over = True
             self.winner = player
+            self._emit('game_over', winner=player)
             return
 
         if card.rank == '8':
@@ -106,6 +116,7 @@ class AmerikaiiGame:
             
         drawn_card = self.draw_pile.deal()
         player.add_card(drawn_card)
+        self._emit('cards_drawn', player=player, count=1, penalty=False)
         
         if not self._is_move_valid(drawn_card):
             self._advance_turn()
@@ -120,20 +131,42 @@ class AmerikaiiGame:
         top = self.discard_pile.pop()
         cards_to_shuffle = self.discard_pile[:]
         self.discard_pile = [top]
-        random.shuffle(cards_to_shuffle)
+        self.rng.shuffle(cards_to_shuffle)
         self.draw_pile.cards.extend(cards_to_shuffle)
 
+    # --- API حرکت (apply_move) ---
+
+    def _move_play(self, move: dict):
+        player = self.players[self.current_player_index]
+        card = move['card']
+        if self.is_game_over or card not in player.hand or not self._is_move_valid(card):
+            raise ValueError(f"حرکت غیرمجاز برای {player.name}: {card}")
+        self.play_turn(player, card, move.get('suit'))
+
+    def _move_draw(self, move: dict):
+        if self.is_game_over:
+            raise ValueError("بازی تمام شده است.")
+        self.player_must_draw(self.players[self.current_player_index])
+
+    def ai_move(self) -> dict | None:
+        if self.is_game_over:
+            return None
+        choice = self.ai_choose_card(self.players[self.current_player_index])
+        if choice is None:
+            return {'action': 'draw'}
+        return {'action': 'play', 'card': choice['card'], 'suit': choice['suit']}
+
     def ai_choose_card(self, player: Player) -> dict:
         """مغز AI برای انتخاب بهترین حرکت در بازی آمریکایی."""
         valid_moves = [c for c in player.hand if self._is_move_valid(c)]
         if not valid_moves:
             return None
 
-        card_to_play = random.choice(valid_moves)
+        card_to_play = self.rng.choice(valid_moves)
         declared_suit = None
         if card_to_play.rank == '8':
             from collections import Counter
             suit_counts = Counter(c.suit for c in player.hand if c.rank != '8')
-            declared_suit = suit_counts.most_common(1)[0][0] if suit_counts else random.choice(SUITS)
+            declared_suit = suit_counts.most_common(1)[0][0] if suit_counts else self.rng.choice(SUITS)
         
         return {'card': card_to_play, 'suit': declared_suit}
@@ -1,30 +1,88 @@
+import time
 from PyQt5.QtCore import QUrl, QFileInfo
 from PyQt5.QtMultimedia import QSoundEffect
 
 class AudioManager:
-    """کلاسی برای مدیریت بارگذاری و پخش جلوه‌های صوتی."""
-    def __init__(self):
-        self.sounds = {}
+    """
+    کلاسی برای مدیریت بارگذاری و پخش جلوه‌های صوتی.
+    همه ویجت‌ها از یک نمونه مشترک (AudioManager.instance()) استفاده می‌کنند تا هر فایل فقط یک بار
+    بارگذاری شود. هر جلوه چند «صدا» (QSoundEffect با منبع یکسان) دارد تا پخش‌های پشت سر هم
+    روی هم بیفتند و صدای قبلی قطع نشود.
+    """
+    SOUND_FILES = {
+        "play": "resources/audio/card_play.wav",
+        "shuffle": "resources/audio/shuffle.wav",
+        "win": "resources/audio/win_trick.wav"
+    }
+    VOICES_PER_SOUND = 3
+    _instance = None
+
+    @classmethod
+    def instance(cls) -> "AudioManager":
+        """نمونه مشترک کل برنامه؛ در اولین فراخوانی ساخته و بارگذاری می‌شود."""
+        if cls._instance is None:
+            cls._instance = cls()
+        else:
+            cls._instance.stats["instance_reuses"] += 1
+        return cls._instance
+
+    def __init__(self, voices_per_sound=VOICES_PER_SOUND):
+        self.voices_per_sound = voices_per_sound
+        self.sounds = {}  # نام -> لیست صداها
+        self._next_voice = {}
+        self.load_times = {}  # نام -> زمان تا آماده شدن (ثانیه)
+        self.stats = {"plays": 0, "overlapped_plays": 0, "stolen_voices": 0, "instance_reuses": 0}
         self._load_sounds()
 
     def _load_sounds(self):
-        sound_files = {
-            "play": "resources/audio/card_play.wav",
-            "shuffle": "resources/audio/shuffle.wav",
-            "win": "resources/audio/win_trick.wav"
-        }
-        
-        for name, path in sound_files.items():
+        for name, path in self.SOUND_FILES.items():
             file_info = QFileInfo(path)
             if not file_info.exists():
                 print(f"هشدار: فایل صوتی پیدا نشد: {path}")
                 continue
-                
-            sound_effect = QSoundEffect()
-            sound_effect.setSource(QUrl.fromLocalFile(path))
-            sound_effect.setVolume(0.8)
-            self.sounds[name] = sound_effect
+
+            # صداهای یک جلوه منبع یکسان دارند و Qt نمونه‌های رمزگشایی شده را بین آن‌ها به اشتراک می‌گذارد
+            url = QUrl.fromLocalFile(path)
+            started = time.perf_counter()
+            voices = []
+            for _ in range(self.voices_per_sound):
+                sound_effect = QSoundEffect()
+                sound_effect.setSource(url)
+                sound_effect.setVolume(0.8)
+                voices.append(sound_effect)
+            voices[0].statusChanged.connect(lambda name=name, started=started: self._on_status_changed(name, started))
+            self.sounds[name] = voices
+            self._next_voice[name] = 0
+
+    def _on_status_changed(self, name: str, started: float):
+        if name not in self.load_times and self.sounds[name][0].status() == QSoundEffect.Ready:
+            self.load_times[name] = time.perf_counter() - started
 
     def play(self, sound_name: str):
-        if sound_name in self.sounds:
-            self.sounds[sound_name].play()
+        voices = self.sounds.get(sound_name)
+        if not voices:
+            return
+        # اولین صدای بیکار از نوبت فعلی؛ اگر همه در حال پخش باشند قدیمی‌ترین صدا دوباره استفاده می‌شود
+        start = self._next_voice[sound_name]
+        index = start
+        for offset in range(len(voices)):
+            candidate = (start + offset) % len(voices)
+            if not voices[candidate].isPlaying():
+                index = candidate
+                break
+        else:
+            self.stats["stolen_voices"] += 1
+        if any(v.isPlaying() for v in voices):
+            self.stats["overlapped_plays"] += 1
+
+        voices[index].play()
+        self._next_voice[sound_name] = (index + 1) % len(voices)
+        self.stats["plays"] += 1
+
+    def cache_stats(self) -> dict:
+        return {
+            "loaded_sounds": len(self.sounds),
+            "voices": sum(len(v) for v in self.sounds.values()),
+            "load_times": dict(self.load_times),
+            **self.stats,
+        }
@@ -1,21 +1,27 @@
 import random
 from game_basics import Card, Player, Deck, RANKS
+from game_events import EventSource
+from game_state import Snapshottable
 
-class BibiSalamGame:
+class BibiSalamGame(EventSource, Snapshottable):
     """
     موتور و منطق اصلی بازی بی‌بی سلام.
     """
     SUIT_ORDER = ['♠️', '♥️', '♣️', '♦️']
+    MOVE_HANDLERS = {'play_next': '_move_play_next', 'salam': '_move_salam'}
+    STATE_FIELDS = ('current_suit_index', 'current_rank_index', 'center_pile', 'pending_salam', 'is_game_over',
+                    'winner')
 
-    def __init__(self, num_players=3, difficulty='medium'):
+    def __init__(self, num_players=3, difficulty='medium', rng=None):
         if num_players < 2:
             raise ValueError("تعداد بازیکنان باید حداقل ۲ نفر باشد.")
 
         self.difficulty = difficulty
+        self.rng = rng or random
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players)]
         
         deck = Deck()
-        deck.shuffle()
+        deck.shuffle(self.rng)
         self._deal_all_cards(deck)
 
         self.current_suit_index = 0
@@ -23,6 +29,7 @@ class BibiSalamGame:
         self.center_pile = []
         self.is_game_over = False
         self.winner = None
+        self.pending_salam = None  # بازیکنی که بی‌بی بازی کرده و جریمه سلام آن هنوز اعمال نشده
 
     def _deal_all_cards(self, deck: Deck):
         """تمام کارت‌های دسته را بین بازیکنان پخش می‌کند."""
@@ -65,11 +72,13 @@ class BibiSalamGame:
         else:
             potential_losers = [p for p in self.players if p != player_who_played_q]
             if not potential_losers: return
-            loser = random.choice(potential_losers)
+            loser = self.rng.choice(potential_losers)
         
         print(f"{loser.name} در سلام کردن کند بود و جریمه شد!")
+        self._emit('salam_penalty', player=player_who_played_q, loser=loser, count=len(self.center_pile))
         loser.hand.extend(self.center_pile)
         self.center_pile = []
+        self.pending_salam = None
 
     def play_next_card(self) -> Player:
         """
@@ -81,6 +90,7 @@ class BibiSalamGame:
         card_needed = self.get_card_to_play()
         if not card_needed:
             self.is_game_over = True
+            self._emit('game_over', winner=None)
             return None
 
         player_with_card = self.find_player_with_card(card_needed)
@@ -88,15 +98,38 @@ class BibiSalamGame:
         if player_with_card:
             player_with_card.hand.remove(card_needed)
             self.center_pile.append(card_needed)
+            self._emit('card_played', player=player_with_card, card=card_needed)
             
             if not player_with_card.hand:
                 self.is_game_over = True
                 self.winner = player_with_card
+                self._emit('game_over', winner=player_with_card)
                 return player_with_card
 
+            if card_needed.rank == 'Q':
+                self.pending_salam = player_with_card
             self._advance_to_next_card()
             return player_with_card
         else:
             # This case shouldn't happen if all cards are in play
             self._advance_to_next_card()
             return None
+
+    # --- API حرکت (apply_move) ---
+
+    def _move_play_next(self, move: dict):
+        if self.is_game_over or self.pending_salam is not None:
+            raise ValueError("ابتدا باید جریمه سلام اعمال شود.")
+        self.play_next_card()
+
+    def _move_salam(self, move: dict):
+        if self.pending_salam is None:
+            raise ValueError("بی‌بی بازی نشده است.")
+        self._handle_salam_penalty(self.pending_salam, human_was_slow=move.get('human_was_slow', False))
+
+    def ai_move(self) -> dict | None:
+        if self.is_game_over:
+            return None
+        if self.pending_salam is not None:
+            return {'action': 'salam', 'human_was_slow': False}
+        return {'action': 'play_next'}
@@ -1,17 +1,27 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout
-from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QTimer
 from bibi_salam_game import BibiSalamGame, Card
+from game_basics import RANK_VALUES
 from audio_manager import AudioManager
+from pixmap_cache import PixmapCache
+from hand_view import HandView
+from event_presenter import EventPresenter
 import random
 
-class BibiSalamGameWidget(QWidget):
+class BibiSalamGameWidget(EventPresenter, QWidget):
+    AI_MOVE_DELAY = 1200  # مکث پیش از نمایش حرکت AI
+    EVENT_HOLD_TIMES = {'salam_penalty': 1500}  # مدت نمایش رویداد پیش از رویداد بعدی
+
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.process_game_step)
+        self.audio_manager = AudioManager.instance()
+        self.pixmaps = PixmapCache.instance()
+        # مهلت کلیک سلام؛ فقط واکنش بازیکن را محدود می‌کند و موتور را جلو نمی‌برد
+        self.salam_timer = QTimer(self)
+        self.salam_timer.setSingleShot(True)
+        self.salam_timer.timeout.connect(self.salam_timeout)
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -37,106 +47,110 @@ class BibiSalamGameWidget(QWidget):
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
         
     def start_new_game(self):
-        self.game = BibiSalamGame(num_players=4)
+        self.salam_timer.stop()
+        self.attach_game(BibiSalamGame(num_players=4))
         self.start_button.hide()
         self.audio_manager.play("shuffle")
-        self.update_displays()
-        self.timer.start(1200)
+        self.update_hand_display()
+        self.advance_engine()
 
-    def process_game_step(self):
-        if self.game.is_game_over:
-            self.timer.stop()
-            self.status_label.setText(f"بازی تمام شد! برنده: {self.game.winner.name}")
-            self.start_button.show()
-            self.audio_manager.play("win")
-            return
+    # --- اجرای موتور و نمایش رویدادها ---
+
+    def human_to_move(self) -> bool:
+        """آیا موتور منتظر بازیکن انسانی است؟ (کارت بعدی در دست اوست، یا باید سلام کند)"""
+        game = self.game
+        if game.is_game_over or game.pending_salam is not None:
+            return True
+        return game.find_player_with_card(game.get_card_to_play()) == game.players[0]
 
-        card_needed = self.game.get_card_to_play()
-        player_with_card = self.game.find_player_with_card(card_needed)
+    def event_lead_time(self, event) -> int:
+        # جریمه سلام بلافاصله پس از واکنش بازیکن نمایش داده می‌شود
+        return super().event_lead_time(event) if event.kind == 'card_played' else 0
 
-        if player_with_card == self.game.players[0]:
-            self.timer.stop()
-            self.play_button.show()
-            self.status_label.setText("نوبت شماست! کارت را بازی کنید.")
+    def show_card_played(self, event):
+        self.audio_manager.play("play")
+        self.show_card(event['card'])
+        if event['player'] == self.game.players[0]:
+            self.hand_view.set_cards([card for card, _ in self.hand_view.items() if card != event['card']])
+        self.status_label.setText(f"{event['player'].name} {event['card']} را بازی کرد.")
+
+    def show_salam_penalty(self, event):
+        self.clear_layout(self.card_needed_layout)
+        if event['loser'] == self.game.players[0]:
+            self.update_hand_display()
+        self.status_label.setText(f"{event['loser'].name} در سلام کردن کند بود و {event['count']} کارت برداشت.")
+
+    def show_game_over(self, event):
+        winner = event['winner']
+        self.status_label.setText(f"بازی تمام شد! برنده: {winner.name if winner else 'نامشخص'}")
+        self.audio_manager.play("win")
+
+    def await_human(self):
+        game = self.game
+        if game.is_game_over:
+            self.start_button.show()
+        elif game.pending_salam is not None:
+            self.prompt_for_salam()
         else:
-            self.audio_manager.play("play")
-            played_card_owner = self.game.play_next_card()
-            self.update_displays()
-            if card_needed and card_needed.rank == 'Q':
-                self.handle_salam_event(played_card_owner)
+            card_needed = game.get_card_to_play()
+            self.show_card(card_needed)
+            self.play_button = QPushButton("بازی کن")
+            self.play_button.clicked.connect(self.on_play_card_clicked)
+            self.card_needed_layout.addWidget(self.play_button, 0, Qt.AlignCenter)
+            self.status_label.setText(f"نوبت شماست! کارت {card_needed} را بازی کنید.")
+
+    # --- حرکت بازیکن ---
 
     def on_play_card_clicked(self):
-        self.audio_manager.play("play")
-        card_needed = self.game.get_card_to_play()
-        played_card_owner = self.game.play_next_card()
+        if self.presenting or not self.human_to_move() or self.game.pending_salam is not None:
+            return
         self.play_button.hide()
-        
-        if card_needed and card_needed.rank == 'Q':
-            self.handle_salam_event(played_card_owner)
-        else:
-            self.timer.start(1200)
-            self.update_displays()
+        self.game.apply_move({'action': 'play_next'})
+        self.advance_engine()
 
-    def handle_salam_event(self, player_who_played_q):
-        self.timer.stop()
+    def prompt_for_salam(self):
         self.status_label.setText("بی‌بی سلام! سریع کلیک کن!")
         
         self.salam_button = QPushButton("سلام!")
         self.salam_button.setFixedSize(150, 150)
         self.salam_button.setStyleSheet("font-size: 30px; font-weight: bold; background-color: #ffc107; border-radius: 75px;")
-        self.salam_button.clicked.connect(lambda: self.on_salam_clicked(player_who_played_q))
+        self.salam_button.clicked.connect(self.on_salam_clicked)
         self.card_needed_layout.addWidget(self.salam_button)
 
-        QTimer.singleShot(random.randint(2000, 4000), lambda: self.salam_timeout(player_who_played_q))
+        self.salam_timer.start(random.randint(2000, 4000))
 
-    def on_salam_clicked(self, player_who_played_q):
-        if not hasattr(self, 'salam_button') or self.salam_button.isHidden(): return
-        
-        self.status_label.setText("آفرین! شما سریع بودید.")
+    def on_salam_clicked(self):
+        if not self.salam_timer.isActive(): return
+        self.salam_timer.stop()
         self.salam_button.hide()
-        self.game._handle_salam_penalty(player_who_played_q, human_was_slow=False)
-        QTimer.singleShot(1500, self.update_and_resume)
-
-    def salam_timeout(self, player_who_played_q):
-        if not hasattr(self, 'salam_button') or self.salam_button.isHidden(): return
+        self.status_label.setText("آفرین! شما سریع بودید.")
+        self.game.apply_move({'action': 'salam', 'human_was_slow': False})
+        self.advance_engine()
 
-        self.status_label.setText("دیر کردی! شما جریمه شدید.")
+    def salam_timeout(self):
         self.salam_button.hide()
-        self.game._handle_salam_penalty(player_who_played_q, human_was_slow=True)
-        QTimer.singleShot(1500, self.update_and_resume)
-
-    def update_and_resume(self):
-        self.update_displays()
-        self.timer.start(1200)
+        self.status_label.setText("دیر کردی! شما جریمه شدید.")
+        self.game.apply_move({'action': 'salam', 'human_was_slow': True})
+        self.advance_engine()
 
-    def update_displays(self):
+    def show_card(self, card: Card):
         self.clear_layout(self.card_needed_layout)
-        card_needed = self.game.get_card_to_play()
-        
-        if card_needed:
-            card_needed_text = str(card_needed)
-            player_with_card = self.game.find_player_with_card(card_needed)
-            owner_name = player_with_card.name if player_with_card else "نامشخص"
-            self.status_label.setText(f"کارت مورد نیاز: {card_needed_text} (در دست {owner_name})")
-            
-            card_needed_lbl = QLabel(card_needed_text)
-            card_needed_lbl.setStyleSheet("font-size: 36px; font-weight: bold; border: 2px solid green; padding: 20px; background-color: white;")
-            self.card_needed_layout.addWidget(card_needed_lbl, 0, Qt.AlignCenter)
-            
-            self.play_button = QPushButton("بازی کن")
-            self.play_button.clicked.connect(self.on_play_card_clicked)
-            self.play_button.hide()
-            self.card_needed_layout.addWidget(self.play_button, 0, Qt.AlignCenter)
+        card_lbl = QLabel(str(card))
+        card_lbl.setStyleSheet("font-size: 36px; font-weight: bold; border: 2px solid green; padding: 20px; background-color: white;")
+        self.card_needed_layout.addWidget(card_lbl, 0, Qt.AlignCenter)
 
-        self.clear_layout(self.player_hand_layout)
+    def update_hand_display(self):
         player = self.game.players[0]
-        for card in sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])):
-            lbl = QLabel()
-            pixmap = QIcon(f"resources/images/themes/default/cards/{card.image_filename}").pixmap(QSize(60, 88))
-            lbl.setPixmap(pixmap)
-            self.player_hand_layout.addWidget(lbl)
+        self.hand_view.set_cards(sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])))
+
+    def make_hand_card_widget(self, card):
+        lbl = QLabel()
+        lbl.setPixmap(self.pixmaps.card_pixmap(card, (60, 88)))
+        return lbl
             
     def clear_layout(self, layout):
         if layout is not None:
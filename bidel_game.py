@@ -1,33 +1,80 @@
 import random
-from game_basics import Card, Player, Deck, RANK_VALUES
+from game_basics import ALL_CARDS, Card, Player, Deck, RANK_VALUES
+from hand_bitboard import (FULL_DECK_MASK, LANE_BITS, SUIT_MASKS, SUIT_INDEX, card_bit, has_suit, hand_to_mask,
+                           mask_to_cards, valid_moves_mask)
+from trick_search import Determinizer, PenaltyCardsGoal, known_voids, run_search
+from double_dummy import CardPoints, DoubleDummySolver, endgame_search
+from zobrist import TranspositionTable
+from game_events import EventSource
+from game_state import Snapshottable
 
-class BidelGame:
+TWO_OF_CLUBS = Card('♣️', '2')
+QUEEN_OF_SPADES = Card('♠️', 'Q')
+HEARTS_INDEX = SUIT_INDEX['♥️']
+# امتیاز منفی هر کارت بر اساس card.id (برای جستجوی AI سخت)
+PENALTY_POINTS = {c.id: 1 for c in ALL_CARDS if c.suit == '♥️'}
+PENALTY_POINTS[QUEEN_OF_SPADES.id] = 13
+
+class BidelGame(EventSource, Snapshottable):
     """
     موتور و منطق اصلی بازی بیدل (Hearts).
     """
-    def __init__(self, difficulty='medium'):
+    LOSING_SCORE = 100  # با رسیدن یک بازیکن به این امتیاز منفی، بازی تمام می‌شود
+    MOVE_HANDLERS = {'new_round': '_move_new_round', 'pass': '_move_pass', 'play': '_move_play'}
+    STATE_FIELDS = ('total_scores', 'round_scores', 'passing_offset', 'cards_passed', 'hearts_broken',
+                    'current_player_index', 'trick_cards', 'last_trick', 'trick_history', 'is_round_over',
+                    'is_game_over')
+    PLAYER_STATE_FIELDS = ('hand', 'collected_cards')
+
+    def __init__(self, difficulty='medium', rng=None, ai_time_budget=0.15, ai_iterations=None, ai_workers=1,
+                 ai_endgame_cards=5):
         self.difficulty = difficulty
+        self.rng = rng or random
+        # بودجه جستجوی AI سخت: زمان (ثانیه) و/یا تعداد تکرار برای هر حرکت، و تعداد پردازه‌های playout
+        self.ai_time_budget = ai_time_budget
+        self.ai_iterations = ai_iterations
+        self.ai_workers = ai_workers
+        # وقتی کارت‌های بازیکن به این تعداد برسد، AI سخت پایان دور را دقیق حل می‌کند (۰ = هرگز)
+        self.ai_endgame_cards = ai_endgame_cards
+        self.endgame_table = None
+        self.last_search_stats = None
         self.players = [Player(f"بازیکن {i+1}") for i in range(4)]
         
         self.total_scores = {p.name: 0 for p in self.players}
+        self.is_round_over = True  # هنوز دوری شروع نشده است
         self.is_game_over = False
         
         self.passing_offset = 1 # 1=left, 2=right, 3=across, 0=hold
+        # وضعیت دور؛ در start_new_round مقداردهی می‌شود
+        self.round_scores = {p.name: 0 for p in self.players}
+        self.cards_passed = False
+        self.hearts_broken = False
+        self.current_player_index = 0
+        self.trick_cards = []
+        self.last_trick = []
+        self.trick_history = []
 
     def start_new_round(self):
         """یک دور جدید را با پخش کارت و ریست کردن متغیرها شروع می‌کند."""
         deck = Deck()
-        deck.shuffle()
-        for p in self.players: p.hand = []
+        deck.shuffle(self.rng)
+        for p in self.players:
+            p.hand = []
+            p.collected_cards = []
         self._deal_cards(deck)
         
         self.round_scores = {p.name: 0 for p in self.players}
         self.hearts_broken = False
         self.current_player_index = self._find_starter()
         self.trick_cards = []
+        self.last_trick = []
+        self.trick_history = []
+        self.is_round_over = False
         
         # چرخش جهت پاس دادن
         self.passing_offset = (self.passing_offset + 1) % 4
+        self.cards_passed = False
+        self._emit('round_started', passing_offset=self.passing_offset)
 
     def _deal_cards(self, deck: Deck):
         """کارت‌ها را بین ۴ بازیکن پخش می‌کند."""
@@ -56,7 +103,9 @@ class BidelGame:
 
     def pass_cards(self, pass_data: dict):
         """کارت‌های پاس داده شده را بین بازیکنان جابجا می‌کند."""
-        if self.passing_offset == 0: return
+        if self.passing_offset == 0:
+            self.cards_passed = True
+            return
 
         for i, player in enumerate(self.players):
             recipient_index = self.get_pass_recipient(i)
@@ -68,26 +117,36 @@ class BidelGame:
                     player.hand.remove(card)
                 recipient.hand.append(card)
 
-    def _is_move_valid(self, card: Card, player: Player) -> bool:
-        """بررسی می‌کند آیا حرکت بازیکن مجاز است یا خیر."""
+        # ۲ خاج ممکن است جابجا شده باشد
+        self.current_player_index = self._find_starter()
+        self.cards_passed = True
+        self._emit('cards_passed', passing_offset=self.passing_offset)
+
+    def _valid_moves_mask(self, hand_mask: int) -> int:
+        """bitmask کارت‌های مجاز برای یک دست (ابزارهای hand_bitboard)."""
         is_first_trick = sum(len(p.collected_cards) for p in self.players) == 0
 
         # دست اول: باید با ۲ خاج شروع شود
         if is_first_trick and not self.trick_cards:
-            return card.suit == '♣️' and card.rank == '2'
+            return hand_mask & card_bit(TWO_OF_CLUBS)
 
         # اگر اولین کارت دست نیست، باید از خال زمینه پیروی کند
         if self.trick_cards:
-            lead_suit = self.trick_cards[0][1].suit
-            if card.suit != lead_suit and any(c.suit == lead_suit for c in player.hand):
-                return False
-        
+            return valid_moves_mask(hand_mask, self.trick_cards[0][1].suit_index)
+
         # اگر اولین کارت دست است، نمی‌تواند با دل شروع کند مگر اینکه دل زده شده باشد
-        else: 
-            if card.suit == '♥️' and not self.hearts_broken:
-                return not any(c.suit != '♥️' for c in player.hand)
-        
-        return True
+        if not self.hearts_broken:
+            non_hearts = hand_mask & ~SUIT_MASKS[HEARTS_INDEX]
+            if non_hearts:
+                return non_hearts
+        return hand_mask
+
+    def _get_valid_moves(self, player: Player) -> list[Card]:
+        return mask_to_cards(self._valid_moves_mask(player.hand_mask))
+
+    def _is_move_valid(self, card: Card, player: Player) -> bool:
+        """بررسی می‌کند آیا حرکت بازیکن مجاز است یا خیر."""
+        return bool(self._valid_moves_mask(player.hand_mask) & card_bit(card))
 
     def _calculate_trick_points(self, trick: list) -> int:
         """امتیازات منفی یک دست را محاسبه می‌کند."""
@@ -99,29 +158,152 @@ class BidelGame:
                 points += 13
         return points
 
+    def play_card(self, player: Player, card: Card) -> Player | None:
+        """
+        کارت بازیکن را بازی کرده و نوبت را جلو می‌برد.
+        اگر دست کامل شود امتیاز منفی آن را ثبت کرده و برنده دست را برمی‌گرداند.
+        """
+        player.hand.remove(card)
+        self.trick_cards.append((player, card))
+        if card.suit == '♥️': self.hearts_broken = True
+        self._emit('card_played', player=player, card=card)
+
+        if len(self.trick_cards) < 4:
+            self.current_player_index = (self.current_player_index + 1) % 4
+            return None
+
+        lead_suit = self.trick_cards[0][1].suit
+        lead_suit_cards = [(p, c) for p, c in self.trick_cards if c.suit == lead_suit]
+        winner, _ = max(lead_suit_cards, key=lambda item: item[1].value)
+
+        points = self._calculate_trick_points(self.trick_cards)
+        self.round_scores[winner.name] += points
+        winner.score += points
+        winner.collected_cards.extend(c for _, c in self.trick_cards)
+
+        self.current_player_index = self.players.index(winner)
+        self.last_trick = self.trick_cards
+        self.trick_history.append(self.trick_cards)
+        self.trick_cards = []
+        self._emit('trick_won', winner=winner, cards=self.last_trick, points=points)
+
+        if not winner.hand:
+            self._end_round()
+        return winner
+
+    def _end_round(self):
+        """امتیازات دور را به امتیاز کل اضافه کرده و پایان بازی را بررسی می‌کند."""
+        for name, points in self.round_scores.items():
+            self.total_scores[name] += points
+        self.is_round_over = True
+        self._emit('round_over', round_scores=dict(self.round_scores), total_scores=dict(self.total_scores))
+        if max(self.total_scores.values()) >= self.LOSING_SCORE:
+            self.is_game_over = True
+            self._emit('game_over', winner=min(self.total_scores, key=self.total_scores.get))
+
+    # --- API حرکت (apply_move) ---
+
+    def _move_new_round(self, move: dict):
+        if not self.is_round_over or self.is_game_over:
+            raise ValueError("دور جاری هنوز تمام نشده است.")
+        self.start_new_round()
+
+    def _move_pass(self, move: dict):
+        if self.is_round_over or self.cards_passed:
+            raise ValueError("زمان پاس دادن کارت‌ها نیست.")
+        for player in self.players:
+            cards = move['cards'][player.name] if self.passing_offset else []
+            if len(cards) != (3 if self.passing_offset else 0) or any(c not in player.hand for c in cards):
+                raise ValueError(f"کارت‌های پاس {player.name} نامعتبر است.")
+        self.pass_cards(move['cards'])
+
+    def _move_play(self, move: dict):
+        player = self.players[self.current_player_index]
+        if self.is_round_over or not self.cards_passed or not self._is_move_valid(move['card'], player):
+            raise ValueError(f"حرکت غیرمجاز برای {player.name}: {move['card']}")
+        self.play_card(player, move['card'])
+
+    def ai_move(self) -> dict | None:
+        """حرکت بعدی بازی از دید AI؛ در مرحله پاس، کارت‌های همه بازیکنان را انتخاب می‌کند."""
+        if self.is_game_over:
+            return None
+        if self.is_round_over:
+            return {'action': 'new_round'}
+        if not self.cards_passed:
+            return {'action': 'pass', 'cards': {p.name: self.ai_choose_cards_to_pass(p) for p in self.players}}
+        return {'action': 'play', 'card': self.ai_choose_card(self.players[self.current_player_index])}
+
     def ai_choose_cards_to_pass(self, player: Player) -> list[Card]:
         """AI سه کارت را برای پاس دادن انتخاب می‌کند."""
         # Hard: High cards, especially in Spades and Hearts
-        player.hand.sort(key=lambda c: RANK_VALUES[c.rank], reverse=True)
+        # (بدون مرتب کردن خود دست تا انتخاب AI وضعیت بازی را تغییر ندهد)
+        ranked = sorted(player.hand, key=lambda c: RANK_VALUES[c.rank], reverse=True)
         # Avoid passing low clubs/diamonds if possible
-        return player.hand[:3]
+        return ranked[:3]
+
+    def _search_root(self, player: Player) -> Determinizer:
+        """اطلاعات عمومی دور از دید player برای ساختن determinizationهای سازگار با بازی‌های دیده شده."""
+        seat = self.players.index(player)
+        tricks = [[(self.players.index(p), c.id) for p, c in trick]
+                  for trick in self.trick_history + [self.trick_cards]]
+        seen_mask = player.hand_mask
+        for trick in tricks:
+            for _, card_id in trick:
+                seen_mask |= 1 << card_id
+        hands = [None] * 4
+        hands[seat] = player.hand_mask
+        return Determinizer(
+            seat, hands, FULL_DECK_MASK & ~seen_mask, [len(p.hand) for p in self.players],
+            known_voids(tricks, 4), tricks[-1], None, (0, 1, 2, 3),
+            won_cards=[hand_to_mask(p.collected_cards) for p in self.players],
+            unbroken_suit=None if self.hearts_broken else HEARTS_INDEX)
+
+    def ai_search_card(self, player: Player) -> Card:
+        """
+        AI سخت: determinization دست حریفان و playoutهای سریع تا پایان دور؛
+        حرکتی با کمترین میانگین امتیاز منفی انتخاب می‌شود. در پایان دور (ai_endgame_cards) هر
+        determinization دقیق حل می‌شود، با این فرض بدبینانه که سه بازیکن دیگر امتیاز منفی را به
+        این بازیکن می‌دهند.
+        """
+        valid_moves = self._get_valid_moves(player)
+        if len(valid_moves) == 1:
+            return valid_moves[0]
+
+        if len(player.hand) <= self.ai_endgame_cards:
+            seat = self.players.index(player)
+            if self.endgame_table is None:
+                self.endgame_table = TranspositionTable()
+            # بیشینه‌کننده خود بازیکن است و امتیاز، امتیاز منفی‌ای است که به بقیه می‌رسد
+            solver = DoubleDummySolver(None, tuple(0 if i == seat else 1 for i in range(4)), 0, LANE_BITS,
+                                       scorer=CardPoints(1, PENALTY_POINTS), table=self.endgame_table,
+                                       perspective=seat)
+            self.last_search_stats = endgame_search(self._search_root(player), [c.id for c in valid_moves], solver,
+                                                    self.rng, self.ai_time_budget, self.ai_iterations)
+            return Card.from_id(self.last_search_stats.best_move())
+
+        goal = PenaltyCardsGoal(self.players.index(player), PENALTY_POINTS)
+        self.last_search_stats = run_search(self._search_root(player), [c.id for c in valid_moves], goal, self.rng,
+                                            self.ai_time_budget, self.ai_iterations, workers=self.ai_workers)
+        return Card.from_id(self.last_search_stats.best_move())
 
     def ai_choose_card(self, player: Player) -> Card:
         """مغز AI برای انتخاب کارت در حین بازی."""
-        valid_moves = [c for c in player.hand if self._is_move_valid(c, player)]
+        valid_moves = self._get_valid_moves(player)
         
         if not valid_moves: return None
 
         # Easy: random valid card
         if self.difficulty == 'easy':
-            return random.choice(valid_moves)
+            return self.rng.choice(valid_moves)
+
+        if self.difficulty == 'hard':
+            return self.ai_search_card(player)
         
-        # Medium/Hard: more strategic
+        # Medium: more strategic
         # Try to discard high cards (Q♠️, A♠️, K♠️) if not following suit
         lead_suit = self.trick_cards[0][1].suit if self.trick_cards else None
-        if lead_suit and not any(c.suit == lead_suit for c in player.hand):
-            queen_spades = Card('♠️', 'Q')
-            if queen_spades in valid_moves: return queen_spades
+        if lead_suit and not has_suit(player.hand_mask, SUIT_INDEX[lead_suit]):
+            if QUEEN_OF_SPADES in valid_moves: return QUEEN_OF_SPADES
             high_spades = sorted([c for c in valid_moves if c.suit == '♠️'], key=lambda c: RANK_VALUES[c.rank], reverse=True)
             if high_spades: return high_spades[0]
             high_hearts = sorted([c for c in valid_moves if c.suit == '♥️'], key=lambda c: RANK_VALUES[c.rank], reverse=True)
@@ -1,19 +1,25 @@
 import sys, random
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QGridLayout
-from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QSize
 from bidel_game import BidelGame, Card, RANK_VALUES
 from audio_manager import AudioManager
+from pixmap_cache import PixmapCache
+from hand_view import HandView
+from event_presenter import EventPresenter
+
+class BidelGameWidget(EventPresenter, QWidget):
+    EVENT_HOLD_TIMES = {'trick_won': 2500, 'cards_passed': 1000}  # مدت نمایش رویداد پیش از رویداد بعدی
 
-class BidelGameWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
+        self.audio_manager = AudioManager.instance()
+        self.pixmaps = PixmapCache.instance()
         self.game_phase = None
         self.selected_cards_for_pass = []
-        self.hand_card_widgets = {}
         self.trick_card_widgets = {}
+        self.shown_scores = {}  # امتیاز منفی هر بازیکن تا آخرین رویداد نمایش داده شده
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -40,25 +46,88 @@ class BidelGameWidget(QWidget):
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
         
         self.pass_button = QPushButton("پاس بده")
+        self.pass_button.clicked.connect(self.finalize_passing)
         self.pass_button.hide()
         self.main_layout.addWidget(self.pass_button, 0, Qt.AlignCenter)
 
     def start_new_game(self):
-        self.game = BidelGame()
+        self.clear_trick_widgets()
+        if self.game is None or self.game.is_game_over:
+            self.attach_game(BidelGame())
+            self.shown_scores = {p.name: 0 for p in self.game.players}
+        else:
+            self.reset_presenter()
         self.start_button.hide()
         self.audio_manager.play("shuffle")
-        self.game.start_new_round()
-        self.game_phase = 'passing'
-        self.setup_passing_ui()
+        self.game.apply_move({'action': 'new_round'})
+        self.advance_engine()
+
+    # --- اجرای موتور و نمایش رویدادها ---
+
+    def human_to_move(self) -> bool:
+        """آیا موتور منتظر تصمیم بازیکن انسانی (یا شروع دور جدید) است؟"""
+        game = self.game
+        if game.is_round_over:
+            return True
+        if not game.cards_passed:
+            # در دور بدون پاس، حرکت پاس (خالی) را خود موتور انجام می‌دهد
+            return game.passing_offset != 0
+        return game.current_player_index == 0
+
+    def show_round_started(self, event):
+        self.game_phase = 'passing' if event['passing_offset'] else 'playing'
+        self.selected_cards_for_pass = []
+        self.update_player_hand_display()
+        self.update_scores_display()
+
+    def show_cards_passed(self, event):
+        self.game_phase = 'playing'
+        self.status_label.setText("کارت‌ها پاس داده شدند.")
+        self.update_player_hand_display()
+
+    def show_card_played(self, event):
+        self.audio_manager.play("play")
+        self.update_trick_display([(event['player'], event['card'])])
+        if event['player'] == self.game.players[0]:
+            self.update_player_hand_display()
+        next_index = (self.game.players.index(event['player']) + 1) % len(self.game.players)
+        self.status_label.setText(f"نوبت: {self.game.players[next_index].name}")
+
+    def show_trick_won(self, event):
+        self.shown_scores[event['winner'].name] += event['points']
+        self.update_scores_display()
+        self.status_label.setText(f"دست را {event['winner'].name} با {event['points']} امتیاز منفی گرفت.")
+        self.audio_manager.play("win")
+        self.trick_done = True
+
+    def show_round_over(self, event):
+        self.status_label.setText("دور تمام شد!")
+
+    def show_game_over(self, event):
+        self.status_label.setText(f"بازی تمام شد! برنده: {event['winner']}")
+
+    def await_human(self):
+        game = self.game
+        if game.is_round_over:
+            self.start_button.setText("شروع بازی جدید بیدل" if game.is_game_over else "دور بعد")
+            self.start_button.show()
+        elif not game.cards_passed:
+            self.setup_passing_ui()
+        else:
+            self.status_label.setText(f"نوبت: {game.players[0].name}")
+            self.set_hand_buttons_enabled(True)
+
+    # --- پاس دادن ---
 
     def setup_passing_ui(self):
         self.status_label.setText("۳ کارت برای پاس دادن انتخاب کنید.")
         self.update_player_hand_display()
         self.pass_button.show()
         self.pass_button.setEnabled(False)
-        self.pass_button.clicked.connect(self.finalize_passing)
 
     def on_card_toggled_for_pass(self, card: Card, is_checked: bool):
         if is_checked:
@@ -68,104 +137,55 @@ class BidelGameWidget(QWidget):
         self.pass_button.setEnabled(len(self.selected_cards_for_pass) == 3)
 
     def finalize_passing(self):
-        pass_data = {}
-        pass_data[self.game.players[0].name] = self.selected_cards_for_pass
-        for i in range(1, 4):
-            player = self.game.players[i]
-            pass_data[player.name] = self.game.ai_choose_cards_to_pass(player)
-            
-        self.game.pass_cards(pass_data)
-        
+        if self.presenting or len(self.selected_cards_for_pass) != 3:
+            return
+        human = self.game.players[0]
+        pass_data = {p.name: self.game.ai_choose_cards_to_pass(p) for p in self.game.players if p != human}
+        pass_data[human.name] = list(self.selected_cards_for_pass)
+
         self.pass_button.hide()
         self.selected_cards_for_pass = []
-        self.game_phase = 'playing'
-        self.game.current_player_index = self.game._find_starter()
-        self.process_trick_turn()
+        self.game.apply_move({'action': 'pass', 'cards': pass_data})
+        self.advance_engine()
 
-    def process_trick_turn(self):
-        trick_count = len(self.game.players[0].collected_cards) + len(self.game.players[1].collected_cards) + len(self.game.players[2].collected_cards) + len(self.game.players[3].collected_cards)
-        if trick_count == 52: # 13 tricks * 4 cards
-            self.status_label.setText("دور تمام شد!")
-            self.start_button.show()
+    # --- بازی دست‌ها ---
+
+    def on_card_clicked(self, card):
+        if self.presenting or not self.human_to_move() or self.game_phase != 'playing':
             return
-            
-        if not self.game.trick_cards:
-            self.clear_trick_widgets()
+        self.set_hand_buttons_enabled(False)
+        self.game.apply_move({'action': 'play', 'card': card})
+        self.advance_engine()
 
-        self.update_displays()
+    def update_player_hand_display(self):
+        player = self.game.players[0]
+        # در مرحله پاس دادن دکمه‌ها قابل انتخاب هستند، پس با عوض شدن مرحله دوباره ساخته می‌شوند
+        self.hand_view.set_cards(sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])),
+                                 mode=self.game_phase)
+        self.hand_view.set_checked(self.selected_cards_for_pass)
+
+    def make_hand_card_widget(self, card):
+        btn = QPushButton("")
+        btn.setIcon(self.pixmaps.card_icon(card))
+        btn.setIconSize(QSize(80, 110))
+        btn.setFixedSize(QSize(85, 115))
+        btn.setStyleSheet("QPushButton { border: none; background-color: transparent; } QPushButton:checked { border: 2px solid #007bff; border-radius: 5px; }")
         
-        current_player = self.game.players[self.game.current_player_index]
-        if current_player == self.game.players[0]:
-            self.set_hand_buttons_enabled(True)
+        if self.game_phase == 'passing':
+            btn.setCheckable(True)
+            btn.toggled.connect(lambda checked, c=card: self.on_card_toggled_for_pass(c, checked))
         else:
-            self.set_hand_buttons_enabled(False)
-            QTimer.singleShot(1000, self.play_ai_turn)
-
-    def play_ai_turn(self):
-        player = self.game.players[self.game.current_player_index]
-        card_to_play = self.game.ai_choose_card(player)
-        self.on_card_clicked(card_to_play, is_human=False)
+            btn.setCheckable(False)
+            btn.clicked.connect(lambda _, c=card: self.on_card_clicked(c))
+        return btn
 
-    def on_card_clicked(self, card, is_human=True):
-        player = self.game.players[self.game.current_player_index]
-        if is_human and player != self.game.players[0]: return
-
-        self.audio_manager.play("play")
-        self.game.trick_cards.append((player, card))
-        player.hand.remove(card)
-        if card.suit == '♥️': self.game.hearts_broken = True
-
-        if len(self.game.trick_cards) == 4:
-            self.update_displays()
-            # Determine winner and points
-            lead_suit = self.game.trick_cards[0][1].suit
-            lead_suit_cards = [(p,c) for p,c in self.game.trick_cards if c.suit == lead_suit]
-            winner, _ = max(lead_suit_cards, key=lambda item: RANK_VALUES[item[1].rank])
-            
-            points = self.game._calculate_trick_points(self.game.trick_cards)
-            winner.score += points # Using generic score attribute
-            winner.collected_cards.extend([c for _,c in self.game.trick_cards])
-            
-            self.status_label.setText(f"دست را {winner.name} با {points} امتیاز منفی گرفت.")
-            self.game.current_player_index = self.players.index(winner)
-            self.game.trick_cards = []
-            self.audio_manager.play("win")
-            QTimer.singleShot(2500, self.process_trick_turn)
-        else:
-            self.game.current_player_index = (self.game.current_player_index + 1) % 4
-            self.process_trick_turn()
-            
-    def update_displays(self):
-        self.status_label.setText(f"نوبت: {self.game.players[self.game.current_player_index].name}")
-        self.update_player_hand_display()
-        self.update_trick_display()
-        self.update_scores_display()
-
-    def update_player_hand_display(self):
-        self.clear_layout(self.player_hand_layout)
-        player = self.game.players[0]
-        for card in sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])):
-            btn = QPushButton("")
-            btn.setIcon(QIcon(f"resources/images/themes/default/cards/{card.image_filename}"))
-            btn.setIconSize(QSize(80, 110))
-            btn.setFixedSize(QSize(85, 115))
-            btn.setStyleSheet("QPushButton { border: none; background-color: transparent; } QPushButton:checked { border: 2px solid #007bff; border-radius: 5px; }")
-            
-            if self.game_phase == 'passing':
-                btn.setCheckable(True)
-                btn.toggled.connect(lambda checked, c=card: self.on_card_toggled_for_pass(c, checked))
-            else:
-                btn.setCheckable(False)
-                btn.clicked.connect(lambda _, c=card: self.on_card_clicked(c))
-            self.player_hand_layout.addWidget(btn)
-
-    def update_trick_display(self):
+    def update_trick_display(self, trick_cards):
         positions = {0: (2, 1), 1: (1, 2), 2: (0, 1), 3: (1, 0)}
-        for player, card in self.game.trick_cards:
+        for player, card in trick_cards:
             if card not in self.trick_card_widgets:
-                player_idx = self.players.index(player)
+                player_idx = self.game.players.index(player)
                 lbl = QLabel()
-                pixmap = QIcon(f"resources/images/themes/default/cards/{card.image_filename}").pixmap(QSize(80, 110))
+                pixmap = self.pixmaps.card_pixmap(card, (80, 110))
                 lbl.setPixmap(pixmap)
                 row, col = positions[player_idx]
                 self.game_board_layout.addWidget(lbl, row, col, Qt.AlignCenter)
@@ -173,16 +193,12 @@ class BidelGameWidget(QWidget):
                 
     def update_scores_display(self):
         self.clear_layout(self.scores_layout)
-        scores_text = "امتیازات منفی: " + " | ".join([f"{p.name}: {p.score}" for p in self.game.players])
+        scores_text = "امتیازات منفی: " + " | ".join(f"{name}: {score}" for name, score in self.shown_scores.items())
         self.scores_layout.addWidget(QLabel(scores_text))
 
     def set_hand_buttons_enabled(self, enabled):
-        player = self.game.players[0]
-        for i in range(self.player_hand_layout.count()):
-            widget = self.player_hand_layout.itemAt(i).widget()
-            # A bit tricky to get the card from the widget; this is a simplification
-            # A better way is to store a map of widget to card
-            widget.setEnabled(enabled)
+        valid_moves = self.game._get_valid_moves(self.game.players[0])
+        self.hand_view.set_enabled(lambda card: enabled and card in valid_moves)
 
     def clear_layout(self, layout):
         if layout is None: return
@@ -0,0 +1,205 @@
+"""
+مدل باور یک بازیکن در بلوف (چاخان) برای AI سخت.
+
+از دید صندلی me، برای هر رتبه نگه داشته می‌شود: تعداد آن رتبه در دست خودم، تعداد کارت‌های آن رتبه
+که جایشان معلوم است (در دست هر حریف یا در وسط)، و برای هر حریف و وسط تعداد کارت‌های ناشناخته.
+فقط اطلاعاتی که me دیده استفاده می‌شود: کارت‌های خودش، کارت‌هایی که با چالش رو می‌شوند و این که
+کل وسط به دست بازنده چالش می‌رود. هر رویداد با چند عمل روی شمارنده‌ها به‌روز می‌شود (مستقل از
+اندازه وسط یا طول بازی).
+
+ادعاهای به چالش کشیده نشده هم شمرده می‌شوند: اگر باورپذیر باشند کارت‌هایشان از همان رتبه فرض
+می‌شود (و اگر بعداً با کارت‌های دیده شده نخواند، اصلاح می‌شود).
+
+احتمال صادق بودن last_play: بازیکن (مثل AI متوسط) وقتی کارت رتبه اعلام شده را دارد همه را
+صادقانه بازی می‌کند، پس ادعای k کارت یعنی دست‌کم k کارت از آن رتبه داشته است. کارت‌های ناشناخته
+دست او نمونه‌ای تصادفی از همه کارت‌های ناشناخته فرض می‌شوند و احتمال با دم توزیع فوق‌هندسی
+(حداکثر ۴ جمله) حساب می‌شود.
+"""
+from math import comb
+
+from game_basics import RANKS
+from game_state import register_state_type
+
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+COPIES = 4  # تعداد کارت‌های هر رتبه در دسته
+PLAUSIBLE = 0.5  # ادعای بدون چالش با این احتمال صادق بودن (یا بیشتر) راست فرض می‌شود
+
+
+class BluffBelief:
+    """باور صندلی me؛ hand_sizes اندازه دست همه صندلی‌ها پس از پخش است."""
+    __slots__ = ("me", "mine", "known", "known_total", "unknown", "pile_known", "pile_unknown",
+                 "last_claim", "last_known_taken", "last_unknown")
+
+    def __init__(self, me: int, my_hand, hand_sizes: list):
+        self.me = me
+        self.mine = [0] * len(RANKS)
+        for card in my_hand:
+            self.mine[RANK_INDEX[card.rank]] += 1
+        self.known = [[0] * len(RANKS) for _ in hand_sizes]  # known[seat][rank] برای حریفان
+        self.known_total = [0] * len(RANKS)
+        self.unknown = [0 if seat == me else size for seat, size in enumerate(hand_sizes)]
+        self.pile_known = [0] * len(RANKS)
+        self.pile_unknown = 0
+        self.last_claim = None  # (صندلی، تعداد، شماره رتبه)
+        self.last_known_taken = 0
+        self.last_unknown = 0
+
+    def __repr__(self) -> str:
+        return f"BluffBelief(صندلی {self.me}، {self.pool()} کارت ناشناخته، وسط {self.pile_size()})"
+
+    def unseen(self, rank_index: int) -> int:
+        """کارت‌های این رتبه که جایشان برای me معلوم نیست."""
+        return COPIES - self.mine[rank_index] - self.known_total[rank_index] - self.pile_known[rank_index]
+
+    def pool(self) -> int:
+        """تعداد همه کارت‌های ناشناخته (دست حریفان و وسط)."""
+        return sum(self.unknown) + self.pile_unknown
+
+    def pile_size(self) -> int:
+        return sum(self.pile_known) + self.pile_unknown
+
+    # --- رویدادها ---
+
+    def on_play(self, seat: int, cards, declared_rank: str):
+        """cards فقط وقتی seat خود me است خوانده می‌شود (بقیه فقط تعداد را می‌بینند)."""
+        self._settle_claim()
+        rank_index = RANK_INDEX[declared_rank]
+        count = len(cards)
+        if seat == self.me:
+            for card in cards:
+                played = RANK_INDEX[card.rank]
+                self.mine[played] -= 1
+                self.pile_known[played] += 1
+            self.last_claim = (seat, count, rank_index)
+            self.last_known_taken = self.last_unknown = 0
+            return
+
+        # کارت‌های معلوم رتبه اعلام شده اول بازی می‌شوند، بقیه از کارت‌های ناشناخته
+        known = self.known[seat]
+        taken = min(count, known[rank_index])
+        known[rank_index] -= taken
+        self.known_total[rank_index] -= taken
+        self.pile_known[rank_index] += taken
+        from_unknown = count - taken
+        if from_unknown > self.unknown[seat]:
+            # کارت‌های معلوم رتبه‌های دیگر برای بلوف بازی شده‌اند؛ دیگر جایشان معلوم نیست
+            extra = from_unknown - self.unknown[seat]
+            for other in range(len(RANKS)):
+                moved = min(extra, known[other])
+                known[other] -= moved
+                self.known_total[other] -= moved
+                self.unknown[seat] += moved
+                extra -= moved
+                if not extra:
+                    break
+        self.unknown[seat] -= from_unknown
+        self.pile_unknown += from_unknown
+        self.last_claim = (seat, count, rank_index)
+        self.last_known_taken, self.last_unknown = taken, from_unknown
+
+    def _settle_claim(self):
+        """
+        ادعای قبلی که به چالش کشیده نشد، اگر از دید me باورپذیر باشد، کارت‌های معلوم وسط حساب می‌شود
+        تا وقتی وسط به کسی رسید بدانیم این کارت‌ها در دست اوست.
+        """
+        if self.last_claim is None or not self.last_unknown:
+            return
+        rank_index = self.last_claim[2]
+        if self.honest_probability() >= PLAUSIBLE:
+            settled = min(self.last_unknown, max(0, self.unseen(rank_index)))
+            self.pile_known[rank_index] += settled
+            self.pile_unknown -= settled
+
+    def on_call(self, revealed, loser: int, pile=None):
+        """
+        revealed کارت‌های رو شده آخرین حرکت است و کل وسط به loser می‌رسد؛ pile (کارت‌های وسط)
+        فقط وقتی loser خود me است خوانده می‌شود.
+        """
+        if self.last_claim is not None and self.last_claim[0] != self.me:
+            # برداشت فرضی on_play برای آخرین حرکت با کارت‌های واقعی جایگزین می‌شود
+            self.pile_known[self.last_claim[2]] -= self.last_known_taken
+            self.pile_unknown -= self.last_unknown
+            for card in revealed:
+                self.pile_known[RANK_INDEX[card.rank]] += 1
+            self._fix_overcount()
+
+        if loser == self.me:
+            for card in pile:
+                self.mine[RANK_INDEX[card.rank]] += 1
+            # کارت‌هایی که در دست حریفان معلوم فرض شده بودند ممکن است حالا در دست خودم باشند
+            self._fix_overcount()
+        else:
+            known = self.known[loser]
+            for rank_index, count in enumerate(self.pile_known):
+                if count:
+                    known[rank_index] += count
+                    self.known_total[rank_index] += count
+            self.unknown[loser] += self.pile_unknown
+        self.pile_known = [0] * len(RANKS)
+        self.pile_unknown = 0
+        self.last_claim = None
+        self.last_known_taken = self.last_unknown = 0
+
+    def _fix_overcount(self):
+        """اگر فرض‌های on_play با کارت‌های دیده شده نخواند، کارت‌های معلوم حریفان ناشناخته می‌شوند."""
+        for rank_index in range(len(RANKS)):
+            excess = -self.unseen(rank_index)
+            for seat, known in enumerate(self.known):
+                if excess <= 0:
+                    break
+                moved = min(excess, known[rank_index])
+                known[rank_index] -= moved
+                self.known_total[rank_index] -= moved
+                self.unknown[seat] += moved
+                excess -= moved
+            if excess > 0:
+                # باقی‌مانده از فرض‌های قبلی درباره کارت‌های وسط است
+                self.pile_known[rank_index] -= excess
+                self.pile_unknown += excess
+
+    # --- پرس‌وجو ---
+
+    def honest_probability(self) -> float:
+        """احتمال این که آخرین ادعای حریف (last_claim) راست باشد."""
+        if self.last_claim is None:
+            return 1.0
+        seat, count, rank_index = self.last_claim
+        if seat == self.me:
+            return 1.0
+        need = count - self.last_known_taken
+        if need <= 0:
+            return 1.0
+        # دست او پیش از بازی: last_unknown + unknown[seat] کارت ناشناخته از pool
+        drawn = self.unknown[seat] + self.last_unknown
+        pool = self.pool()
+        successes = max(0, self.unseen(rank_index))
+        if drawn > pool or pool <= 0:
+            return 0.0
+        total = comb(pool, drawn)
+        tail = sum(comb(successes, j) * comb(pool - successes, drawn - j)
+                   for j in range(need, min(successes, drawn) + 1))
+        return tail / total
+
+
+class FrozenBelief(tuple):
+    """BluffBelief در GameState: شمارنده‌ها به صورت تاپل به ترتیب __slots__."""
+    __slots__ = ()
+
+
+def _freeze_belief(belief: BluffBelief) -> FrozenBelief:
+    return FrozenBelief((belief.me, tuple(belief.mine), tuple(map(tuple, belief.known)), tuple(belief.known_total),
+                         tuple(belief.unknown), tuple(belief.pile_known), belief.pile_unknown, belief.last_claim,
+                         belief.last_known_taken, belief.last_unknown))
+
+
+def _thaw_belief(frozen: FrozenBelief) -> BluffBelief:
+    belief = BluffBelief.__new__(BluffBelief)
+    (belief.me, mine, known, known_total, unknown, pile_known, belief.pile_unknown, belief.last_claim,
+     belief.last_known_taken, belief.last_unknown) = frozen
+    belief.mine, belief.known_total, belief.unknown, belief.pile_known = (
+        list(mine), list(known_total), list(unknown), list(pile_known))
+    belief.known = [list(row) for row in known]
+    return belief
+
+
+register_state_type(BluffBelief, FrozenBelief, _freeze_belief, _thaw_belief)
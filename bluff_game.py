@@ -1,19 +1,30 @@
 import random
 from game_basics import Card, Player, Deck, RANKS
+from bluff_belief import BluffBelief, RANK_INDEX
+from game_events import EventSource
+from game_state import Snapshottable
 
-class BluffGame:
+class BluffGame(EventSource, Snapshottable):
     """
     موتور و منطق اصلی بازی بلوف (چاخان).
     """
-    def __init__(self, num_players=3, difficulty='medium'):
+    MOVE_HANDLERS = {'play': '_move_play', 'call_bluff': '_move_call_bluff'}
+    HARD_CALL_THRESHOLD = 0.5  # AI سخت زیر این احتمال صادق بودن چالش می‌کند
+    HARD_LET_PASS_PILE = 3  # بلوف روی وسط کوچک وقتی می‌توانم راست دنبال کنم چالش نمی‌شود
+    HARD_OPEN_RANK_SHARE = 0.5  # سهم شروع‌هایی که رتبه قابل دنبال کردن برای حریفان را ترجیح می‌دهند
+    STATE_FIELDS = ('center_pile', 'current_declared_rank', 'last_play', 'current_player_index', 'is_game_over',
+                    'winner', 'beliefs')
+
+    def __init__(self, num_players=3, difficulty='medium', rng=None):
         if num_players < 2:
             raise ValueError("تعداد بازیکنان باید حداقل ۲ نفر باشد.")
 
         self.difficulty = difficulty
+        self.rng = rng or random
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players)]
         
         deck = Deck()
-        deck.shuffle()
+        deck.shuffle(self.rng)
         self._deal_all_cards(deck)
 
         self.center_pile = [] # کارت‌های بازی شده در وسط (به پشت)
@@ -22,6 +33,10 @@ class BluffGame:
         self.current_player_index = 0
         self.is_game_over = False
         self.winner = None
+        self.beliefs = None  # باور هر صندلی برای AI سخت (با snapshot ذخیره و بازگردانده می‌شود)
+        if difficulty == 'hard':
+            sizes = [len(player.hand) for player in self.players]
+            self.beliefs = [BluffBelief(seat, player.hand, sizes) for seat, player in enumerate(self.players)]
 
     def _deal_all_cards(self, deck: Deck):
         """تمام کارت‌های دسته را بین بازیکنان پخش می‌کند."""
@@ -49,10 +64,17 @@ class BluffGame:
         
         self.center_pile.extend(cards_to_play)
         self.last_play = {'player': player, 'cards': cards_to_play}
+        if self.beliefs:
+            seat = self.players.index(player)
+            for belief in self.beliefs:
+                belief.on_play(seat, cards_to_play, self.current_declared_rank)
+        self._emit('cards_played', player=player, count=len(cards_to_play),
+                   declared_rank=self.current_declared_rank, pile_size=len(self.center_pile))
         
         if not player.hand:
             self.is_game_over = True
             self.winner = player
+            self._emit('game_over', winner=player)
         else:
             self.current_player_index = (self.current_player_index + 1) % len(self.players)
 
@@ -75,6 +97,12 @@ class BluffGame:
             loser = challenger
 
         loser.hand.extend(self.center_pile)
+        if self.beliefs:
+            loser_seat = self.players.index(loser)
+            for belief in self.beliefs:
+                belief.on_call(played_cards, loser_seat, self.center_pile)
+        self._emit('bluff_called', challenger=challenger, accused=last_player, loser=loser,
+                   was_bluffing=was_bluffing, revealed=list(played_cards), pile=list(self.center_pile))
         
         self.center_pile = []
         self.current_declared_rank = None
@@ -82,20 +110,41 @@ class BluffGame:
         self.current_player_index = self.players.index(loser)
         
         return loser
+
+    # --- API حرکت (apply_move) ---
+
+    def _move_play(self, move: dict):
+        player = self.players[self.current_player_index]
+        cards = move['cards']
+        if self.is_game_over or not cards or not all(card in player.hand for card in cards):
+            raise ValueError(f"حرکت غیرمجاز برای {player.name}: {cards}")
+        self.play_cards(player, cards, move.get('declared_rank'))
+
+    def _move_call_bluff(self, move: dict):
+        if self.is_game_over or not self.last_play:
+            raise ValueError("حرکتی برای به چالش کشیدن وجود ندارد.")
+        self.call_bluff(move.get('player') or self.players[self.current_player_index])
+
+    def ai_move(self) -> dict | None:
+        if self.is_game_over:
+            return None
+        return self.ai_choose_move(self.players[self.current_player_index])
         
     def ai_choose_move(self, player: Player) -> dict:
         """مغز AI برای انتخاب حرکت در بازی بلوف."""
+        if self.beliefs:
+            return self._hard_move(player)
         # Call Bluff Logic
         if self.last_play:
-            # Hard AI would track cards. Medium AI checks own hand.
+            # Medium AI checks own hand.
             known_cards_of_rank = [c for c in player.hand if c.rank == self.current_declared_rank]
             # A simple probability check
             if len(known_cards_of_rank) >= 2 and self.difficulty != 'easy':
                  # If I have 2 or more of the declared rank, the chance of the opponent
                  # also having 2 or more is lower, so I'm more likely to call a bluff.
-                 if random.random() < 0.6: # 60% chance to call bluff
+                 if self.rng.random() < 0.6: # 60% chance to call bluff
                     return {'action': 'call_bluff'}
-            elif random.random() < 0.2: # Low base chance to call bluff
+            elif self.rng.random() < 0.2: # Low base chance to call bluff
                 return {'action': 'call_bluff'}
 
         # Play Cards Logic
@@ -107,7 +156,7 @@ class BluffGame:
 
         if self.difficulty == 'easy':
             # Plays 1 random card and declares its rank if starting, or bluffs.
-            card_to_play = random.choice(player.hand)
+            card_to_play = self.rng.choice(player.hand)
             return {
                 'action': 'play',
                 'cards': [card_to_play],
@@ -123,9 +172,55 @@ class BluffGame:
                 }
             else:
                 # Bluff: play 1 or 2 random cards
-                card_to_play = random.choice(player.hand)
+                card_to_play = self.rng.choice(player.hand)
                 return {
                     'action': 'play',
                     'cards': [card_to_play],
                     'declared_rank': declared_rank or card_to_play.rank # Must declare if starting
                 }
+
+    def _hard_move(self, player: Player) -> dict:
+        """
+        AI سخت: وقتی احتمال صادق بودن آخرین ادعا (از مدل باور) کمتر از نصف است چالش می‌کند و
+        هر وقت کارت رتبه اعلام شده را دارد راست بازی می‌کند.
+
+        اگر بلوف همیشه گرفته شود، کارت فقط با بازی راست از دست‌ها بیرون می‌رود و بازی بین چند AI سخت
+        در یک چرخه ثابت گیر می‌کند (هر کس وسط را برمی‌دارد، دور بعد را با همان رتبه کامل شروع می‌کند
+        و نفر بعد مجبور به بلوف است). برای همین: شروع با رتبه‌ای که فقط در دست خودم است با یک کارت
+        انجام می‌شود، شروع‌ها گاهی رتبه قابل دنبال کردن را ترجیح می‌دهند و بلوف روی وسط کوچک وقتی
+        خودم کارت آن رتبه را دارم (و می‌توانم راست دنبال کنم) چالش نمی‌شود.
+        """
+        belief = self.beliefs[self.players.index(player)]
+        if self.last_play and belief.honest_probability() < self.HARD_CALL_THRESHOLD:
+            holding = belief.mine[RANK_INDEX[self.current_declared_rank]]
+            if not (holding and len(self.center_pile) <= self.HARD_LET_PASS_PILE):
+                return {'action': 'call_bluff'}
+
+        declared_rank = self.current_declared_rank
+        opening = declared_rank is None
+        if opening:
+            declared_rank = self._hard_opening_rank(player, belief)
+        truthful = [card for card in player.hand if card.rank == declared_rank]
+        if truthful:
+            rank_index = RANK_INDEX[declared_rank]
+            if (opening and 1 < len(truthful) < len(player.hand)
+                    and belief.unseen(rank_index) + belief.known_total[rank_index] == 0):
+                # حریفان کارتی از این رتبه ندارند؛ یکی نگه داشته می‌شود تا وقتی وسط به نفر بعد رسید
+                # کارت‌های این رتبه بین دو دست پخش باشد و دور بعد بتوان آن را راست دنبال کرد
+                truthful = truthful[:1]
+            return {'action': 'play', 'cards': truthful, 'declared_rank': declared_rank}
+        # بلوف با کارتی از رتبه‌ای که کمترین تعداد را از آن داریم (کم‌ارزش‌ترین برای ادعاهای بعدی)
+        card_to_play = min(player.hand, key=lambda card: belief.mine[RANK_INDEX[card.rank]])
+        return {'action': 'play', 'cards': [card_to_play], 'declared_rank': declared_rank}
+
+    def _hard_opening_rank(self, player: Player, belief: BluffBelief) -> str:
+        """
+        رتبه شروع دور (وزن‌دار با تعداد در دست). در سهم HARD_OPEN_RANK_SHARE از شروع‌ها فقط رتبه‌هایی
+        که حریفان هم ممکن است داشته باشند (یا کل دست اگر یک رتبه باشد) انتخاب می‌شوند.
+        """
+        open_cards = [card for card in player.hand
+                      if belief.mine[RANK_INDEX[card.rank]] == len(player.hand)
+                      or belief.unseen(RANK_INDEX[card.rank]) + belief.known_total[RANK_INDEX[card.rank]] > 0]
+        if open_cards and self.rng.random() < self.HARD_OPEN_RANK_SHARE:
+            return self.rng.choice(open_cards).rank
+        return self.rng.choice(player.hand).rank
@@ -1,16 +1,24 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QComboBox
-from PyQt5.QtCore import Qt, QTimer, QSize
+from PyQt5.QtCore import Qt, QSize
 from PyQt5.QtGui import QIcon
 from bluff_game import BluffGame, Card, RANKS
 from audio_manager import AudioManager
+from hand_view import HandView
+from event_presenter import EventPresenter
 import random
 
-class BluffGameWidget(QWidget):
+class BluffGameWidget(EventPresenter, QWidget):
+    AI_MOVE_DELAY = 2000  # مکث پیش از نمایش حرکت AI
+    EVENT_HOLD_TIMES = {'bluff_called': 2000}  # مدت نمایش رویداد پیش از رویداد بعدی
+
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
+        self.audio_manager = AudioManager.instance()
         self.selected_cards = []
+        self.shown_declared_rank = None  # رتبه اعلام شده و اندازه وسط تا آخرین رویداد نمایش داده شده
+        self.shown_pile_size = 0
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -39,13 +47,19 @@ class BluffGameWidget(QWidget):
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
 
     def start_new_game(self):
-        self.game = BluffGame(num_players=3)
+        self.attach_game(BluffGame(num_players=3))
+        self.selected_cards = []
+        self.shown_declared_rank = None
+        self.shown_pile_size = 0
         self.start_button.hide()
         self.audio_manager.play("shuffle")
         self.setup_controls()
-        self.process_turn()
+        self.update_displays()
+        self.advance_engine()
 
     def setup_controls(self):
         self.clear_layout(self.controls_layout)
@@ -60,23 +74,52 @@ class BluffGameWidget(QWidget):
         self.controls_layout.addWidget(self.play_button)
         self.controls_layout.addWidget(self.call_bluff_button)
 
-    def process_turn(self):
+    # --- اجرای موتور و نمایش رویدادها ---
+
+    def human_to_move(self) -> bool:
+        """آیا موتور منتظر تصمیم بازیکن انسانی (یا شروع بازی جدید) است؟"""
+        return self.game.is_game_over or self.game.current_player_index == 0
+
+    def event_lead_time(self, event) -> int:
+        if event.kind == 'bluff_called' and event['challenger'] != self.game.players[0]:
+            return self.AI_MOVE_DELAY
+        return super().event_lead_time(event)
+
+    def show_cards_played(self, event):
+        self.audio_manager.play("play")
+        self.shown_declared_rank = event['declared_rank']
+        self.shown_pile_size = event['pile_size']
+        self.update_pile_display()
+        self.status_label.setText(f"{event['player'].name} {event['count']} کارت {event['declared_rank']} بازی کرد.")
+
+    def show_bluff_called(self, event):
+        self.audio_manager.play("win")
+        self.shown_declared_rank = None
+        self.shown_pile_size = 0
+        self.update_pile_display()
+        if event['loser'] == self.game.players[0]:
+            self.update_hand_display()
+        result = "بلوف بود" if event['was_bluffing'] else "راست می‌گفت"
+        self.status_label.setText(f"{event['challenger'].name} بلوف را صدا زد ({result})! "
+                                  f"{event['loser'].name} کارت‌ها را برداشت.")
+
+    def show_game_over(self, event):
+        self.status_label.setText(f"بازی تمام شد! برنده: {event['winner'].name}")
+        self.audio_manager.play("win")
+
+    def await_human(self):
         if self.game.is_game_over:
-            self.status_label.setText(f"بازی تمام شد! برنده: {self.game.winner.name}")
             self.start_button.show()
             self.set_player_controls_enabled(False)
-            self.audio_manager.play("win")
             return
-
         self.update_displays()
-        current_player = self.game.players[self.game.current_player_index]
-        if self.game.current_player_index == 0:
-            self.status_label.setText("نوبت شماست.")
-            self.set_player_controls_enabled(True)
+        if self.shown_declared_rank:
+            self.status_label.setText(f"نوبت شماست. رتبه اعلام شده: {self.shown_declared_rank}")
         else:
-            self.status_label.setText(f"نوبت حریف: {current_player.name}")
-            self.set_player_controls_enabled(False)
-            QTimer.singleShot(2000, self.play_ai_turn)
+            self.status_label.setText("نوبت شماست. یک رتبه اعلام کنید.")
+        self.set_player_controls_enabled(True)
+
+    # --- حرکت بازیکن ---
 
     def on_card_toggled(self, card: Card, is_checked: bool):
         if is_checked:
@@ -86,51 +129,43 @@ class BluffGameWidget(QWidget):
         self.play_button.setEnabled(len(self.selected_cards) > 0)
 
     def on_play_clicked(self):
-        declared_rank = self.rank_selector.currentText()
-        self.game.play_cards(self.game.players[0], self.selected_cards, declared_rank)
-        self.selected_cards = []
-        self.audio_manager.play("play")
-        self.process_turn()
+        if self.presenting or not self.human_to_move() or not self.selected_cards:
+            return
+        declared_rank = self.game.current_declared_rank or self.rank_selector.currentText()
+        cards, self.selected_cards = self.selected_cards, []
+        self.hand_view.set_cards([card for card, _ in self.hand_view.items() if card not in cards])
+        self.apply_human_move({'action': 'play', 'cards': cards, 'declared_rank': declared_rank})
 
     def on_bluff_called(self):
-        loser = self.game.call_bluff(self.game.players[0])
-        self.status_label.setText(f"چالش تمام شد! {loser.name} کارت‌ها را برداشت.")
-        self.audio_manager.play("win")
-        QTimer.singleShot(2000, self.process_turn)
-
-    def play_ai_turn(self):
-        player = self.game.players[self.game.current_player_index]
-        move = self.game.ai_choose_move(player)
-        
-        if move['action'] == 'call_bluff':
-            loser = self.game.call_bluff(player)
-            self.status_label.setText(f"{player.name} بلوف را صدا زد! {loser.name} کارت‌ها را برداشت.")
-            self.audio_manager.play("win")
-        elif move['action'] == 'play':
-            self.game.play_cards(player, move['cards'], move['declared_rank'])
-            self.audio_manager.play("play")
+        if self.presenting or not self.human_to_move() or self.game.last_play is None:
+            return
+        self.apply_human_move({'action': 'call_bluff', 'player': self.game.players[0]})
 
-        QTimer.singleShot(2000, self.process_turn)
+    def apply_human_move(self, move: dict):
+        self.set_player_controls_enabled(False)
+        self.game.apply_move(move)
+        self.advance_engine()
 
     def update_displays(self):
-        if self.game.current_declared_rank:
-            status_text = f"رتبه اعلام شده: {self.game.current_declared_rank}"
-        else:
-            status_text = "منتظر اعلام رتبه توسط بازیکن اول..."
-        self.status_label.setText(status_text)
-        
+        self.update_pile_display()
+        self.update_hand_display()
+
+    def update_pile_display(self):
         self.clear_layout(self.game_board_layout)
-        center_pile_lbl = QLabel(f"تعداد کارت در وسط: {len(self.game.center_pile)}")
+        center_pile_lbl = QLabel(f"تعداد کارت در وسط: {self.shown_pile_size}")
         center_pile_lbl.setStyleSheet("font-size: 18px; color: white;")
         self.game_board_layout.addWidget(center_pile_lbl)
-        
-        self.clear_layout(self.player_hand_layout)
+
+    def update_hand_display(self):
         player = self.game.players[0]
-        for card in sorted(player.hand, key=lambda c: (c.suit, c.rank)):
-            btn = QPushButton(str(card)) # Show card text for selection
-            btn.setCheckable(True)
-            btn.toggled.connect(lambda checked, c=card: self.on_card_toggled(c, checked))
-            self.player_hand_layout.addWidget(btn)
+        self.hand_view.set_cards(sorted(player.hand, key=lambda c: (c.suit, c.rank)))
+        self.hand_view.set_checked(self.selected_cards)
+
+    def make_hand_card_widget(self, card):
+        btn = QPushButton(str(card)) # Show card text for selection
+        btn.setCheckable(True)
+        btn.toggled.connect(lambda checked, c=card: self.on_card_toggled(c, checked))
+        return btn
 
     def set_player_controls_enabled(self, enabled: bool):
         self.play_button.setEnabled(enabled and len(self.selected_cards) > 0)
@@ -139,9 +174,7 @@ class BluffGameWidget(QWidget):
         is_rank_declaration_turn = self.game.current_declared_rank is None
         self.rank_selector.setEnabled(enabled and is_rank_declaration_turn)
         
-        for i in range(self.player_hand_layout.count()):
-            widget = self.player_hand_layout.itemAt(i).widget()
-            if widget: widget.setEnabled(enabled)
+        self.hand_view.set_enabled(enabled)
 
     def clear_layout(self, layout):
         if layout is not None:
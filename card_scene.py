@@ -0,0 +1,231 @@
+"""
+رندر اختیاری کارت‌ها با QGraphicsScene و یک اطلس بافت (sprite atlas).
+
+همه تصاویر کارت‌های یک تم در یک QPixmap بسته‌بندی می‌شوند و هر کارت فقط یک
+drawPixmap از زیرمستطیل همان اطلس است؛ بنابراین صحنه‌های پر کارت (دست کامل بلوف،
+مجموعه‌های روی میز ریم) بدون ساختن ویجت برای هر کارت و با نقاشی دسته‌ای رسم می‌شوند.
+
+مقایسه زمان هر فریم با روش ویجتی:
+    python card_scene.py --frames 200
+در اندازه‌گیری‌ها زمان نقاشی هر فریم صحنه تقریبا برابر QLabelهاست (مزیت سرعتی ندارد)؛ فایده آن
+نساختن ویجت برای هر کارت و یکجا بودن همه کارت‌ها در یک اطلس است.
+"""
+import argparse
+import sys
+import time
+from PyQt5.QtCore import Qt, QRectF, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QPixmap
+from PyQt5.QtWidgets import QApplication, QGraphicsObject, QGraphicsScene, QGraphicsView
+from game_basics import ALL_CARDS, RANKS, SUITS
+from pixmap_cache import THEMES_DIR
+
+class CardAtlas:
+    """
+    اطلس کارت‌های یک تم در یک اندازه: سطر هر خال، ستون هر رتبه، و پشت کارت در سطر آخر.
+    اطلس‌ها بر اساس (تم، اندازه) کش می‌شوند.
+    """
+    _atlases = {}
+
+    @classmethod
+    def get(cls, theme="default", card_size=(80, 110)) -> "CardAtlas":
+        key = (theme, tuple(card_size))
+        atlas = cls._atlases.get(key)
+        if atlas is None:
+            atlas = cls._atlases[key] = cls(theme, card_size)
+        return atlas
+
+    def __init__(self, theme="default", card_size=(80, 110)):
+        self.theme = theme
+        self.width, self.height = card_size
+        start = time.perf_counter()
+        image = QImage(self.width * len(RANKS), self.height * (len(SUITS) + 1), QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        for card in ALL_CARDS:
+            self._blit(painter, f"{THEMES_DIR}/{theme}/cards/{card.image_filename}", self._cell(card.id))
+        self._blit(painter, f"{THEMES_DIR}/{theme}/back.png", self.back_rect)
+        painter.end()
+        self.pixmap = QPixmap.fromImage(image)
+        self.build_time = time.perf_counter() - start
+
+    def _cell(self, index: int) -> QRectF:
+        row, col = divmod(index, len(RANKS))
+        return QRectF(col * self.width, row * self.height, self.width, self.height)
+
+    def _blit(self, painter: QPainter, path: str, target: QRectF):
+        source = QImage(path)
+        if source.isNull():
+            return
+        source = source.scaled(self.width, self.height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        # تصویر در مرکز خانه خود قرار می‌گیرد (مثل QIcon.pixmap که نسبت ابعاد را حفظ می‌کند)
+        x = target.x() + (self.width - source.width()) / 2
+        y = target.y() + (self.height - source.height()) / 2
+        painter.drawImage(int(x), int(y), source)
+
+    @property
+    def back_rect(self) -> QRectF:
+        return self._cell(len(ALL_CARDS))
+
+    def source_rect(self, card, face_up=True) -> QRectF:
+        return self._cell(card.id) if face_up else self.back_rect
+
+
+class CardItem(QGraphicsObject):
+    """یک کارت روی صحنه؛ فقط زیرمستطیل خود از اطلس مشترک را رسم می‌کند."""
+    clicked = pyqtSignal(object)
+
+    def __init__(self, card, atlas: CardAtlas, face_up=True):
+        super().__init__()
+        self.card = card
+        self.atlas = atlas
+        self.face_up = face_up
+        self._source = atlas.source_rect(card, face_up)
+        self._bounds = QRectF(0, 0, atlas.width, atlas.height)
+
+    def set_face_up(self, face_up: bool):
+        if face_up != self.face_up:
+            self.face_up = face_up
+            self._source = self.atlas.source_rect(self.card, face_up)
+            self.update()
+
+    def boundingRect(self) -> QRectF:
+        return self._bounds
+
+    def paint(self, painter, option, widget=None):
+        painter.drawPixmap(self._bounds, self.atlas.pixmap, self._source)
+
+    def mousePressEvent(self, event):
+        if self.isEnabled():
+            self.clicked.emit(self.card)
+        event.accept()
+
+
+class CardSceneView(QGraphicsView):
+    """
+    نمای صحنه کارت‌ها با ردیف‌های نام‌دار (مثلا "hand" یا "meld_0").
+    set_row مانند HandView فقط کارت‌های تغییر کرده را اضافه/حذف و بقیه را جابجا می‌کند.
+    """
+    card_clicked = pyqtSignal(object)
+
+    def __init__(self, theme="default", card_size=(80, 110), parent=None):
+        super().__init__(parent)
+        self.atlas = CardAtlas.get(theme, card_size)
+        self.setScene(QGraphicsScene(self))
+        self.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        self.setViewportUpdateMode(QGraphicsView.MinimalViewportUpdate)
+        self.setStyleSheet("background: transparent; border: none;")
+        self._rows = {}  # نام ردیف -> {کارت: CardItem}
+
+    def set_row(self, name: str, cards, y: float, spacing: float = None, face_up=True):
+        items = self._rows.setdefault(name, {})
+        wanted = set(cards)
+        for card in [c for c in items if c not in wanted]:
+            self.scene().removeItem(items.pop(card))
+
+        step = spacing if spacing is not None else self.atlas.width + 5
+        for i, card in enumerate(cards):
+            item = items.get(card)
+            if item is None:
+                item = items[card] = CardItem(card, self.atlas, face_up)
+                item.clicked.connect(self.card_clicked)
+                self.scene().addItem(item)
+            item.set_face_up(face_up)
+            item.setPos(i * step, y)
+            item.setZValue(i)
+
+    def row_items(self, name: str) -> dict:
+        return self._rows.get(name, {})
+
+    def clear_rows(self):
+        self.scene().clear()
+        self._rows.clear()
+
+
+# --- مقایسه زمان فریم با روش ویجتی ---
+
+def _time_frames(render, frames: int) -> float:
+    """میانگین زمان هر فریم (میلی‌ثانیه)."""
+    start = time.perf_counter()
+    for frame in range(frames):
+        render(frame)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def benchmark(frames=200, theme="default", card_size=(80, 110)) -> dict:
+    """
+    یک دست کامل ۵۲ کارتی را در هر فریم کمی جابجا کرده و کل صحنه را در یک QImage رسم می‌کند؛
+    یک بار با QLabel برای هر کارت، یک بار با scene().render و یک بار از viewport نما (مثل برنامه).
+    """
+    from PyQt5.QtWidgets import QLabel, QWidget
+    from pixmap_cache import PixmapCache
+
+    width, height = card_size
+    canvas_size = (width * 14, height * 5)
+    target = QImage(*canvas_size, QImage.Format_ARGB32_Premultiplied)
+    cards = list(ALL_CARDS)
+
+    board = QWidget()
+    board.resize(*canvas_size)
+    pixmaps = PixmapCache(theme)
+    labels = []
+    for card in cards:
+        lbl = QLabel(board)
+        lbl.setPixmap(pixmaps.card_pixmap(card, card_size))
+        lbl.resize(width, height)
+        labels.append(lbl)
+
+    def render_widgets(frame):
+        for i, lbl in enumerate(labels):
+            row, col = divmod(i, len(RANKS))
+            lbl.move(col * width + frame % 10, row * height)
+        board.render(target)
+
+    view = CardSceneView(theme, card_size)
+    view.resize(*canvas_size)
+    view.setSceneRect(0, 0, *canvas_size)
+    view.scene().setSceneRect(0, 0, *canvas_size)  # وگرنه مستطیل صحنه با جابجایی کارت‌ها تغییر می‌کند و render مقیاس می‌دهد
+    for suit_index in range(len(SUITS)):
+        view.set_row(f"suit_{suit_index}", cards[suit_index * len(RANKS):(suit_index + 1) * len(RANKS)],
+                     suit_index * height, spacing=width)
+
+    def render_scene(frame):
+        for items in view._rows.values():
+            for item in items.values():
+                item.setX(item.card.id % len(RANKS) * width + frame % 10)
+        painter = QPainter(target)
+        view.scene().render(painter)
+        painter.end()
+
+    def render_view(frame):
+        for items in view._rows.values():
+            for item in items.values():
+                item.setX(item.card.id % len(RANKS) * width + frame % 10)
+        view.viewport().render(target)
+
+    return {
+        "widgets_ms": _time_frames(render_widgets, frames),
+        "scene_ms": _time_frames(render_scene, frames),
+        "view_ms": _time_frames(render_view, frames),
+        "atlas_build_ms": view.atlas.build_time * 1000,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="مقایسه زمان فریم رندر صحنه‌ای و ویجتی کارت‌ها")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--theme", default="default")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    result = benchmark(args.frames, args.theme)
+    print(f"ساخت اطلس: {result['atlas_build_ms']:.1f} ms")
+    print(f"ویجت‌ها (QLabel): {result['widgets_ms']:.2f} ms/فریم")
+    print(f"QGraphicsScene + اطلس: {result['scene_ms']:.2f} ms/فریم "
+          f"({result['widgets_ms'] / result['scene_ms']:.1f}x)")
+    print(f"QGraphicsView (viewport): {result['view_ms']:.2f} ms/فریم "
+          f"({result['widgets_ms'] / result['view_ms']:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
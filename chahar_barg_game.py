@@ -1,30 +1,44 @@
 import random
-from itertools import combinations
 from collections import Counter
 from game_basics import Card, Player, Deck
+from game_events import EventSource
+from game_state import Snapshottable
 
 # ارزش عددی کارت‌ها برای محاسبه جمع
 CARD_VALUES = {
     'A': 1, '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10,
     'J': 11, 'Q': 12, 'K': 13
 }
+CAPTURE_TARGET = 11
+FACE_RANKS = ('J', 'Q', 'K')
+# بیشترین جمعی که از کارت‌های عددی زمین لازم است (۱۱ منهای آس)
+MAX_CAPTURE_SUM = CAPTURE_TARGET - CARD_VALUES['A']
 
-class ChaharBargGame:
+class ChaharBargGame(EventSource, Snapshottable):
     """موتور و منطق اصلی بازی چهاربرگ (یازده)."""
-    def __init__(self, num_players=2, difficulty='medium'):
+    MOVE_HANDLERS = {'play': '_move_play', 'deal': '_move_deal', 'end_round': '_move_end_round'}
+    STATE_FIELDS = ('deck', 'table_cards', 'current_player_index', 'last_capturer', 'total_scores',
+                    'is_round_over')
+    PLAYER_STATE_FIELDS = ('hand', 'collected_cards', 'soor_count')
+
+    def __init__(self, num_players=2, difficulty='medium', rng=None):
         if num_players not in [2, 4]:
             raise ValueError("تعداد بازیکنان باید ۲ یا ۴ باشد.")
         
         self.difficulty = difficulty
+        self.rng = rng or random
         self.num_players = num_players
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players)]
         
         self.deck = Deck()
-        self.deck.shuffle()
+        self.deck.shuffle(self.rng)
         
         self.table_cards = []
+        # نمایه جمع زیرمجموعه‌ها: جمع ارزش -> لیست زیرمجموعه‌های کارت‌های عددی زمین
+        self._capture_index = {}
         self.current_player_index = 0
         self.last_capturer = None
+        self.is_round_over = False
 
         self.total_scores = {p.name: 0 for p in self.players}
         for player in self.players:
@@ -42,9 +56,10 @@ class ChaharBargGame:
         for i, card in enumerate(self.table_cards):
             if card.rank == 'J':
                 self.deck.cards.insert(0, self.table_cards.pop(i))
-                self.deck.shuffle()
+                self.deck.shuffle(self.rng)
                 self.table_cards.insert(i, self.deck.deal())
 
+        self._rebuild_capture_index()
         self._deal_cards_to_players()
 
     def _deal_cards_to_players(self):
@@ -78,30 +93,56 @@ class ChaharBargGame:
                 possible_captures.append([capture[0]])
             return possible_captures
 
-        target_sum = 11
-        numeric_table_cards = [c for c in self.table_cards if c.rank in CARD_VALUES and c.rank not in ['J', 'Q', 'K']]
+        target_sum = CAPTURE_TARGET - CARD_VALUES[player_card_rank]
+        return [list(combo) for combo in self._capture_index.get(target_sum, [])]
+
+    def _rebuild_capture_index(self):
+        """نمایه جمع زیرمجموعه‌ها را از روی کارت‌های فعلی زمین از نو می‌سازد."""
+        self._capture_index = {}
+        for card in self.table_cards:
+            self._index_add(card)
+
+    def _after_restore(self):
+        self._rebuild_capture_index()
 
-        for i in range(1, len(numeric_table_cards) + 1):
-            for combo in combinations(numeric_table_cards, i):
-                current_sum = sum(CARD_VALUES[card.rank] for card in combo)
-                if current_sum + CARD_VALUES[player_card.rank] == target_sum:
-                    possible_captures.append(list(combo))
-                    
-        return possible_captures
+    def _index_add(self, card: Card):
+        """کارت جدید زمین را به تمام زیرمجموعه‌های موجود (با جمع مجاز) اضافه می‌کند."""
+        if card.rank in FACE_RANKS:
+            return
+        value = CARD_VALUES[card.rank]
+        new_entries = [(value, (card,))]
+        for current_sum, combos in self._capture_index.items():
+            if current_sum + value <= MAX_CAPTURE_SUM:
+                new_entries.extend((current_sum + value, combo + (card,)) for combo in combos)
+        for combo_sum, combo in new_entries:
+            self._capture_index.setdefault(combo_sum, []).append(combo)
+
+    def _index_remove(self, cards: list):
+        """زیرمجموعه‌هایی که شامل کارت‌های برداشته شده هستند را حذف می‌کند."""
+        removed = set(cards)
+        index = {}
+        for combo_sum, combos in self._capture_index.items():
+            kept = [combo for combo in combos if removed.isdisjoint(combo)]
+            if kept:
+                index[combo_sum] = kept
+        self._capture_index = index
 
     def play_turn(self, player: Player, player_card: Card, chosen_capture: list):
         """حرکت بازیکن را نهایی می‌کند."""
         if player_card not in player.hand: return
         player.hand.remove(player_card)
 
+        is_soor = False
         if not chosen_capture:
             self.table_cards.append(player_card)
+            self._index_add(player_card)
         else:
             all_captured_cards = chosen_capture + [player_card]
             player.collected_cards.extend(all_captured_cards)
             
             for card in chosen_capture:
                 self.table_cards.remove(card)
+            self._index_remove(chosen_capture)
             
             self.last_capturer = player
 
@@ -109,14 +150,49 @@ class ChaharBargGame:
             if not self.table_cards:
                 if player_card.rank != 'J':
                     player.soor_count += 1
+                    is_soor = True
 
+        self._emit('card_played', player=player, card=player_card, captured=list(chosen_capture), is_soor=is_soor)
         self.current_player_index = (self.current_player_index + 1) % self.num_players
         
     def end_round(self):
         if self.last_capturer:
             self.last_capturer.collected_cards.extend(self.table_cards)
             self.table_cards = []
+            self._capture_index = {}
         self._calculate_round_scores()
+        self.is_round_over = True
+        self._emit('round_over', total_scores=dict(self.total_scores))
+
+    # --- API حرکت (apply_move) ---
+
+    def _move_play(self, move: dict):
+        player = self.players[self.current_player_index]
+        card, capture = move['card'], move.get('capture') or []
+        if self.is_round_over or card not in player.hand:
+            raise ValueError(f"حرکت غیرمجاز برای {player.name}: {card}")
+        if capture and Counter(capture) not in [Counter(c) for c in self.get_possible_captures(card)]:
+            raise ValueError(f"برداشت نامعتبر با {card}: {capture}")
+        self.play_turn(player, card, capture)
+
+    def _move_deal(self, move: dict):
+        if any(p.hand for p in self.players) or len(self.deck) == 0:
+            raise ValueError("هنوز زمان پخش کارت جدید نیست.")
+        self._deal_cards_to_players()
+        self._emit('cards_dealt', remaining=len(self.deck))
+
+    def _move_end_round(self, move: dict):
+        if self.is_round_over or any(p.hand for p in self.players) or len(self.deck) > 0:
+            raise ValueError("دور هنوز تمام نشده است.")
+        self.end_round()
+
+    def ai_move(self) -> dict | None:
+        if self.is_round_over:
+            return None
+        if all(not p.hand for p in self.players):
+            return {'action': 'deal'} if len(self.deck) > 0 else {'action': 'end_round'}
+        move = self.ai_choose_move(self.players[self.current_player_index])
+        return {'action': 'play', 'card': move['card'], 'capture': move['capture']}
 
     def _calculate_round_scores(self):
         """امتیازات را در پایان یک دور محاسبه و به امتیاز کل اضافه می‌کند."""
@@ -180,7 +256,7 @@ class ChaharBargGame:
         if not possible_moves: return {'card': None, 'capture': [], 'score': 0}
 
         if self.difficulty == 'easy':
-            return random.choice(possible_moves)
+            return self.rng.choice(possible_moves)
 
         elif self.difficulty == 'medium' or self.difficulty == 'hard':
             best_move = max(possible_moves, key=lambda move: move['score'])
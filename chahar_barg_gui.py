@@ -1,15 +1,21 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QFrame
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from chahar_barg_game import ChaharBargGame, Card
 from audio_manager import AudioManager
+from hand_view import HandView
+from event_presenter import EventPresenter
 from game_basics import Player
 
-class ChaharBargGameWidget(QWidget):
+class ChaharBargGameWidget(EventPresenter, QWidget):
+    AI_MOVE_DELAY = 1500  # مکث پیش از نمایش حرکت AI
+
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
+        self.audio_manager = AudioManager.instance()
         self.selected_hand_card = None
+        self.shown_table = []  # کارت‌های زمین تا آخرین رویداد نمایش داده شده
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -43,33 +49,62 @@ class ChaharBargGameWidget(QWidget):
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
 
     def start_new_game(self):
-        self.game = ChaharBargGame()
+        self.attach_game(ChaharBargGame())
+        self.shown_table = list(self.game.table_cards)
         self.start_button.hide()
         self.audio_manager.play("shuffle")
-        self.process_turn()
+        self.update_displays(self.game.total_scores)
+        self.advance_engine()
+
+    # --- اجرای موتور و نمایش رویدادها ---
+
+    def human_to_move(self) -> bool:
+        """آیا موتور منتظر تصمیم بازیکن انسانی (یا شروع بازی جدید) است؟"""
+        game = self.game
+        if game.is_round_over:
+            return True
+        return game.current_player_index == 0 and bool(game.players[0].hand)
+
+    def show_card_played(self, event):
+        if event['captured']:
+            for card in event['captured']:
+                self.shown_table.remove(card)
+            self.audio_manager.play("win")
+        else:
+            self.shown_table.append(event['card'])
+            self.audio_manager.play("play")
+        if event['player'] == self.game.players[0]:
+            self.hand_view.set_cards([card for card, _ in self.hand_view.items() if card != event['card']])
+        else:
+            self.status_label.setText(f"{event['player'].name} {event['card']} را بازی کرد.")
+        self.update_table_display()
+
+    def show_cards_dealt(self, event):
+        self.hand_view.set_cards(self.game.players[0].hand)
+        self.status_label.setText(f"کارت‌های جدید پخش شد ({event['remaining']} کارت در دسته).")
+
+    def show_round_over(self, event):
+        self.shown_table = []
+        self.update_displays(event['total_scores'])
+        final_scores_text = " | ".join([f"{name}: {score}" for name, score in event['total_scores'].items()])
+        self.status_label.setText(f"دور تمام شد! امتیازات نهایی: {final_scores_text}")
 
-    def process_turn(self):
-        if len(self.game.deck) == 0 and all(len(p.hand) == 0 for p in self.game.players):
-            self.end_round()
+    def await_human(self):
+        if self.game.is_round_over:
+            self.start_button.show()
             return
-            
-        if all(len(p.hand) == 0 for p in self.game.players):
-            self.game._deal_cards_to_players()
+        self.status_label.setText("نوبت شماست: یک کارت از دستتان انتخاب کنید.")
+        self.set_hand_buttons_enabled(True)
 
-        self.update_displays()
-        
-        current_player = self.game.players[self.game.current_player_index]
-        if self.game.current_player_index == 0:
-            self.status_label.setText("نوبت شماست: یک کارت از دستتان انتخاب کنید.")
-            self.set_hand_buttons_enabled(True)
-        else:
-            self.status_label.setText(f"نوبت حریف: {current_player.name}")
-            self.set_hand_buttons_enabled(False)
-            QTimer.singleShot(1500, self.play_ai_turn)
+    # --- حرکت بازیکن ---
 
     def on_hand_card_selected(self, card: Card):
+        if self.presenting or not self.human_to_move():
+            return
         self.selected_hand_card = card
         self.set_hand_buttons_enabled(False)
         
@@ -78,7 +113,7 @@ class ChaharBargGameWidget(QWidget):
         
         if not possible_captures:
             self.status_label.setText(f"با {card} حرکتی ممکن نیست. کارت روی زمین گذاشته می‌شود.")
-            QTimer.singleShot(1000, lambda: self.finalize_turn([]))
+            self.finalize_turn([])
         else:
             self.status_label.setText("یک حرکت را انتخاب کنید:")
             for capture_group in possible_captures:
@@ -88,57 +123,36 @@ class ChaharBargGameWidget(QWidget):
                 self.capture_options_layout.addWidget(btn)
 
     def finalize_turn(self, chosen_capture: list):
-        player = self.game.players[0]
-        self.game.play_turn(player, self.selected_hand_card, chosen_capture)
-        if chosen_capture: self.audio_manager.play("win")
-        else: self.audio_manager.play("play")
-        
+        card = self.selected_hand_card
         self.selected_hand_card = None
         self.clear_layout(self.capture_options_layout)
-        self.process_turn()
+        self.game.apply_move({'action': 'play', 'card': card, 'capture': list(chosen_capture)})
+        self.advance_engine()
 
-    def play_ai_turn(self):
-        player = self.game.players[self.game.current_player_index]
-        move = self.game.ai_choose_move(player)
-        
-        if move and move['card']:
-            self.game.play_turn(player, move['card'], move['capture'])
-            if move['capture']: self.audio_manager.play("win")
-            else: self.audio_manager.play("play")
-
-        self.process_turn()
-
-    def end_round(self):
-        self.game.end_round()
-        self.update_displays()
-        final_scores_text = " | ".join([f"{name}: {score}" for name, score in self.game.total_scores.items()])
-        self.status_label.setText(f"دور تمام شد! امتیازات نهایی: {final_scores_text}")
-        self.start_button.show()
+    def update_displays(self, total_scores: dict):
+        self.update_table_display()
+        self.hand_view.set_cards(self.game.players[0].hand)
+            
+        self.clear_layout(self.scores_layout)
+        scores_text = "امتیازات: " + " | ".join([f"{name}: {score}" for name, score in total_scores.items()])
+        self.scores_layout.addWidget(QLabel(scores_text))
 
-    def update_displays(self):
+    def update_table_display(self):
         self.clear_layout(self.table_cards_layout)
         self.table_cards_layout.addWidget(QLabel("کارت‌های زمین:"))
-        for card in self.game.table_cards:
+        for card in self.shown_table:
             lbl = QLabel(str(card))
             lbl.setStyleSheet("font-size: 18px; font-weight: bold; border: 1px solid black; padding: 10px; background-color: white;")
             self.table_cards_layout.addWidget(lbl)
 
-        self.clear_layout(self.player_hand_layout)
-        player = self.game.players[0]
-        for card in player.hand:
-            btn = QPushButton(str(card))
-            btn.setStyleSheet("font-size: 16px; padding: 10px 5px;")
-            btn.clicked.connect(lambda _, c=card: self.on_hand_card_selected(c))
-            self.player_hand_layout.addWidget(btn)
-            
-        self.clear_layout(self.scores_layout)
-        scores_text = "امتیازات: " + " | ".join([f"{name}: {score}" for name, score in self.game.total_scores.items()])
-        self.scores_layout.addWidget(QLabel(scores_text))
-
     def set_hand_buttons_enabled(self, enabled):
-        for i in range(self.player_hand_layout.count()):
-            widget = self.player_hand_layout.itemAt(i).widget()
-            if widget: widget.setEnabled(enabled)
+        self.hand_view.set_enabled(enabled)
+
+    def make_hand_card_widget(self, card):
+        btn = QPushButton(str(card))
+        btn.setStyleSheet("font-size: 16px; padding: 10px 5px;")
+        btn.clicked.connect(lambda _, c=card: self.on_hand_card_selected(c))
+        return btn
 
     def clear_layout(self, layout):
         if layout is not None:
@@ -1,19 +1,25 @@
 import random
 from game_basics import Card, Player, Deck, RANKS
+from game_events import EventSource
+from game_state import Snapshottable
 
-class ChosEFilGame:
+class ChosEFilGame(EventSource, Snapshottable):
     """
     موتور و منطق اصلی بازی چُس فیل.
     """
-    def __init__(self, num_players=4, difficulty='medium'):
+    MOVE_HANDLERS = {'turn': '_move_turn'}
+    STATE_FIELDS = ('active_players', 'current_player_index', 'loser', 'is_game_over')
+
+    def __init__(self, num_players=4, difficulty='medium', rng=None):
         if num_players < 2:
             raise ValueError("تعداد بازیکنان باید حداقل ۲ نفر باشد.")
         
         self.difficulty = difficulty
+        self.rng = rng or random
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players)]
         
         self.game_deck = self._create_game_deck(num_players)
-        random.shuffle(self.game_deck)
+        self.rng.shuffle(self.game_deck)
 
         self.active_players = list(self.players)
         self.loser = None
@@ -21,6 +27,7 @@ class ChosEFilGame:
         self.current_player_index = 0
 
         self._deal_cards()
+        self._remove_initial_pairs()
 
     def _create_game_deck(self, num_players: int) -> list[Card]:
         """دسته کارت مخصوص بازی را می‌سازد (N-1 جفت + 1 تک کارت)."""
@@ -29,13 +36,13 @@ class ChosEFilGame:
         deck.append(chos_fil_card)
 
         available_ranks = [r for r in RANKS if r != 'A']
-        random.shuffle(available_ranks)
+        self.rng.shuffle(available_ranks)
         
         num_pairs = (num_players * 2 - 1) // 2 if num_players > 4 else num_players - 1
         
         for i in range(num_pairs):
             rank = available_ranks.pop()
-            suits = random.sample(['♠️', '♥️', '♦️', '♣️'], 2)
+            suits = self.rng.sample(['♠️', '♥️', '♦️', '♣️'], 2)
             deck.append(Card(suits[0], rank))
             deck.append(Card(suits[1], rank))
             
@@ -50,6 +57,12 @@ class ChosEFilGame:
             player.add_card(self.game_deck.pop())
             player_index = (player_index + 1) % len(self.players)
 
+    def _remove_initial_pairs(self):
+        """جفت‌های دست اولیه همه بازیکنان را کنار می‌گذارد."""
+        for player in self.players:
+            self.check_and_remove_pairs(player)
+        self.active_players = [p for p in self.players if p.hand]
+
     def check_and_remove_pairs(self, player: Player):
         """
         جفت‌های موجود در دست بازیکن را پیدا کرده، حذف می‌کند و وضعیت بازیکن را بررسی می‌کند.
@@ -65,6 +78,7 @@ class ChosEFilGame:
                     cards_of_rank = [c for c in player.hand if c.rank == rank]
                     player.hand.remove(cards_of_rank[0])
                     player.hand.remove(cards_of_rank[1])
+                    self._emit('pair_removed', player=player, cards=cards_of_rank[:2])
                     found_pair = True
                     break # Restart check after modifying the list
             
@@ -79,6 +93,7 @@ class ChosEFilGame:
             if self.active_players:
                 self.loser = self.active_players[0]
             self.is_game_over = True
+            self._emit('game_over', loser=self.loser)
             return
 
         current_player = self.active_players[self.current_player_index]
@@ -94,9 +109,10 @@ class ChosEFilGame:
                 next_player = self.active_players[next_player_index_in_active]
                 if next_player_index_in_active == original_next_idx: return # All others are out
 
-        drawn_card = random.choice(next_player.hand)
+        drawn_card = self.rng.choice(next_player.hand)
         next_player.hand.remove(drawn_card)
         current_player.add_card(drawn_card)
+        self._emit('card_drawn', player=current_player, from_player=next_player, card=drawn_card)
 
         self.check_and_remove_pairs(current_player)
 
@@ -110,3 +126,14 @@ class ChosEFilGame:
         except ValueError:
             # Current player was removed, index might stay the same or need adjustment
             self.current_player_index %= len(self.active_players) if self.active_players else 0
+
+    # --- API حرکت (apply_move) ---
+
+    def _move_turn(self, move: dict):
+        if self.is_game_over:
+            raise ValueError("بازی تمام شده است.")
+        self.play_turn()
+
+    def ai_move(self) -> dict | None:
+        # در چُس فیل انتخاب کارت تصادفی است و نوبت‌ها تصمیمی ندارند
+        return None if self.is_game_over else {'action': 'turn'}
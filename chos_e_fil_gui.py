@@ -1,13 +1,20 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from chos_e_fil_game import ChosEFilGame
 from audio_manager import AudioManager
+from event_presenter import EventPresenter
+
+class ChosEFilGameWidget(EventPresenter, QWidget):
+    AI_MOVE_DELAY = 1500  # مکث پیش از نمایش نوبت AI
 
-class ChosEFilGameWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
+        self.audio_manager = AudioManager.instance()
+        self.shown_hand_sizes = {}  # تعداد کارت‌های نمایش داده شده هر بازیکن (وضعیت زنده موتور جلوتر است)
+        self.shown_turn_player = None
+        self.shown_loser = None
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -34,63 +41,84 @@ class ChosEFilGameWidget(QWidget):
         self.main_layout.addLayout(self.controls_layout)
 
     def start_new_game(self):
-        self.game = ChosEFilGame(num_players=4)
+        self.attach_game(ChosEFilGame(num_players=4))
+        self.shown_hand_sizes = {player: len(player.hand) for player in self.game.players}
+        self.shown_turn_player = None
+        self.shown_loser = None
         self.start_button.hide()
         self.audio_manager.play("shuffle")
-        
-        # Initial pair check and removal
-        for p in self.game.players:
-            self.game.check_and_remove_pairs(p)
-        self.game.active_players = [p for p in self.game.players if p.hand]
-            
         self.setup_controls()
-        self.process_turn()
+        self.update_displays()
+        self.advance_engine()
 
     def setup_controls(self):
         self.clear_layout(self.controls_layout)
         self.play_turn_button = QPushButton("نوبت بعدی (کشیدن کارت)")
         self.play_turn_button.clicked.connect(self.play_turn)
+        self.play_turn_button.setEnabled(False)
         self.controls_layout.addWidget(self.play_turn_button)
 
-    def play_turn(self):
-        if self.game.is_game_over: return
+    # --- اجرای موتور و نمایش رویدادها ---
 
-        current_player = self.game.active_players[self.game.current_player_index]
+    def human_to_move(self) -> bool:
+        game = self.game
+        if game.is_game_over:
+            return True
+        # با یک بازیکن باقی‌مانده نوبت بعدی فقط بازی را تمام می‌کند
+        return len(game.active_players) > 1 and game.active_players[game.current_player_index] == game.players[0]
+
+    def event_lead_time(self, event) -> int:
+        # فقط کشیدن کارت یک نوبت است؛ کنار گذاشتن جفت‌ها بلافاصله پس از آن نمایش داده می‌شود
+        return super().event_lead_time(event) if event.kind == 'card_drawn' else 0
+
+    def show_card_drawn(self, event):
         self.audio_manager.play("play")
-        self.game.play_turn()
+        self.shown_hand_sizes[event['player']] += 1
+        self.shown_hand_sizes[event['from_player']] -= 1
+        self.shown_turn_player = event['player']
+        self.update_displays()
+        self.status_label.setText(f"{event['player'].name} از {event['from_player'].name} کارت کشید.")
+
+    def show_pair_removed(self, event):
+        self.shown_hand_sizes[event['player']] -= len(event['cards'])
         self.update_displays()
 
+    def show_game_over(self, event):
+        self.shown_loser = event['loser']
+        self.shown_turn_player = None
+        self.update_displays()
+        self.status_label.setText(f"بازی تمام شد! بازنده: {self.shown_loser.name if self.shown_loser else 'نامشخص'}")
+        self.audio_manager.play("win")
+
+    def await_human(self):
         if self.game.is_game_over:
-            self.status_label.setText(f"بازی تمام شد! بازنده: {self.game.loser.name}")
             self.play_turn_button.setEnabled(False)
             self.start_button.show()
-            self.audio_manager.play("win")
-
-    def process_turn(self):
+            return
+        self.shown_turn_player = self.game.players[0]
         self.update_displays()
-        current_player = self.game.active_players[self.game.current_player_index]
-        if current_player == self.game.players[0]:
-            self.play_turn_button.setEnabled(True)
-            self.status_label.setText("نوبت شماست. از نفر بعدی کارت بکشید.")
-        else:
-            self.play_turn_button.setEnabled(False)
-            self.status_label.setText(f"نوبت {current_player.name}...")
-            QTimer.singleShot(1500, self.play_turn)
+        self.play_turn_button.setEnabled(True)
+        self.status_label.setText("نوبت شماست. از نفر بعدی کارت بکشید.")
 
+    # --- حرکت بازیکن ---
+
+    def play_turn(self):
+        if self.presenting or self.game.is_game_over or not self.human_to_move(): return
+        self.play_turn_button.setEnabled(False)
+        self.game.apply_move({'action': 'turn'})
+        self.advance_engine()
 
     def update_displays(self):
         self.clear_layout(self.players_layout)
-        
-        self.status_label.setText(f"{len(self.game.active_players)} بازیکن باقی مانده است.")
 
         for player in self.game.players:
-            status = "✅" if not player.hand and player not in self.game.active_players else f"({len(player.hand)} کارت)"
-            if player == self.game.loser:
+            status = "✅" if not self.shown_hand_sizes[player] else f"({self.shown_hand_sizes[player]} کارت)"
+            if player == self.shown_loser:
                 status = "❌ بازنده"
 
             player_lbl = QLabel(f"{player.name}: {status}")
             player_lbl.setStyleSheet("font-size: 14px; color: white;")
-            if player == self.game.players[self.game.current_player_index] and not self.game.is_game_over:
+            if player == self.shown_turn_player:
                 player_lbl.setStyleSheet("font-size: 14px; color: white; font-weight: bold; border: 1px solid yellow;")
 
             self.players_layout.addWidget(player_lbl)
@@ -0,0 +1,370 @@
+"""
+حل‌کننده دقیق پایان دور (double dummy) برای بازی‌های دست‌گیری (حکم، گنجفه، بیدل، شلم).
+
+با دست‌های باز (همه کارت‌ها معلوم)، با جستجوی alpha-beta بیشترین امتیازی را که یک تیم با بازی
+کامل هر دو طرف می‌گیرد حساب می‌کند. امتیاز با یک شمارنده تعیین می‌شود: TrickCount (تعداد دست‌ها،
+حکم و گنجفه) یا CardPoints (امتیاز کارت‌ها؛ بیدل و شلم). وضعیت همان bitmaskهای TrickState
+(trick_search.py) است. برای سرعت:
+    - جدول جابجایی با کلید Zobrist (zobrist.py) در ابتدای هر دست: کران پایین/بالای امتیاز
+    - حذف کارت‌های هم‌ارز: کارت‌های پشت سر هم یک دست در یک خال (با در نظر گرفتن کارت‌های
+      باقی‌مانده) که scorer امتیاز یکسان به آن‌ها می‌دهد یک حرکت حساب می‌شوند
+    - ترتیب حرکت‌ها: ارزان‌ترین کارت برنده، یا کم‌ارزش‌ترین کارت وقتی یار برنده است
+
+در AI سخت، وقتی کارت‌های هر بازیکن به آستانه برسد، برای چند determinization دست حریفان
+پایان دور دقیق حل می‌شود (endgame_search) و حرکت با بیشترین میانگین امتیاز انتخاب می‌شود.
+"""
+import argparse
+import random
+import sys
+import time
+
+from trick_search import SearchStats, TrickState, mask_ids
+from zobrist import TranspositionTable, zobrist_keys
+
+
+class TrickCount:
+    """هر دست یک امتیاز برای تیمی که آن را می‌برد."""
+    __slots__ = ("team",)
+
+    def __init__(self, team: int):
+        self.team = team
+
+    def points(self, cards_mask: int, winner_team: int) -> int:
+        return 1 if winner_team == self.team else 0
+
+    def bound(self, live_mask: int, tricks_left: int) -> int:
+        return tricks_left
+
+    def same_value(self, card_id: int, other_id: int) -> bool:
+        return True
+
+
+class CardPoints:
+    """
+    امتیاز کارت‌های گرفته شده (card_points: card_id -> امتیاز) به علاوه trick_points برای هر دست،
+    وقتی برنده دست credit_team باشد. برای بیدل credit_team حریفان هستند (امتیاز منفی که به آن‌ها رسیده).
+    """
+    __slots__ = ("credit_team", "card_points", "trick_points", "values")
+
+    def __init__(self, credit_team: int, card_points: dict, trick_points: int = 0):
+        self.credit_team = credit_team
+        self.card_points = tuple(card_points.items())
+        self.trick_points = trick_points
+        self.values = dict(card_points)
+
+    def points(self, cards_mask: int, winner_team: int) -> int:
+        if winner_team != self.credit_team:
+            return 0
+        return self.trick_points + sum(points for card_id, points in self.card_points if cards_mask >> card_id & 1)
+
+    def bound(self, live_mask: int, tricks_left: int) -> int:
+        return self.trick_points * tricks_left + sum(p for card_id, p in self.card_points if live_mask >> card_id & 1)
+
+    def same_value(self, card_id: int, other_id: int) -> bool:
+        """کارت‌های پشت سر هم فقط وقتی هم‌ارزند که امتیازشان یکی باشد (مثلا J♠ و Q♠ در بیدل نیستند)."""
+        return self.values.get(card_id, 0) == self.values.get(other_id, 0)
+
+
+class DoubleDummySolver:
+    """
+    حل‌کننده برای یک حکم و یک دیدگاه مشخص: تیم team (در team_of) بیشینه‌کننده است و امتیاز با
+    scorer شمرده می‌شود (پیش‌فرض TrickCount(team)). perspective در کلید Zobrist می‌آید تا
+    جستجوهای دیدگاه‌های مختلف (مثلا هر صندلی بیدل) بتوانند یک table مشترک داشته باشند.
+    """
+    def __init__(self, trump: int | None, team_of: tuple, team: int, lane_bits: int, num_suits: int = 4,
+                 scorer=None, table: TranspositionTable = None, perspective: int | None = None):
+        self.trump = trump
+        self.team_of = team_of
+        self.team = team
+        self.lane_bits = lane_bits
+        self.lane_mask = (1 << lane_bits) - 1
+        self.num_seats = len(team_of)
+        self.scorer = scorer or TrickCount(team)
+        self.table = table if table is not None else TranspositionTable()
+        self.keys = zobrist_keys(self.num_seats, num_suits * lane_bits, num_suits)
+        self.perspective = team if perspective is None else perspective
+        self.no_suit = num_suits
+        self.nodes = 0
+
+    def _root(self, state: TrickState):
+        key = self.keys.hash_state(state.hands, state.trick, state.turn, self.trump, state.unbroken_suit,
+                                   self.perspective)
+        return list(state.hands), tuple(state.trick), state.turn, key, state.unbroken_suit
+
+    def _upper_bound(self, hands: list, trick: tuple) -> int:
+        live = 0
+        for hand in hands:
+            live |= hand
+        for _, card_id in trick:
+            live |= 1 << card_id
+        return self.scorer.bound(live, max(hand.bit_count() for hand in hands) + (1 if trick else 0))
+
+    def solve(self, state: TrickState) -> int:
+        """امتیاز باقی‌مانده (شامل دست جاری) که تیم با بازی کامل می‌گیرد."""
+        hands, trick, turn, key, unbroken = self._root(state)
+        return self._value(hands, trick, turn, key, unbroken)
+
+    def analyze(self, state: TrickState) -> dict[int, int]:
+        """برای هر کارت مجاز صندلی نوبت، امتیاز باقی‌مانده تیم (شامل دست جاری) پس از بازی آن کارت."""
+        hands, trick, turn, key, unbroken = self._root(state)
+        results = {}
+        hand = hands[turn]
+        for card_id in mask_ids(self._legal(hand, trick, unbroken)):
+            child_trick, child_turn, child_key, child_unbroken, gained = self._play(hands, trick, turn, key, unbroken,
+                                                                                    card_id)
+            results[card_id] = gained + self._value(hands, child_trick, child_turn, child_key, child_unbroken)
+            hands[turn] = hand
+        return results
+
+    def _value(self, hands: list, trick: tuple, turn: int, key: int, unbroken) -> int:
+        """
+        مقدار دقیق با جستجوهای پنجره صفر («آیا تیم دست‌کم k امتیاز می‌گیرد؟») و جستجوی دودویی
+        روی k؛ کران‌های جدول جابجایی بین این جستجوها مشترک است.
+        """
+        if not hands[turn]:
+            return 0
+        lower, upper = 0, self._upper_bound(hands, trick)
+        while lower < upper:
+            target = (lower + upper + 1) // 2
+            value = self._search(hands, trick, turn, key, unbroken, target - 1, target)
+            if value >= target:
+                lower = value
+            else:
+                upper = value
+        return lower
+
+    def _legal(self, hand: int, trick: tuple, unbroken) -> int:
+        lane_bits, lane_mask = self.lane_bits, self.lane_mask
+        if trick:
+            return hand & (lane_mask << (trick[0][1] // lane_bits * lane_bits)) or hand
+        if unbroken is not None:
+            return hand & ~(lane_mask << (unbroken * lane_bits)) or hand
+        return hand
+
+    def _play(self, hands: list, trick: tuple, turn: int, key: int, unbroken, card_id: int):
+        """
+        کارت را برای turn بازی می‌کند (hands در جا تغییر می‌کند)؛
+        (دست جاری، نوبت، کلید، خال شکسته نشده، امتیاز به دست آمده) جدید را برمی‌گرداند.
+        """
+        keys = self.keys
+        hands[turn] &= ~(1 << card_id)
+        key ^= keys.owner[turn][card_id] ^ keys.turn[turn]
+        if unbroken is not None and card_id // self.lane_bits == unbroken:
+            key ^= keys.unbroken[unbroken] ^ keys.unbroken[self.no_suit]
+            unbroken = None
+        played = trick + ((turn, card_id),)
+        if len(played) < self.num_seats:
+            next_turn = (turn + 1) % self.num_seats
+            return played, next_turn, key ^ keys.in_trick[turn][card_id] ^ keys.turn[next_turn], unbroken, 0
+        winner = self._winning(played)[0]
+        cards_mask = 1 << card_id
+        for seat, played_id in trick:
+            key ^= keys.in_trick[seat][played_id]
+            cards_mask |= 1 << played_id
+        gained = self.scorer.points(cards_mask, self.team_of[winner])
+        return (), winner, key ^ keys.turn[winner], unbroken, gained
+
+    def _search(self, hands: list, trick: tuple, turn: int, key: int, unbroken, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        hand = hands[turn]
+        if not trick:
+            remaining = hand.bit_count()
+            if not remaining:
+                return 0
+            upper_bound = self._upper_bound(hands, trick)
+            if alpha >= upper_bound:
+                return upper_bound
+            if beta <= 0:
+                return 0
+            bounds = self.table.probe(key)
+            if bounds is not None:
+                lower, upper = bounds
+                if lower >= beta or lower == upper:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                alpha, beta = max(alpha, lower), min(beta, upper)
+            original_alpha, original_beta = alpha, beta
+
+        maximizing = self.team_of[turn] == self.team
+        best = None
+        for card_id in self._ordered_moves(hands, trick, turn, unbroken):
+            child_trick, child_turn, child_key, child_unbroken, gained = self._play(hands, trick, turn, key, unbroken,
+                                                                                    card_id)
+            value = gained + self._search(hands, child_trick, child_turn, child_key, child_unbroken,
+                                          alpha - gained, beta - gained)
+            hands[turn] = hand
+            if maximizing:
+                if best is None or value > best:
+                    best = value
+                    alpha = max(alpha, value)
+            elif best is None or value < best:
+                best = value
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if not trick:
+            lower, upper = bounds if bounds is not None else (0, upper_bound)
+            if best <= original_alpha:
+                upper = min(upper, best)
+            elif best >= original_beta:
+                lower = max(lower, best)
+            else:
+                lower = upper = best
+            self.table.store(key, remaining, (lower, upper))
+        return best
+
+    def _winning(self, trick: tuple) -> tuple[int, int]:
+        """(صندلی برنده فعلی دست، کلید قدرت کارت او)."""
+        lead_suit = trick[0][1] // self.lane_bits
+        best_seat, best_key = None, -1
+        for seat, card_id in trick:
+            key = self._card_key(card_id, lead_suit)
+            if key > best_key:
+                best_seat, best_key = seat, key
+        return best_seat, best_key
+
+    def _card_key(self, card_id: int, lead_suit: int) -> int:
+        suit, rank_index = divmod(card_id, self.lane_bits)
+        if suit == self.trump:
+            return 2 * self.lane_bits + rank_index
+        if suit == lead_suit:
+            return self.lane_bits + rank_index
+        return -1
+
+    def _ordered_moves(self, hands: list, trick: tuple, turn: int, unbroken) -> list[int]:
+        lane_bits, lane_mask = self.lane_bits, self.lane_mask
+        same_value = self.scorer.same_value
+        legal = self._legal(hands[turn], trick, unbroken)
+
+        # یک نماینده از هر دنباله کارت‌های پشت سر هم (کارت‌های دست جاری هم جزو «باقی‌مانده» هستند)
+        live = 0
+        for other in hands:
+            live |= other
+        for _, card_id in trick:
+            live |= 1 << card_id
+        moves = []
+        for card_id in mask_ids(legal):
+            suit_base = card_id // lane_bits * lane_bits
+            higher = live & (lane_mask << suit_base) & ~((2 << card_id) - 1)
+            if higher:
+                next_id = (higher & -higher).bit_length() - 1
+                if legal >> next_id & 1 and same_value(card_id, next_id):
+                    continue  # کارت بالاتر بعدی با همان امتیاز هم در همین دست است
+            moves.append(card_id)
+
+        if not trick:
+            moves.reverse()  # شروع با کارت‌های بالا
+            return moves
+        winner, winning_key = self._winning(trick)
+        if self.team_of[winner] == self.team_of[turn]:
+            return moves  # یار برنده است: کم‌ارزش‌ترین کارت اول
+        lead_suit = trick[0][1] // lane_bits
+        beating, losing = [], []
+        for card_id in moves:
+            (beating if self._card_key(card_id, lead_suit) > winning_key else losing).append(card_id)
+        return beating + losing
+
+
+def solve_tricks(state: TrickState, team: int) -> int:
+    """تعداد دست‌های باقی‌مانده‌ای که team با بازی کامل همه بازیکنان (دست‌های باز) می‌برد."""
+    return DoubleDummySolver(state.trump, state.team_of, team, state.lane_bits).solve(state)
+
+
+def analyze_moves(state: TrickState, team: int) -> dict[int, int]:
+    """برای هر کارت مجاز صندلی نوبت، دست‌های باقی‌مانده‌ای که team با بازی کامل پس از آن می‌برد."""
+    return DoubleDummySolver(state.trump, state.team_of, team, state.lane_bits).analyze(state)
+
+
+def endgame_search(sample_root, candidates: list[int], solver: DoubleDummySolver, rng,
+                   time_budget: float | None = None, max_iterations: int | None = None) -> SearchStats:
+    """
+    مانند monte_carlo_search اما هر حرکت روی هر determinization به جای playout تصادفی دقیق حل
+    می‌شود؛ امتیاز هر حرکت، امتیاز باقی‌مانده تیم solver است (solver باید با همان حکم و تیم‌بندی
+    determinizationها ساخته شده باشد).
+    """
+    stats = SearchStats()
+    start = time.perf_counter()
+    deadline = start + time_budget if time_budget is not None else None
+    solver.table.new_search()
+    while True:
+        for move, value in solver.analyze(sample_root(rng)).items():
+            if move in candidates:
+                stats.add(move, value)
+        stats.iterations += 1
+        if max_iterations is not None and stats.iterations >= max_iterations:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if deadline is None and max_iterations is None:
+            break
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+# --- مقایسه با minimax کامل ---
+
+def _minimax(solver: DoubleDummySolver, hands: list, trick: tuple, turn: int, unbroken) -> int:
+    """جستجوی کامل بدون هرس، جدول و حذف کارت‌های هم‌ارز (فقط برای بررسی درستی)."""
+    hand = hands[turn]
+    if not hand:
+        return 0
+    values = []
+    for card_id in mask_ids(solver._legal(hand, trick, unbroken)):
+        child_trick, child_turn, _, child_unbroken, gained = solver._play(hands, trick, turn, 0, unbroken, card_id)
+        values.append(gained + _minimax(solver, hands, child_trick, child_turn, child_unbroken))
+        hands[turn] = hand
+    return max(values) if solver.team_of[turn] == solver.team else min(values)
+
+
+def self_check(positions: int, cards: int, seed: int) -> int:
+    """
+    روی موقعیت‌های تصادفی پاسخ solve را با minimax کامل مقایسه می‌کند: شمارش دست (حکم)، امتیاز
+    کارت مثل بیدل (هر دل ۱ و Q♠ ۱۳، دل شکسته نشده) و مثل شلم (A و ۱۰ ده، ۵ پنج، هر دست ۵).
+    تعداد ناسازگاری‌ها را برمی‌گرداند.
+    """
+    lane_bits = 13
+    setups = {
+        'tricks': (0, (0, 1, 0, 1), 0, None, None),
+        'bidel': (None, (1, 0, 1, 1), 0, CardPoints(1, {**{26 + i: 1 for i in range(13)}, 10: 13}), 2),
+        'shelem': (1, (0, 1, 0, 1), 0,
+                   CardPoints(0, {suit * 13 + rank: points for suit in range(4)
+                                  for rank, points in ((12, 10), (8, 10), (3, 5))}, 5), None),
+    }
+    rng = random.Random(seed)
+    mismatches = 0
+    for name, (trump, team_of, team, scorer, unbroken) in setups.items():
+        for _ in range(positions):
+            deal = rng.sample(range(4 * lane_bits), 4 * cards)
+            hands = []
+            for seat in range(4):
+                mask = 0
+                for card_id in deal[seat * cards:(seat + 1) * cards]:
+                    mask |= 1 << card_id
+                hands.append(mask)
+            state = TrickState(hands, rng.randrange(4), trump, team_of, lane_bits=lane_bits, unbroken_suit=unbroken)
+            solver = DoubleDummySolver(trump, team_of, team, lane_bits, scorer=scorer)
+            expected = _minimax(solver, list(hands), (), state.turn, unbroken)
+            value = solver.solve(state)
+            if value != expected:
+                mismatches += 1
+                print(f"{name}: solve={value} minimax={expected} hands={[mask_ids(h) for h in hands]} "
+                      f"turn={state.turn}")
+        print(f"{name}: {positions} موقعیت بررسی شد")
+    return mismatches
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="مقایسه حل‌کننده پایان دور با minimax کامل")
+    parser.add_argument("--positions", type=int, default=100)
+    parser.add_argument("--cards", type=int, default=3, help="تعداد کارت هر بازیکن")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    mismatches = self_check(args.positions, args.cards, args.seed)
+    print(f"{mismatches} ناسازگاری")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
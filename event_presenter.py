@@ -0,0 +1,84 @@
+from collections import deque
+from PyQt5.QtCore import QTimer
+
+
+class EventPresenter:
+    """
+    اجرای موتور و نمایش رویدادهای آن در ویجت‌های بازی (mixin کنار QWidget).
+
+    حرکت‌های AI با apply_move بدون تاخیر تا نوبت بعدی انسان اجرا می‌شوند و رویدادهایشان در
+    event_queue می‌مانند؛ یک QTimer (presenter) آن‌ها را یکی‌یکی با show_<kind> نمایش می‌دهد:
+    پیش از هر رویداد event_lead_time و پس از آن EVENT_HOLD_TIMES مکث می‌کند. وقتی صف خالی شد
+    await_human صدا زده می‌شود. ویجت باید human_to_move و await_human را پیاده کند.
+    """
+    AI_MOVE_DELAY = 1000  # مکث پیش از نمایش حرکت AI
+    EVENT_HOLD_TIMES = {}  # مدت نمایش هر نوع رویداد پیش از رفتن به رویداد بعدی
+
+    def setup_presenter(self):
+        self.event_queue = deque()
+        self.presenter = QTimer(self)
+        self.presenter.setSingleShot(True)
+        self.presenter.timeout.connect(self.present_next_event)
+        self.lead_done = False
+        self.trick_done = False  # بازی‌های دستی: میز پیش از رویداد بعدی پاک می‌شود
+
+    def attach_game(self, game):
+        """صف را خالی کرده و رویدادهای موتور تازه را به آن وصل می‌کند."""
+        self.reset_presenter()
+        self.game = game
+        game.subscribe(self.event_queue.append)
+
+    def reset_presenter(self):
+        self.presenter.stop()
+        self.event_queue.clear()
+        self.lead_done = False
+        self.trick_done = False
+
+    @property
+    def presenting(self) -> bool:
+        """آیا هنوز رویدادی در حال نمایش یا در صف است؟ (ورودی کاربر در این حالت نادیده گرفته می‌شود)"""
+        return self.presenter.isActive() or bool(self.event_queue)
+
+    def human_to_move(self) -> bool:
+        """آیا موتور منتظر تصمیم بازیکن انسانی (یا شروع بازی جدید) است؟"""
+        raise NotImplementedError
+
+    def apply_ai_move(self):
+        self.game.apply_move(self.game.ai_move())
+
+    def advance_engine(self):
+        """حرکت‌های AI تا نوبت بعدی انسان اجرا می‌شوند؛ رویدادها با فاصله زمانی نمایش داده می‌شوند."""
+        while not self.human_to_move():
+            self.apply_ai_move()
+        if not self.presenter.isActive():
+            self.present_next_event()
+
+    def event_lead_time(self, event) -> int:
+        """مکث پیش از نمایش رویداد (میلی‌ثانیه)؛ پیش‌فرض برای حرکت‌های بازیکنان AI."""
+        player = event.get('player')
+        if player is not None and player != self.game.players[0]:
+            return self.AI_MOVE_DELAY
+        return 0
+
+    def present_next_event(self):
+        if self.trick_done:
+            self.clear_trick_widgets()
+            self.trick_done = False
+        if not self.event_queue:
+            self.await_human()
+            return
+
+        event = self.event_queue[0]
+        if not self.lead_done and self.event_lead_time(event) > 0:
+            self.lead_done = True
+            self.presenter.start(self.event_lead_time(event))
+            return
+        self.event_queue.popleft()
+        self.lead_done = False
+        handler = getattr(self, f"show_{event.kind}", None)
+        if handler:
+            handler(event)
+        self.presenter.start(self.EVENT_HOLD_TIMES.get(event.kind, 0))
+
+    def await_human(self):
+        raise NotImplementedError
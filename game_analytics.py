@@ -0,0 +1,300 @@
+"""
+تحلیل جریانی رکوردهای ضبط شده (game_record.py) برای تنظیم AI.
+
+خط لوله از مولدها ساخته شده است و در هر لحظه فقط یک تکه از فایل و یک بازی در حافظه است:
+    stream_records (خواندن تکه‌ای فایل) -> select_shard -> replay_events (اجرای دوباره حرکت‌ها)
+    -> تجمیع‌گرها
+هر تجمیع‌گر فقط شمارنده (Counter) نگه می‌دارد و با merge ادغام می‌شود؛ پس ورودی را می‌توان
+بین پردازه‌ها تقسیم کرد: اگر تعداد فایل‌ها کافی باشد هر فایل یک تکه است، وگرنه رکوردهای هر
+فایل به صورت یک در میان (بر اساس شماره رکورد) بین پردازه‌ها پخش می‌شوند.
+
+نمونه:
+    python game_analytics.py logs/*.icgr -a hakem_by_suit soor bidel_queen --workers 8
+"""
+import argparse
+import contextlib
+import itertools
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from game_basics import Card
+from game_events import GameEvent
+from game_record import bind_seats, reseed, stream_records
+
+QUEEN_OF_SPADES = Card('♠️', 'Q')
+
+
+# --- تجمیع‌گرها ---
+
+class Aggregate:
+    """
+    پایه تجمیع‌گرها. GAMES بازی‌هایی است که تجمیع‌گر رویدادهای آن‌ها را می‌خواهد (خالی = همه).
+    ویژگی‌های Counter نتیجه هستند و در merge جمع می‌شوند؛ ویژگی‌های با _ وضعیت موقت بازی جاری‌اند.
+    """
+    NAME = ""
+    GAMES = ()
+
+    def update(self, game, event: GameEvent):
+        raise NotImplementedError
+
+    def merge(self, other: "Aggregate"):
+        for name, value in vars(other).items():
+            if isinstance(value, Counter):
+                getattr(self, name).update(value)
+
+    def report(self) -> str:
+        raise NotImplementedError
+
+
+def _rate(part: int, whole: int) -> str:
+    return f"{100.0 * part / whole:.1f}%" if whole else "-"
+
+
+class EventCounts(Aggregate):
+    """تعداد هر نوع رویداد در هر بازی."""
+    NAME = "events"
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def update(self, game, event):
+        self.counts[(type(game).__name__, event.kind)] += 1
+
+    def report(self) -> str:
+        lines = ["تعداد رویدادها:"]
+        for (engine, kind), count in sorted(self.counts.items()):
+            lines.append(f"    {engine:16} {kind:20} {count}")
+        return "\n".join(lines)
+
+
+class HakemWinRateBySuit(Aggregate):
+    """درصد بردن دور توسط تیم حاکم، به تفکیک خال حکم."""
+    NAME = "hakem_by_suit"
+    GAMES = ("hokm",)
+
+    def __init__(self):
+        self.rounds = Counter()
+        self.hakem_wins = Counter()
+        self._suit = None
+        self._hakem_team = None
+
+    def update(self, game, event):
+        if event.kind == 'hokm_set':
+            self._suit = event['suit']
+            self._hakem_team = next(name for name, members in game.teams.items() if event['hakem'] in members)
+        elif event.kind == 'round_over' and self._suit is not None:
+            self.rounds[self._suit] += 1
+            if event['winner'] == self._hakem_team:
+                self.hakem_wins[self._suit] += 1
+            self._suit = None
+
+    def report(self) -> str:
+        lines = ["حکم - درصد برد تیم حاکم به تفکیک خال حکم:"]
+        for suit, rounds in sorted(self.rounds.items()):
+            lines.append(f"    {suit}: {_rate(self.hakem_wins[suit], rounds)} از {rounds} دور")
+        total = sum(self.rounds.values())
+        lines.append(f"    کل: {_rate(sum(self.hakem_wins.values()), total)} از {total} دور")
+        return "\n".join(lines)
+
+
+class SoorFrequency(Aggregate):
+    """تعداد سور در چهاربرگ: به ازای هر حرکت، توزیع سور در هر بازی و رتبه کارت سور زننده."""
+    NAME = "soor"
+    GAMES = ("chahar_barg",)
+
+    def __init__(self):
+        self.totals = Counter()
+        self.soors_per_game = Counter()
+        self.soor_ranks = Counter()
+        self._soors = 0
+
+    def update(self, game, event):
+        if event.kind == 'replay_started':
+            self._soors = 0
+        elif event.kind == 'card_played':
+            self.totals['plays'] += 1
+            if event['is_soor']:
+                self._soors += 1
+                self.soor_ranks[event['card'].rank] += 1
+        elif event.kind == 'replay_finished':
+            self.totals['games'] += 1
+            self.totals['soors'] += self._soors
+            self.soors_per_game[self._soors] += 1
+
+    def report(self) -> str:
+        games, soors = self.totals['games'], self.totals['soors']
+        lines = [f"چهاربرگ - سور: {soors} سور در {games} بازی "
+                 f"({soors / games if games else 0:.2f} در هر بازی، {_rate(soors, self.totals['plays'])} حرکت‌ها)"]
+        for count, num_games in sorted(self.soors_per_game.items()):
+            lines.append(f"    {count} سور: {num_games} بازی ({_rate(num_games, games)})")
+        lines.append("    رتبه کارت: " + "، ".join(f"{rank}={n}" for rank, n in self.soor_ranks.most_common()))
+        return "\n".join(lines)
+
+
+class QueenOfSpadesDistribution(Aggregate):
+    """بی‌دل - بی‌بی پیک: کدام صندلی و در کدام دست آن را گرفته و چند بار دارنده آن خودش آن را گرفته است."""
+    NAME = "bidel_queen"
+    GAMES = ("bidel",)
+
+    def __init__(self):
+        self.taker_seats = Counter()
+        self.trick_numbers = Counter()
+        self.totals = Counter()
+        self._holder = None
+
+    def update(self, game, event):
+        if event.kind == 'round_started':
+            self._holder = None
+        elif event.kind == 'card_played' and self._holder is None:
+            # دارنده پس از پاس کارت‌ها، در اولین کارت بازی شده دور مشخص می‌شود
+            if event['card'] == QUEEN_OF_SPADES:
+                self._holder = event['player']
+            else:
+                self._holder = next(p for p in game.players if QUEEN_OF_SPADES in p.hand)
+        elif event.kind == 'trick_won' and any(card == QUEEN_OF_SPADES for _, card in event['cards']):
+            self.taker_seats[game.players.index(event['winner'])] += 1
+            self.trick_numbers[len(game.trick_history)] += 1
+            self.totals['rounds'] += 1
+            if event['winner'] is self._holder:
+                self.totals['taken_by_holder'] += 1
+
+    def report(self) -> str:
+        rounds = self.totals['rounds']
+        lines = [f"بی‌دل - بی‌بی پیک در {rounds} دور؛ دارنده خودش گرفته: "
+                 f"{_rate(self.totals['taken_by_holder'], rounds)}"]
+        for seat, count in sorted(self.taker_seats.items()):
+            lines.append(f"    صندلی {seat + 1}: {count} ({_rate(count, rounds)})")
+        lines.append("    شماره دست: " + "، ".join(f"{trick}={n}" for trick, n in sorted(self.trick_numbers.items())))
+        return "\n".join(lines)
+
+
+AGGREGATES = {cls.NAME: cls for cls in (EventCounts, HakemWinRateBySuit, SoorFrequency, QueenOfSpadesDistribution)}
+
+
+# --- خط لوله ---
+
+def select_shard(records, shard_index=0, shard_count=1):
+    """رکوردهای با شماره shard_index، shard_index + shard_count، ... را نگه می‌دارد."""
+    return itertools.islice(records, shard_index, None, shard_count)
+
+
+def replay_events(records, games=None):
+    """
+    هر رکورد را دوباره اجرا کرده و (موتور، رویداد) تولید می‌کند. هر بازی با رویدادهای ساختگی
+    'replay_started' و 'replay_finished' محصور می‌شود. رکورد بازی‌های خارج از games رد می‌شوند.
+    """
+    for record in records:
+        if games is not None and record.game_name not in games:
+            continue
+        game = record.new_engine()
+        players = game._state_players()
+        yield game, GameEvent('replay_started', {'record': record})
+        for index, move in enumerate(record.moves):
+            if record.has_seats:
+                move = bind_seats(move, players)
+            reseed(game, record.seed, index)
+            for event in game.apply_move(move):
+                yield game, event
+        yield game, GameEvent('replay_finished', {'record': record, 'moves': len(record.moves)})
+
+
+class AnalysisResult:
+    """نتیجه تجمیعی تحلیل یک یا چند تکه از رکوردها."""
+    def __init__(self, aggregate_names):
+        self.aggregates = {name: AGGREGATES[name]() for name in aggregate_names}
+        self.games = 0
+        self.moves = 0
+        self.elapsed = 0.0
+
+    def merge(self, other: "AnalysisResult"):
+        self.games += other.games
+        self.moves += other.moves
+        for name, aggregate in other.aggregates.items():
+            self.aggregates[name].merge(aggregate)
+
+    def report(self) -> str:
+        rate = self.games / self.elapsed if self.elapsed else 0.0
+        lines = [f"{self.games} بازی ({self.moves} حرکت) در {self.elapsed:.2f} ثانیه ({rate:.1f} بازی/ثانیه)"]
+        lines.extend(aggregate.report() for aggregate in self.aggregates.values())
+        return "\n".join(lines)
+
+
+def analyze(records, aggregate_names) -> AnalysisResult:
+    """رویدادهای رکوردها را به تجمیع‌گرها می‌دهد؛ هر تجمیع‌گر فقط رویداد بازی‌های GAMES خود را می‌گیرد."""
+    result = AnalysisResult(aggregate_names)
+    aggregates = list(result.aggregates.values())
+    games = None
+    if all(aggregate.GAMES for aggregate in aggregates):
+        games = {name for aggregate in aggregates for name in aggregate.GAMES}
+    listeners = {}  # نوع موتور -> تجمیع‌گرهای علاقه‌مند
+    start = time.perf_counter()
+    for game, event in replay_events(records, games):
+        targets = listeners.get(type(game))
+        if targets is None:
+            game_name = event['record'].game_name
+            targets = listeners[type(game)] = [a for a in aggregates if not a.GAMES or game_name in a.GAMES]
+        for aggregate in targets:
+            aggregate.update(game, event)
+        if event.kind == 'replay_finished':
+            result.games += 1
+            result.moves += event['moves']
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+# --- تقسیم بین پردازه‌ها ---
+
+def plan_shards(paths: list, workers: int) -> list[tuple[str, int, int]]:
+    """تکه‌های (مسیر، شماره تکه، تعداد تکه‌های آن فایل)؛ با فایل‌های کم، هر فایل بین چند پردازه پخش می‌شود."""
+    stripes = max(1, math.ceil(workers / len(paths))) if paths else 1
+    return [(path, index, stripes) for path in paths for index in range(stripes)]
+
+
+def _run_shard(shard: tuple) -> AnalysisResult:
+    path, shard_index, shard_count, aggregate_names, chunk_size = shard
+    records = select_shard(stream_records(path, chunk_size), shard_index, shard_count)
+    # برخی موتورها پیام‌های وضعیت را print می‌کنند
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return analyze(records, aggregate_names)
+
+
+def analyze_files(paths: list, aggregate_names, workers: int | None = None, chunk_size=1 << 20) -> AnalysisResult:
+    """فایل‌های رکورد را با workers پردازه تحلیل کرده و نتیجه‌ها را ادغام می‌کند."""
+    unknown = [name for name in aggregate_names if name not in AGGREGATES]
+    if unknown:
+        raise ValueError(f"تجمیع‌گر نامعتبر: {', '.join(unknown)}")
+    workers = workers or os.cpu_count() or 1
+    shards = [(path, index, count, aggregate_names, chunk_size)
+              for path, index, count in plan_shards(paths, workers)]
+
+    merged = AnalysisResult(aggregate_names)
+    start = time.perf_counter()
+    if workers == 1:
+        for result in map(_run_shard, shards):
+            merged.merge(result)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_run_shard, shards):
+                merged.merge(result)
+    merged.elapsed = time.perf_counter() - start
+    return merged
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="تحلیل جریانی بازی‌های ضبط شده")
+    parser.add_argument("paths", nargs="+", help="فایل‌های ضبط شده با game_record.py")
+    parser.add_argument("-a", "--aggregates", nargs="+", choices=sorted(AGGREGATES), default=sorted(AGGREGATES))
+    parser.add_argument("--workers", type=int, default=None, help="تعداد پردازه‌ها (پیش‌فرض: تعداد هسته‌ها)")
+    parser.add_argument("--chunk-size", type=int, default=1 << 20, help="اندازه تکه خواندن فایل (بایت)")
+    args = parser.parse_args(argv)
+
+    print(analyze_files(args.paths, args.aggregates, args.workers, args.chunk_size).report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,42 +4,77 @@ SUITS = ["♣️", "♦️", "♥️", "♠️"]
 RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
 RANK_VALUES = {rank: i for i, rank in enumerate(RANKS, 2)}
 
+# جدول‌های از پیش محاسبه‌شده؛ شناسه هر کارت عددی بین ۰ تا ۵۱ است (suit_index * 13 + rank_index)
+_SUIT_CHARS = ["C", "D", "H", "S"]
+CARD_COUNT = len(SUITS) * len(RANKS)
+CARD_SUIT_INDEX = tuple(i // len(RANKS) for i in range(CARD_COUNT))
+CARD_RANK_VALUE = tuple(i % len(RANKS) + 2 for i in range(CARD_COUNT))
+CARD_IMAGE_FILENAMES = tuple(f"{rank}{suit_char}.png" for suit_char in _SUIT_CHARS for rank in RANKS)
+
 class Card:
-    """کلاسی برای نمایش یک کارت بازی."""
-    def __init__(self, suit: str, rank: str):
+    """
+    کلاسی برای نمایش یک کارت بازی.
+    کارت‌ها interned هستند: برای هر جفت (خال، رتبه) فقط یک نمونه ساخته می‌شود،
+    بنابراین مقایسه و hash فقط روی شناسه عددی کارت انجام می‌شود.
+    """
+    __slots__ = ("id", "suit", "rank", "suit_index", "value", "image_filename")
+    _interned = {}
+
+    def __new__(cls, suit: str, rank: str):
+        card = cls._interned.get((suit, rank))
+        if card is not None:
+            return card
         if suit not in SUITS:
             raise ValueError(f"خال نامعتبر: {suit}")
         if rank not in RANKS:
             raise ValueError(f"رتبه نامعتبر: {rank}")
-            
-        self.suit = suit
-        self.rank = rank
-        
-        # ایجاد نام فایل تصویر بر اساس خال و رتبه
-        rank_map = {'J': 'J', 'Q': 'Q', 'K': 'K', 'A': 'A'}
-        suit_map = {"♣️": "C", "♦️": "D", "♥️": "H", "♠️": "S"}
-        
-        rank_char = rank_map.get(rank, rank) 
-        suit_char = suit_map[suit]
-        
-        self.image_filename = f"{rank_char}{suit_char}.png"
+        raise ValueError(f"کارت نامعتبر: {rank}{suit}")
+
+    @classmethod
+    def _create(cls, card_id: int) -> "Card":
+        card = object.__new__(cls)
+        card.id = card_id
+        card.suit_index = CARD_SUIT_INDEX[card_id]
+        card.suit = SUITS[card.suit_index]
+        card.rank = RANKS[card_id % len(RANKS)]
+        card.value = CARD_RANK_VALUE[card_id]
+        card.image_filename = CARD_IMAGE_FILENAMES[card_id]
+        cls._interned[(card.suit, card.rank)] = card
+        return card
+
+    @staticmethod
+    def from_id(card_id: int) -> "Card":
+        """کارت متناظر با یک شناسه عددی (۰ تا ۵۱) را برمی‌گرداند."""
+        return ALL_CARDS[card_id]
 
     def __repr__(self) -> str:
         return f"{self.rank}{self.suit}"
 
     def __eq__(self, other):
-        # این متد برای مقایسه دو کارت لازم است
-        return isinstance(other, Card) and self.rank == other.rank and self.suit == other.suit
+        # به خاطر intern شدن، در عمل مقایسه هویتی کافی است
+        return self is other or (isinstance(other, Card) and self.id == other.id)
 
     def __hash__(self):
-        # این متد برای استفاده از کارت‌ها در دیکشنری یا ست لازم است
-        return hash((self.rank, self.suit))
+        return self.id
+
+    def __reduce__(self):
+        # حفظ یکتایی کارت‌ها هنگام pickle (مثلا بین پردازه‌ها)
+        return (Card.from_id, (self.id,))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+ALL_CARDS = tuple(Card._create(card_id) for card_id in range(CARD_COUNT))
 
 
 class Deck:
     """کلاسی برای نمایش یک دسته کارت استاندارد ۵۲ تایی."""
     def __init__(self):
-        self.cards = [Card(suit, rank) for suit in SUITS for rank in RANKS]
+        self.cards = list(ALL_CARDS)
 
     def __repr__(self) -> str:
         return f"دسته کارت با {len(self.cards)} کارت"
@@ -47,8 +82,9 @@ class Deck:
     def __len__(self) -> int:
         return len(self.cards)
 
-    def shuffle(self):
-        random.shuffle(self.cards)
+    def shuffle(self, rng=None):
+        """دسته را بُر می‌زند؛ rng یک random.Random اختیاری برای تکرارپذیری است."""
+        (rng or random).shuffle(self.cards)
 
     def deal(self) -> Card | None:
         """یک کارت از روی دسته برمی‌دارد. اگر کارتی باقی نمانده باشد، None برمی‌گرداند."""
@@ -56,6 +92,86 @@ class Deck:
             return None
         return self.cards.pop()
 
+
+def _cards_mask(cards) -> int:
+    mask = 0
+    for card in cards:
+        if card.__class__ is Card:  # کارت‌های غیر استاندارد (مثل کارت گنجفه) در bitmask نمی‌آیند
+            mask |= 1 << card.id
+    return mask
+
+
+class Hand(list):
+    """
+    لیست کارت‌های دست که bitmask آن (بیت card.id برای هر کارت) را همراه با هر تغییر به‌روز نگه
+    می‌دارد، تا player.hand_mask بدون پیمایش دست O(1) باشد. ترتیب و رفتار لیست تغییری نمی‌کند.
+    """
+    __slots__ = ("mask",)
+
+    def __init__(self, cards=()):
+        list.__init__(self, cards)
+        self.mask = _cards_mask(self)
+
+    @classmethod
+    def _with_mask(cls, cards, mask: int) -> "Hand":
+        """ساخت سریع وقتی mask از قبل معلوم است (مثلا در restore)."""
+        hand = cls.__new__(cls)
+        list.__init__(hand, cards)
+        hand.mask = mask
+        return hand
+
+    def __reduce__(self):
+        return (Hand, (list(self),))
+
+    def __copy__(self):
+        return Hand(self)
+
+    def __deepcopy__(self, memo):
+        return Hand(self)  # کارت‌ها interned هستند
+
+    def append(self, card):
+        list.append(self, card)
+        if card.__class__ is Card:
+            self.mask |= 1 << card.id
+
+    def insert(self, index, card):
+        list.insert(self, index, card)
+        if card.__class__ is Card:
+            self.mask |= 1 << card.id
+
+    def extend(self, cards):
+        cards = list(cards)
+        list.extend(self, cards)
+        self.mask |= _cards_mask(cards)
+
+    def __iadd__(self, cards):
+        self.extend(cards)
+        return self
+
+    def remove(self, card):
+        list.remove(self, card)
+        if card.__class__ is Card:
+            self.mask &= ~(1 << card.id)
+
+    def pop(self, index=-1):
+        card = list.pop(self, index)
+        if card.__class__ is Card:
+            self.mask &= ~(1 << card.id)
+        return card
+
+    def clear(self):
+        list.clear(self)
+        self.mask = 0
+
+    def __setitem__(self, index, value):
+        list.__setitem__(self, index, value)
+        self.mask = _cards_mask(self)
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self.mask = _cards_mask(self)
+
+
 class Player:
     """کلاسی برای نمایش یک بازیکن."""
     def __init__(self, name: str):
@@ -68,6 +184,17 @@ class Player:
     def __repr__(self) -> str:
         return self.name
 
+    def __setattr__(self, name, value):
+        # لیست‌های معمولی (مثل p.hand = [] یا restore) به Hand تبدیل می‌شوند؛ خواندن p.hand هزینه‌ای ندارد
+        if name == "hand" and value.__class__ is not Hand:
+            value = Hand(value)
+        object.__setattr__(self, name, value)
+
+    @property
+    def hand_mask(self) -> int:
+        """دست بازیکن به صورت bitmask (بیت card.id برای هر کارت)؛ ابزارهای آن در hand_bitboard هستند."""
+        return self.hand.mask
+
     def add_card(self, card: Card):
         """یک کارت به دست بازیکن اضافه می‌کند."""
         if card:
@@ -0,0 +1,62 @@
+class GameEvent:
+    """یک رویداد موتور بازی (مثل 'card_played' یا 'trick_won') همراه با داده‌های آن."""
+    __slots__ = ("kind", "data")
+
+    def __init__(self, kind: str, data: dict):
+        self.kind = kind
+        self.data = data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __repr__(self):
+        return f"GameEvent({self.kind}, {self.data})"
+
+
+class EventSource:
+    """
+    پایه مشترک موتورها برای جریان رویداد.
+    موتور با _emit رویداد می‌فرستد؛ رابط گرافیکی (یا ضبط‌کننده) با subscribe آن‌ها را دریافت می‌کند.
+    apply_move رویدادهای یک حرکت را جمع کرده و برمی‌گرداند. وقتی شنونده‌ای نباشد، _emit تقریبا هزینه‌ای ندارد.
+    """
+    _listeners = ()
+    _move_events = None
+
+    def subscribe(self, listener):
+        if not self._listeners:
+            self._listeners = []
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, kind: str, **data):
+        if self._move_events is None and not self._listeners:
+            return
+        event = GameEvent(kind, data)
+        if self._move_events is not None:
+            self._move_events.append(event)
+        for listener in list(self._listeners):
+            listener(event)
+
+    def apply_move(self, move: dict) -> list[GameEvent]:
+        """
+        حرکت move (دیکشنری با کلید 'action') را اجرا کرده و رویدادهای تولید شده را برمی‌گرداند.
+        هر موتور اکشن‌های خود را در MOVE_HANDLERS به نام متد نگاشت می‌کند.
+        """
+        handler = self.MOVE_HANDLERS.get(move.get('action'))
+        if handler is None:
+            raise ValueError(f"حرکت نامعتبر: {move}")
+        outer_events = self._move_events
+        self._move_events = events = []
+        try:
+            getattr(self, handler)(move)
+        finally:
+            self._move_events = outer_events
+        if outer_events is not None:
+            outer_events.extend(events)
+        return events
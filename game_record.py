@@ -0,0 +1,446 @@
+"""
+فرمت باینری فشرده ضبط بازی‌ها و پخش دوباره آن‌ها.
+
+هر فایل با MAGIC شروع می‌شود و پس از آن یک یا چند رکورد بازی می‌آید. هر رکورد:
+    طول سرآیند (varint) + سرآیند JSON (نام بازی، seed، گزینه‌های سازنده موتور)
+    حرکت‌ها (دیکشنری‌های apply_move) پشت سر هم، و در پایان بایت END.
+مقدارها با یک بایت برچسب کد می‌شوند؛ کارت‌های استاندارد (شناسه ۰ تا ۵۱) و رشته‌های تکراری
+(نام اکشن‌ها، کلیدها، خال‌ها) فقط یک بایت می‌گیرند، پس هر حرکت حکم حدود ۴ بایت است.
+
+موتور با random.Random(seed) ساخته می‌شود و پیش از هر حرکت rng آن با (seed، شماره حرکت)
+دوباره seed می‌شود؛ بنابراین اتفاق‌های شانسی داخل حرکت‌ها (بُر زدن، پخش) مستقل از مصرف rng
+توسط AI بین حرکت‌ها هستند و پخش دوباره فقط با اجرای حرکت‌ها دقیقا همان بازی را می‌سازد.
+
+نمونه:
+    python game_record.py record hokm --seed 7 -o hokm.icgr
+    python game_record.py replay hokm.icgr --to 120
+"""
+import argparse
+import importlib
+import json
+import random
+import struct
+import sys
+import time
+from game_basics import ALL_CARDS, Card
+from game_state import Seat
+
+MAGIC = b"ICGREC01"
+
+ENGINES = {
+    'hokm': ('hokm_game', 'HokmGame'),
+    'bidel': ('bidel_game', 'BidelGame'),
+    'ganjifeh': ('ganjifeh_game', 'GanjifehGame'),
+    'chahar_barg': ('chahar_barg_game', 'ChaharBargGame'),
+    'haft_khaj': ('haft_khaj_game', 'HaftKhajGame'),
+    'nakhoda': ('nakhoda_game', 'NakhodaGame'),
+    'amerikaii': ('amerikaii_game', 'AmerikaiiGame'),
+    'rummy': ('rummy_game', 'RummyGame'),
+    'bluff': ('bluff_game', 'BluffGame'),
+    'bibi_salam': ('bibi_salam_game', 'BibiSalamGame'),
+    'chos_e_fil': ('chos_e_fil_game', 'ChosEFilGame'),
+    'haft_o_nim': ('haft_o_nim_game', 'HaftONimGame'),
+    'shelem': ('shelem_game', 'ShelemGame'),
+}
+
+# برچسب‌های مقدار
+_NONE, _FALSE, _TRUE, _INT, _NEW_STR, _LIST, _DICT, _SEAT, _ENGINE_CARD, _STR_REF, _FLOAT, _TUPLE, _END = range(13)
+_CARD_BASE = 0x40  # 0x40 + card.id برای کارت‌های استاندارد
+_SMALL_STR_REF = 0x80  # 0x80 + شماره رشته برای ۱۲۸ رشته اول
+_FLOAT_STRUCT = struct.Struct("<d")
+
+
+def create_engine(game_name: str, seed: int, options: dict = None):
+    """موتور بازی را با rng قطعی ساخته شده از seed می‌سازد."""
+    if game_name not in ENGINES:
+        raise ValueError(f"بازی نامعتبر: {game_name}")
+    module_name, class_name = ENGINES[game_name]
+    engine_class = getattr(importlib.import_module(module_name), class_name)
+    return engine_class(rng=random.Random(seed), **(options or {}))
+
+
+def reseed(game, seed: int, move_index: int):
+    game.rng.seed(seed * 1_000_003 + move_index)
+
+
+# --- کدگذاری ---
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class _Encoder:
+    """کدگذار مقدارهای یک رکورد؛ جدول رشته‌ها در طول رکورد ساخته می‌شود."""
+    def __init__(self, game):
+        self.game = game
+        self.strings = {}
+        self.seat_of = {id(p): i for i, p in enumerate(game._state_players())}
+        self.engine_card_type = type(game._cards_by_id[0]) if hasattr(game, '_cards_by_id') else None
+
+    def encode(self, out: bytearray, value):
+        value_type = type(value)
+        if value_type is Card:
+            out.append(_CARD_BASE + value.id)
+        elif value_type is str:
+            index = self.strings.get(value)
+            if index is None:
+                self.strings[value] = len(self.strings)
+                data = value.encode()
+                out.append(_NEW_STR)
+                _write_varint(out, len(data))
+                out += data
+            elif index < 0x80:
+                out.append(_SMALL_STR_REF + index)
+            else:
+                out.append(_STR_REF)
+                _write_varint(out, index)
+        elif value is None:
+            out.append(_NONE)
+        elif value_type is bool:
+            out.append(_TRUE if value else _FALSE)
+        elif value_type is int:
+            out.append(_INT)
+            _write_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+        elif value_type is float:
+            out.append(_FLOAT)
+            out += _FLOAT_STRUCT.pack(value)
+        elif value_type is list or value_type is tuple:
+            out.append(_LIST if value_type is list else _TUPLE)
+            _write_varint(out, len(value))
+            for item in value:
+                self.encode(out, item)
+        elif value_type is dict:
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                self.encode(out, key)
+                self.encode(out, item)
+        elif value_type is self.engine_card_type:
+            out.append(_ENGINE_CARD)
+            _write_varint(out, self.game._card_id(value))
+        elif id(value) in self.seat_of:
+            out.append(_SEAT)
+            _write_varint(out, self.seat_of[id(value)])
+        else:
+            raise TypeError(f"مقدار قابل ضبط نیست: {value!r}")
+
+
+def _read_varint(data, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+_card_tables = {}
+
+
+def _engine_card_table(game_name: str):
+    """کارت‌های مخصوص بازی به ترتیب شناسه (مثل گنجفه)، یا None برای بازی‌های با کارت استاندارد."""
+    if game_name not in _card_tables:
+        _card_tables[game_name] = getattr(create_engine(game_name, 0), '_cards_by_id', None)
+    return _card_tables[game_name]
+
+
+def bind_seats(value, players):
+    """ارجاع‌های Seat در یک حرکت خوانده شده را به اشیای بازیکن موتور داده شده تبدیل می‌کند."""
+    value_type = type(value)
+    if value_type is Seat:
+        return players[value]
+    if value_type is dict:
+        return {key: bind_seats(item, players) for key, item in value.items()}
+    if value_type is list or value_type is tuple:
+        return value_type(bind_seats(item, players) for item in value)
+    return value
+
+
+class _Decoder:
+    """بازیکن‌ها به صورت Seat خوانده می‌شوند تا رکورد به یک موتور خاص وابسته نباشد."""
+    def __init__(self, data, pos: int, card_table=None):
+        self.data = data
+        self.pos = pos
+        self.card_table = card_table
+        self.strings = []
+        self.has_seats = False
+
+    def varint(self) -> int:
+        value, self.pos = _read_varint(self.data, self.pos)
+        return value
+
+    def decode(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag >= _SMALL_STR_REF:
+            return self.strings[tag - _SMALL_STR_REF]
+        if tag >= _CARD_BASE:
+            return ALL_CARDS[tag - _CARD_BASE]
+        if tag == _NEW_STR:
+            length = self.varint()
+            if self.pos + length > len(self.data):
+                raise IndexError("رکورد ناقص است.")
+            value = bytes(self.data[self.pos:self.pos + length]).decode()
+            self.pos += length
+            self.strings.append(value)
+            return value
+        if tag == _STR_REF:
+            return self.strings[self.varint()]
+        if tag == _NONE:
+            return None
+        if tag == _FALSE or tag == _TRUE:
+            return tag == _TRUE
+        if tag == _INT:
+            zigzag = self.varint()
+            return zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+        if tag == _FLOAT:
+            if self.pos + _FLOAT_STRUCT.size > len(self.data):
+                raise IndexError("رکورد ناقص است.")
+            (value,) = _FLOAT_STRUCT.unpack_from(self.data, self.pos)
+            self.pos += _FLOAT_STRUCT.size
+            return value
+        if tag == _LIST or tag == _TUPLE:
+            items = [self.decode() for _ in range(self.varint())]
+            return items if tag == _LIST else tuple(items)
+        if tag == _DICT:
+            result = {}
+            for _ in range(self.varint()):
+                key = self.decode()
+                result[key] = self.decode()
+            return result
+        if tag == _ENGINE_CARD:
+            return self.card_table[self.varint()]
+        if tag == _SEAT:
+            self.has_seats = True
+            return Seat(self.varint())
+        raise ValueError(f"برچسب نامعتبر {tag} در بایت {self.pos - 1}")
+
+    def at_end(self) -> bool:
+        if self.data[self.pos] == _END:
+            self.pos += 1
+            return True
+        return False
+
+
+# --- نوشتن ---
+
+class GameRecorder:
+    """
+    ضبط جریانی یک بازی: موتور را می‌سازد و هر حرکتی که با apply اجرا شود بلافاصله به فایل اضافه می‌شود.
+    چند ضبط‌کننده می‌توانند پشت سر هم روی یک فایل بنویسند (یک رکورد برای هر بازی).
+    """
+    def __init__(self, game_name: str, seed: int, file, **options):
+        self.game_name = game_name
+        self.seed = seed
+        self.file = file
+        self.game = create_engine(game_name, seed, options)
+        self.move_count = 0
+        self._encoder = _Encoder(self.game)
+        header = json.dumps({"game": game_name, "seed": seed, "options": options}, ensure_ascii=False).encode()
+        out = bytearray()
+        if file.tell() == 0:
+            out += MAGIC
+        _write_varint(out, len(header))
+        out += header
+        file.write(out)
+
+    def apply(self, move: dict) -> list:
+        reseed(self.game, self.seed, self.move_count)
+        events = self.game.apply_move(move)
+        out = bytearray()
+        self._encoder.encode(out, move)
+        self.file.write(out)
+        self.move_count += 1
+        return events
+
+    def close(self):
+        """پایان رکورد را می‌نویسد (فایل را نمی‌بندد)."""
+        self.file.write(bytes((_END,)))
+        self.file.flush()
+
+
+def record_ai_game(game_name: str, seed: int, file, max_moves=5000, **options) -> int:
+    """یک بازی کامل AI در برابر AI را ضبط کرده و تعداد حرکت‌ها را برمی‌گرداند."""
+    recorder = GameRecorder(game_name, seed, file, **options)
+    game = recorder.game
+    while recorder.move_count < max_moves:
+        reseed(game, seed, recorder.move_count)
+        move = game.ai_move()
+        if move is None:
+            break
+        recorder.apply(move)
+    recorder.close()
+    return recorder.move_count
+
+
+# --- خواندن ---
+
+class GameRecord:
+    """یک رکورد خوانده شده: سرآیند و لیست حرکت‌ها (بازیکن‌ها به صورت Seat؛ bind_seats را ببینید)."""
+    __slots__ = ("game_name", "seed", "options", "moves", "has_seats")
+
+    def __init__(self, game_name: str, seed: int, options: dict, moves: list, has_seats=False):
+        self.game_name = game_name
+        self.seed = seed
+        self.options = options
+        self.moves = moves
+        self.has_seats = has_seats
+
+    def new_engine(self):
+        return create_engine(self.game_name, self.seed, self.options)
+
+    def __repr__(self):
+        return f"GameRecord({self.game_name}, seed={self.seed}, {len(self.moves)} حرکت)"
+
+
+def _read_record(data, pos: int):
+    """
+    رکورد شروع شده از pos را می‌خواند؛ (رکورد، موقعیت بعدی) برمی‌گرداند.
+    اگر داده پیش از پایان رکورد تمام شود IndexError می‌دهد (stream_records را ببینید).
+    """
+    header_len, pos = _read_varint(data, pos)
+    if pos + header_len > len(data):
+        raise IndexError("رکورد ناقص است.")
+    header = json.loads(bytes(data[pos:pos + header_len]).decode())
+    record = GameRecord(header["game"], header["seed"], header.get("options", {}), [])
+    decoder = _Decoder(data, pos + header_len, _engine_card_table(record.game_name))
+    while not decoder.at_end():
+        record.moves.append(decoder.decode())
+    record.has_seats = decoder.has_seats
+    return record, decoder.pos
+
+
+def iter_records(data):
+    """رکوردهای یک فایل (bytes، memoryview یا mmap) را یکی یکی تولید می‌کند."""
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("فایل ضبط بازی نامعتبر است.")
+    pos = len(MAGIC)
+    while pos < len(data):
+        record, pos = _read_record(data, pos)
+        yield record
+
+
+def stream_records(path: str, chunk_size=1 << 20):
+    """
+    رکوردهای فایل را با خواندن تکه‌های chunk_size بایتی تولید می‌کند؛ حافظه مصرفی به اندازه
+    یک تکه (یا بزرگ‌ترین رکورد) است، نه کل فایل.
+    """
+    with open(path, "rb") as f:
+        buffer = bytearray(f.read(max(chunk_size, len(MAGIC))))
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("فایل ضبط بازی نامعتبر است.")
+        pos = len(MAGIC)
+        while True:
+            if pos < len(buffer):
+                try:
+                    record, end = _read_record(buffer, pos)
+                except IndexError:
+                    pass  # رکورد در تکه بعدی ادامه دارد
+                else:
+                    pos = end
+                    yield record
+                    continue
+            chunk = f.read(chunk_size)
+            if not chunk:
+                if pos < len(buffer):
+                    raise ValueError(f"فایل {path} در میانه یک رکورد تمام شده است.")
+                return
+            del buffer[:pos]
+            buffer += chunk
+            pos = 0
+
+
+def read_records(path: str) -> list[GameRecord]:
+    with open(path, "rb") as f:
+        return list(iter_records(f.read()))
+
+
+# --- پخش دوباره ---
+
+class ReplayPlayer:
+    """
+    پخش دوباره یک رکورد: seek(index) موتور را به وضعیت پس از index حرکت می‌برد.
+    جلو رفتن فقط اجرای apply_move بدون شنونده است (بدون رندر وضعیت‌های میانی)؛ برای عقب رفتن
+    هر checkpoint_every حرکت یک snapshot (game_state.py) نگه داشته می‌شود.
+    """
+    def __init__(self, record: GameRecord, checkpoint_every=32):
+        self.record = record
+        self.checkpoint_every = checkpoint_every
+        self.game = record.new_engine()
+        self.position = 0
+        self._checkpoints = {0: self.game.snapshot(include_rng=True)}
+
+    def __len__(self) -> int:
+        return len(self.record.moves)
+
+    def step(self) -> list:
+        """حرکت بعدی را اجرا کرده و رویدادهای آن را برمی‌گرداند."""
+        move = self.record.moves[self.position]
+        if self.record.has_seats:
+            move = bind_seats(move, self.game._state_players())
+        reseed(self.game, self.record.seed, self.position)
+        events = self.game.apply_move(move)
+        self.position += 1
+        if self.position % self.checkpoint_every == 0 and self.position not in self._checkpoints:
+            self._checkpoints[self.position] = self.game.snapshot(include_rng=True)
+        return events
+
+    def seek(self, index: int):
+        index = max(0, min(index, len(self)))
+        if index < self.position:
+            base = max(i for i in self._checkpoints if i <= index)
+            self.game.restore(self._checkpoints[base])
+            self.position = base
+        while self.position < index:
+            self.step()
+        return self.game
+
+
+# --- خط فرمان ---
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ضبط و پخش دوباره بازی‌ها")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="ضبط بازی‌های AI در برابر AI")
+    rec.add_argument("game", choices=sorted(ENGINES))
+    rec.add_argument("-o", "--output", required=True)
+    rec.add_argument("-n", "--games", type=int, default=1)
+    rec.add_argument("--seed", type=int, default=0)
+    rec.add_argument("--difficulty", default="medium", choices=["easy", "medium", "hard"])
+    rec.add_argument("--append", action="store_true", help="اضافه کردن به انتهای فایل موجود")
+
+    play = commands.add_parser("replay", help="جلو بردن یک رکورد تا حرکت مشخص")
+    play.add_argument("path")
+    play.add_argument("--record", type=int, default=0, help="شماره رکورد در فایل")
+    play.add_argument("--to", type=int, default=None, help="شماره حرکت (پیش‌فرض: پایان بازی)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        start = time.perf_counter()
+        with open(args.output, "ab" if args.append else "wb") as f:
+            moves = sum(record_ai_game(args.game, args.seed + i, f, difficulty=args.difficulty)
+                        for i in range(args.games))
+            size = f.tell()
+        print(f"{args.games} بازی ({moves} حرکت) در {time.perf_counter() - start:.2f} ثانیه ضبط شد؛ "
+              f"حجم فایل {size} بایت ({size / max(moves, 1):.1f} بایت/حرکت)")
+        return 0
+
+    records = read_records(args.path)
+    record = records[args.record]
+    replay = ReplayPlayer(record)
+    start = time.perf_counter()
+    game = replay.seek(len(replay) if args.to is None else args.to)
+    print(f"{record}: حرکت {replay.position} در {(time.perf_counter() - start) * 1000:.1f} ms")
+    for player in game._state_players():
+        print(f"    {player.name}: {player.hand}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
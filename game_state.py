@@ -0,0 +1,249 @@
+"""
+snapshot و restore سریع وضعیت موتورهای بازی.
+
+هر موتور فیلدهای وضعیت خود را در STATE_FIELDS و فیلدهای هر بازیکن را در PLAYER_STATE_FIELDS
+اعلام می‌کند. snapshot() این فیلدها را به یک GameState تغییرناپذیر تبدیل می‌کند: لیست‌ها به
+تاپل، دیکشنری‌ها به تاپل جفت‌ها و ارجاع به بازیکن به شماره صندلی. چون کارت‌ها interned و
+تغییرناپذیرند خودشان کپی نمی‌شوند، پس هزینه snapshot فقط ساختن چند تاپل کوچک است.
+
+مقایسه زمان با copy.deepcopy:
+    python game_state.py --moves 20 --repeat 2000
+"""
+import argparse
+import copy
+import random
+import sys
+import time
+from game_basics import ALL_CARDS, Card, Deck, Hand
+
+
+class Seat(int):
+    """ارجاع به یک بازیکن با شماره صندلی (تا GameState به اشیای Player وابسته نباشد)."""
+    __slots__ = ()
+
+
+class SeatCard(int):
+    """جفت (بازیکن، کارت) مثل خانه‌های trick_cards به صورت یک عدد: seat * 64 + card.id."""
+    __slots__ = ()
+
+
+class FrozenList(tuple):
+    __slots__ = ()
+
+
+class FrozenDict(tuple):
+    """دیکشنری به صورت تاپل جفت‌های (کلید، مقدار) با حفظ ترتیب."""
+    __slots__ = ()
+
+
+class FrozenHand(tuple):
+    """دست بازیکن به صورت (mask، کارت‌ها) تا restore دوباره mask را نسازد."""
+    __slots__ = ()
+
+
+class FrozenDeck(tuple):
+    __slots__ = ()
+
+
+_ATOMIC = {Card, str, int, float, bool, type(None)}
+
+
+def register_immutable(cls):
+    """نوع کارت‌های مخصوص یک بازی (مثل کارت گنجفه) را تغییرناپذیر اعلام می‌کند تا بدون کپی در snapshot بیایند."""
+    _ATOMIC.add(cls)
+    return cls
+
+
+def _freeze_items(values, seat_of):
+    if _ATOMIC.issuperset(map(type, values)):
+        return values  # مسیر سریع: لیست کارت‌ها یا اعداد
+    return [_freeze(value, seat_of) for value in values]
+
+
+def _freeze_tuple(value, seat_of):
+    if len(value) == 2 and type(value[1]) in _ATOMIC:
+        seat = seat_of.get(id(value[0]))
+        if seat is not None:
+            card = value[1]
+            return SeatCard(seat << 6 | card.id) if type(card) is Card else (Seat(seat), card)
+    return tuple(_freeze_items(value, seat_of))
+
+
+_FREEZERS = {
+    list: lambda value, seat_of: FrozenList(_freeze_items(value, seat_of)),
+    Hand: lambda value, seat_of: FrozenHand((value.mask, tuple(value))),
+    tuple: _freeze_tuple,
+    dict: lambda value, seat_of: FrozenDict((key, _freeze(item, seat_of)) for key, item in value.items()),
+    Deck: lambda value, seat_of: FrozenDeck(value.cards),
+}
+
+
+def register_state_type(cls, frozen_cls, freeze, thaw):
+    """
+    نوع وضعیت مخصوص یک بازی (مثل باور AI بلوف) را قابل snapshot می‌کند: freeze(value) یک
+    frozen_cls تغییرناپذیر و thaw(frozen) یک شیء تازه برمی‌گرداند.
+    """
+    _FREEZERS[cls] = lambda value, seat_of: freeze(value)
+    _THAWERS[frozen_cls] = lambda value, players: thaw(value)
+    return cls
+
+
+def _freeze(value, seat_of: dict):
+    freezer = _FREEZERS.get(type(value))
+    if freezer is not None:
+        return freezer(value, seat_of)
+    seat = seat_of.get(id(value))
+    return value if seat is None else Seat(seat)
+
+
+def _thaw_items(values, players):
+    if _ATOMIC.issuperset(map(type, values)):
+        return values
+    return [_thaw(value, players) for value in values]
+
+
+def _thaw_deck(value, players):
+    deck = Deck.__new__(Deck)
+    deck.cards = list(value)
+    return deck
+
+
+_THAWERS = {
+    FrozenList: lambda value, players: list(_thaw_items(value, players)),
+    tuple: lambda value, players: tuple(_thaw_items(value, players)),
+    FrozenDict: lambda value, players: {key: _thaw(item, players) for key, item in value},
+    FrozenHand: lambda value, players: Hand._with_mask(value[1], value[0]),
+    FrozenDeck: _thaw_deck,
+    Seat: lambda value, players: players[value],
+    SeatCard: lambda value, players: (players[value >> 6], ALL_CARDS[value & 63]),
+}
+
+
+def _thaw(value, players):
+    thawer = _THAWERS.get(type(value))
+    return value if thawer is None else thawer(value, players)
+
+
+class GameState:
+    """
+    وضعیت تغییرناپذیر یک موتور: fields به ترتیب STATE_FIELDS، seats برای هر بازیکن
+    به ترتیب PLAYER_STATE_FIELDS، و در صورت درخواست وضعیت rng.
+    """
+    __slots__ = ("fields", "seats", "rng_state")
+
+    def __init__(self, fields: tuple, seats: tuple, rng_state=None):
+        object.__setattr__(self, "fields", fields)
+        object.__setattr__(self, "seats", seats)
+        object.__setattr__(self, "rng_state", rng_state)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GameState تغییرناپذیر است.")
+
+    def __eq__(self, other):
+        return isinstance(other, GameState) and self.fields == other.fields and self.seats == other.seats
+
+    def __hash__(self):
+        return hash((self.fields, self.seats))
+
+    def __repr__(self):
+        return f"GameState({len(self.fields)} فیلد، {len(self.seats)} بازیکن)"
+
+
+class Snapshottable:
+    """
+    پایه مشترک snapshot/restore موتورها.
+    کش‌های مشتق شده (مثل نمایه برداشت چهاربرگ) در STATE_FIELDS نمی‌آیند و در _after_restore
+    دوباره ساخته می‌شوند.
+    """
+    STATE_FIELDS = ()
+    PLAYER_STATE_FIELDS = ("hand",)
+
+    def _state_players(self) -> list:
+        return self.players
+
+    def snapshot(self, include_rng=False) -> GameState:
+        players = self._state_players()
+        seat_of = {id(player): i for i, player in enumerate(players)}
+        fields = tuple(_freeze(getattr(self, name), seat_of) for name in self.STATE_FIELDS)
+        seats = tuple(tuple(_freeze(getattr(player, name), seat_of) for name in self.PLAYER_STATE_FIELDS)
+                      for player in players)
+        rng_state = self.rng.getstate() if include_rng else None
+        return GameState(fields, seats, rng_state)
+
+    def restore(self, state: GameState):
+        """وضعیت را به state برمی‌گرداند؛ اشیای Player همان اشیای قبلی می‌مانند."""
+        players = self._state_players()
+        for name, value in zip(self.STATE_FIELDS, state.fields):
+            setattr(self, name, _thaw(value, players))
+        for player, values in zip(players, state.seats):
+            for name, value in zip(self.PLAYER_STATE_FIELDS, values):
+                setattr(player, name, _thaw(value, players))
+        if state.rng_state is not None:
+            self.rng.setstate(state.rng_state)
+        self._after_restore()
+
+    def _after_restore(self):
+        pass
+
+
+# --- مقایسه زمان با copy.deepcopy ---
+
+def _engines():
+    from amerikaii_game import AmerikaiiGame
+    from bibi_salam_game import BibiSalamGame
+    from bidel_game import BidelGame
+    from bluff_game import BluffGame
+    from chahar_barg_game import ChaharBargGame
+    from chos_e_fil_game import ChosEFilGame
+    from ganjifeh_game import GanjifehGame
+    from haft_khaj_game import HaftKhajGame
+    from haft_o_nim_game import HaftONimGame
+    from hokm_game import HokmGame
+    from nakhoda_game import NakhodaGame
+    from rummy_game import RummyGame
+    from shelem_game import ShelemGame
+    return [HokmGame, BidelGame, GanjifehGame, ChaharBargGame, HaftKhajGame, NakhodaGame, AmerikaiiGame,
+            RummyGame, BluffGame, BibiSalamGame, ChosEFilGame, HaftONimGame,
+            ShelemGame]
+
+
+def _time_us(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def benchmark(moves=20, repeat=2000, seed=0) -> dict:
+    """برای هر موتور پس از moves حرکت AI، زمان snapshot، restore و deepcopy (میکروثانیه)."""
+    results = {}
+    for engine_class in _engines():
+        game = engine_class(rng=random.Random(seed))
+        for _ in range(moves):
+            move = game.ai_move()
+            if move is None:
+                break
+            game.apply_move(move)
+        state = game.snapshot()
+        results[engine_class.__name__] = {
+            "snapshot_us": _time_us(game.snapshot, repeat),
+            "restore_us": _time_us(lambda: game.restore(state), repeat),
+            "deepcopy_us": _time_us(lambda: copy.deepcopy(game), max(1, repeat // 10)),
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="مقایسه زمان snapshot/restore با copy.deepcopy")
+    parser.add_argument("--moves", type=int, default=20, help="تعداد حرکت‌های AI پیش از اندازه‌گیری")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    for name, result in benchmark(args.moves, args.repeat).items():
+        print(f"{name:16} snapshot {result['snapshot_us']:7.1f} us | restore {result['restore_us']:7.1f} us | "
+              f"deepcopy {result['deepcopy_us']:8.1f} us ({result['deepcopy_us'] / result['snapshot_us']:.0f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,9 @@
 import random
+from trick_search import Determinizer, TeamTricksGoal, known_voids, run_search
+from double_dummy import DoubleDummySolver, endgame_search
+from zobrist import TranspositionTable
+from game_events import EventSource
+from game_state import Snapshottable, register_immutable
 
 class Player:
     """یک کلاس ساده برای بازیکن که در این فایل استفاده می‌شود."""
@@ -10,6 +15,7 @@ class Player:
     def add_card(self, card):
         if card: self.hand.append(card)
 
+@register_immutable
 class GanjifehCard:
     """یک کارت گنجفه با خال و رتبه مخصوص به خود."""
     def __init__(self, suit: str, rank: str):
@@ -22,20 +28,38 @@ class GanjifehCard:
     def __hash__(self):
         return hash((self.rank, self.suit))
 
-class GanjifehGame:
+class GanjifehGame(EventSource, Snapshottable):
     """
     موتور و منطق یک بازی ساده شده با کارت‌های گنجفه (سبک حکم).
     """
     SUITS = ["شمشیر", "اشرفی", "چنگ", "برات", "تاج", "قماش", "غلام", "سکه"]
     RANKS = ["۱", "۲", "۳", "۴", "۵", "۶", "۷", "۸", "۹", "۱۰", "وزیر", "شاه"]
     RANK_VALUES = {rank: i for i, rank in enumerate(RANKS)}
+    SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+    # شناسه کارت برای جستجو: suit_index * LANE_BITS + rank_index (یک mask ۹۶ بیتی)
+    LANE_BITS = len(RANKS)
+    WINNING_TRICKS = 5  # از ۸ دست
+    MOVE_HANDLERS = {'play': '_move_play'}
+    STATE_FIELDS = ('deck', 'hokm_suit', 'team_trick_wins', 'current_player_index', 'trick_cards',
+                    'last_trick', 'trick_history', 'is_game_over')
 
-    def __init__(self, num_players=4, difficulty='medium'):
+    def __init__(self, num_players=4, difficulty='medium', rng=None, ai_time_budget=0.15, ai_iterations=None,
+                 ai_workers=1, ai_endgame_cards=5):
         self.difficulty = difficulty
+        self.rng = rng or random
+        # بودجه جستجوی AI سخت: زمان (ثانیه) و/یا تعداد تکرار برای هر حرکت، و تعداد پردازه‌های playout
+        self.ai_time_budget = ai_time_budget
+        self.ai_iterations = ai_iterations
+        self.ai_workers = ai_workers
+        # وقتی کارت‌های بازیکن به این تعداد برسد، AI سخت پایان بازی را دقیق حل می‌کند (۰ = هرگز)
+        self.ai_endgame_cards = ai_endgame_cards
+        self.endgame_table = None
+        self.last_search_stats = None
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players)]
         
         self.deck = self._create_ganjifeh_deck()
-        random.shuffle(self.deck)
+        self._cards_by_id = list(self.deck)
+        self.rng.shuffle(self.deck)
 
         self.teams = {
             "تیم ۱": [self.players[0], self.players[2]],
@@ -46,6 +70,9 @@ class GanjifehGame:
         self.current_player_index = 0
         self.hokm_suit = None
         self.trick_cards = []
+        self.last_trick = []
+        self.trick_history = []
+        self.is_game_over = False
 
         self._deal_cards(8)
         self._determine_hokm()
@@ -64,19 +91,16 @@ class GanjifehGame:
         suit_counts = {suit: 0 for suit in self.SUITS}
         for card in hakem.hand:
             suit_counts[card.suit] += 1
-        self.hokm_suit = max(suit_counts, key=suit_counts.get) if hakem.hand else random.choice(self.SUITS)
+        self.hokm_suit = max(suit_counts, key=suit_counts.get) if hakem.hand else self.rng.choice(self.SUITS)
 
     def _get_valid_moves(self, player: Player) -> list[GanjifehCard]:
         if not self.trick_cards:
             return player.hand
         
         lead_suit = self.trick_cards[0][1].suit
-        hand_suits = [c.suit for c in player.hand]
-        
-        if lead_suit in hand_suits:
-            return [c for c in player.hand if c.suit == lead_suit]
-        else:
-            return player.hand
+        # دسته گنجفه ۹۶ کارتی است و در bitboard استاندارد جا نمی‌شود؛ یک پیمایش کافی است
+        follow = [c for c in player.hand if c.suit == lead_suit]
+        return follow or player.hand
 
     def _determine_trick_winner(self) -> Player:
         if not self.trick_cards: return None
@@ -92,11 +116,99 @@ class GanjifehGame:
         
         return winner_player
 
+    def play_card(self, player: Player, card: GanjifehCard) -> Player | None:
+        """
+        کارت بازیکن را بازی کرده و نوبت را جلو می‌برد.
+        اگر دست کامل شود برنده آن را برمی‌گرداند؛ کارت‌های آن دست در last_trick می‌مانند.
+        """
+        player.hand.remove(card)
+        self.trick_cards.append((player, card))
+        self._emit('card_played', player=player, card=card)
+        if len(self.trick_cards) < len(self.players):
+            self.current_player_index = (self.current_player_index + 1) % len(self.players)
+            return None
+
+        winner = self._determine_trick_winner()
+        winner_team_name = "تیم ۱" if winner in self.teams["تیم ۱"] else "تیم ۲"
+        self.team_trick_wins[winner_team_name] += 1
+        self.current_player_index = self.players.index(winner)
+        self.last_trick = self.trick_cards
+        self.trick_history.append(self.trick_cards)
+        self.trick_cards = []
+        self._emit('trick_won', winner=winner, team=winner_team_name, cards=self.last_trick)
+
+        if not winner.hand:
+            self.is_game_over = True
+            wins = self.team_trick_wins
+            self._emit('game_over', winner=max(wins, key=wins.get) if wins["تیم ۱"] != wins["تیم ۲"] else None)
+        return winner
+
+    def _move_play(self, move: dict):
+        player = self.players[self.current_player_index]
+        if self.is_game_over or move['card'] not in self._get_valid_moves(player):
+            raise ValueError(f"حرکت غیرمجاز برای {player.name}: {move['card']}")
+        self.play_card(player, move['card'])
+
+    def ai_move(self) -> dict | None:
+        if self.is_game_over:
+            return None
+        return {'action': 'play', 'card': self.ai_choose_card(self.players[self.current_player_index])}
+
+    def _card_id(self, card: GanjifehCard) -> int:
+        return self.SUIT_INDEX[card.suit] * self.LANE_BITS + self.RANK_VALUES[card.rank]
+
+    def _team_index(self, player: Player) -> int:
+        return 0 if player in self.teams["تیم ۱"] else 1
+
+    def _search_root(self, player: Player) -> Determinizer:
+        """اطلاعات عمومی بازی از دید player برای ساختن determinizationهای سازگار با بازی‌های دیده شده."""
+        seat = self.players.index(player)
+        tricks = [[(self.players.index(p), self._card_id(c)) for p, c in trick]
+                  for trick in self.trick_history + [self.trick_cards]]
+        hand_mask = 0
+        for card in player.hand:
+            hand_mask |= 1 << self._card_id(card)
+        seen_mask = hand_mask
+        for trick in tricks:
+            for _, card_id in trick:
+                seen_mask |= 1 << card_id
+        hands = [None] * len(self.players)
+        hands[seat] = hand_mask
+        return Determinizer(
+            seat, hands, ((1 << len(self._cards_by_id)) - 1) & ~seen_mask, [len(p.hand) for p in self.players],
+            known_voids(tricks, len(self.players), self.LANE_BITS), tricks[-1], self.SUIT_INDEX[self.hokm_suit],
+            tuple(self._team_index(p) for p in self.players),
+            won_tricks=[self.team_trick_wins["تیم ۱"], self.team_trick_wins["تیم ۲"]], lane_bits=self.LANE_BITS)
+
+    def ai_search_card(self, player: Player) -> GanjifehCard:
+        """AI سخت: مانند حکم، جستجوی مونت‌کارلو روی determinizationهای دست حریفان و حل دقیق پایان بازی."""
+        valid_moves = self._get_valid_moves(player)
+        if len(valid_moves) == 1:
+            return valid_moves[0]
+
+        if len(player.hand) <= self.ai_endgame_cards:
+            if self.endgame_table is None:
+                self.endgame_table = TranspositionTable()
+            solver = DoubleDummySolver(self.SUIT_INDEX[self.hokm_suit], tuple(self._team_index(p) for p in self.players),
+                                       self._team_index(player), self.LANE_BITS, len(self.SUITS),
+                                       table=self.endgame_table)
+            self.last_search_stats = endgame_search(self._search_root(player), [self._card_id(c) for c in valid_moves],
+                                                    solver, self.rng, self.ai_time_budget, self.ai_iterations)
+            return self._cards_by_id[self.last_search_stats.best_move()]
+
+        goal = TeamTricksGoal(self._team_index(player), self.WINNING_TRICKS)
+        self.last_search_stats = run_search(self._search_root(player), [self._card_id(c) for c in valid_moves], goal,
+                                            self.rng, self.ai_time_budget, self.ai_iterations, goal.is_decided,
+                                            self.ai_workers)
+        return self._cards_by_id[self.last_search_stats.best_move()]
+
     def ai_choose_card(self, player: Player) -> GanjifehCard:
         valid_moves = self._get_valid_moves(player)
         if not valid_moves: return None
         
         if self.difficulty == 'easy':
-            return random.choice(valid_moves)
-        else: # Medium / Hard
+            return self.rng.choice(valid_moves)
+        elif self.difficulty == 'hard':
+            return self.ai_search_card(player)
+        else: # Medium
             return max(valid_moves, key=lambda c: self.RANK_VALUES[c.rank])
@@ -1,15 +1,20 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QGridLayout
-from PyQt5.QtCore import Qt, QTimer, QSize
+from PyQt5.QtCore import Qt, QSize
 from ganjifeh_game import GanjifehGame, GanjifehCard, Player
 from audio_manager import AudioManager
+from hand_view import HandView
+from event_presenter import EventPresenter
+
+class GanjifehGameWidget(EventPresenter, QWidget):
+    EVENT_HOLD_TIMES = {'trick_won': 2500}  # مدت نمایش رویداد پیش از رویداد بعدی
 
-class GanjifehGameWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
-        self.hand_card_widgets = {}
+        self.audio_manager = AudioManager.instance()
         self.trick_card_widgets = {}
+        self.shown_trick_wins = {}  # دست‌های برده هر تیم تا آخرین رویداد نمایش داده شده
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -33,80 +38,73 @@ class GanjifehGameWidget(QWidget):
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
 
     def start_new_game(self):
-        self.game = GanjifehGame()
+        self.clear_trick_widgets()
+        self.attach_game(GanjifehGame())
+        self.shown_trick_wins = dict(self.game.team_trick_wins)
         self.start_button.hide()
         self.audio_manager.play("shuffle")
-        self.process_trick_turn()
+        self.update_player_hand_display()
+        self.advance_engine()
+
+    # --- اجرای موتور و نمایش رویدادها ---
 
-    def process_trick_turn(self):
-        if len(self.game.players[0].hand) == 0:
-            winner_team = max(self.game.team_trick_wins, key=self.game.team_trick_wins.get)
-            self.status_label.setText(f"دور تمام شد! برنده: {winner_team}")
+    def human_to_move(self) -> bool:
+        """آیا موتور منتظر تصمیم بازیکن انسانی (یا شروع بازی جدید) است؟"""
+        return self.game.is_game_over or self.game.current_player_index == 0
+
+    def show_card_played(self, event):
+        self.audio_manager.play("play")
+        self.update_trick_display([(event['player'], event['card'])])
+        if event['player'] == self.game.players[0]:
+            self.update_player_hand_display()
+        next_index = (self.game.players.index(event['player']) + 1) % len(self.game.players)
+        self.update_status(self.game.players[next_index])
+
+    def show_trick_won(self, event):
+        self.shown_trick_wins[event['team']] += 1
+        self.status_label.setText(f"برنده دست: {event['winner'].name}")
+        self.audio_manager.play("win")
+        self.trick_done = True
+
+    def show_game_over(self, event):
+        self.status_label.setText(f"دور تمام شد! برنده: {event['winner'] or 'مساوی'}")
+        self.audio_manager.play("win")
+
+    def await_human(self):
+        if self.game.is_game_over:
             self.start_button.show()
-            self.audio_manager.play("win")
             return
-            
-        if not self.game.trick_cards:
-            self.clear_trick_widgets()
+        self.update_status(self.game.players[0])
+        self.set_hand_buttons_enabled(True)
 
-        self.update_displays()
-        
-        current_player = self.game.players[self.game.current_player_index]
-        if current_player == self.game.players[0]:
-            self.set_hand_buttons_enabled(True)
-        else:
-            self.set_hand_buttons_enabled(False)
-            QTimer.singleShot(1000, self.play_ai_turn)
-
-    def play_ai_turn(self):
-        player = self.game.players[self.game.current_player_index]
-        card_to_play = self.game.ai_choose_card(player)
-        self.on_card_clicked(card_to_play, is_human=False)
-
-    def on_card_clicked(self, card: GanjifehCard, is_human=True):
-        player = self.game.players[self.game.current_player_index]
-        if is_human and player != self.game.players[0]:
+    def on_card_clicked(self, card: GanjifehCard):
+        if self.presenting or not self.human_to_move() or self.game.is_game_over:
             return
-        
-        self.audio_manager.play("play")
-        self.game.trick_cards.append((player, card))
-        player.hand.remove(card)
-
-        if len(self.game.trick_cards) == len(self.game.players):
-            self.update_displays()
-            winner = self.game._determine_trick_winner()
-            winner_team_name = "تیم ۱" if winner in self.game.teams["تیم ۱"] else "تیم ۲"
-            self.game.team_trick_wins[winner_team_name] += 1
-            
-            self.status_label.setText(f"برنده دست: {winner.name}")
-            self.game.current_player_index = self.game.players.index(winner)
-            self.game.trick_cards = [] # Clear for next trick
-            self.audio_manager.play("win")
-            QTimer.singleShot(2500, self.process_trick_turn)
-        else:
-            self.game.current_player_index = (self.game.current_player_index + 1) % len(self.game.players)
-            self.process_trick_turn()
-            
-    def update_displays(self):
-        scores_text = "دست‌های برده: " + " | ".join([f"{name}: {score}" for name, score in self.game.team_trick_wins.items()])
-        self.status_label.setText(f"حکم: {self.game.hokm_suit} | نوبت: {self.game.players[self.game.current_player_index].name} | {scores_text}")
-        self.update_player_hand_display()
-        self.update_trick_display()
+        self.set_hand_buttons_enabled(False)
+        self.game.apply_move({'action': 'play', 'card': card})
+        self.advance_engine()
+
+    def update_status(self, player_to_move: Player):
+        scores_text = "دست‌های برده: " + " | ".join([f"{name}: {score}" for name, score in self.shown_trick_wins.items()])
+        self.status_label.setText(f"حکم: {self.game.hokm_suit} | نوبت: {player_to_move.name} | {scores_text}")
 
     def update_player_hand_display(self):
-        self.clear_layout(self.player_hand_layout)
         player = self.game.players[0]
-        for card in sorted(player.hand, key=lambda c: (c.suit, self.game.RANK_VALUES[c.rank])):
-            btn = QPushButton(str(card))
-            btn.setFixedSize(100, 50)
-            btn.clicked.connect(lambda _, c=card: self.on_card_clicked(c))
-            self.player_hand_layout.addWidget(btn)
+        self.hand_view.set_cards(sorted(player.hand, key=lambda c: (c.suit, self.game.RANK_VALUES[c.rank])))
+
+    def make_hand_card_widget(self, card):
+        btn = QPushButton(str(card))
+        btn.setFixedSize(100, 50)
+        btn.clicked.connect(lambda _, c=card: self.on_card_clicked(c))
+        return btn
             
-    def update_trick_display(self):
+    def update_trick_display(self, trick_cards):
         positions = {0: (2, 1), 1: (1, 2), 2: (0, 1), 3: (1, 0)}
-        for player, card in self.game.trick_cards:
+        for player, card in trick_cards:
             if card not in self.trick_card_widgets:
                 player_idx = self.game.players.index(player)
                 lbl = QLabel(str(card))
@@ -116,13 +114,8 @@ class GanjifehGameWidget(QWidget):
                 self.trick_card_widgets[card] = lbl
 
     def set_hand_buttons_enabled(self, enabled):
-        player = self.game.players[0]
-        valid_moves = self.game._get_valid_moves(player)
-        for i in range(self.player_hand_layout.count()):
-            widget = self.player_hand_layout.itemAt(i).widget()
-            # A simple text-based check for validity
-            is_valid = any(widget.text() == str(card) for card in valid_moves)
-            widget.setEnabled(enabled and is_valid)
+        valid_moves = self.game._get_valid_moves(self.game.players[0])
+        self.hand_view.set_enabled(lambda card: enabled and card in valid_moves)
     
     def clear_layout(self, layout):
         if layout is None: return
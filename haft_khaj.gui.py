@@ -1,16 +1,25 @@
 from collections import Counter
 import random
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QFrame, QInputDialog
-from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QSize
 from haft_khaj_game import HaftKhajGame, Card, SUITS
 from audio_manager import AudioManager
+from pixmap_cache import PixmapCache
+from hand_view import HandView
+from event_presenter import EventPresenter
+
+class HaftKhajGameWidget(EventPresenter, QWidget):
+    AI_MOVE_DELAY = 1500  # مکث پیش از نمایش حرکت AI
+    EVENT_HOLD_TIMES = {'cards_drawn': 1000}  # مدت نمایش رویداد پیش از رویداد بعدی
 
-class HaftKhajGameWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
+        self.audio_manager = AudioManager.instance()
+        self.pixmaps = PixmapCache.instance()
+        self.shown_top_card = None  # کارت رو و خال اعلام شده تا آخرین رویداد نمایش داده شده
+        self.shown_suit = None
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -36,103 +45,117 @@ class HaftKhajGameWidget(QWidget):
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
+        self.draw_button = QPushButton("کارت بکش")
+        self.draw_button.clicked.connect(self.on_draw_clicked)
+        self.draw_button.hide()
+        self.player_hand_layout.addWidget(self.draw_button)
 
     def start_new_game(self):
-        self.game = HaftKhajGame(num_players=3)
+        self.attach_game(HaftKhajGame(num_players=3))
+        self.shown_top_card = self.game.top_card()
+        self.shown_suit = None
         self.start_button.hide()
         self.audio_manager.play("shuffle")
-        self.process_turn()
+        self.update_displays()
+        self.advance_engine()
+
+    # --- اجرای موتور و نمایش رویدادها ---
+
+    def human_to_move(self) -> bool:
+        """آیا موتور منتظر تصمیم بازیکن انسانی (یا شروع بازی جدید) است؟"""
+        return self.game.is_game_over or self.game.current_player_index == 0
 
-    def process_turn(self):
+    def show_card_played(self, event):
+        self.audio_manager.play("play")
+        self.shown_top_card = event['card']
+        self.shown_suit = event['suit'] if event['card'].rank == '7' else None
+        self.update_pile_display()
+        self.status_label.setText(self.status_text(f"{event['player'].name} {event['card']} را بازی کرد"))
+
+    def show_cards_drawn(self, event):
+        reason = " جریمه" if event['penalty'] else ""
+        if event['player'] == self.game.players[0]:
+            self.update_hand_display()
+        self.status_label.setText(self.status_text(f"{event['player'].name} {event['count']} کارت{reason} کشید"))
+
+    def show_game_over(self, event):
+        winner = event['winner']
+        self.status_label.setText(f"بازی تمام شد! برنده: {winner.name if winner else 'نامشخص'}")
+        self.audio_manager.play("win")
+
+    def await_human(self):
         if self.game.is_game_over:
-            winner = next((p for p in self.game.players if not p.hand), None)
-            self.status_label.setText(f"بازی تمام شد! برنده: {winner.name if winner else 'نامشخص'}")
+            self.set_player_controls_enabled(False)
             self.start_button.show()
-            self.audio_manager.play("win")
             return
-            
         self.update_displays()
-        
-        current_player = self.game.players[self.game.current_player_index]
-        if self.game.current_player_index == 0:
-            self.set_player_controls_enabled(True)
-        else:
-            self.set_player_controls_enabled(False)
-            QTimer.singleShot(1500, self.play_ai_turn)
+        self.status_label.setText(self.status_text(f"نوبت: {self.game.players[0].name}"))
+        self.set_player_controls_enabled(True)
+
+    # --- حرکت بازیکن ---
 
     def on_card_clicked(self, card: Card):
-        self.audio_manager.play("play")
+        if self.presenting or not self.human_to_move() or self.game.is_game_over:
+            return
         if card.rank == '7':
             self.prompt_for_suit(card)
         else:
-            self.game.play_turn(self.game.players[0], card)
-            self.process_turn()
+            self.apply_human_move({'action': 'play', 'card': card})
     
     def on_draw_clicked(self):
-        self.audio_manager.play("play")
-        self.game.player_must_draw(self.game.players[0])
-        self.process_turn()
+        if self.presenting or not self.human_to_move() or self.game.is_game_over:
+            return
+        self.apply_human_move({'action': 'draw'})
 
     def prompt_for_suit(self, card_seven: Card):
         suit, ok = QInputDialog.getItem(self, "انتخاب خال", "خال بعدی را انتخاب کنید:", SUITS, 0, False)
         if ok and suit:
-            self.game.play_turn(self.game.players[0], card_seven, suit)
-        self.process_turn()
+            self.apply_human_move({'action': 'play', 'card': card_seven, 'suit': suit})
 
-    def play_ai_turn(self):
-        player = self.game.players[self.game.current_player_index]
-        move = self.game.ai_choose_card(player)
-        
-        if move:
-            self.audio_manager.play("play")
-            self.game.play_turn(player, move['card'], move['suit'])
-        else:
-            self.game.player_must_draw(player)
-            
-        self.process_turn()
+    def apply_human_move(self, move: dict):
+        self.set_player_controls_enabled(False)
+        if move['action'] == 'play':
+            self.hand_view.set_cards([card for card, _ in self.hand_view.items() if card != move['card']])
+        self.game.apply_move(move)
+        self.advance_engine()
+
+    def status_text(self, text: str) -> str:
+        if self.shown_suit:
+            text += f" | خال اعلام شده: {self.shown_suit}"
+        return text
 
     def update_displays(self):
-        player_name = self.game.players[self.game.current_player_index].name
-        status_text = f"نوبت: {player_name}"
-        if self.game.declared_suit:
-            status_text += f" | خال اعلام شده: {self.game.declared_suit}"
-        self.status_label.setText(status_text)
+        self.update_pile_display()
+        self.update_hand_display()
 
+    def update_pile_display(self):
         self.clear_layout(self.discard_pile_layout)
-        top_card = self.game.top_card()
-        if top_card:
+        if self.shown_top_card:
             lbl = QLabel()
-            pixmap = QIcon(f"resources/images/themes/default/cards/{top_card.image_filename}").pixmap(QSize(100, 140))
+            pixmap = self.pixmaps.card_pixmap(self.shown_top_card, (100, 140))
             lbl.setPixmap(pixmap)
             self.discard_pile_layout.addWidget(lbl)
 
-        self.clear_layout(self.player_hand_layout)
+    def update_hand_display(self):
         player = self.game.players[0]
-        self.playable_cards_in_hand = [c for c in player.hand if self.game._is_move_valid(c)]
-        
-        for card in sorted(player.hand, key=lambda c: (c.suit, c.rank)):
-            btn = QPushButton("")
-            btn.setIcon(QIcon(f"resources/images/themes/default/cards/{card.image_filename}"))
-            btn.setIconSize(QSize(80, 110))
-            btn.setFixedSize(QSize(85, 115))
-            btn.setStyleSheet("QPushButton { border: none; background-color: transparent; }")
-            btn.clicked.connect(lambda _, c=card: self.on_card_clicked(c))
-            self.player_hand_layout.addWidget(btn)
+        self.hand_view.set_cards(sorted(player.hand, key=lambda c: (c.suit, c.rank)))
 
-        self.draw_button = QPushButton("کارت بکش")
-        self.draw_button.clicked.connect(self.on_draw_clicked)
-        self.player_hand_layout.addWidget(self.draw_button)
+    def make_hand_card_widget(self, card):
+        btn = QPushButton("")
+        btn.setIcon(self.pixmaps.card_icon(card))
+        btn.setIconSize(QSize(80, 110))
+        btn.setFixedSize(QSize(85, 115))
+        btn.setStyleSheet("QPushButton { border: none; background-color: transparent; }")
+        btn.clicked.connect(lambda _, c=card: self.on_card_clicked(c))
+        return btn
         
     def set_player_controls_enabled(self, enabled: bool):
+        self.playable_cards_in_hand = [c for c in self.game.players[0].hand if self.game._is_move_valid(c)]
         is_any_card_playable = bool(self.playable_cards_in_hand)
         self.draw_button.setVisible(enabled and not is_any_card_playable)
-
-        for i in range(self.player_hand_layout.count() - 1):
-            widget = self.player_hand_layout.itemAt(i).widget()
-            if widget:
-                # This is tricky because the widget text is empty. We need a better way to map widget to card.
-                # For now, we enable all and rely on the logic to prevent illegal moves.
-                widget.setEnabled(enabled and is_any_card_playable)
+        self.hand_view.set_enabled(lambda card: enabled and card in self.playable_cards_in_hand)
     
     def clear_layout(self, layout):
         if layout is not None:
@@ -1,19 +1,27 @@
 import random
+from collections import Counter
 from game_basics import Card, Player, Deck, SUITS
+from game_events import EventSource
+from game_state import Snapshottable
 
-class HaftKhajGame:
+class HaftKhajGame(EventSource, Snapshottable):
     """
     موتور و منطق اصلی بازی هفت خاج (هفت کثیف).
     """
-    def __init__(self, num_players=3, difficulty='medium'):
+    MOVE_HANDLERS = {'play': '_move_play', 'draw': '_move_draw'}
+    STATE_FIELDS = ('draw_pile', 'discard_pile', 'current_player_index', 'play_direction', 'declared_suit',
+                    'draw_penalty_stack', 'is_game_over')
+
+    def __init__(self, num_players=3, difficulty='medium', rng=None):
         if num_players < 2:
             raise ValueError("تعداد بازیکنان باید حداقل ۲ نفر باشد.")
         
         self.difficulty = difficulty
+        self.rng = rng or random
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players)]
         
         self.draw_pile = Deck()
-        self.draw_pile.shuffle()
+        self.draw_pile.shuffle(self.rng)
         self.discard_pile = []
 
         self.current_player_index = 0
@@ -72,7 +80,7 @@ class HaftKhajGame:
             if len(self.draw_pile) == 0: self._refill_draw_pile()
             if len(self.draw_pile) > 0:
                 target_player.add_card(self.draw_pile.deal())
-        
+        self._emit('cards_drawn', player=target_player, count=self.draw_penalty_stack, penalty=True)
         self.draw_penalty_stack = 0
 
     def play_turn(self, player: Player, card: Card, declared_suit: str = None):
@@ -82,10 +90,12 @@ class HaftKhajGame:
 
         player.hand.remove(card)
         self.discard_pile.append(card)
+        self._emit('card_played', player=player, card=card, suit=declared_suit)
         self.declared_suit = None
 
         if not player.hand:
             self.is_game_over = True
+            self._emit('game_over', winner=player)
             return
 
         if card.rank == '2':
@@ -125,6 +135,7 @@ class HaftKhajGame:
             if len(self.draw_pile) == 0: self._refill_draw_pile()
             if len(self.draw_pile) == 0:
                 self.is_game_over = True
+                self._emit('game_over', winner=None)
                 break
             
             drawn_card = self.draw_pile.deal()
@@ -133,6 +144,7 @@ class HaftKhajGame:
             if self._is_move_valid(drawn_card):
                 break
         
+        self._emit('cards_drawn', player=player, count=len(drawn_cards), penalty=False)
         self._advance_turn()
         return drawn_cards
 
@@ -144,9 +156,31 @@ class HaftKhajGame:
         top = self.discard_pile.pop()
         cards_to_shuffle = self.discard_pile
         self.discard_pile = [top]
-        random.shuffle(cards_to_shuffle)
+        self.rng.shuffle(cards_to_shuffle)
         self.draw_pile.cards.extend(cards_to_shuffle)
 
+    # --- API حرکت (apply_move) ---
+
+    def _move_play(self, move: dict):
+        player = self.players[self.current_player_index]
+        card = move['card']
+        if self.is_game_over or card not in player.hand or not self._is_move_valid(card):
+            raise ValueError(f"حرکت غیرمجاز برای {player.name}: {card}")
+        self.play_turn(player, card, move.get('suit'))
+
+    def _move_draw(self, move: dict):
+        if self.is_game_over:
+            raise ValueError("بازی تمام شده است.")
+        self.player_must_draw(self.players[self.current_player_index])
+
+    def ai_move(self) -> dict | None:
+        if self.is_game_over:
+            return None
+        choice = self.ai_choose_card(self.players[self.current_player_index])
+        if choice is None:
+            return {'action': 'draw'}
+        return {'action': 'play', 'card': choice['card'], 'suit': choice['suit']}
+
     def ai_choose_card(self, player: Player) -> dict:
         """مغز AI برای انتخاب بهترین حرکت در هفت خاج."""
         valid_moves = [c for c in player.hand if self._is_move_valid(c)]
@@ -154,16 +188,16 @@ class HaftKhajGame:
             return None # Must draw
 
         if self.difficulty == 'easy':
-            return {'card': random.choice(valid_moves), 'suit': None}
+            return {'card': self.rng.choice(valid_moves), 'suit': None}
         
         elif self.difficulty == 'medium' or self.difficulty == 'hard':
             # استراتژی متوسط: کارت‌های ویژه را نگه می‌دارد مگر مجبور شود
             # و سعی می‌کند از کارت‌های غیر ویژه خلاص شود.
             non_special_cards = [c for c in valid_moves if c.rank not in ['A', '2', '7', '8', '10', 'K']]
             if non_special_cards:
-                card_to_play = random.choice(non_special_cards)
+                card_to_play = self.rng.choice(non_special_cards)
             else:
-                card_to_play = random.choice(valid_moves)
+                card_to_play = self.rng.choice(valid_moves)
 
             declared_suit = None
             if card_to_play.rank == '7':
@@ -171,8 +205,8 @@ class HaftKhajGame:
                 if suit_counts:
                     declared_suit = suit_counts.most_common(1)[0][0]
                 else:
-                    declared_suit = random.choice(SUITS)
+                    declared_suit = self.rng.choice(SUITS)
             
             return {'card': card_to_play, 'suit': declared_suit}
         
-        return {'card': random.choice(valid_moves), 'suit': None}
+        return {'card': self.rng.choice(valid_moves), 'suit': None}
@@ -0,0 +1,238 @@
+"""
+جدول احتمال‌ها و ارزش انتظاری هفت و نیم با شبیه‌سازی مونت‌کارلو.
+
+وضعیت‌ها: (امتیاز بازیکن، کارت رو بانکدار، ترکیب کارت‌های باقی‌مانده). امتیازها به واحد نیم
+ذخیره می‌شوند (۱ تا ۱۵ یعنی ۰.۵ تا ۷.۵) و ترکیب دسته با دو نسبت خلاصه می‌شود: کارت‌های
+تصویری (۰.۵ امتیاز) و کارت‌های ۸ تا ۱۰ (که همیشه می‌سوزانند)، هر کدام در DECK_BINS دسته.
+
+برای هر (کارت رو، ترکیب) توزیع امتیاز نهایی بانکدار با قانون موتور (کشیدن تا DEALER_STAND_SCORE)
+یکجا برای همه آزمایش‌ها شبیه‌سازی می‌شود (با NumPy به صورت برداری، و بدون آن با random)؛
+از این توزیع ارزش ماندن برای همه امتیازها و با برنامه‌ریزی پویا ارزش کشیدن به دست می‌آید.
+جدول از پیش ساخته شده همراه مخزن در EQUITY_TABLE_PATH است (فقط اگر نباشد یک بار ساخته و ذخیره
+می‌شود) و پرس‌وجوی آن O(1) است.
+
+نمونه:
+    python haft_o_nim_equity.py --rebuild --trials 50000
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+
+try:
+    import numpy
+except ImportError:  # NumPy اختیاری است؛ بدون آن ساخت جدول کندتر است
+    numpy = None
+
+MAGIC = b"ICGH7N01"
+# کنار ماژول (نه نسبت به پوشه جاری) تا جدول ساخته شده همراه مخزن از هر جا پیدا شود
+EQUITY_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "haft_o_nim_equity.bin")
+_HEADER = struct.Struct("<II")  # تعداد آزمایش، seed
+
+MAX_SCORE = 15  # ۷.۵ به واحد نیم
+BUST = MAX_SCORE + 1
+DEALER_STAND_SCORE = 12  # بانکدار تا امتیاز ۶ کارت می‌کشد (HaftONimGame.DEALER_STAND_SCORE)
+# ارزش کارت‌ها به واحد نیم: کارت‌های تصویری ۱ و آس تا ۱۰ از ۲ تا ۲۰
+CARD_UNITS = (1,) + tuple(range(2, 21, 2))
+UP_CARDS = len(CARD_UNITS)
+_UP_INDEX = {unit: i for i, unit in enumerate(CARD_UNITS)}
+DECK_BINS = 4
+PROFILES = DECK_BINS * DECK_BINS
+SAMPLE_DECK_SIZE = 40
+# فیلدهای هر خانه جدول
+STATS = ("bust_if_hit", "win_if_stand", "push_if_stand", "ev_stand", "ev_hit")
+DEFAULT_TRIALS = 20000 if numpy is not None else 2000
+
+
+def to_units(score: float) -> int:
+    return int(score * 2)
+
+
+def deck_profile(units: list) -> int:
+    """شماره دسته ترکیب برای کارت‌های باقی‌مانده (به واحد نیم)."""
+    if not units:
+        return _bin(12 / 52) * DECK_BINS + _bin(12 / 52)
+    faces = sum(1 for unit in units if unit == 1)
+    high = sum(1 for unit in units if unit >= 16)
+    return _bin(faces / len(units)) * DECK_BINS + _bin(high / len(units))
+
+
+def _bin(fraction: float) -> int:
+    return min(DECK_BINS - 1, int(fraction * 2 * DECK_BINS))
+
+
+def sample_deck(profile: int) -> list:
+    """یک دسته نمونه SAMPLE_DECK_SIZE کارتی با نسبت‌های وسط دسته ترکیب profile."""
+    face_bin, high_bin = divmod(profile, DECK_BINS)
+    faces = round((face_bin + 0.5) / (2 * DECK_BINS) * SAMPLE_DECK_SIZE)
+    high = round((high_bin + 0.5) / (2 * DECK_BINS) * SAMPLE_DECK_SIZE)
+    middle = SAMPLE_DECK_SIZE - faces - high
+    units = [1] * faces
+    units += [(16, 18, 20)[i % 3] for i in range(high)]
+    units += [2 * (i % 7 + 1) for i in range(middle)]  # آس تا ۷
+    return units
+
+
+# --- شبیه‌سازی بانکدار ---
+
+def _dealer_distribution_numpy(up: int, deck: list, trials: int, seed: int) -> list:
+    rng = numpy.random.default_rng(seed)
+    values = numpy.array(deck, dtype=numpy.int16)
+    # جایگشت تصادفی مستقل برای هر آزمایش؛ بانکدار هیچ‌گاه بیش از ۱۲ کارت نمی‌کشد
+    draws = min(len(deck), DEALER_STAND_SCORE)
+    order = numpy.argsort(rng.random((trials, len(deck))), axis=1)[:, :draws]
+    # ستون اول امتیاز پیش از کشیدن است (با کارت رو ۶ یا بیشتر بانکدار کارتی نمی‌کشد)
+    totals = numpy.empty((trials, draws + 1), dtype=numpy.int16)
+    totals[:, 0] = up
+    totals[:, 1:] = up + numpy.cumsum(values[order], axis=1)
+    stopped = totals >= DEALER_STAND_SCORE
+    first = numpy.where(stopped.any(axis=1), stopped.argmax(axis=1), draws)
+    final = numpy.minimum(totals[numpy.arange(trials), first], BUST)
+    return (numpy.bincount(final, minlength=BUST + 1) / trials).tolist()
+
+
+def _dealer_distribution_python(up: int, deck: list, trials: int, seed: int) -> list:
+    rng = random.Random(seed)
+    counts = [0] * (BUST + 1)
+    draws = min(len(deck), DEALER_STAND_SCORE)
+    for _ in range(trials):
+        total = up
+        for unit in rng.sample(deck, draws):
+            if total >= DEALER_STAND_SCORE:
+                break
+            total += unit
+        counts[min(total, BUST)] += 1
+    return [count / trials for count in counts]
+
+
+def dealer_distribution(up: int, deck: list, trials: int, seed: int = 0) -> list:
+    """احتمال امتیاز نهایی بانکدار (اندیس BUST = سوختن) با کارت رو up و دسته deck."""
+    if numpy is not None:
+        return _dealer_distribution_numpy(up, deck, trials, seed)
+    return _dealer_distribution_python(up, deck, trials, seed)
+
+
+def _state_stats(distribution: list, deck: list) -> list:
+    """آمار STATS برای امتیازهای ۱ تا MAX_SCORE بازیکن در برابر یک توزیع بانکدار."""
+    card_probs = [(unit, deck.count(unit) / len(deck)) for unit in sorted(set(deck))]
+    below = 0.0
+    stand = [None] * (MAX_SCORE + 1)
+    for score in range(1, MAX_SCORE + 1):
+        below += distribution[score - 1]
+        win = distribution[BUST] + below
+        push = distribution[score]
+        stand[score] = (win, push, win - (1.0 - win - push))
+
+    # ارزش کشیدن از بالا به پایین: پس از کارت جدید بهترین تصمیم گرفته می‌شود
+    best = [0.0] * (MAX_SCORE + 1)
+    hit = [0.0] * (MAX_SCORE + 1)
+    bust = [0.0] * (MAX_SCORE + 1)
+    for score in range(MAX_SCORE, 0, -1):
+        for unit, prob in card_probs:
+            if score + unit > MAX_SCORE:
+                bust[score] += prob
+                hit[score] -= prob
+            else:
+                hit[score] += prob * best[score + unit]
+        best[score] = max(stand[score][2], hit[score])
+    return [(bust[score], *stand[score], hit[score]) for score in range(1, MAX_SCORE + 1)]
+
+
+def build_table(trials: int = DEFAULT_TRIALS, seed: int = 0) -> array:
+    values = array("f")
+    for profile in range(PROFILES):
+        deck = sample_deck(profile)
+        for up_index, up in enumerate(CARD_UNITS):
+            distribution = dealer_distribution(up, deck, trials, seed + profile * UP_CARDS + up_index)
+            for stats in _state_stats(distribution, deck):
+                values.extend(stats)
+    return values
+
+
+# --- جدول ذخیره شده ---
+
+class EquityTable:
+    """جدول ساخته شده با build_table؛ lookup فقط محاسبه یک اندیس است."""
+    _instance = None
+
+    @classmethod
+    def instance(cls, path: str = EQUITY_TABLE_PATH) -> "EquityTable":
+        """نمونه مشترک؛ اگر فایل جدول نباشد یک بار ساخته و ذخیره می‌شود."""
+        if cls._instance is None:
+            cls._instance = cls.load(path) if os.path.exists(path) else cls.build(path=path)
+        return cls._instance
+
+    def __init__(self, values: array, trials: int, seed: int):
+        if len(values) != PROFILES * UP_CARDS * MAX_SCORE * len(STATS):
+            raise ValueError("اندازه جدول هفت و نیم نامعتبر است.")
+        self.values = values
+        self.trials = trials
+        self.seed = seed
+
+    @classmethod
+    def build(cls, trials: int = DEFAULT_TRIALS, seed: int = 0, path: str = None) -> "EquityTable":
+        table = cls(build_table(trials, seed), trials, seed)
+        if path:
+            table.save(path)
+        return table
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(MAGIC + _HEADER.pack(self.trials, self.seed))
+            self.values.tofile(f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "EquityTable":
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"فایل جدول هفت و نیم نامعتبر است: {path}")
+            trials, seed = _HEADER.unpack(f.read(_HEADER.size))
+            values = array("f")
+            values.frombytes(f.read())
+        return cls(values, trials, seed)
+
+    def lookup(self, score_units: int, up_units: int, profile: int) -> dict:
+        """آمار یک وضعیت؛ score_units و up_units به واحد نیم هستند."""
+        offset = self._offset(score_units, up_units, profile)
+        return dict(zip(STATS, self.values[offset:offset + len(STATS)]))
+
+    def should_hit(self, score_units: int, up_units: int, profile: int) -> bool:
+        offset = self._offset(score_units, up_units, profile)
+        return self.values[offset + 4] > self.values[offset + 3]
+
+    def _offset(self, score_units: int, up_units: int, profile: int) -> int:
+        return ((profile * UP_CARDS + _UP_INDEX[up_units]) * MAX_SCORE + score_units - 1) * len(STATS)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ساخت جدول احتمال‌های هفت و نیم")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS, help="تعداد آزمایش برای هر (کارت رو، ترکیب)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rebuild", action="store_true", help="ساخت دوباره حتی اگر فایل جدول موجود باشد")
+    parser.add_argument("--path", default=EQUITY_TABLE_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.rebuild or not os.path.exists(args.path):
+        table = EquityTable.build(args.trials, args.seed, args.path)
+        engine = "NumPy" if numpy is not None else "random"
+        print(f"جدول با {args.trials} آزمایش ({engine}) در {time.perf_counter() - start:.2f} ثانیه ساخته شد: {args.path}")
+    else:
+        table = EquityTable.load(args.path)
+
+    profile = deck_profile(sample_deck(deck_profile([])))
+    print("کشیدن (ب) یا ماندن (م) برای دسته کامل؛ سطرها امتیاز بازیکن، ستون‌ها کارت رو بانکدار:")
+    print("       " + " ".join(f"{up / 2:>4g}" for up in CARD_UNITS))
+    for score in range(1, MAX_SCORE + 1):
+        row = ["   ب" if table.should_hit(score, up, profile) else "   م" for up in CARD_UNITS]
+        print(f"{score / 2:>5g}  " + " ".join(row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
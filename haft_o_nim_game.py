@@ -1,29 +1,42 @@
+import random
 from game_basics import Card, Player, Deck
+from game_events import EventSource
+from game_state import Snapshottable
+from haft_o_nim_equity import EquityTable, deck_profile, to_units
 
-class HaftONimGame:
+class HaftONimGame(EventSource, Snapshottable):
     """
     موتور و منطق اصلی بازی هفت و نیم.
     """
+    MOVE_HANDLERS = {'hit': '_move_hit', 'stand': '_move_stand', 'dealer': '_move_dealer'}
+    STATE_FIELDS = ('deck', 'current_player_index', 'player_status', 'final_results', 'player_outcomes',
+                    'is_game_over')
     CARD_VALUES = {
         'A': 1, '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10,
         'J': 0.5, 'Q': 0.5, 'K': 0.5
     }
+    DEALER_STAND_SCORE = 6
 
-    def __init__(self, num_players=3, difficulty='medium'):
+    def __init__(self, num_players=3, difficulty='medium', rng=None):
         self.difficulty = difficulty
+        self.rng = rng or random
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players - 1)]
         self.dealer = Player("بانکدار")
         
         self.deck = Deck()
-        self.deck.shuffle()
+        self.deck.shuffle(self.rng)
         
         self.is_game_over = False
         self.current_player_index = 0
         self.player_status = {p.name: 'playing' for p in self.players} # 'playing', 'stand', 'bust'
         self.final_results = {}
+        self.player_outcomes = {} # 'win', 'loss', 'push'
         
         self._initial_deal()
 
+    def _state_players(self) -> list:
+        return self.players + [self.dealer]
+
     def _calculate_hand_value(self, hand: list[Card]) -> float:
         """امتیاز یک دست را محاسبه می‌کند."""
         return sum(self.CARD_VALUES[card.rank] for card in hand)
@@ -46,23 +59,47 @@ class HaftONimGame:
 
         if score > 7.5:
             self.player_status[player.name] = 'bust'
+        self._emit('card_dealt', player=player, card=new_card, score=score, status=self.player_status[player.name])
         
         return score
 
     def player_stands(self, player: Player):
         """وضعیت بازیکن را به 'ماندن' تغییر می‌دهد."""
         self.player_status[player.name] = 'stand'
+        self._emit('player_stood', player=player, score=self._calculate_hand_value(player.hand))
+
+    def ai_should_hit(self, player: Player) -> bool:
+        """تصمیم AI برای کشیدن کارت جدید."""
+        score = self._calculate_hand_value(player.hand)
+        if self.difficulty == 'easy':
+            return score < 7 and self.rng.random() < 0.5
+        if self.difficulty == 'hard':
+            return EquityTable.instance().should_hit(*self._equity_state(player))
+        return score < 5
+
+    def _equity_state(self, player: Player) -> tuple:
+        """وضعیت بازیکن برای جدول احتمال‌ها: (امتیاز، کارت رو بانکدار، ترکیب دسته) به واحد نیم."""
+        deck_units = [to_units(self.CARD_VALUES[card.rank]) for card in self.deck.cards]
+        return (to_units(self._calculate_hand_value(player.hand)),
+                to_units(self.CARD_VALUES[self.dealer.hand[0].rank]), deck_profile(deck_units))
+
+    def equity_hint(self, player: Player) -> dict:
+        """احتمال سوختن با کارت بعد، احتمال برد با ماندن و پیشنهاد جدول برای بازیکن."""
+        hint = EquityTable.instance().lookup(*self._equity_state(player))
+        hint['action'] = 'hit' if hint['ev_hit'] > hint['ev_stand'] else 'stand'
+        return hint
 
     def dealer_plays(self) -> float:
         """منطق کامل بازی بانکدار را اجرا می‌کند."""
         dealer_score = self._calculate_hand_value(self.dealer.hand)
         
         # قانون ساده: بانکدار تا زمانی که امتیازش کمتر از ۶ باشد، کارت می‌کشد
-        while dealer_score < 6:
+        while dealer_score < self.DEALER_STAND_SCORE:
             if not self.deck: break
             new_card = self.deck.deal()
             self.dealer.add_card(new_card)
             dealer_score = self._calculate_hand_value(self.dealer.hand)
+        self._emit('dealer_played', hand=list(self.dealer.hand), score=dealer_score)
         
         return dealer_score
 
@@ -78,15 +115,51 @@ class HaftONimGame:
             result = ""
             if status == 'bust':
                 result = f"باخت (سوخت با امتیاز {player_score})"
+                outcome = 'loss'
             elif is_dealer_bust:
                 result = f"برد! (بانکدار سوخت)"
+                outcome = 'win'
             elif player_score > dealer_score:
                 result = f"برد! ({player_score} > {dealer_score})"
+                outcome = 'win'
             elif player_score < dealer_score:
                 result = f"باخت. ({player_score} < {dealer_score})"
+                outcome = 'loss'
             else:
                 result = f"مساوی. (امتیاز {player_score})"
+                outcome = 'push'
 
             self.final_results[player.name] = result
+            self.player_outcomes[player.name] = outcome
         
         self.is_game_over = True
+        self._emit('round_over', outcomes=dict(self.player_outcomes))
+
+    # --- API حرکت (apply_move) ---
+
+    def _move_player(self, move: dict) -> Player:
+        player = move.get('player') or self.players[self.current_player_index]
+        if self.is_game_over or self.player_status.get(player.name) != 'playing':
+            raise ValueError(f"نوبت {player.name} نیست.")
+        return player
+
+    def _move_hit(self, move: dict):
+        self.player_hits(self._move_player(move))
+
+    def _move_stand(self, move: dict):
+        self.player_stands(self._move_player(move))
+
+    def _move_dealer(self, move: dict):
+        if self.is_game_over or 'playing' in self.player_status.values():
+            raise ValueError("هنوز نوبت بانکدار نیست.")
+        self.dealer_plays()
+        self.determine_winners()
+
+    def ai_move(self) -> dict | None:
+        """بازیکنان به ترتیب تا ماندن یا سوختن بازی می‌کنند و سپس نوبت بانکدار است."""
+        if self.is_game_over:
+            return None
+        for player in self.players:
+            if self.player_status[player.name] == 'playing':
+                return {'action': 'hit' if self.ai_should_hit(player) else 'stand', 'player': player}
+        return {'action': 'dealer'}
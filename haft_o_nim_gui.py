@@ -1,14 +1,22 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout
-from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QCheckBox
+from PyQt5.QtCore import Qt
 from haft_o_nim_game import HaftONimGame
 from audio_manager import AudioManager
+from pixmap_cache import PixmapCache
+from hand_view import HandView
+from event_presenter import EventPresenter
+
+class HaftONimGameWidget(EventPresenter, QWidget):
+    AI_MOVE_DELAY = 1000  # مکث پیش از رو شدن دست بانکدار
 
-class HaftONimGameWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
+        self.audio_manager = AudioManager.instance()
+        self.pixmaps = PixmapCache.instance()
+        self.shown_dealer_hand = []  # دست بانکدار تا رویداد dealer_played از کارت‌های اولیه نمایش داده می‌شود
+        self.show_all_dealer_cards = False
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -20,98 +28,138 @@ class HaftONimGameWidget(QWidget):
         self.status_label.setStyleSheet("font-size: 16px; font-weight: bold; color: white; background-color: rgba(0,0,0,0.5); padding: 5px; border-radius: 5px;")
         self.start_button = QPushButton("شروع بازی جدید هفت و نیم")
         self.start_button.clicked.connect(self.start_new_game)
+        # راهنمای احتمال‌ها از جدول از پیش ساخته شده (haft_o_nim_equity.py) خوانده می‌شود
+        self.hint_checkbox = QCheckBox("نمایش راهنما")
+        self.hint_checkbox.toggled.connect(self.update_hint)
         top_layout.addWidget(self.status_label)
         top_layout.addStretch()
+        top_layout.addWidget(self.hint_checkbox)
         top_layout.addWidget(self.start_button)
         self.main_layout.addLayout(top_layout)
 
+        self.hint_label = QLabel("")
+        self.hint_label.setStyleSheet("font-size: 14px; color: #ffe08a; background-color: rgba(0,0,0,0.5); padding: 4px; border-radius: 5px;")
+        self.hint_label.setAlignment(Qt.AlignCenter)
+        self.hint_label.hide()
+        self.main_layout.addWidget(self.hint_label)
+
         self.dealer_hand_layout = QHBoxLayout()
         self.dealer_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.dealer_hand_layout)
+        self.dealer_hand_layout.addWidget(QLabel("دست بانکدار:"))
+        self.dealer_hand_view = HandView(self.make_dealer_card_widget)
+        self.dealer_hand_layout.addWidget(self.dealer_hand_view)
         
         self.main_layout.addStretch()
 
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.player_hand_layout.addWidget(QLabel("دست شما:"))
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
         
         self.controls_layout = QHBoxLayout()
         self.controls_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.controls_layout)
+        self.hit_button = QPushButton("بزن (Hit)")
+        self.stand_button = QPushButton("بمان (Stand)")
+        self.hit_button.clicked.connect(self.on_hit_clicked)
+        self.stand_button.clicked.connect(self.on_stand_clicked)
+        self.controls_layout.addWidget(self.hit_button)
+        self.controls_layout.addWidget(self.stand_button)
+        self.set_player_controls_enabled(False)
 
     def start_new_game(self):
-        self.game = HaftONimGame(num_players=2) # 1 player vs dealer
+        self.attach_game(HaftONimGame(num_players=2)) # 1 player vs dealer
+        self.shown_dealer_hand = list(self.game.dealer.hand)
+        self.dealer_hand_view.clear()  # کارت رو/پشت بانکدار به جایگاه کارت بستگی دارد
         self.start_button.hide()
         self.audio_manager.play("shuffle")
         self.update_displays()
-        self.set_player_controls_enabled(True)
+        self.advance_engine()
 
-    def on_hit_clicked(self):
+    # --- اجرای موتور و نمایش رویدادها ---
+
+    def human_to_move(self) -> bool:
+        return self.game.is_game_over or self.game.player_status[self.game.players[0].name] == 'playing'
+
+    def event_lead_time(self, event) -> int:
+        # بازی بانکدار با مکث پس از ماندن یا سوختن بازیکن رو می‌شود
+        return self.AI_MOVE_DELAY if event.kind == 'dealer_played' else super().event_lead_time(event)
+
+    def show_card_dealt(self, event):
         self.audio_manager.play("play")
-        player = self.game.players[0]
-        score = self.game.player_hits(player)
-        
-        if self.game.player_status[player.name] == 'bust':
-            self.status_label.setText(f"سوختی! با امتیاز {score}. شما باختید.")
-            self.set_player_controls_enabled(False)
-            self.start_button.show()
-        
         self.update_displays()
+        if event['status'] == 'bust':
+            self.status_label.setText(f"سوختی! با امتیاز {event['score']}. شما باختید.")
 
-    def on_stand_clicked(self):
-        player = self.game.players[0]
-        self.game.player_stands(player)
-        self.set_player_controls_enabled(False)
+    def show_player_stood(self, event):
         self.status_label.setText("شما ماندید. نوبت بانکدار...")
-        
-        QTimer.singleShot(1000, self.play_dealer_turn)
 
-    def play_dealer_turn(self):
-        self.game.dealer_plays()
+    def show_dealer_played(self, event):
         self.audio_manager.play("play")
-        self.game.determine_winners()
-        
+        self.shown_dealer_hand = event['hand']
+        self.update_displays(show_all_dealer_cards=True)
+
+    def show_round_over(self, event):
         player_result = self.game.final_results[self.game.players[0].name]
         self.status_label.setText(f"بازی تمام شد! نتیجه شما: {player_result}")
-        self.start_button.show()
-        self.update_displays(show_all_dealer_cards=True)
+
+    def await_human(self):
+        if self.game.is_game_over:
+            self.start_button.show()
+            return
+        player_score = self.game._calculate_hand_value(self.game.players[0].hand)
+        self.status_label.setText(f"نوبت شما. امتیاز: {player_score}")
+        self.set_player_controls_enabled(True)
+        self.update_hint()
+
+    # --- حرکت بازیکن ---
+
+    def on_hit_clicked(self):
+        self.apply_human_move({'action': 'hit', 'player': self.game.players[0]})
+
+    def on_stand_clicked(self):
+        self.apply_human_move({'action': 'stand', 'player': self.game.players[0]})
+
+    def apply_human_move(self, move: dict):
+        if self.presenting or self.game.is_game_over or not self.human_to_move(): return
+        self.set_player_controls_enabled(False)
+        self.game.apply_move(move)
+        self.update_hint()
+        self.advance_engine()
 
     def update_displays(self, show_all_dealer_cards=False):
-        player = self.game.players[0]
-        player_score = self.game._calculate_hand_value(player.hand)
-        
-        if self.game.player_status[player.name] == 'playing':
-             self.status_label.setText(f"نوبت شما. امتیاز: {player_score}")
+        # با رو شدن دست بانکدار، mode عوض شده و کارت‌های آن دوباره ساخته می‌شوند
+        self.show_all_dealer_cards = show_all_dealer_cards
+        self.dealer_hand_view.set_cards(self.shown_dealer_hand, mode=show_all_dealer_cards)
+        self.hand_view.set_cards(self.game.players[0].hand)
 
-        self.clear_layout(self.dealer_hand_layout)
-        self.dealer_hand_layout.addWidget(QLabel("دست بانکدار:"))
-        for i, card in enumerate(self.game.dealer.hand):
-            lbl = QLabel()
-            if i == 0 or show_all_dealer_cards:
-                pixmap = QIcon(f"resources/images/themes/default/cards/{card.image_filename}").pixmap(QSize(80, 110))
-            else:
-                pixmap = QIcon("resources/images/themes/default/back.png").pixmap(QSize(80, 110))
-            lbl.setPixmap(pixmap)
-            self.dealer_hand_layout.addWidget(lbl)
-
-        self.clear_layout(self.player_hand_layout)
-        self.player_hand_layout.addWidget(QLabel("دست شما:"))
-        for card in player.hand:
-            lbl = QLabel()
-            pixmap = QIcon(f"resources/images/themes/default/cards/{card.image_filename}").pixmap(QSize(80, 110))
-            lbl.setPixmap(pixmap)
-            self.player_hand_layout.addWidget(lbl)
+    def update_hint(self):
+        player = self.game.players[0] if self.game else None
+        if not self.hint_checkbox.isChecked() or player is None or self.game.player_status[player.name] != 'playing':
+            self.hint_label.hide()
+            return
+        hint = self.game.equity_hint(player)
+        advice = "بزن" if hint['action'] == 'hit' else "بمان"
+        self.hint_label.setText(f"احتمال سوختن با کارت بعد: {hint['bust_if_hit']:.0%} | "
+                                f"احتمال برد با ماندن: {hint['win_if_stand']:.0%} | پیشنهاد: {advice}")
+        self.hint_label.show()
 
-        self.clear_layout(self.controls_layout)
-        self.hit_button = QPushButton("بزن (Hit)")
-        self.stand_button = QPushButton("بمان (Stand)")
-        self.hit_button.clicked.connect(self.on_hit_clicked)
-        self.stand_button.clicked.connect(self.on_stand_clicked)
-        self.controls_layout.addWidget(self.hit_button)
-        self.controls_layout.addWidget(self.stand_button)
-        
-        is_player_turn_over = self.game.player_status[player.name] != 'playing'
-        self.set_player_controls_enabled(not is_player_turn_over)
+    def make_dealer_card_widget(self, card):
+        lbl = QLabel()
+        if card == self.shown_dealer_hand[0] or self.show_all_dealer_cards:
+            pixmap = self.pixmaps.card_pixmap(card, (80, 110))
+        else:
+            pixmap = self.pixmaps.back_pixmap((80, 110))
+        lbl.setPixmap(pixmap)
+        return lbl
+
+    def make_hand_card_widget(self, card):
+        lbl = QLabel()
+        lbl.setPixmap(self.pixmaps.card_pixmap(card, (80, 110)))
+        return lbl
 
     def set_player_controls_enabled(self, enabled: bool):
         self.hit_button.setEnabled(enabled)
@@ -0,0 +1,114 @@
+from game_basics import Card, ALL_CARDS, SUITS, RANKS
+
+# هر دست به صورت یک عدد صحیح ۵۲ بیتی نمایش داده می‌شود: بیت card.id برای هر کارت.
+# چون card.id = suit_index * 13 + rank_index است، هر خال یک باند ۱۳ بیتی جدا دارد
+# و بیت‌های داخل هر باند به ترتیب ارزش رتبه (۲ تا آس) چیده شده‌اند.
+LANE_BITS = len(RANKS)
+LANE_MASK = (1 << LANE_BITS) - 1
+SUIT_MASKS = tuple(LANE_MASK << (i * LANE_BITS) for i in range(len(SUITS)))
+FULL_DECK_MASK = (1 << len(ALL_CARDS)) - 1
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+
+def card_bit(card: Card) -> int:
+    return 1 << card.id
+
+
+def hand_to_mask(cards) -> int:
+    """لیستی از کارت‌ها را به bitmask تبدیل می‌کند."""
+    mask = 0
+    for card in cards:
+        mask |= 1 << card.id
+    return mask
+
+
+def mask_to_cards(mask: int) -> list[Card]:
+    """کارت‌های یک bitmask را به ترتیب شناسه برمی‌گرداند."""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(ALL_CARDS[low.bit_length() - 1])
+        mask ^= low
+    return cards
+
+
+def suit_length(mask: int, suit_index: int) -> int:
+    return (mask & SUIT_MASKS[suit_index]).bit_count()
+
+
+def has_suit(mask: int, suit_index: int) -> bool:
+    return bool(mask & SUIT_MASKS[suit_index])
+
+
+def valid_moves_mask(mask: int, lead_suit_index: int | None) -> int:
+    """
+    کارت‌های مجاز برای بازی در یک دست با قانون پیروی از خال.
+    اگر دست خالی از خال زمینه باشد (یا کسی شروع‌کننده باشد) کل دست مجاز است.
+    """
+    if lead_suit_index is None:
+        return mask
+    follow = mask & SUIT_MASKS[lead_suit_index]
+    return follow if follow else mask
+
+
+def highest_card_id(mask: int) -> int:
+    """شناسه بزرگ‌ترین بیت؛ برای یک باند تک‌خال یعنی بالاترین کارت آن خال."""
+    return mask.bit_length() - 1
+
+
+def lowest_card_id(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+
+class HandMask:
+    """
+    یک دست کارت مبتنی بر bitmask که می‌تواند در کنار (یا به جای) player.hand استفاده شود.
+    همه عملیات‌های پرکاربرد (عضویت، پیروی از خال، طول خال) O(1) هستند.
+    """
+    __slots__ = ("bits",)
+
+    def __init__(self, cards=()):
+        self.bits = hand_to_mask(cards)
+
+    @classmethod
+    def from_bits(cls, bits: int) -> "HandMask":
+        hand = cls()
+        hand.bits = bits
+        return hand
+
+    def __repr__(self) -> str:
+        return f"HandMask({mask_to_cards(self.bits)})"
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __contains__(self, card: Card) -> bool:
+        return bool(self.bits >> card.id & 1)
+
+    def __iter__(self):
+        return iter(mask_to_cards(self.bits))
+
+    def __eq__(self, other):
+        return isinstance(other, HandMask) and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def add(self, card: Card):
+        self.bits |= 1 << card.id
+
+    def remove(self, card: Card):
+        bit = 1 << card.id
+        if not self.bits & bit:
+            raise ValueError(f"کارت {card} در دست نیست.")
+        self.bits ^= bit
+
+    def has_suit(self, suit: str) -> bool:
+        return has_suit(self.bits, SUIT_INDEX[suit])
+
+    def suit_length(self, suit: str) -> int:
+        return suit_length(self.bits, SUIT_INDEX[suit])
+
+    def valid_moves(self, lead_suit: str | None) -> list[Card]:
+        lead_suit_index = SUIT_INDEX[lead_suit] if lead_suit else None
+        return mask_to_cards(valid_moves_mask(self.bits, lead_suit_index))
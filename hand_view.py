@@ -0,0 +1,82 @@
+from collections import Counter
+from PyQt5.QtWidgets import QWidget, QHBoxLayout
+from PyQt5.QtCore import Qt
+
+class HandView(QWidget):
+    """
+    نمایش دست بازیکن با یک ویجت ثابت برای هر کارت.
+    set_cards به جای پاک کردن و ساختن دوباره کل دست، فقط ویجت کارت‌های حذف شده را پاک،
+    برای کارت‌های جدید ویجت می‌سازد و بقیه را در جای خود جابجا می‌کند.
+    make_widget(card) ویجت هر کارت را می‌سازد؛ با عوض شدن mode (مثلا مرحله پاس دادن در برابر بازی)
+    همه ویجت‌ها دوباره ساخته می‌شوند تا اتصال‌های سیگنال با مرحله جدید هماهنگ باشند.
+    """
+    def __init__(self, make_widget, parent=None):
+        super().__init__(parent)
+        self.make_widget = make_widget
+        self.cards_layout = QHBoxLayout(self)
+        self.cards_layout.setContentsMargins(0, 0, 0, 0)
+        self.cards_layout.setAlignment(Qt.AlignCenter)
+        self._widgets = {}  # (کارت، شماره تکرار) -> ویجت
+        self._order = []
+        self._mode = None
+        self.stats = {"created": 0, "removed": 0, "moved": 0}
+
+    def set_cards(self, cards, mode=None):
+        if mode != self._mode:
+            self.clear()
+            self._mode = mode
+
+        # کلید شامل شماره تکرار است تا دسته‌های چندتایی (کارت تکراری) هم درست نمایش داده شوند
+        keys, seen = [], Counter()
+        for card in cards:
+            keys.append((card, seen[card]))
+            seen[card] += 1
+
+        wanted = set(keys)
+        for key in self._order:
+            if key not in wanted:
+                self._remove(key)
+
+        for index, key in enumerate(keys):
+            widget = self._widgets.get(key)
+            if widget is None:
+                widget = self._widgets[key] = self.make_widget(key[0])
+                self.cards_layout.insertWidget(index, widget)
+                self.stats["created"] += 1
+            elif self.cards_layout.indexOf(widget) != index:
+                self.cards_layout.removeWidget(widget)
+                self.cards_layout.insertWidget(index, widget)
+                self.stats["moved"] += 1
+        self._order = keys
+
+    def _remove(self, key):
+        widget = self._widgets.pop(key)
+        self.cards_layout.removeWidget(widget)
+        widget.hide()
+        widget.deleteLater()
+        self.stats["removed"] += 1
+
+    def clear(self):
+        for key in self._order:
+            self._remove(key)
+        self._order = []
+
+    def items(self):
+        """(کارت، ویجت) به ترتیب نمایش."""
+        return [(key[0], self._widgets[key]) for key in self._order]
+
+    def widget(self, card):
+        return self._widgets.get((card, 0))
+
+    def set_enabled(self, enabled):
+        """enabled می‌تواند bool یا تابعی از کارت باشد."""
+        for card, widget in self.items():
+            widget.setEnabled(enabled(card) if callable(enabled) else enabled)
+
+    def set_checked(self, cards):
+        """وضعیت انتخاب ویجت‌های قابل انتخاب را بدون فرستادن سیگنال با لیست cards هماهنگ می‌کند."""
+        for card, widget in self.items():
+            if widget.isCheckable():
+                widget.blockSignals(True)
+                widget.setChecked(card in cards)
+                widget.blockSignals(False)
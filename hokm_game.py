@@ -1,19 +1,43 @@
 import random
-from game_basics import Card, Deck, Player, RANK_VALUES
+from game_basics import Card, Deck, Player, RANK_VALUES, SUITS
+from hand_bitboard import FULL_DECK_MASK, LANE_BITS, SUIT_INDEX, card_bit, mask_to_cards, valid_moves_mask
+from trick_search import Determinizer, TeamTricksGoal, TrickState, known_voids, run_search
+from double_dummy import DoubleDummySolver, analyze_moves, endgame_search
+from zobrist import TranspositionTable
+from game_events import EventSource
+from game_state import Snapshottable
 
-class HokmGame:
-    def __init__(self, num_players=4, difficulty='medium'):
+class HokmGame(EventSource, Snapshottable):
+    WINNING_SCORE = 7  # تعداد دورهای لازم برای بردن بازی
+    WINNING_TRICKS = 7  # تعداد دست‌های لازم برای بردن یک دور
+    MOVE_HANDLERS = {'new_round': '_move_new_round', 'set_hokm': '_move_set_hokm', 'play': '_move_play'}
+    STATE_FIELDS = ('deck', 'hakem', 'hokm_suit', 'current_player_index', 'trick_cards', 'last_trick',
+                    'trick_history', 'trick_scores', 'team_scores', 'is_round_over', 'is_game_over')
+
+    def __init__(self, num_players=4, difficulty='medium', rng=None, ai_time_budget=0.15, ai_iterations=None,
+                 ai_workers=1, ai_endgame_cards=5):
         self.num_players = num_players
         self.difficulty = difficulty
+        self.rng = rng or random
+        # بودجه جستجوی AI سخت: زمان (ثانیه) و/یا تعداد تکرار برای هر حرکت، و تعداد پردازه‌های playout
+        self.ai_time_budget = ai_time_budget
+        self.ai_iterations = ai_iterations
+        self.ai_workers = ai_workers
+        # وقتی کارت‌های بازیکن به این تعداد برسد، AI سخت پایان دور را دقیق حل می‌کند (۰ = هرگز)
+        self.ai_endgame_cards = ai_endgame_cards
+        self.endgame_table = None  # جدول جابجایی حل‌کننده پایان دور؛ در طول بازی نگه داشته می‌شود
+        self.last_search_stats = None
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players)]
         
         self.deck = Deck()
-        self.deck.shuffle()
+        self.deck.shuffle(self.rng)
         
         self.hakem = None
         self.hokm_suit = None
         self.current_player_index = 0
         self.trick_cards = []  # لیستی از تاپل‌های (player, card)
+        self.last_trick = []
+        self.trick_history = []  # دست‌های کامل شده این دور
         self.is_round_over = False
         self.is_game_over = False
         
@@ -30,15 +54,19 @@ class HokmGame:
     def _start_new_round(self):
         # ریست کردن متغیرهای دور
         self.deck = Deck()
-        self.deck.shuffle()
+        self.deck.shuffle(self.rng)
         for p in self.players:
             p.hand = []
         self.trick_scores = {"تیم ۱": 0, "تیم ۲": 0}
+        self.hokm_suit = None
         self.trick_cards = []
+        self.last_trick = []
+        self.trick_history = []
         self.is_round_over = False
         
         self._deal_cards_for_hakem()
         self._determine_hakem()
+        self._emit('round_started', hakem=self.hakem)
 
     def _deal_cards_for_hakem(self):
         for _ in range(5):
@@ -71,6 +99,7 @@ class HokmGame:
     def set_hokm(self, suit):
         self.hokm_suit = suit
         self._deal_remaining_cards()
+        self._emit('hokm_set', hakem=self.hakem, suit=suit)
 
     def _deal_remaining_cards(self):
         num_remaining = 13 - len(self.players[0].hand)
@@ -78,17 +107,15 @@ class HokmGame:
             for player in self.players:
                 player.add_card(self.deck.deal())
 
+    def _valid_moves_mask(self, hand_mask: int) -> int:
+        """bitmask کارت‌های مجاز برای یک دست (ابزارهای hand_bitboard)."""
+        return valid_moves_mask(hand_mask, self.trick_cards[0][1].suit_index if self.trick_cards else None)
+
     def _get_valid_moves(self, player: Player) -> list[Card]:
-        if not self.trick_cards:
-            return player.hand
-        
-        lead_suit = self.trick_cards[0][1].suit
-        hand_suits = [c.suit for c in player.hand]
-        
-        if lead_suit in hand_suits:
-            return [c for c in player.hand if c.suit == lead_suit]
-        else:
-            return player.hand
+        return mask_to_cards(self._valid_moves_mask(player.hand_mask))
+
+    def _is_move_valid(self, card: Card, player: Player) -> bool:
+        return bool(self._valid_moves_mask(player.hand_mask) & card_bit(card))
 
     def _determine_trick_winner(self) -> Player:
         if not self.trick_cards:
@@ -106,14 +133,150 @@ class HokmGame:
         
         return winner_player
 
+    def play_card(self, player: Player, card: Card) -> Player | None:
+        """
+        کارت بازیکن را در دست جاری بازی کرده و نوبت را جلو می‌برد.
+        اگر دست کامل شود برنده آن را برمی‌گرداند؛ کارت‌های آن دست در last_trick می‌مانند.
+        """
+        player.hand.remove(card)
+        self.trick_cards.append((player, card))
+        self._emit('card_played', player=player, card=card)
+        if len(self.trick_cards) < self.num_players:
+            self.current_player_index = (self.current_player_index + 1) % self.num_players
+            return None
+
+        winner = self._determine_trick_winner()
+        winner_team_name = "تیم ۱" if winner in self.teams["تیم ۱"] else "تیم ۲"
+        self.trick_scores[winner_team_name] += 1
+        self.current_player_index = self.players.index(winner)
+        self.last_trick = self.trick_cards
+        self.trick_history.append(self.trick_cards)
+        self.trick_cards = []
+        self._emit('trick_won', winner=winner, team=winner_team_name, cards=self.last_trick)
+
+        if not winner.hand:
+            self._end_round()
+        return winner
+
+    def _end_round(self):
+        """تیمی که دست‌های بیشتری برده، امتیاز دور را می‌گیرد."""
+        round_winner = max(self.trick_scores, key=self.trick_scores.get)
+        self.team_scores[round_winner] += 1
+        self.is_round_over = True
+        self._emit('round_over', winner=round_winner, team_scores=dict(self.team_scores))
+        if self.team_scores[round_winner] >= self.WINNING_SCORE:
+            self.is_game_over = True
+            self._emit('game_over', winner=round_winner)
+
+    # --- API حرکت (apply_move) ---
+
+    def _move_new_round(self, move: dict):
+        if not self.is_round_over or self.is_game_over:
+            raise ValueError("دور جاری هنوز تمام نشده است.")
+        self._start_new_round()
+
+    def _move_set_hokm(self, move: dict):
+        if self.hokm_suit is not None:
+            raise ValueError("حکم این دور قبلا تعیین شده است.")
+        if move['suit'] not in SUITS:
+            raise ValueError(f"خال نامعتبر: {move['suit']}")
+        self.set_hokm(move['suit'])
+
+    def _move_play(self, move: dict):
+        player = self.players[self.current_player_index]
+        if self.hokm_suit is None or self.is_round_over or not self._is_move_valid(move['card'], player):
+            raise ValueError(f"حرکت غیرمجاز برای {player.name}: {move['card']}")
+        self.play_card(player, move['card'])
+
+    def ai_move(self) -> dict | None:
+        """حرکت بعدی بازی از دید AI (برای بازیکنی که نوبت اوست)؛ پس از پایان بازی None."""
+        if self.is_game_over:
+            return None
+        if self.is_round_over:
+            return {'action': 'new_round'}
+        if self.hokm_suit is None:
+            return {'action': 'set_hokm', 'suit': self.ai_choose_hokm()}
+        return {'action': 'play', 'card': self.ai_choose_card(self.players[self.current_player_index])}
+
+    def ai_choose_hokm(self) -> str:
+        """حاکم AI خالی را که بیشترین کارت را از آن دارد حکم می‌کند."""
+        suit_counts = {suit: 0 for suit in SUITS}
+        for card in self.hakem.hand:
+            suit_counts[card.suit] += 1
+        return max(suit_counts, key=suit_counts.get)
+
+    def _team_index(self, player: Player) -> int:
+        return 0 if player in self.teams["تیم ۱"] else 1
+
+    def _search_root(self, player: Player) -> Determinizer:
+        """اطلاعات عمومی دور از دید player برای ساختن determinizationهای سازگار با بازی‌های دیده شده."""
+        seat = self.players.index(player)
+        tricks = [[(self.players.index(p), c.id) for p, c in trick]
+                  for trick in self.trick_history + [self.trick_cards]]
+        seen_mask = player.hand_mask
+        for trick in tricks:
+            for _, card_id in trick:
+                seen_mask |= 1 << card_id
+        hands = [None] * self.num_players
+        hands[seat] = player.hand_mask
+        return Determinizer(
+            seat, hands, FULL_DECK_MASK & ~seen_mask, [len(p.hand) for p in self.players],
+            known_voids(tricks, self.num_players), tricks[-1], SUIT_INDEX[self.hokm_suit],
+            tuple(self._team_index(p) for p in self.players),
+            won_tricks=[self.trick_scores["تیم ۱"], self.trick_scores["تیم ۲"]])
+
+    def ai_search_card(self, player: Player) -> Card:
+        """
+        AI سخت: determinization دست حریفان و ارزیابی هر حرکت مجاز با playoutهای سریع؛
+        حرکتی با بیشترین نرخ برد دور انتخاب می‌شود. با ai_workers > 1 playoutها بین چند پردازه پخش می‌شوند.
+        در پایان دور (ai_endgame_cards) به جای playout هر determinization دقیق حل می‌شود.
+        """
+        valid_moves = self._get_valid_moves(player)
+        if len(valid_moves) == 1:
+            return valid_moves[0]
+
+        if len(player.hand) <= self.ai_endgame_cards:
+            self.last_search_stats = endgame_search(self._search_root(player), [c.id for c in valid_moves],
+                                                    self._endgame_solver(player), self.rng, self.ai_time_budget,
+                                                    self.ai_iterations)
+            return Card.from_id(self.last_search_stats.best_move())
+
+        goal = TeamTricksGoal(self._team_index(player), self.WINNING_TRICKS)
+        self.last_search_stats = run_search(self._search_root(player), [c.id for c in valid_moves], goal, self.rng,
+                                            self.ai_time_budget, self.ai_iterations, goal.is_decided, self.ai_workers)
+        return Card.from_id(self.last_search_stats.best_move())
+
+    def _endgame_solver(self, player: Player) -> DoubleDummySolver:
+        if self.endgame_table is None:
+            self.endgame_table = TranspositionTable()
+        return DoubleDummySolver(SUIT_INDEX[self.hokm_suit], tuple(self._team_index(p) for p in self.players),
+                                 self._team_index(player), LANE_BITS, table=self.endgame_table)
+
+    def analyze_position(self) -> dict[Card, int]:
+        """
+        تحلیل با دست‌های باز (double dummy): برای هر کارت مجاز بازیکن نوبت، تعداد کل دست‌هایی
+        که تیم او با بازی کامل همه بازیکنان در این دور می‌برد.
+        """
+        player = self.players[self.current_player_index]
+        team = self._team_index(player)
+        state = TrickState([p.hand_mask for p in self.players], self.current_player_index, SUIT_INDEX[self.hokm_suit],
+                           tuple(self._team_index(p) for p in self.players),
+                           [(self.players.index(p), c.id) for p, c in self.trick_cards],
+                           [self.trick_scores["تیم ۱"], self.trick_scores["تیم ۲"]])
+        return {Card.from_id(card_id): state.won_tricks[team] + tricks
+                for card_id, tricks in analyze_moves(state, team).items()}
+
     def ai_choose_card(self, player: Player) -> Card:
         valid_moves = self._get_valid_moves(player)
         
         if self.difficulty == 'easy':
-            return random.choice(valid_moves)
+            return self.rng.choice(valid_moves)
         
-        elif self.difficulty == 'medium' or self.difficulty == 'hard':
+        elif self.difficulty == 'medium':
             # استراتژی ساده: بالاترین کارت مجاز را بازی می‌کند
             return max(valid_moves, key=lambda c: RANK_VALUES.get(c.rank, 0))
+
+        elif self.difficulty == 'hard':
+            return self.ai_search_card(player)
         
-        return random.choice(valid_moves)
+        return self.rng.choice(valid_moves)
@@ -1,17 +1,25 @@
 import sys, random
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QInputDialog, QGridLayout
-from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import QSize, QPropertyAnimation, QRect, QEasingCurve, QTimer, Qt
-from hokm_game import HokmGame, Card, SUITS
+from PyQt5.QtCore import QSize, QPropertyAnimation, QRect, QEasingCurve, Qt
+from hokm_game import HokmGame, Card, SUITS, RANK_VALUES
 from audio_manager import AudioManager
+from pixmap_cache import PixmapCache
+from hand_view import HandView
+from game_events import GameEvent
+from event_presenter import EventPresenter
+from move_history import MoveHistory
+
+class HokmGameWidget(EventPresenter, QWidget):
+    EVENT_HOLD_TIMES = {'trick_won': 2000}  # مدت نمایش رویداد پیش از رفتن به رویداد بعدی
 
-class HokmGameWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
-        self.hand_card_widgets = {}
+        self.audio_manager = AudioManager.instance()
+        self.pixmaps = PixmapCache.instance()
         self.trick_card_widgets = {}
+        self.setup_presenter()
+        self.shown_hokm = None
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -23,8 +31,12 @@ class HokmGameWidget(QWidget):
         self.status_label.setStyleSheet("font-size: 16px; font-weight: bold; color: white; background-color: rgba(0,0,0,0.5); padding: 5px; border-radius: 5px;")
         self.start_button = QPushButton("شروع بازی جدید")
         self.start_button.clicked.connect(self.start_new_game)
+        self.undo_button = QPushButton("بازگشت حرکت")
+        self.undo_button.clicked.connect(self.undo_last_move)
+        self.undo_button.setEnabled(False)
         top_layout.addWidget(self.status_label)
         top_layout.addStretch()
+        top_layout.addWidget(self.undo_button)
         top_layout.addWidget(self.start_button)
         self.main_layout.addLayout(top_layout)
 
@@ -35,6 +47,8 @@ class HokmGameWidget(QWidget):
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
 
     def start_new_game(self):
         items = ("بازی ۴ نفره", "بازی ۲ نفره")
@@ -50,33 +64,84 @@ class HokmGameWidget(QWidget):
         if "متوسط" in difficulty_choice: difficulty = 'medium'
         if "سخت" in difficulty_choice: difficulty = 'hard'
         
-        self.game = HokmGame(num_players=num_players, difficulty=difficulty)
+        self.clear_trick_widgets()
+        self.attach_game(HokmGame(num_players=num_players, difficulty=difficulty))
+        self.history = MoveHistory(self.game)
         self.start_button.hide()
         self.audio_manager.play("shuffle")
-        self.prompt_for_hokm()
+        # دور اول در سازنده موتور شروع شده است؛ رویداد آن دستی به صف اضافه می‌شود
+        self.event_queue.append(GameEvent('round_started', {'hakem': self.game.hakem}))
+        self.advance_engine()
+
+    # --- اجرای موتور و نمایش رویدادها ---
+
+    def human_to_move(self) -> bool:
+        """آیا موتور منتظر تصمیم بازیکن انسانی (یا شروع بازی جدید) است؟"""
+        game = self.game
+        if game.is_round_over or game.is_game_over:
+            return True
+        if game.hokm_suit is None:
+            return game.hakem == game.players[0]
+        return game.players[game.current_player_index] == game.players[0]
+
+    def apply_ai_move(self):
+        self.history.apply(self.game.ai_move())
+
+    def event_lead_time(self, event) -> int:
+        """مکث پیش از نمایش رویداد (میلی‌ثانیه)؛ فقط حرکت‌های AI مکث دارند تا قابل دنبال کردن باشند."""
+        if event.kind == 'card_played' and event['player'] != self.game.players[0]:
+            return self.AI_MOVE_DELAY
+        if event.kind == 'hokm_set' and event['hakem'] != self.game.players[0]:
+            return self.AI_MOVE_DELAY
+        return 0
+
+    def show_round_started(self, event):
+        self.shown_hokm = None
+        self.update_player_hand_display()
+        self.set_hand_buttons_enabled(False)  # تا تعیین حکم هیچ کارتی قابل بازی نیست
+        self.status_label.setText(f"حاکم: {event['hakem'].name}. منتظر انتخاب حکم...")
 
-    def prompt_for_hokm(self):
-        self.update_displays()
-        hakem = self.game.hakem
-        self.status_label.setText(f"حاکم: {hakem.name}. منتظر انتخاب حکم...")
-
-        if hakem == self.game.players[0]:
-            self.hokm_buttons_layout = QHBoxLayout()
-            for suit in SUITS:
-                btn = QPushButton(suit)
-                btn.setStyleSheet("font-size: 24px; font-weight: bold;")
-                btn.clicked.connect(lambda _, s=suit: self.set_hokm_and_start(s))
-                self.hokm_buttons_layout.addWidget(btn)
-            self.main_layout.insertLayout(1, self.hokm_buttons_layout)
+    def show_hokm_set(self, event):
+        self.shown_hokm = event['suit']
+        self.update_player_hand_display()
+        self.status_label.setText(f"حکم: {self.shown_hokm} | حاکم: {event['hakem'].name}")
+
+    def show_card_played(self, event):
+        self.audio_manager.play("play")
+        self.update_trick_display([(event['player'], event['card'])])
+        if event['player'] == self.game.players[0]:
+            self.update_player_hand_display()
+        next_index = (self.game.players.index(event['player']) + 1) % self.game.num_players
+        self.status_label.setText(f"حکم: {self.shown_hokm or '?'} | نوبت: {self.game.players[next_index].name}")
+
+    def show_trick_won(self, event):
+        self.status_label.setText(f"برنده دست: {event['winner'].name}")
+        self.audio_manager.play("win")
+        self.trick_done = True
+
+    def show_round_over(self, event):
+        self.status_label.setText(f"دور تمام شد! برنده: {event['winner']}")
+
+    def await_human(self):
+        game = self.game
+        self.undo_button.setEnabled(self.history.can_undo)
+        if game.is_round_over or game.is_game_over:
+            self.start_button.show()
+        elif game.hokm_suit is None:
+            self.prompt_for_hokm()
         else:
-            QTimer.singleShot(1000, self.ai_sets_hokm)
+            self.status_label.setText(f"حکم: {game.hokm_suit} | نوبت: {game.players[0].name}")
+            self.set_hand_buttons_enabled(True)
 
-    def ai_sets_hokm(self):
-        suit_counts = {suit: 0 for suit in SUITS}
-        for card in self.game.hakem.hand:
-            suit_counts[card.suit] += 1
-        chosen_hokm = max(suit_counts, key=suit_counts.get)
-        self.set_hokm_and_start(chosen_hokm)
+    def prompt_for_hokm(self):
+        self.set_hand_buttons_enabled(False)
+        self.hokm_buttons_layout = QHBoxLayout()
+        for suit in SUITS:
+            btn = QPushButton(suit)
+            btn.setStyleSheet("font-size: 24px; font-weight: bold;")
+            btn.clicked.connect(lambda _, s=suit: self.set_hokm_and_start(s))
+            self.hokm_buttons_layout.addWidget(btn)
+        self.main_layout.insertLayout(1, self.hokm_buttons_layout)
 
     def set_hokm_and_start(self, suit):
         if hasattr(self, 'hokm_buttons_layout'):
@@ -84,75 +149,49 @@ class HokmGameWidget(QWidget):
             self.main_layout.removeItem(self.hokm_buttons_layout)
             del self.hokm_buttons_layout
 
-        self.game.set_hokm(suit)
-        self.process_trick_turn()
+        self.history.apply({'action': 'set_hokm', 'suit': suit})
+        self.advance_engine()
 
-    def process_trick_turn(self):
-        if len(self.game.players[0].hand) == 0:
-            self.status_label.setText("دور تمام شد!")
-            self.start_button.show()
+    def on_card_clicked(self, card):
+        if self.presenting or not self.human_to_move() or self.game.hokm_suit is None:
             return
-            
-        if not self.game.trick_cards:
-            self.clear_trick_widgets()
-
-        self.update_displays()
-        
-        current_player = self.game.players[self.game.current_player_index]
-        if current_player == self.game.players[0]:
-            self.set_hand_buttons_enabled(True)
-        else:
-            self.set_hand_buttons_enabled(False)
-            QTimer.singleShot(1000, self.play_ai_turn)
-
-    def play_ai_turn(self):
-        player = self.game.players[self.game.current_player_index]
-        card_to_play = self.game.ai_choose_card(player)
-        self.on_card_clicked(card_to_play, is_human=False)
-
-    def on_card_clicked(self, card, is_human=True):
-        player = self.game.players[self.game.current_player_index]
-        if is_human and player != self.game.players[0]:
+        self.set_hand_buttons_enabled(False)
+        self.undo_button.setEnabled(False)
+        self.history.apply({'action': 'play', 'card': card})
+        self.advance_engine()
+
+    def undo_last_move(self):
+        """آخرین کارت بازیکن و حرکت‌های AI پس از آن را پس می‌گیرد."""
+        if self.presenting or hasattr(self, 'hokm_buttons_layout'):
             return
-        
-        self.audio_manager.play("play")
-        self.game.trick_cards.append((player, card))
-        player.hand.remove(card)
-
-        if len(self.game.trick_cards) == self.game.num_players:
-            self.update_displays()
-            winner = self.game._determine_trick_winner()
-            winner_team_name = "تیم ۱" if winner in self.game.teams["تیم ۱"] else "تیم ۲"
-            self.game.trick_scores[winner_team_name] += 1
-            self.status_label.setText(f"برنده دست: {winner.name}")
-            self.game.current_player_index = self.players.index(winner)
-            self.audio_manager.play("win")
-            QTimer.singleShot(2000, self.process_trick_turn)
-        else:
-            self.game.current_player_index = (self.game.current_player_index + 1) % self.game.num_players
-            self.process_trick_turn()
-            
-    def update_displays(self):
-        self.status_label.setText(f"حکم: {self.game.hokm_suit or '?'} | نوبت: {self.game.players[self.game.current_player_index].name}")
+        while self.history.can_undo:
+            node = self.history.last_node
+            self.history.undo()
+            if node.player_index == 0 and node.move['action'] == 'play':
+                break
+
+        self.shown_hokm = self.game.hokm_suit
+        self.trick_done = False
+        self.start_button.hide()
+        self.clear_trick_widgets()
+        self.update_trick_display(self.game.trick_cards)
         self.update_player_hand_display()
-        self.update_trick_display()
+        self.advance_engine()
 
     def update_player_hand_display(self):
-        self.clear_layout(self.player_hand_layout)
-        self.hand_card_widgets.clear()
         player = self.game.players[0]
-        for card in sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])):
-            btn = QPushButton("")
-            icon_path = f"resources/images/themes/default/cards/{card.image_filename}"
-            btn.setIcon(QIcon(icon_path))
-            btn.setIconSize(QSize(80, 110))
-            btn.setFixedSize(QSize(85, 115))
-            btn.setStyleSheet("QPushButton { border: none; background-color: transparent; }")
-            btn.clicked.connect(lambda _, c=card: self.on_card_clicked(c))
-            self.player_hand_layout.addWidget(btn)
-            self.hand_card_widgets[card] = btn
+        self.hand_view.set_cards(sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])))
+
+    def make_hand_card_widget(self, card):
+        btn = QPushButton("")
+        btn.setIcon(self.pixmaps.card_icon(card))
+        btn.setIconSize(QSize(80, 110))
+        btn.setFixedSize(QSize(85, 115))
+        btn.setStyleSheet("QPushButton { border: none; background-color: transparent; }")
+        btn.clicked.connect(lambda _, c=card: self.on_card_clicked(c))
+        return btn
             
-    def update_trick_display(self):
+    def update_trick_display(self, trick_cards):
         positions = {
             0: (2, 1), # Bottom (Player 1)
             1: (1, 2), # Right (Player 2)
@@ -162,11 +201,11 @@ class HokmGameWidget(QWidget):
         if self.game.num_players == 2:
             positions = {0: (2, 1), 1: (0, 1)}
 
-        for player, card in self.game.trick_cards:
+        for player, card in trick_cards:
             if card not in self.trick_card_widgets:
-                player_idx = self.players.index(player)
+                player_idx = self.game.players.index(player)
                 lbl = QLabel()
-                pixmap = QIcon(f"resources/images/themes/default/cards/{card.image_filename}").pixmap(QSize(80, 110))
+                pixmap = self.pixmaps.card_pixmap(card, (80, 110))
                 lbl.setPixmap(pixmap)
                 row, col = positions[player_idx]
                 self.game_board_layout.addWidget(lbl, row, col, Qt.AlignCenter)
@@ -174,8 +213,7 @@ class HokmGameWidget(QWidget):
 
     def set_hand_buttons_enabled(self, enabled):
         valid_moves = self.game._get_valid_moves(self.game.players[0])
-        for card, widget in self.hand_card_widgets.items():
-            widget.setEnabled(enabled and card in valid_moves)
+        self.hand_view.set_enabled(lambda card: enabled and card in valid_moves)
 
     def clear_layout(self, layout):
         if layout is None: return
@@ -1,25 +1,32 @@
+import argparse
+import importlib
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget
+import time
+from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout
 from PyQt5.QtGui import QFontDatabase, QFont
 
-# وارد کردن ویجت‌های نهایی و کامل همه بازی‌ها
-from hokm_gui import HokmGameWidget
-from shelem_gui import ShelemGameWidget
-from chahar_barg_gui import ChaharBargGameWidget
-from haft_khaj_gui import HaftKhajGameWidget
-from rummy_gui import RummyGameWidget
-from bibi_salam_gui import BibiSalamGameWidget
-from bluff_gui import BluffGameWidget
-from haft_o_nim_gui import HaftONimGameWidget
-from bidel_gui import BidelGameWidget
-from nakhoda_gui import NakhodaGameWidget
-from chos_e_fil_gui import ChosEFilGameWidget
-from ganjifeh_gui import GanjifehGameWidget
-from amerikaii_gui import AmerikaiiGameWidget
+# ماژول‌های رابط گرافیکی هر بازی فقط هنگام اولین انتخاب زبانه آن import و ساخته می‌شوند
+GAME_TABS = [
+    ("hokm_gui", "HokmGameWidget", "حکم (Hokm)"),
+    ("shelem_gui", "ShelemGameWidget", "شلم (Shelem)"),
+    ("chahar_barg_gui", "ChaharBargGameWidget", "چهاربرگ (Chahar Barg)"),
+    ("haft_khaj_gui", "HaftKhajGameWidget", "هفت خاج (Haft Khaj)"),
+    ("rummy_gui", "RummyGameWidget", "ریم (Rummy)"),
+    ("bibi_salam_gui", "BibiSalamGameWidget", "بی‌بی سلام (Bibi Salam)"),
+    ("bluff_gui", "BluffGameWidget", "بلوف (Bluff)"),
+    ("haft_o_nim_gui", "HaftONimGameWidget", "هفت و نیم (Haft-o-Nim)"),
+    ("bidel_gui", "BidelGameWidget", "بیدل (Bidel)"),
+    ("nakhoda_gui", "NakhodaGameWidget", "ناخدا (Nakhoda)"),
+    ("chos_e_fil_gui", "ChosEFilGameWidget", "چُس فیل (Chos-e Fil)"),
+    ("ganjifeh_gui", "GanjifehGameWidget", "گنجفه (Ganjifeh)"),
+    ("amerikaii_gui", "AmerikaiiGameWidget", "آمریکایی (Amerikaii)"),
+]
 
 class MainAppWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, lazy_tabs=True):
         super().__init__()
+        start = time.perf_counter()
+        self.tab_load_times = {}  # عنوان زبانه -> زمان import و ساخت (ثانیه)
         
         self.setWindowTitle("مجموعه بازی‌های کارتی ایرانی")
         self.setGeometry(100, 100, 1280, 800)
@@ -55,22 +62,49 @@ class MainAppWindow(QMainWindow):
         self.setCentralWidget(self.tabs)
 
         # --- افزودن تمام زبانه‌ها ---
-        self.tabs.addTab(HokmGameWidget(), "حکم (Hokm)")
-        self.tabs.addTab(ShelemGameWidget(), "شلم (Shelem)")
-        self.tabs.addTab(ChaharBargGameWidget(), "چهاربرگ (Chahar Barg)")
-        self.tabs.addTab(HaftKhajGameWidget(), "هفت خاج (Haft Khaj)")
-        self.tabs.addTab(RummyGameWidget(), "ریم (Rummy)")
-        self.tabs.addTab(BibiSalamGameWidget(), "بی‌بی سلام (Bibi Salam)")
-        self.tabs.addTab(BluffGameWidget(), "بلوف (Bluff)")
-        self.tabs.addTab(HaftONimGameWidget(), "هفت و نیم (Haft-o-Nim)")
-        self.tabs.addTab(BidelGameWidget(), "بیدل (Bidel)")
-        self.tabs.addTab(NakhodaGameWidget(), "ناخدا (Nakhoda)")
-        self.tabs.addTab(ChosEFilGameWidget(), "چُس فیل (Chos-e Fil)")
-        self.tabs.addTab(GanjifehGameWidget(), "گنجفه (Ganjifeh)")
-        self.tabs.addTab(AmerikaiiGameWidget(), "آمریکایی (Amerikaii)")
-        
+        # هر زبانه ابتدا یک ظرف خالی است؛ ویجت بازی با اولین انتخاب در آن ساخته می‌شود
+        self.tab_containers = []
+        for _, _, title in GAME_TABS:
+            container = QWidget()
+            container.setLayout(QVBoxLayout())
+            container.layout().setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(container, title)
+            self.tab_containers.append(container)
+        self.loaded_tabs = {}  # اندیس زبانه -> ویجت بازی
+
+        self.tabs.currentChanged.connect(self._load_tab)
+        if lazy_tabs:
+            self._load_tab(self.tabs.currentIndex())
+        else:
+            for index in range(len(GAME_TABS)):
+                self._load_tab(index)
+        self.startup_time = time.perf_counter() - start
+
+    def _load_tab(self, index: int):
+        """ماژول بازی زبانه index را import کرده و ویجت آن را (فقط یک بار) می‌سازد."""
+        if index < 0 or index in self.loaded_tabs:
+            return
+        module_name, class_name, title = GAME_TABS[index]
+        start = time.perf_counter()
+        widget_class = getattr(importlib.import_module(module_name), class_name)
+        widget = widget_class()
+        self.tab_containers[index].layout().addWidget(widget)
+        self.loaded_tabs[index] = widget
+        self.tab_load_times[title] = time.perf_counter() - start
+
+    def timing_report(self) -> str:
+        lines = [f"ساخت پنجره اصلی: {self.startup_time * 1000:.1f} ms "
+                 f"({len(self.loaded_tabs)} از {len(GAME_TABS)} زبانه بارگذاری شده)"]
+        for title, elapsed in self.tab_load_times.items():
+            lines.append(f"    {title}: {elapsed * 1000:.1f} ms")
+        return "\n".join(lines)
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="مجموعه بازی‌های کارتی ایرانی")
+    parser.add_argument("--eager", action="store_true", help="ساخت همه زبانه‌ها هنگام شروع (برای مقایسه)")
+    parser.add_argument("--timing", action="store_true", help="چاپ گزارش زمان راه‌اندازی")
+    args, qt_args = parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
 
     # افزودن فونت سفارشی
     font_path = "resources/fonts/Vazirmatn-Regular.ttf"
@@ -83,6 +117,8 @@ if __name__ == "__main__":
     else:
         print(f"هشدار: فایل فونت در مسیر '{font_path}' پیدا نشد. از فونت پیش‌فرض استفاده می‌شود.")
         
-    window = MainAppWindow()
+    window = MainAppWindow(lazy_tabs=not args.eager)
     window.show()
+    if args.timing:
+        print(window.timing_report())
     sys.exit(app.exec_())
@@ -0,0 +1,120 @@
+"""
+تاریخچه حرکت‌ها با undo/redo برای موتورهای بازی.
+
+بعد از هر حرکت یک GameState (game_state.py) ذخیره می‌شود، اما فیلدهایی که تغییر نکرده‌اند
+همان اشیای تغییرناپذیر وضعیت قبلی را به اشتراک می‌گذارند (structural sharing)؛ در لیست‌هایی مثل
+trick_history هم فقط عضو جدید تازه است. پس حافظه به تعداد فیلدهای تغییر کرده رشد می‌کند.
+undo و redo فقط جابجایی یک گره بین دو پشته است و سپس restore همان وضعیت.
+"""
+from game_state import FrozenDict, FrozenList, GameState
+
+_SHARED_CONTAINERS = (FrozenList, FrozenDict, tuple)
+
+
+def _share(new, old):
+    """new را با اشتراک گذاشتن بخش‌های برابر با old برمی‌گرداند."""
+    if new == old:
+        return old
+    if type(new) is type(old) and type(new) in _SHARED_CONTAINERS:
+        shared = [_share(n, o) for n, o in zip(new, old)]
+        shared.extend(new[len(old):])
+        return type(new)(shared)
+    return new
+
+
+class HistoryNode:
+    """یک حرکت و وضعیت پس از آن؛ player_index بازیکنی است که حرکت را انجام داده است."""
+    __slots__ = ("move", "state", "player_index")
+
+    def __init__(self, move, state: GameState, player_index):
+        self.move = move
+        self.state = state
+        self.player_index = player_index
+
+
+class MoveHistory:
+    """
+    تاریخچه حرکت‌های یک موتور (هر موتوری که apply_move و snapshot دارد).
+    حرکت‌ها با apply اجرا و ثبت می‌شوند؛ اجرای حرکت جدید پس از undo شاخه redo را دور می‌اندازد.
+    """
+    def __init__(self, game, track_rng=False):
+        self.game = game
+        self.track_rng = track_rng
+        self._past = [HistoryNode(None, game.snapshot(track_rng), None)]  # آخرین گره = وضعیت فعلی
+        self._future = []  # پشته redo (آخرین عضو = حرکت بعدی)
+        self.stats = {"fields_shared": 0, "fields_new": 0}
+
+    def apply(self, move: dict) -> list:
+        """حرکت را روی موتور اجرا کرده، ثبت می‌کند و رویدادهای آن را برمی‌گرداند."""
+        player_index = getattr(self.game, "current_player_index", None)
+        events = self.game.apply_move(move)
+        self.record(move, player_index)
+        return events
+
+    def record(self, move=None, player_index=None):
+        """وضعیت فعلی موتور را (مثلا پس از تغییری خارج از apply_move) به تاریخچه اضافه می‌کند."""
+        previous = self._past[-1].state
+        state = self.game.snapshot(self.track_rng)
+        fields = tuple(self._share_counted(new, old) for new, old in zip(state.fields, previous.fields))
+        seats = tuple(tuple(self._share_counted(new, old) for new, old in zip(seat, previous_seat))
+                      for seat, previous_seat in zip(state.seats, previous.seats))
+        rng_state = state.rng_state
+        if rng_state is not None and rng_state == previous.rng_state:
+            rng_state = previous.rng_state
+        self._past.append(HistoryNode(move, GameState(fields, seats, rng_state), player_index))
+        self._future = []
+
+    def _share_counted(self, new, old):
+        shared = _share(new, old)
+        self.stats["fields_shared" if shared is old else "fields_new"] += 1
+        return shared
+
+    @property
+    def can_undo(self) -> bool:
+        return len(self._past) > 1
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._future)
+
+    @property
+    def last_node(self) -> HistoryNode | None:
+        """آخرین حرکت انجام شده (برای undo)."""
+        return self._past[-1] if self.can_undo else None
+
+    def undo(self):
+        """آخرین حرکت را برمی‌گرداند و آن را پس می‌دهد؛ اگر حرکتی نباشد None."""
+        if not self.can_undo:
+            return None
+        node = self._past.pop()
+        self._future.append(node)
+        self.game.restore(self._past[-1].state)
+        return node.move
+
+    def redo(self):
+        if not self._future:
+            return None
+        node = self._future.pop()
+        self._past.append(node)
+        self.game.restore(node.state)
+        return node.move
+
+    def seek(self, index: int):
+        """به وضعیت پس از index حرکت اول می‌رود (۰ = وضعیت اولیه)؛ برای مرور بازپخش."""
+        index = max(0, min(index, len(self)))
+        while len(self._past) - 1 > index:
+            self._future.append(self._past.pop())
+        while len(self._past) - 1 < index:
+            self._past.append(self._future.pop())
+        self.game.restore(self._past[-1].state)
+
+    @property
+    def position(self) -> int:
+        return len(self._past) - 1
+
+    def moves(self) -> list:
+        """همه حرکت‌های ثبت شده (شامل شاخه redo) به ترتیب."""
+        return [node.move for node in self._past[1:]] + [node.move for node in reversed(self._future)]
+
+    def __len__(self) -> int:
+        return len(self._past) - 1 + len(self._future)
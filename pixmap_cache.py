@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QIcon, QImage, QPixmap
+from game_basics import ALL_CARDS
+from theme_bundle import ThemeBundle
+
+THEMES_DIR = "resources/images/themes"
+CARD_SIZES = ((80, 110), (100, 140), (60, 88))  # اندازه‌هایی که ویجت‌های بازی استفاده می‌کنند
+
+class PixmapCache:
+    """
+    کش مشترک تصاویر کارت بر اساس (تم، فایل، اندازه) با سیاست LRU.
+    فایل‌های PNG تم فعال در یک نخ پس‌زمینه رمزگشایی و مقیاس می‌شوند (QImage)؛ ساخت QPixmap
+    که فقط در نخ رابط گرافیکی مجاز است، در اولین درخواست و بدون رمزگشایی دوباره انجام می‌شود.
+    اگر برای تم بسته باینری (theme_bundle.py) ساخته شده باشد، تصاویر مستقیما از آن خوانده می‌شوند.
+    """
+    _instance = None
+
+    @classmethod
+    def instance(cls) -> "PixmapCache":
+        """نمونه مشترک کل برنامه؛ در اولین فراخوانی پیش‌بارگذاری تم پیش‌فرض شروع می‌شود."""
+        if cls._instance is None:
+            cls._instance = cls()
+            cls._instance.preload()
+        return cls._instance
+
+    def __init__(self, theme="default", capacity=512):
+        self.theme = theme
+        self.capacity = capacity
+        self._pixmaps = OrderedDict()  # کلید -> QPixmap (به ترتیب آخرین استفاده)
+        self._icons = {}  # کلید -> QIcon ساخته شده از همان QPixmap
+        self._decoded = {}  # کلید -> QImage آماده از نخ پیش‌بارگذاری
+        self._preload_thread = None
+        self.bundle = ThemeBundle.open(theme)
+        self.stats = {"hits": 0, "misses": 0, "preloaded_hits": 0, "bundle_hits": 0, "evictions": 0,
+                      "preload_time": None}
+
+    def card_path(self, card) -> str:
+        return f"{THEMES_DIR}/{self.theme}/cards/{card.image_filename}"
+
+    def back_path(self) -> str:
+        return f"{THEMES_DIR}/{self.theme}/back.png"
+
+    @staticmethod
+    def _scaled(image: QImage, width: int, height: int) -> QImage:
+        if image.isNull():
+            return image
+        return image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    @classmethod
+    def _decode(cls, path: str, width: int, height: int) -> QImage:
+        return cls._scaled(QImage(path), width, height)
+
+    def _key(self, path: str, size) -> tuple:
+        width, height = (size.width(), size.height()) if isinstance(size, QSize) else size
+        return path, width, height
+
+    def pixmap(self, path: str, size) -> QPixmap:
+        key = self._key(path, size)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            self.stats["hits"] += 1
+            return pixmap
+
+        image = self._decoded.pop(key, None)
+        if image is not None:
+            self.stats["preloaded_hits"] += 1
+        elif self.bundle is not None and (image := self._bundle_image(*key)) is not None:
+            self.stats["bundle_hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            image = self._decode(*key)
+        pixmap = QPixmap.fromImage(image)
+        self._pixmaps[key] = pixmap
+        if len(self._pixmaps) > self.capacity:
+            old_key, _ = self._pixmaps.popitem(last=False)
+            self._icons.pop(old_key, None)
+            self.stats["evictions"] += 1
+        return pixmap
+
+    def _bundle_image(self, path: str, width: int, height: int) -> QImage | None:
+        if not path.startswith(f"{THEMES_DIR}/{self.theme}/"):
+            return None
+        return self.bundle.image(path.rsplit("/", 1)[-1], width, height)
+
+    def card_pixmap(self, card, size=(80, 110)) -> QPixmap:
+        return self.pixmap(self.card_path(card), size)
+
+    def back_pixmap(self, size=(80, 110)) -> QPixmap:
+        return self.pixmap(self.back_path(), size)
+
+    def card_icon(self, card, size=(80, 110)) -> QIcon:
+        """QIcon دکمه‌های دست؛ پیکسمپ آن دقیقا هم‌اندازه iconSize دکمه است تا نیازی به مقیاس دوباره نباشد."""
+        pixmap = self.card_pixmap(card, size)
+        key = self._key(self.card_path(card), size)
+        icon = self._icons.get(key)
+        if icon is None:
+            icon = self._icons[key] = QIcon(pixmap)
+        return icon
+
+    def set_theme(self, theme: str):
+        """تم فعال را عوض کرده و پیش‌بارگذاری آن را شروع می‌کند؛ تصاویر تم قبلی به تدریج از LRU خارج می‌شوند."""
+        if theme != self.theme:
+            self.theme = theme
+            self._decoded.clear()
+            self.bundle = ThemeBundle.open(theme)
+            self.preload()
+
+    def preload(self, sizes=CARD_SIZES):
+        """
+        همه کارت‌ها و پشت کارت تم فعال را در پس‌زمینه رمزگشایی و مقیاس می‌کند؛ هر فایل فقط یک بار
+        رمزگشایی و همان QImage به همه اندازه‌ها مقیاس می‌شود.
+        """
+        if self.bundle is not None:
+            return  # تصاویر بسته از قبل رمزگشایی شده‌اند و با mmap در دسترس‌اند
+        paths = [self.card_path(card) for card in ALL_CARDS] + [self.back_path()]
+        theme = self.theme
+
+        def run():
+            start = time.perf_counter()
+            for path in paths:
+                source = None
+                for width, height in sizes:
+                    if self.theme != theme:
+                        return
+                    key = (path, width, height)
+                    if key not in self._pixmaps and key not in self._decoded:
+                        if source is None:
+                            source = QImage(path)
+                        self._decoded[key] = self._scaled(source, width, height)
+            self.stats["preload_time"] = time.perf_counter() - start
+
+        self._preload_thread = threading.Thread(target=run, daemon=True)
+        self._preload_thread.start()
+
+    def cache_stats(self) -> dict:
+        return {"pixmaps": len(self._pixmaps), "decoded_pending": len(self._decoded), **self.stats}
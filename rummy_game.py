@@ -1,28 +1,95 @@
 import random
-from itertools import combinations
-from collections import defaultdict
-from game_basics import Card, Player, Deck, RANK_VALUES
+from game_basics import Card, Player, Deck, RANK_VALUES, ALL_CARDS, SUITS, RANKS
+from game_events import EventSource
+from game_state import Snapshottable
+from hand_bitboard import LANE_BITS, LANE_MASK, hand_to_mask
 
-class RummyGame:
+MIN_MELD_SIZE = 3
+
+
+class MeldFinder:
+    """
+    یافتن ساختاری ملدهای بیشینه (ست‌ها و ران‌ها) در یک دست، با کش افزایشی.
+    دست به صورت bitmask نگه داشته می‌شود؛ با اضافه یا حذف یک کارت فقط ست رتبه
+    و ران‌های خال همان کارت دوباره محاسبه می‌شوند.
+    """
+    __slots__ = ("hand_mask", "_sets_by_rank", "_runs_by_suit")
+
+    def __init__(self, hand=()):
+        self.hand_mask = hand_to_mask(hand)
+        self._sets_by_rank = [self._find_set(r) for r in range(len(RANKS))]
+        self._runs_by_suit = [self._find_runs(s) for s in range(len(SUITS))]
+
+    def add(self, card: Card):
+        self.hand_mask |= 1 << card.id
+        self._update(card)
+
+    def remove(self, card: Card):
+        self.hand_mask &= ~(1 << card.id)
+        self._update(card)
+
+    def melds(self) -> list[list[Card]]:
+        """ملدهای بیشینه؛ ابتدا ست‌ها به ترتیب رتبه و سپس ران‌ها به ترتیب خال."""
+        melds = [meld for meld in self._sets_by_rank if meld]
+        for runs in self._runs_by_suit:
+            melds.extend(runs)
+        return melds
+
+    def _update(self, card: Card):
+        rank_index = card.id % LANE_BITS
+        self._sets_by_rank[rank_index] = self._find_set(rank_index)
+        self._runs_by_suit[card.suit_index] = self._find_runs(card.suit_index)
+
+    def _find_set(self, rank_index: int) -> list[Card] | None:
+        cards = [ALL_CARDS[s * LANE_BITS + rank_index] for s in range(len(SUITS))
+                 if self.hand_mask >> (s * LANE_BITS + rank_index) & 1]
+        return cards if len(cards) >= MIN_MELD_SIZE else None
+
+    def _find_runs(self, suit_index: int) -> list[list[Card]]:
+        lane = (self.hand_mask >> (suit_index * LANE_BITS)) & LANE_MASK
+        base = suit_index * LANE_BITS
+        runs = []
+        rank_index = 0
+        while lane:
+            if not lane & 1:
+                lane >>= 1
+                rank_index += 1
+                continue
+            start = rank_index
+            while lane & 1:
+                lane >>= 1
+                rank_index += 1
+            if rank_index - start >= MIN_MELD_SIZE:
+                runs.append([ALL_CARDS[base + r] for r in range(start, rank_index)])
+        return runs
+
+class RummyGame(EventSource, Snapshottable):
     """
     موتور و منطق اصلی بازی ریم (Rummy).
     """
-    def __init__(self, num_players=2, hand_size=10, difficulty='medium'):
+    MOVE_HANDLERS = {'draw': '_move_draw', 'meld': '_move_meld', 'discard': '_move_discard'}
+    STATE_FIELDS = ('stock_pile', 'discard_pile', 'melds_on_table', 'current_player_index', 'has_drawn',
+                    'is_game_over', 'winner')
+
+    def __init__(self, num_players=2, hand_size=10, difficulty='medium', rng=None):
         if num_players < 2:
             raise ValueError("تعداد بازیکنان باید حداقل ۲ نفر باشد.")
 
         self.difficulty = difficulty
+        self.rng = rng or random
         self.players = [Player(f"بازیکن {i+1}") for i in range(num_players)]
         self.hand_size = hand_size
         self.is_game_over = False
         self.winner = None
         self.current_player_index = 0
+        self.has_drawn = False  # آیا بازیکن فعلی در این نوبت کارت کشیده است
 
         self.stock_pile = Deck()
-        self.stock_pile.shuffle()
+        self.stock_pile.shuffle(self.rng)
         self.discard_pile = []
         
         self.melds_on_table = []
+        self._meld_finders = {}
 
         self._initial_deal()
 
@@ -69,26 +136,29 @@ class RummyGame:
         return True
 
     def find_possible_melds(self, hand: list[Card]) -> list:
-        """تمام ملدهای (ست‌ها و ران‌های) ممکن در یک دست را پیدا می‌کند."""
-        possible_melds = []
-        
-        for i in range(3, len(hand) + 1):
-            for combo in combinations(hand, i):
-                combo_list = list(combo)
-                if self._is_valid_set(combo_list) or self._is_valid_run(combo_list):
-                    # جلوگیری از افزودن زیرمجموعه‌ها
-                    is_subset = False
-                    for existing_meld in possible_melds:
-                        if set(combo_list).issubset(set(existing_meld)):
-                            is_subset = True
-                            break
-                    if not is_subset:
-                        possible_melds.append(combo_list)
-                    
-        return possible_melds
+        """تمام ملدهای (ست‌ها و ران‌های) بیشینه ممکن در یک دست را پیدا می‌کند."""
+        return MeldFinder(hand).melds()
+
+    def _meld_finder(self, player: Player) -> MeldFinder:
+        """MeldFinder کش‌شده بازیکن؛ اگر دست از بیرون موتور تغییر کرده باشد از نو ساخته می‌شود."""
+        finder = self._meld_finders.get(player)
+        if finder is None or finder.hand_mask != player.hand_mask:
+            finder = MeldFinder(player.hand)
+            self._meld_finders[player] = finder
+        return finder
+
+    def _hand_changed(self, player: Player, added: Card = None, removed: Card = None):
+        finder = self._meld_finders.get(player)
+        if finder is None:
+            return
+        if added:
+            finder.add(added)
+        if removed:
+            finder.remove(removed)
 
     def draw_card(self, player: Player, source: str):
         """بازیکن یک کارت از منبع مشخص شده ('stock' یا 'discard') می‌کشد."""
+        card = None
         if source == 'stock':
             if self.stock_pile:
                 card = self.stock_pile.deal()
@@ -97,6 +167,10 @@ class RummyGame:
             if self.discard_pile:
                 card = self.discard_pile.pop()
                 player.add_card(card)
+        if card:
+            self._hand_changed(player, added=card)
+        self.has_drawn = True
+        self._emit('card_drawn', player=player, source=source, card=card if source == 'discard' else None)
         
         if not self.stock_pile:
              self._refill_stock_pile()
@@ -108,6 +182,8 @@ class RummyGame:
                 self.melds_on_table.append(meld)
                 for card in meld:
                     player.hand.remove(card)
+                    self._hand_changed(player, removed=card)
+                self._emit('meld_played', player=player, meld=list(meld))
 
     def discard_card(self, player: Player, card_to_discard: Card):
         """بازیکن یک کارت را دور می‌اندازد تا نوبتش تمام شود."""
@@ -116,60 +192,102 @@ class RummyGame:
             if not player.hand:
                  self.is_game_over = True
                  self.winner = player
+                 self._emit('game_over', winner=player)
                  return
             raise ValueError("کارت برای دور انداختن در دست بازیکن نیست.")
             
         player.hand.remove(card_to_discard)
+        self._hand_changed(player, removed=card_to_discard)
         self.discard_pile.append(card_to_discard)
+        self.has_drawn = False
+        self._emit('card_discarded', player=player, card=card_to_discard)
 
         if not player.hand:
             self.is_game_over = True
             self.winner = player
+            self._emit('game_over', winner=player)
         else:
             self.current_player_index = (self.current_player_index + 1) % len(self.players)
 
     def _refill_stock_pile(self):
         if not self.discard_pile or len(self.discard_pile) <= 1:
             self.is_game_over = True # No cards left to play
+            self._emit('game_over', winner=None)
             return
         
         top = self.discard_pile.pop()
         cards_to_shuffle = self.discard_pile
         self.discard_pile = [top]
-        random.shuffle(cards_to_shuffle)
+        self.rng.shuffle(cards_to_shuffle)
         self.stock_pile.cards.extend(cards_to_shuffle)
 
+    # --- API حرکت (apply_move) ---
+
+    def _move_draw(self, move: dict):
+        if self.is_game_over or self.has_drawn or move.get('source') not in ('stock', 'discard'):
+            raise ValueError(f"کشیدن کارت غیرمجاز: {move}")
+        self.draw_card(self.players[self.current_player_index], move['source'])
+
+    def _move_meld(self, move: dict):
+        player = self.players[self.current_player_index]
+        melds = move['melds']
+        if self.is_game_over or not self.has_drawn:
+            raise ValueError("ابتدا باید کارت کشیده شود.")
+        if not all(self._is_valid_set(meld) or self._is_valid_run(meld) for meld in melds):
+            raise ValueError(f"مجموعه نامعتبر: {melds}")
+        self.play_melds(player, melds)
+
+    def _move_discard(self, move: dict):
+        if self.is_game_over or not self.has_drawn:
+            raise ValueError("ابتدا باید کارت کشیده شود.")
+        self.discard_card(self.players[self.current_player_index], move.get('card'))
+
+    def ai_move(self) -> dict | None:
+        """حرکت بعدی AI در مرحله فعلی نوبت (کشیدن، گذاشتن مجموعه‌ها یا دور انداختن)."""
+        if self.is_game_over:
+            return None
+        player = self.players[self.current_player_index]
+        if not self.has_drawn:
+            return {'action': 'draw', 'source': self._ai_draw_source(player)}
+        melds_to_play = self._meld_finder(player).melds()
+        if melds_to_play:
+            return {'action': 'meld', 'melds': melds_to_play}
+        # با دست خالی (همه کارت‌ها در مجموعه‌ها) discard_card بازیکن را برنده اعلام می‌کند
+        return {'action': 'discard', 'card': self._ai_discard_choice(player, []) if player.hand else None}
+
+    def _ai_draw_source(self, player: Player) -> str:
+        # Medium/Hard AI: Check if discard card is useful
+        finder = self._meld_finder(player)
+        top_discard = self.top_discard_card()
+        takes_discard = False
+        if top_discard and self.difficulty != 'easy':
+            finder.add(top_discard)
+            takes_discard = any(top_discard in meld for meld in finder.melds())
+            finder.remove(top_discard)
+        return 'discard' if takes_discard else 'stock'
+
+    def _ai_discard_choice(self, player: Player, melds_played: list) -> Card:
+        # Medium/Hard AI: Discard a card that is not part of any potential meld
+        all_meld_cards = set()
+        for meld in melds_played:
+            all_meld_cards.update(meld)
+
+        non_meld_cards = [c for c in player.hand if c not in all_meld_cards]
+        if non_meld_cards:
+            # Discard the highest rank non-meld card
+            return max(non_meld_cards, key=lambda c: RANK_VALUES[c.rank])
+        return self.rng.choice(player.hand)
+
     def ai_play_turn(self, player: Player):
         """یک نوبت کامل را برای بازیکن هوش مصنوعی شبیه‌سازی می‌کند."""
         # 1. Draw card
-        # Medium/Hard AI: Check if discard card is useful
-        top_discard = self.top_discard_card()
-        potential_hand = player.hand + [top_discard]
-        melds_with_discard = self.find_possible_melds(potential_hand)
-        melds_without_discard = self.find_possible_melds(player.hand)
-        
-        if self.difficulty != 'easy' and len(melds_with_discard) > len(melds_without_discard):
-            self.draw_card(player, 'discard')
-        else:
-            self.draw_card(player, 'stock')
+        self.draw_card(player, self._ai_draw_source(player))
 
         # 2. Meld cards
-        melds_to_play = self.find_possible_melds(player.hand)
+        melds_to_play = self._meld_finder(player).melds()
         if melds_to_play:
             self.play_melds(player, melds_to_play)
 
         # 3. Discard card
         if player.hand:
-            # Medium/Hard AI: Discard a card that is not part of any potential meld
-            all_meld_cards = set()
-            for meld in melds_to_play:
-                all_meld_cards.update(meld)
-            
-            non_meld_cards = [c for c in player.hand if c not in all_meld_cards]
-            if non_meld_cards:
-                # Discard the highest rank non-meld card
-                card_to_discard = max(non_meld_cards, key=lambda c: RANK_VALUES[c.rank])
-            else:
-                card_to_discard = random.choice(player.hand)
-            
-            self.discard_card(player, card_to_discard)
+            self.discard_card(player, self._ai_discard_choice(player, melds_to_play))
@@ -3,14 +3,24 @@ from PyQt5.QtCore import Qt, QTimer, QSize
 from PyQt5.QtGui import QIcon
 from rummy_game import RummyGame, Card, RANK_VALUES
 from audio_manager import AudioManager
+from hand_view import HandView
+from event_presenter import EventPresenter
+
+class RummyGameWidget(EventPresenter, QWidget):
+    AI_MOVE_DELAY = 2000  # مکث پیش از نمایش نوبت AI
+    EVENT_HOLD_TIMES = {'card_drawn': 800, 'meld_played': 800}  # هر مرحله نوبت AI جدا دیده می‌شود
 
-class RummyGameWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
+        self.audio_manager = AudioManager.instance()
         self.turn_phase = None
         self.selected_cards = []
+        # وضعیت زمین تا جایی که رویدادها نمایش داده شده‌اند (وضعیت زنده موتور جلوتر است)
+        self.shown_melds = []
+        self.shown_stock_size = 0
+        self.shown_discard_pile = []
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -37,42 +47,92 @@ class RummyGameWidget(QWidget):
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
         
         self.action_layout = QHBoxLayout()
         self.main_layout.addLayout(self.action_layout)
 
     def start_new_game(self):
-        self.game = RummyGame()
+        self.attach_game(RummyGame())
+        self.shown_melds = []
+        self.shown_stock_size = len(self.game.stock_pile)
+        self.shown_discard_pile = list(self.game.discard_pile)
+        self.turn_phase = None
+        self.selected_cards = []
         self.start_button.hide()
         self.audio_manager.play("shuffle")
-        self.process_turn()
+        self.update_displays()
+        self.advance_engine()
+
+    # --- اجرای موتور و نمایش رویدادها ---
+
+    def human_to_move(self) -> bool:
+        return self.game.is_game_over or self.game.current_player_index == 0
+
+    def event_lead_time(self, event) -> int:
+        # مکث فقط پیش از شروع نوبت AI؛ چیدن و دور انداختن با EVENT_HOLD_TIMES فاصله می‌گیرند
+        return super().event_lead_time(event) if event.kind == 'card_drawn' else 0
+
+    def show_card_drawn(self, event):
+        self.audio_manager.play("play")
+        if event['source'] == 'stock':
+            self.shown_stock_size -= 1
+        elif self.shown_discard_pile:
+            self.shown_discard_pile.pop()
+        if not self.shown_stock_size and len(self.shown_discard_pile) > 1:
+            # موتور با تمام شدن دسته اصلی، کارت‌های دورریخته (جز رویی) را دوباره بر می‌زند
+            self.shown_stock_size = len(self.shown_discard_pile) - 1
+            self.shown_discard_pile = self.shown_discard_pile[-1:]
+        if event['player'] != self.game.players[0]:
+            self.status_label.setText(f"نوبت حریف: {event['player'].name}")
+        self.update_displays()
+
+    def show_meld_played(self, event):
+        self.audio_manager.play("win")
+        self.shown_melds.append(event['meld'])
+        self.update_displays()
+
+    def show_card_discarded(self, event):
+        self.audio_manager.play("play")
+        self.shown_discard_pile.append(event['card'])
+        self.update_displays()
+
+    def show_game_over(self, event):
+        winner = event['winner']
+        self.status_label.setText(f"بازی تمام شد! برنده: {winner.name if winner else 'نامشخص'}")
+        self.audio_manager.play("win")
 
-    def process_turn(self):
+    def await_human(self):
         if self.game.is_game_over:
-            self.status_label.setText(f"بازی تمام شد! برنده: {self.game.winner.name}")
+            self.turn_phase = None
+            self.update_displays()
             self.start_button.show()
-            self.audio_manager.play("win")
             return
-
-        current_player = self.game.players[self.game.current_player_index]
-        if self.game.current_player_index == 0:
+        if not self.game.has_drawn:
             self.turn_phase = 'draw'
             self.status_label.setText("نوبت شما: یک کارت بکشید.")
+        elif not self.game.players[0].hand:
+            # همه کارت‌ها چیده شده‌اند؛ دور انداختن بدون کارت بازیکن را برنده می‌کند
+            self.apply_human_move({'action': 'discard', 'card': None})
+            return
         else:
-            self.turn_phase = 'ai_turn'
-            self.status_label.setText(f"نوبت حریف: {current_player.name}")
-            QTimer.singleShot(2000, self.play_ai_turn)
-            
+            self.turn_phase = 'meld_discard'
+            self.status_label.setText("کارت‌ها را بچینید (Meld) و یا یک کارت را برای دور انداختن انتخاب کنید.")
         self.update_displays()
 
-    def on_draw_clicked(self, source: str):
-        if self.turn_phase != 'draw': return
-        self.audio_manager.play("play")
-        self.game.draw_card(self.game.players[0], source)
+    # --- حرکت بازیکن ---
+
+    def apply_human_move(self, move: dict):
+        self.turn_phase = None
         self.selected_cards = []
-        self.turn_phase = 'meld_discard'
-        self.status_label.setText("کارت‌ها را بچینید (Meld) و یا یک کارت را برای دور انداختن انتخاب کنید.")
+        self.game.apply_move(move)
         self.update_displays()
+        self.advance_engine()
+
+    def on_draw_clicked(self, source: str):
+        if self.presenting or self.turn_phase != 'draw': return
+        self.apply_human_move({'action': 'draw', 'source': source})
 
     def on_hand_card_toggled(self, card: Card, is_checked: bool):
         if is_checked:
@@ -82,42 +142,32 @@ class RummyGameWidget(QWidget):
         self.update_action_buttons()
 
     def on_meld_clicked(self):
+        if self.presenting or self.turn_phase != 'meld_discard': return
         is_valid = self.game._is_valid_set(self.selected_cards) or self.game._is_valid_run(self.selected_cards)
         if is_valid:
-            self.game.play_melds(self.game.players[0], [self.selected_cards])
-            self.audio_manager.play("win")
-            self.selected_cards = []
-            self.update_displays()
+            self.apply_human_move({'action': 'meld', 'melds': [list(self.selected_cards)]})
         else:
             self.status_label.setText("این یک مجموعه مجاز نیست!")
             QTimer.singleShot(2000, lambda: self.status_label.setText("کارت‌ها را بچینید یا یک کارت دور بیندازید."))
 
     def on_discard_clicked(self):
-        if len(self.selected_cards) != 1: return
-        self.audio_manager.play("play")
-        self.game.discard_card(self.game.players[0], self.selected_cards[0])
-        self.selected_cards = []
-        self.process_turn()
-
-    def play_ai_turn(self):
-        self.game.ai_play_turn(self.game.players[self.game.current_player_index])
-        self.process_turn()
+        if self.presenting or self.turn_phase != 'meld_discard' or len(self.selected_cards) != 1: return
+        self.apply_human_move({'action': 'discard', 'card': self.selected_cards[0]})
 
     def update_displays(self):
         self.clear_layout(self.game_board_layout)
-        self.clear_layout(self.player_hand_layout)
         self.clear_layout(self.action_layout)
         self.clear_layout(self.melds_layout)
 
         # Melds on table
         self.melds_layout.addWidget(QLabel("مجموعه‌های روی زمین:"))
-        for meld in self.game.melds_on_table:
+        for meld in self.shown_melds:
             meld_text = " ".join(str(c) for c in meld)
             self.melds_layout.addWidget(QLabel(f"[{meld_text}]"))
 
         # Stock and Discard piles
-        stock_pile_btn = QPushButton(f"دسته اصلی\n({len(self.game.stock_pile)} کارت)")
-        discard_card = self.game.top_discard_card()
+        stock_pile_btn = QPushButton(f"دسته اصلی\n({self.shown_stock_size} کارت)")
+        discard_card = self.shown_discard_pile[-1] if self.shown_discard_pile else None
         discard_pile_btn = QPushButton(f"برداشتن\n{discard_card}" if discard_card else "خالی")
         stock_pile_btn.clicked.connect(lambda: self.on_draw_clicked('stock'))
         discard_pile_btn.clicked.connect(lambda: self.on_draw_clicked('discard'))
@@ -126,11 +176,8 @@ class RummyGameWidget(QWidget):
         
         # Player hand
         player = self.game.players[0]
-        for card in sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])):
-            btn = QPushButton(str(card))
-            btn.setCheckable(True)
-            btn.toggled.connect(lambda checked, c=card: self.on_hand_card_toggled(c, checked))
-            self.player_hand_layout.addWidget(btn)
+        self.hand_view.set_cards(sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])))
+        self.hand_view.set_checked(self.selected_cards)
 
         # Action buttons
         self.meld_button = QPushButton("چیدن مجموعه (Meld)")
@@ -142,16 +189,20 @@ class RummyGameWidget(QWidget):
         
         self.configure_ui_for_phase()
 
+    def make_hand_card_widget(self, card):
+        btn = QPushButton(str(card))
+        btn.setCheckable(True)
+        btn.toggled.connect(lambda checked, c=card: self.on_hand_card_toggled(c, checked))
+        return btn
+
     def configure_ui_for_phase(self):
-        is_my_turn = self.game.current_player_index == 0
+        is_my_turn = self.turn_phase is not None
         
         for i in range(self.game_board_layout.count()):
             widget = self.game_board_layout.itemAt(i).widget()
             if widget: widget.setEnabled(is_my_turn and self.turn_phase == 'draw')
             
-        for i in range(self.player_hand_layout.count()):
-            widget = self.player_hand_layout.itemAt(i).widget()
-            if widget: widget.setEnabled(is_my_turn and self.turn_phase == 'meld_discard')
+        self.hand_view.set_enabled(is_my_turn and self.turn_phase == 'meld_discard')
         
         self.meld_button.setVisible(is_my_turn and self.turn_phase == 'meld_discard')
         self.discard_button.setVisible(is_my_turn and self.turn_phase == 'meld_discard')
@@ -0,0 +1,79 @@
+"""
+مزرعه بازی خودکار (self-play) چندپردازه‌ای با seed قطعی.
+
+بازی i ام همیشه با random.Random(seed + i) اجرا می‌شود، پس خلاصه ادغام‌شده
+مستقل از تعداد پردازه‌ها و اندازه تکه‌هاست.
+
+نمونه:
+    python self_play.py hokm -n 200000 --workers 8 --seed 0
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from simulate import RUNNERS, SimulationResult, simulate
+
+
+def shard_seed_ranges(num_games: int, seed: int, chunk_size: int) -> list[tuple[int, int]]:
+    """بازه seedها را به تکه‌های (seed شروع، تعداد بازی) تقسیم می‌کند."""
+    return [(seed + start, min(chunk_size, num_games - start)) for start in range(0, num_games, chunk_size)]
+
+
+def _run_shard(shard: tuple) -> SimulationResult:
+    game_name, difficulty, first_seed, count = shard
+    return simulate(game_name, count, difficulty, first_seed)
+
+
+def self_play(game_name: str, num_games: int, difficulty: str = 'medium', seed: int = 0,
+              workers: int | None = None, chunk_size: int | None = None) -> SimulationResult:
+    """
+    num_games بازی را بین workers پردازه تقسیم کرده و نتایج را در یک SimulationResult ادغام می‌کند.
+    elapsed نتیجه، زمان واقعی کل است و cpu_time مجموع زمان CPU پردازه‌ها.
+    """
+    if game_name not in RUNNERS:
+        raise ValueError(f"بازی نامعتبر: {game_name}")
+    workers = workers or os.cpu_count() or 1
+    # چند تکه برای هر پردازه تا تفاوت طول بازی‌ها باعث بیکاری پردازه‌ها نشود
+    chunk_size = chunk_size or max(1, math.ceil(num_games / (workers * 4)))
+    shards = [(game_name, difficulty, first_seed, count)
+              for first_seed, count in shard_seed_ranges(num_games, seed, chunk_size)]
+
+    merged = SimulationResult(game_name, difficulty)
+    start = time.perf_counter()
+    if workers == 1:
+        for result in map(_run_shard, shards):
+            merged.merge(result)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_run_shard, shards):
+                merged.merge(result)
+    merged.elapsed = time.perf_counter() - start
+    return merged
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="بازی خودکار چندپردازه‌ای با seed قطعی")
+    parser.add_argument("games", nargs="+", help=f"نام بازی‌ها از {', '.join(sorted(RUNNERS))}")
+    parser.add_argument("-n", "--num-games", type=int, default=10000)
+    parser.add_argument("-d", "--difficulty", choices=["easy", "medium", "hard"], default="medium")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.games if name not in RUNNERS]
+    if unknown:
+        parser.error(f"بازی نامعتبر: {', '.join(unknown)}")
+
+    for game_name in args.games:
+        result = self_play(game_name, args.num_games, args.difficulty, args.seed, args.workers, args.chunk_size)
+        print(result.report())
+        speedup = result.cpu_time / result.elapsed if result.elapsed else 0.0
+        print(f"    شتاب موازی: {speedup:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""
+ارزیابی خواندن در شلم با نمونه‌گیری به جای شمردن امتیاز کارت‌ها.
+
+امتیازها: هر آس و ده ۱۰، هر پنج ۵ و هر دست ۵ امتیاز؛ ۴ کارتی که حاکم پس از برداشتن زمین رد
+می‌کند مثل یک دست برای تیم حاکم حساب می‌شود، پس جمع امتیازها ۱۶۵ است.
+
+برای یک دست ۱۲ کارتی، در هر نمونه ۴۰ کارت دیده‌نشده بر می‌خورند: ۴ کارت زمین به دست حاکم
+می‌آید (و ۴ کارت با choose_discard رد می‌شود) و ۳۶ کارت دیگر بین سه بازیکن پخش می‌شود. همان
+پخش برای هر چهار خال حکم با playout حریصانه (greedy_playout) بازی می‌شود تا مقایسه خال‌ها
+نویز کمتری داشته باشد. به طور پیش‌فرض تعداد نمونه ثابت است (نتیجه تکرارپذیر)؛ با time_budget
+نمونه‌گیری تا تمام شدن زمان ادامه دارد. AI ساده و متوسط به جای نمونه‌گیری از quick_estimate
+(برازش خطی روی همین برآوردها) استفاده می‌کنند.
+
+چون قوانین نسبت به جابجایی خال‌ها متقارن است، نتیجه برای شکل متعارف دست (خال‌ها به ترتیب
+bitmask) ذخیره می‌شود و دست‌هایی که فقط در نام خال‌ها فرق دارند از یک ورودی cache استفاده می‌کنند.
+
+نمونه:
+    python shelem_bidding.py --hands 5 --budget 0.05
+"""
+import argparse
+import random
+import sys
+import time
+from bisect import bisect_left
+
+from game_basics import ALL_CARDS, SUITS
+from hand_bitboard import FULL_DECK_MASK, LANE_BITS, LANE_MASK, SUIT_MASKS, mask_to_cards
+from trick_search import mask_ids
+
+TRICK_POINTS = 5
+TOTAL_POINTS = 165
+MIN_BID = 100
+BID_STEP = 5
+KITTY_SIZE = 4
+HAND_SIZE = 12
+CARD_POINTS = {c.id: 10 for c in ALL_CARDS if c.rank in ('A', '10')}
+CARD_POINTS.update({c.id: 5 for c in ALL_CARDS if c.rank == '5'})
+TEN_POINT_MASK = sum(1 << card_id for card_id, points in CARD_POINTS.items() if points == 10)
+FIVE_POINT_MASK = sum(1 << card_id for card_id, points in CARD_POINTS.items() if points == 5)
+POINT_MASK = TEN_POINT_MASK | FIVE_POINT_MASK
+_ACE = LANE_BITS - 1
+_LANE_BASES = tuple(suit * LANE_BITS for suit in range(len(SUITS)))
+TEAM_OF = (0, 1, 0, 1)
+
+
+def mask_points(mask: int) -> int:
+    """امتیاز کارت‌های یک bitmask (بدون امتیاز دست)."""
+    return 10 * (mask & TEN_POINT_MASK).bit_count() + 5 * (mask & FIVE_POINT_MASK).bit_count()
+
+
+def choose_discard(hand: int, trump: int, count: int = KITTY_SIZE) -> int:
+    """
+    کارت‌هایی که حاکم پس از برداشتن زمین رد می‌کند: کارت‌های امتیازدار بی‌پشتوانه (که رد کردنشان
+    امتیاز را برای تیم نگه می‌دارد)، سپس کارت‌های کوچک خال‌های کوتاه؛ حکم و آس‌ها تا جای ممکن
+    نگه داشته می‌شوند.
+    """
+    candidates = []
+    for suit in range(len(SUITS)):
+        if suit == trump:
+            continue
+        lane = hand >> (suit * LANE_BITS) & LANE_MASK
+        has_ace = lane >> _ACE & 1
+        for rank_index in mask_ids(lane):
+            card_id = suit * LANE_BITS + rank_index
+            if rank_index == _ACE or (has_ace and card_id in CARD_POINTS):
+                continue
+            candidates.append((-CARD_POINTS.get(card_id, 0), lane.bit_count(), rank_index, card_id))
+    candidates.sort()
+    chosen = [card_id for *_, card_id in candidates[:count]]
+    if len(chosen) < count:
+        # دست تقریبا فقط حکم و آس است: کوچک‌ترین کارت‌های باقی‌مانده
+        rest = [card_id for card_id in mask_ids(hand) if card_id not in chosen]
+        rest.sort(key=lambda card_id: (card_id // LANE_BITS == trump, card_id % LANE_BITS))
+        chosen += rest[:count - len(chosen)]
+    discard = 0
+    for card_id in chosen:
+        discard |= 1 << card_id
+    return discard
+
+
+def _lowest(mask: int) -> int:
+    """کوچک‌ترین کارت (در همه خال‌ها)، تا جای ممکن بدون امتیاز."""
+    plain = mask & ~POINT_MASK or mask
+    best, best_rank = None, LANE_BITS
+    for base in _LANE_BASES:
+        lane = plain >> base & LANE_MASK
+        if lane:
+            rank_index = (lane & -lane).bit_length() - 1
+            if rank_index < best_rank:
+                best, best_rank = base + rank_index, rank_index
+    return best
+
+
+def _lead(hand: int, live: int, trump: int) -> int:
+    """کارت برتر یک خال غیر حکم، وگرنه کوچک‌ترین کارت بلندترین خال غیر حکم، وگرنه بزرگ‌ترین حکم."""
+    longest, longest_lane = None, 0
+    for suit, base in enumerate(_LANE_BASES):
+        if suit == trump:
+            continue
+        lane = hand >> base & LANE_MASK
+        if not lane:
+            continue
+        top = lane.bit_length()
+        if (live >> base & LANE_MASK).bit_length() == top:
+            return base + top - 1
+        if lane.bit_count() > longest_lane.bit_count():
+            longest, longest_lane = base, lane
+    if longest is not None:
+        return longest + (longest_lane & -longest_lane).bit_length() - 1
+    return hand.bit_length() - 1
+
+
+def _follow(hand: int, lead_suit: int, winner: int, winning_id: int, trump: int, team_of: tuple, seat: int,
+            last: bool) -> int:
+    """کارت پیرو؛ winner و winning_id برنده فعلی دست و کارت او هستند."""
+    legal = hand & SUIT_MASKS[lead_suit] or hand
+    if team_of[winner] == team_of[seat]:
+        if last:
+            # آخرین بازیکن و یار برنده است: کارت امتیازدار غیر حکم را به یار می‌دهد
+            points = legal & POINT_MASK & ~SUIT_MASKS[trump]
+            if points:
+                return (points & TEN_POINT_MASK or points).bit_length() - 1
+        return _lowest(legal)
+    # ارزان‌ترین کارت برنده: بالاتر در خال کارت برنده، یا (وقتی خال دست را ندارد) هر حکمی روی کارت غیر حکم
+    higher = legal & SUIT_MASKS[winning_id // LANE_BITS] & ~((2 << winning_id) - 1)
+    if not higher and winning_id // LANE_BITS != trump:
+        higher = legal & SUIT_MASKS[trump]
+    if higher:
+        return (higher & -higher).bit_length() - 1
+    return _lowest(legal)
+
+
+def greedy_card(hand: int, trick: list, live: int, trump: int, seat: int, team_of: tuple = TEAM_OF) -> int:
+    """
+    کارت سیاست حریصانه برای صندلی seat (trick: لیست (صندلی، card_id)، live: کارت‌های بازی نشده).
+    همین سیاست در playoutهای خواندن و در AI متوسط موتور شلم به کار می‌رود.
+    """
+    if not trick:
+        return _lead(hand, live, trump)
+    winner, winning_id = trick[0]
+    for played_seat, card_id in trick[1:]:
+        if _beats(card_id, winning_id, trump):
+            winner, winning_id = played_seat, card_id
+    return _follow(hand, trick[0][1] // LANE_BITS, winner, winning_id, trump, team_of, seat,
+                   len(trick) == len(team_of) - 1)
+
+
+def _beats(card_id: int, winning_id: int, trump: int) -> bool:
+    suit, winning_suit = card_id // LANE_BITS, winning_id // LANE_BITS
+    return card_id > winning_id if suit == winning_suit else suit == trump
+
+
+def greedy_playout(hands: list, leader: int, trump: int, team_of: tuple = TEAM_OF) -> list:
+    """
+    بازی کامل یک دور با سیاست حریصانه ساده (hands در جا خالی می‌شود)؛
+    امتیاز (کارت‌ها + دست‌ها) هر تیم را برمی‌گرداند.
+    """
+    num_seats = len(hands)
+    points = [0] * (max(team_of) + 1)
+    live = 0
+    for hand in hands:
+        live |= hand
+    turn = leader
+    while hands[turn]:
+        card_id = _lead(hands[turn], live, trump)
+        hands[turn] &= ~(1 << card_id)
+        lead_suit = card_id // LANE_BITS
+        winner, winning_id, cards = turn, card_id, 1 << card_id
+        for i in range(1, num_seats):
+            seat = (turn + i) % num_seats
+            card_id = _follow(hands[seat], lead_suit, winner, winning_id, trump, team_of, seat, i == num_seats - 1)
+            hands[seat] &= ~(1 << card_id)
+            cards |= 1 << card_id
+            if _beats(card_id, winning_id, trump):
+                winner, winning_id = seat, card_id
+        live &= ~cards
+        points[team_of[winner]] += TRICK_POINTS + mask_points(cards)
+        turn = winner
+    return points
+
+
+def canonical_hand(hand: int) -> tuple[int, tuple]:
+    """(شکل متعارف دست، ترتیب خال‌ها): خال i شکل متعارف همان خال order[i] دست اصلی است."""
+    lanes = [hand >> (suit * LANE_BITS) & LANE_MASK for suit in range(len(SUITS))]
+    order = tuple(sorted(range(len(SUITS)), key=lambda suit: -lanes[suit]))
+    canonical = 0
+    for i, suit in enumerate(order):
+        canonical |= lanes[suit] << (i * LANE_BITS)
+    return canonical, order
+
+
+# ضرایب quick_estimate: برازش خطی روی میانگین ۶۴ نمونه BidEvaluator برای ۱۵۰۰ دست تصادفی
+# (خطای میانگین مربعات حدود ۳.۵ امتیاز)
+QUICK_WEIGHTS = (70.0, 0.2, 5.5, 5.5, 1.0, 3.5, 2.5)
+
+
+def quick_estimate(hand: int) -> float:
+    """
+    برآورد سریع امتیاز مورد انتظار تیم حاکم بدون نمونه‌گیری (برای AI ساده و متوسط): امتیاز کارت‌ها،
+    طول و کارت‌های بالای بلندترین خال (حکم)، آس‌ها، شاه‌ها و خال‌های خالی.
+    """
+    lanes = [hand >> base & LANE_MASK for base in _LANE_BASES]
+    trump_lane = max(lanes, key=lambda lane: (lane.bit_count(), lane))
+    features = (
+        1,
+        mask_points(hand),
+        trump_lane.bit_count(),
+        sum(lane >> _ACE & 1 for lane in lanes),
+        sum(lane >> (_ACE - 1) & 1 for lane in lanes),
+        (trump_lane >> (_ACE - 2)).bit_count(),
+        sum(1 for lane in lanes if not lane),
+    )
+    return sum(weight * feature for weight, feature in zip(QUICK_WEIGHTS, features))
+
+
+class BidEstimate:
+    """امتیازهای نمونه‌گیری شده تیم حاکم برای هر خال حکم (مرتب شده، برای محاسبه احتمال موفقیت)."""
+    __slots__ = ("samples", "elapsed")
+
+    def __init__(self, samples: list, elapsed: float):
+        self.samples = samples  # samples[suit_index] = تاپل مرتب امتیازها
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return f"BidEstimate(حکم {SUITS[self.best_suit]}، {self.expected():.1f} امتیاز، {len(self.samples[0])} نمونه)"
+
+    @property
+    def best_suit(self) -> int:
+        return max(range(len(SUITS)), key=self.expected)
+
+    def expected(self, suit: int = None) -> float:
+        points = self.samples[self.best_suit if suit is None else suit]
+        return sum(points) / len(points)
+
+    def success_probability(self, bid: int, suit: int = None) -> float:
+        """احتمال این که تیم حاکم با حکم suit (پیش‌فرض بهترین خال) دست‌کم bid امتیاز بگیرد."""
+        points = self.samples[self.best_suit if suit is None else suit]
+        return 1.0 - bisect_left(points, bid) / len(points)
+
+    def max_bid(self, confidence: float) -> int | None:
+        """بالاترین خواندنی که با احتمال دست‌کم confidence موفق می‌شود (یا None)."""
+        best = None
+        for bid in range(MIN_BID, TOTAL_POINTS + 1, BID_STEP):
+            if max(self.success_probability(bid, suit) for suit in range(len(SUITS))) < confidence:
+                break
+            best = bid
+        return best
+
+
+class BidEvaluator:
+    """
+    ارزیابی دست‌ها با cache مشترک. به طور پیش‌فرض دقیقا samples نمونه گرفته می‌شود و نتیجه تکرارپذیر
+    است؛ با time_budget (زمان هر ارزیابی جدید، مثلا برای رابط گرافیکی) نمونه‌گیری تا تمام شدن زمان
+    ادامه دارد (دست‌کم min_samples و حداکثر max_samples نمونه).
+    """
+    _instance = None
+
+    @classmethod
+    def instance(cls) -> "BidEvaluator":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, samples: int = 16, time_budget: float | None = None, min_samples: int = 24,
+                 max_samples: int = 400, cache_size: int = 4096):
+        self.samples = samples
+        self.time_budget = time_budget
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.cache_size = cache_size
+        self._cache = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def evaluate(self, hand: int) -> BidEstimate:
+        """برآورد امتیاز تیم صاحب دست hand (۱۲ کارت) در صورت حاکم شدن، برای هر خال حکم."""
+        canonical, order = canonical_hand(hand)
+        estimate = self._cache.get(canonical)
+        if estimate is None:
+            self.stats["misses"] += 1
+            estimate = self._sample(canonical)
+            if len(self._cache) >= self.cache_size:
+                del self._cache[next(iter(self._cache))]
+            self._cache[canonical] = estimate
+        else:
+            self.stats["hits"] += 1
+        samples = [None] * len(SUITS)
+        for i, suit in enumerate(order):
+            samples[suit] = estimate.samples[i]
+        return BidEstimate(samples, estimate.elapsed)
+
+    def _sample(self, hand: int) -> BidEstimate:
+        # seed ثابت برای هر دست: با time_budget=None نتیجه مستقل از ترتیب ارزیابی‌هاست
+        rng = random.Random(hand)
+        unseen = mask_ids(FULL_DECK_MASK & ~hand)
+        suits = range(len(SUITS))
+        points = [[] for _ in suits]
+        start = time.perf_counter()
+        deadline = start + self.time_budget if self.time_budget is not None else None
+        limit = self.max_samples if deadline is not None else self.samples
+        samples = 0
+        while samples < limit:
+            if deadline is not None and samples >= self.min_samples and time.perf_counter() >= deadline:
+                break
+            rng.shuffle(unseen)
+            kitty = 0
+            for card_id in unseen[:KITTY_SIZE]:
+                kitty |= 1 << card_id
+            others = []
+            for seat in range(3):
+                mask = 0
+                for card_id in unseen[KITTY_SIZE + seat * HAND_SIZE:KITTY_SIZE + (seat + 1) * HAND_SIZE]:
+                    mask |= 1 << card_id
+                others.append(mask)
+            for trump in suits:
+                discard = choose_discard(hand | kitty, trump)
+                hands = [(hand | kitty) & ~discard] + others
+                team_points = greedy_playout(hands, 0, trump)[0]
+                points[trump].append(team_points + TRICK_POINTS + mask_points(discard))
+            samples += 1
+        return BidEstimate([tuple(sorted(suit_points)) for suit_points in points], time.perf_counter() - start)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="برآورد امتیاز دست‌های تصادفی شلم برای خواندن")
+    parser.add_argument("--hands", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.05, help="بودجه زمانی هر ارزیابی (ثانیه)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    evaluator = BidEvaluator(time_budget=args.budget)
+    for _ in range(args.hands):
+        hand = 0
+        for card_id in rng.sample(range(len(ALL_CARDS)), HAND_SIZE):
+            hand |= 1 << card_id
+        estimate = evaluator.evaluate(hand)
+        suits = " ".join(f"{SUITS[suit]} {estimate.expected(suit):5.1f}" for suit in range(len(SUITS)))
+        print(f"{mask_to_cards(hand)}\n  {suits} | خواندن تا {estimate.max_bid(0.6)} "
+              f"({len(estimate.samples[0])} نمونه در {estimate.elapsed * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
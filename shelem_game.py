@@ -1,53 +1,387 @@
 import random
-from game_basics import Card, Player, Deck, SUITS, RANKS
-
-class ShelemDeck:
-    def __init__(self):
-        self.cards = [Card(suit, rank) for suit in SUITS for rank in RANKS]
-        self.shuffle()
-    def shuffle(self):
-        random.shuffle(self.cards)
-    def deal(self):
-        return self.cards.pop() if self.cards else None
-    def __len__(self):
-        return len(self.cards)
-
-class ShelemGame:
-    def __init__(self, difficulty='medium'):
+from game_basics import Card, Player, Deck, SUITS
+from hand_bitboard import FULL_DECK_MASK, LANE_BITS, SUIT_INDEX, card_bit, mask_to_cards, valid_moves_mask
+from shelem_bidding import (BID_STEP, CARD_POINTS, KITTY_SIZE, MIN_BID, TEAM_OF, TOTAL_POINTS, TRICK_POINTS,
+                            BidEvaluator, choose_discard, greedy_card, quick_estimate)
+from trick_search import Determinizer, TeamPointsGoal, known_voids, run_search
+from double_dummy import CardPoints, DoubleDummySolver, endgame_search
+from zobrist import TranspositionTable
+from game_events import EventSource
+from game_state import Snapshottable
+
+TEAM_NAMES = ("تیم ۱", "تیم ۲")
+
+
+class ShelemGame(EventSource, Snapshottable):
+    """
+    موتور کامل شلم: خواندن، برداشتن زمین و رد کردن ۴ کارت، انتخاب حکم، ۱۲ دست و امتیازدهی ۱۶۵ امتیازی.
+    مرحله دور در phase است: 'bidding'، 'discarding'، 'hokm' و 'playing'؛ نوبت همه مراحل current_player_index است.
+    """
+    WINNING_SCORE = 1165  # با رسیدن یک تیم به این امتیاز بازی تمام می‌شود
+    HAND_SIZE = 12
+    # کمترین احتمال موفقیت قرارداد که AI با آن می‌خواند
+    BID_CONFIDENCE = {'easy': 0.8, 'medium': 0.65, 'hard': 0.55}
+    # AI ساده و متوسط با برآورد سریع می‌خوانند: تا quick_estimate منهای این حاشیه (هم‌ارز تقریبی
+    # احتمال‌های BID_CONFIDENCE)؛ فقط AI سخت نمونه‌گیری می‌کند
+    QUICK_BID_MARGIN = {'easy': 12, 'medium': 6}
+    MOVE_HANDLERS = {'new_round': '_move_new_round', 'bid': '_move_bid', 'pass': '_move_pass',
+                     'discard': '_move_discard', 'set_hokm': '_move_set_hokm', 'play': '_move_play'}
+    STATE_FIELDS = ('dealer_index', 'phase', 'kitty', 'discarded', 'hakem', 'hokm_suit', 'bids', 'highest_bid',
+                    'bid_winner', 'players_in_bid', 'current_player_index', 'trick_cards', 'last_trick',
+                    'trick_history', 'trick_counts', 'collected_cards', 'round_points', 'team_scores',
+                    'is_round_over', 'is_game_over')
+
+    def __init__(self, difficulty='medium', rng=None, bid_evaluator=None, ai_time_budget=0.15, ai_iterations=None,
+                 ai_workers=1, ai_endgame_cards=5):
         self.difficulty = difficulty
+        self.rng = rng or random
+        # ارزیابی خواندن AI سخت با نمونه‌گیری (پیش‌فرض: تعداد نمونه ثابت و تکرارپذیر)؛ cache آن بین
+        # بازی‌ها مشترک است
+        self.bid_evaluator = bid_evaluator or BidEvaluator.instance()
+        # بودجه جستجوی AI سخت: زمان (ثانیه) و/یا تعداد تکرار برای هر حرکت، و تعداد پردازه‌های playout
+        self.ai_time_budget = ai_time_budget
+        self.ai_iterations = ai_iterations
+        self.ai_workers = ai_workers
+        # وقتی کارت‌های بازیکن به این تعداد برسد، AI سخت پایان دور را دقیق حل می‌کند (۰ = هرگز)
+        self.ai_endgame_cards = ai_endgame_cards
+        self.endgame_table = None
+        self.last_search_stats = None
         self.players = [Player(f"بازیکن {i+1}") for i in range(4)]
         self.teams = {"تیم ۱": [self.players[0], self.players[2]], "تیم ۲": [self.players[1], self.players[3]]}
-        self.deck = ShelemDeck()
-        self.kitty = []
-        
+
+        self.team_scores = {"تیم ۱": 0, "تیم ۲": 0}
+        self.dealer_index = len(self.players) - 1  # خواندن از بازیکن بعد از پخش‌کننده شروع می‌شود
+        self.is_game_over = False
+        self._start_new_round()
+
+    def _start_new_round(self):
+        self.deck = Deck()
+        self.deck.shuffle(self.rng)
+        for p in self.players:
+            p.hand = []
+        self._deal_initial_cards()
+        self.phase = 'bidding'
+        self.discarded = []
         self.hakem = None
         self.hokm_suit = None
         self.bids = {}
-        self.highest_bid = 100
+        self.highest_bid = 0
         self.bid_winner = None
-        
-        self.bidding_turn_index = 0
         self.players_in_bid = self.players[:]
-        self.current_player_index = 0
+        self.current_player_index = (self.dealer_index + 1) % len(self.players)
         self.trick_cards = []
-        
-        self.team_scores = {"تیم ۱": 0, "تیم ۲": 0}
+        self.last_trick = []
+        self.trick_history = []
+        self.trick_counts = {"تیم ۱": 0, "تیم ۲": 0}
         self.collected_cards = {"تیم ۱": [], "تیم ۲": []}
-        
+        self.round_points = {"تیم ۱": 0, "تیم ۲": 0}
+        self.is_round_over = False
+        self._emit('round_started', dealer=self.players[self.dealer_index])
+
     def _deal_initial_cards(self):
-        for _ in range(12):
+        for _ in range(self.HAND_SIZE):
             for player in self.players:
                 player.add_card(self.deck.deal())
-        self.kitty = [self.deck.deal() for _ in range(4)]
+        self.kitty = [self.deck.deal() for _ in range(KITTY_SIZE)]
 
-    def _estimate_hand_value(self, player: Player) -> int:
-        value = 0
-        for card in player.hand:
-            if card.rank in ['A', '10']: value += 10
-            elif card.rank == '5': value += 5
-            elif card.rank in ['K', 'Q']: value += 3
-        return int(round(value / 5.0)) * 5
-
-    def set_hokm_by_suit(self, suit):
+    def _team_name(self, player: Player) -> str:
+        return TEAM_NAMES[self.players.index(player) % 2]
+
+    # --- خواندن ---
+
+    def min_bid(self) -> int:
+        """کمترین خواندن مجاز بعدی."""
+        return MIN_BID if self.bid_winner is None else self.highest_bid + BID_STEP
+
+    def place_bid(self, player: Player, amount: int):
+        self.bids[player.name] = amount
+        self.highest_bid = amount
+        self.bid_winner = player
+        self._emit('bid_placed', player=player, amount=amount)
+        if amount >= TOTAL_POINTS or len(self.players_in_bid) == 1:
+            self._end_bidding()
+        else:
+            self._next_bidder()
+
+    def pass_bid(self, player: Player):
+        self.players_in_bid.remove(player)
+        self._emit('bid_passed', player=player)
+        if not self.players_in_bid:
+            # همه پاس دادند: دور با پخش‌کننده بعدی دوباره پخش می‌شود
+            self._emit('round_redealt')
+            self.dealer_index = (self.dealer_index + 1) % len(self.players)
+            self._start_new_round()
+        elif len(self.players_in_bid) == 1 and self.bid_winner is not None:
+            self._end_bidding()
+        else:
+            self._next_bidder()
+
+    def _next_bidder(self):
+        index = self.current_player_index
+        while True:
+            index = (index + 1) % len(self.players)
+            if self.players[index] in self.players_in_bid:
+                self.current_player_index = index
+                return
+
+    def _end_bidding(self):
+        """حاکم کارت‌های زمین را برمی‌دارد و باید ۴ کارت رد کند."""
+        self.hakem = self.bid_winner
+        self.hakem.hand.extend(self.kitty)
+        self.kitty = []
+        self.phase = 'discarding'
+        self.current_player_index = self.players.index(self.hakem)
+        self._emit('bidding_over', hakem=self.hakem, bid=self.highest_bid)
+
+    def discard_cards(self, cards: list[Card]):
+        for card in cards:
+            self.hakem.hand.remove(card)
+        self.discarded = list(cards)
+        self.phase = 'hokm'
+        self._emit('kitty_discarded', hakem=self.hakem, cards=self.discarded)
+
+    def set_hokm(self, suit):
         self.hokm_suit = suit
+        self.phase = 'playing'
         self.current_player_index = self.players.index(self.hakem)
+        self._emit('hokm_set', hakem=self.hakem, suit=suit)
+
+    # --- بازی دست‌ها ---
+
+    def _valid_moves_mask(self, hand_mask: int) -> int:
+        """bitmask کارت‌های مجاز برای یک دست (ابزارهای hand_bitboard)."""
+        return valid_moves_mask(hand_mask, self.trick_cards[0][1].suit_index if self.trick_cards else None)
+
+    def _get_valid_moves(self, player: Player) -> list[Card]:
+        return mask_to_cards(self._valid_moves_mask(player.hand_mask))
+
+    def _is_move_valid(self, card: Card, player: Player) -> bool:
+        return bool(self._valid_moves_mask(player.hand_mask) & card_bit(card))
+
+    def _trick_winner(self, trick: list) -> Player:
+        lead_suit_index = trick[0][1].suit_index
+        hokm_index = SUIT_INDEX[self.hokm_suit]
+        return max(trick, key=lambda item: (item[1].suit_index == hokm_index,
+                                            item[1].suit_index == lead_suit_index, item[1].value))[0]
+
+    def play_card(self, player: Player, card: Card) -> Player | None:
+        """
+        کارت بازیکن را در دست جاری بازی کرده و نوبت را جلو می‌برد.
+        اگر دست کامل شود برنده آن را برمی‌گرداند؛ کارت‌های دست به collected_cards تیم برنده می‌روند.
+        """
+        player.hand.remove(card)
+        self.trick_cards.append((player, card))
+        self._emit('card_played', player=player, card=card)
+        if len(self.trick_cards) < len(self.players):
+            self.current_player_index = (self.current_player_index + 1) % len(self.players)
+            return None
+
+        winner = self._trick_winner(self.trick_cards)
+        team = self._team_name(winner)
+        self.trick_counts[team] += 1
+        self.collected_cards[team].extend(card for _, card in self.trick_cards)
+        self.current_player_index = self.players.index(winner)
+        self.last_trick = self.trick_cards
+        self.trick_history.append(self.trick_cards)
+        self.trick_cards = []
+        self._emit('trick_won', winner=winner, team=team, cards=self.last_trick)
+
+        if not winner.hand:
+            self._end_round()
+        return winner
+
+    def _end_round(self):
+        """
+        کارت‌های رد شده مثل یک دست به تیم حاکم می‌رسند. اگر تیم حاکم دست‌کم به اندازه خواندنش
+        امتیاز بگیرد همه امتیازش را می‌گیرد (شلم، یعنی هر ۱۶۵ امتیاز، دو برابر)، وگرنه به اندازه خواندن
+        امتیاز از دست می‌دهد؛ تیم دیگر همیشه امتیاز خودش را می‌گیرد.
+        """
+        hakem_team = self._team_name(self.hakem)
+        self.collected_cards[hakem_team].extend(self.discarded)
+        for team in TEAM_NAMES:
+            self.round_points[team] = (sum(CARD_POINTS.get(c.id, 0) for c in self.collected_cards[team])
+                                       + TRICK_POINTS * self.trick_counts[team])
+        self.round_points[hakem_team] += TRICK_POINTS
+
+        points = self.round_points[hakem_team]
+        contract_made = points >= self.highest_bid
+        if contract_made:
+            self.team_scores[hakem_team] += 2 * points if points == TOTAL_POINTS else points
+        else:
+            self.team_scores[hakem_team] -= self.highest_bid
+        for team in TEAM_NAMES:
+            if team != hakem_team:
+                self.team_scores[team] += self.round_points[team]
+
+        self.is_round_over = True
+        self._emit('round_over', hakem=self.hakem, bid=self.highest_bid, contract_made=contract_made,
+                   round_points=dict(self.round_points), team_scores=dict(self.team_scores))
+        if max(self.team_scores.values()) >= self.WINNING_SCORE:
+            self.is_game_over = True
+            self._emit('game_over', winner=max(self.team_scores, key=self.team_scores.get))
+
+    # --- API حرکت (apply_move) ---
+
+    def _require_phase(self, phase: str):
+        if self.is_round_over or self.phase != phase:
+            raise ValueError(f"این حرکت در مرحله {self.phase} مجاز نیست.")
+
+    def _move_new_round(self, move: dict):
+        if not self.is_round_over or self.is_game_over:
+            raise ValueError("دور جاری هنوز تمام نشده است.")
+        self.dealer_index = (self.dealer_index + 1) % len(self.players)
+        self._start_new_round()
+
+    def _move_bid(self, move: dict):
+        self._require_phase('bidding')
+        amount = move['amount']
+        if amount < self.min_bid() or amount > TOTAL_POINTS or amount % BID_STEP:
+            raise ValueError(f"خواندن نامعتبر: {amount}")
+        self.place_bid(self.players[self.current_player_index], amount)
+
+    def _move_pass(self, move: dict):
+        self._require_phase('bidding')
+        self.pass_bid(self.players[self.current_player_index])
+
+    def _move_discard(self, move: dict):
+        self._require_phase('discarding')
+        cards = move['cards']
+        if len(cards) != KITTY_SIZE or len(set(cards)) != KITTY_SIZE or any(c not in self.hakem.hand for c in cards):
+            raise ValueError(f"کارت‌های رد شده نامعتبر: {cards}")
+        self.discard_cards(cards)
+
+    def _move_set_hokm(self, move: dict):
+        self._require_phase('hokm')
+        if move['suit'] not in SUITS:
+            raise ValueError(f"خال نامعتبر: {move['suit']}")
+        self.set_hokm(move['suit'])
+
+    def _move_play(self, move: dict):
+        self._require_phase('playing')
+        player = self.players[self.current_player_index]
+        if not self._is_move_valid(move['card'], player):
+            raise ValueError(f"حرکت غیرمجاز برای {player.name}: {move['card']}")
+        self.play_card(player, move['card'])
+
+    def ai_move(self) -> dict | None:
+        """حرکت بعدی بازی از دید AI (برای بازیکنی که نوبت اوست)؛ پس از پایان بازی None."""
+        if self.is_game_over:
+            return None
+        if self.is_round_over:
+            return {'action': 'new_round'}
+        player = self.players[self.current_player_index]
+        if self.phase == 'bidding':
+            bid = self.ai_bid(player)
+            return {'action': 'pass'} if bid is None else {'action': 'bid', 'amount': bid}
+        if self.phase == 'discarding':
+            return {'action': 'discard', 'cards': self.ai_choose_discard(player)}
+        if self.phase == 'hokm':
+            return {'action': 'set_hokm', 'suit': self.ai_choose_hokm()}
+        return {'action': 'play', 'card': self.ai_choose_card(player)}
+
+    # --- AI ---
+
+    def _estimate_hand_value(self, player: Player) -> int:
+        """امتیاز مورد انتظار تیم player اگر حاکم شود (با بهترین حکم و برداشتن زمین)، به مضرب ۵."""
+        return int(self.bid_evaluator.evaluate(player.hand_mask).expected() // BID_STEP) * BID_STEP
+
+    def ai_bid(self, player: Player) -> int | None:
+        """کمترین خواندن مجاز بعدی اگر قرارداد به اندازه کافی محتمل باشد؛ وگرنه None (پاس)."""
+        bid = self.min_bid()
+        if bid > TOTAL_POINTS:
+            return None
+        if self.difficulty in self.QUICK_BID_MARGIN:
+            return bid if bid <= quick_estimate(player.hand_mask) - self.QUICK_BID_MARGIN[self.difficulty] else None
+        estimate = self.bid_evaluator.evaluate(player.hand_mask)
+        limit = estimate.max_bid(self.BID_CONFIDENCE.get(self.difficulty, 0.65))
+        return bid if limit is not None and bid <= limit else None
+
+    def _hokm_strength(self, hand_mask: int, suit_index: int) -> tuple:
+        lane = hand_mask >> (suit_index * LANE_BITS) & ((1 << LANE_BITS) - 1)
+        return lane.bit_count(), lane
+
+    def ai_choose_hokm(self) -> str:
+        """بلندترین خال دست حاکم (با کارت‌های بزرگ‌تر در تساوی)."""
+        mask = self.hakem.hand_mask
+        return max(SUITS, key=lambda suit: self._hokm_strength(mask, SUIT_INDEX[suit]))
+
+    def ai_choose_discard(self, player: Player) -> list[Card]:
+        """۴ کارت برای رد کردن؛ حکم مورد نظر از روی ۱۶ کارت دست انتخاب می‌شود."""
+        if self.difficulty == 'easy':
+            return self.rng.sample(player.hand, KITTY_SIZE)
+        mask = player.hand_mask
+        trump = max(range(len(SUITS)), key=lambda suit_index: self._hokm_strength(mask, suit_index))
+        return mask_to_cards(choose_discard(mask, trump))
+
+    def _played_tricks(self) -> list:
+        return [[(self.players.index(p), c.id) for p, c in trick] for trick in self.trick_history + [self.trick_cards]]
+
+    def _search_root(self, player: Player) -> Determinizer:
+        """اطلاعات عمومی دور از دید player؛ کارت‌های رد شده فقط برای حاکم دیده شده‌اند."""
+        seat = self.players.index(player)
+        tricks = self._played_tricks()
+        seen_mask = player.hand_mask
+        if player is self.hakem:
+            for card in self.discarded:
+                seen_mask |= 1 << card.id
+        for trick in tricks:
+            for _, card_id in trick:
+                seen_mask |= 1 << card_id
+        won_cards = [0] * len(self.players)
+        for trick in self.trick_history:
+            winner = self.players.index(self._trick_winner(trick))
+            for _, card in trick:
+                won_cards[winner] |= 1 << card.id
+        hands = [None] * len(self.players)
+        hands[seat] = player.hand_mask
+        return Determinizer(
+            seat, hands, FULL_DECK_MASK & ~seen_mask, [len(p.hand) for p in self.players],
+            known_voids(tricks, len(self.players)), tricks[-1], SUIT_INDEX[self.hokm_suit], TEAM_OF,
+            won_tricks=[self.trick_counts["تیم ۱"], self.trick_counts["تیم ۲"]], won_cards=won_cards)
+
+    def ai_search_card(self, player: Player) -> Card:
+        """
+        AI سخت: determinization دست حریفان و playoutهای سریع؛ حرکتی با بیشترین سهم مورد انتظار
+        تیم از امتیاز دور انتخاب می‌شود. در پایان دور (ai_endgame_cards) هر determinization دقیق حل می‌شود.
+        """
+        valid_moves = self._get_valid_moves(player)
+        if len(valid_moves) == 1:
+            return valid_moves[0]
+
+        team = self.players.index(player) % 2
+        if len(player.hand) <= self.ai_endgame_cards:
+            if self.endgame_table is None:
+                self.endgame_table = TranspositionTable()
+            solver = DoubleDummySolver(SUIT_INDEX[self.hokm_suit], TEAM_OF, team, LANE_BITS,
+                                       scorer=CardPoints(team, CARD_POINTS, TRICK_POINTS), table=self.endgame_table)
+            self.last_search_stats = endgame_search(self._search_root(player), [c.id for c in valid_moves], solver,
+                                                    self.rng, self.ai_time_budget, self.ai_iterations)
+            return Card.from_id(self.last_search_stats.best_move())
+
+        goal = TeamPointsGoal(team, CARD_POINTS, TRICK_POINTS, TOTAL_POINTS)
+        self.last_search_stats = run_search(self._search_root(player), [c.id for c in valid_moves], goal, self.rng,
+                                            self.ai_time_budget, self.ai_iterations, workers=self.ai_workers)
+        return Card.from_id(self.last_search_stats.best_move())
+
+    def ai_greedy_card(self, player: Player) -> Card:
+        """AI متوسط: همان سیاست حریصانه playoutهای خواندن (shelem_bidding.greedy_card)."""
+        played = 0
+        for trick in self.trick_history:
+            for _, card in trick:
+                played |= 1 << card.id
+        trick = [(self.players.index(p), c.id) for p, c in self.trick_cards]
+        for _, card_id in trick:
+            played |= 1 << card_id
+        card_id = greedy_card(player.hand_mask, trick, FULL_DECK_MASK & ~played, SUIT_INDEX[self.hokm_suit],
+                              self.players.index(player))
+        return Card.from_id(card_id)
+
+    def ai_choose_card(self, player: Player) -> Card:
+        valid_moves = self._get_valid_moves(player)
+        if len(valid_moves) == 1:
+            return valid_moves[0]
+        if self.difficulty == 'easy':
+            return self.rng.choice(valid_moves)
+        if self.difficulty == 'hard':
+            return self.ai_search_card(player)
+        return self.ai_greedy_card(player)
@@ -1,21 +1,30 @@
 import sys
 import random
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QSpinBox, QFrame, QGridLayout, QInputDialog
-from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QSize
 from shelem_game import ShelemGame, SUITS
+from shelem_bidding import KITTY_SIZE, TOTAL_POINTS, BidEvaluator
 from game_basics import RANK_VALUES
 from audio_manager import AudioManager
+from pixmap_cache import PixmapCache
+from hand_view import HandView
+from game_events import GameEvent
+from event_presenter import EventPresenter
+
+class ShelemGameWidget(EventPresenter, QWidget):
+    EVENT_HOLD_TIMES = {'trick_won': 2000, 'bidding_over': 1500}  # مدت نمایش رویداد پیش از رویداد بعدی
+    BID_TIME_BUDGET = 0.05  # ثانیه برای ارزیابی هر دست تازه در خواندن AI سخت
 
-class ShelemGameWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.game = None
-        self.audio_manager = AudioManager()
+        self.bid_evaluator = None
+        self.audio_manager = AudioManager.instance()
+        self.pixmaps = PixmapCache.instance()
         self.turn_phase = None  # 'bidding', 'discarding', 'hokm_selection', 'playing'
         self.selected_cards_for_discard = []
-        self.hand_card_widgets = {}
         self.trick_card_widgets = {}
+        self.setup_presenter()
         self.setup_initial_ui()
 
     def setup_initial_ui(self):
@@ -25,13 +34,16 @@ class ShelemGameWidget(QWidget):
         top_layout = QHBoxLayout()
         self.status_label = QLabel("برای شروع بازی شلم، روی دکمه کلیک کنید.")
         self.status_label.setStyleSheet("font-size: 16px; font-weight: bold; color: white; background-color: rgba(0,0,0,0.5); padding: 5px; border-radius: 5px;")
+        self.score_label = QLabel("")
+        self.score_label.setStyleSheet("font-size: 14px; color: white;")
         self.start_button = QPushButton("شروع بازی جدید شلم")
         self.start_button.clicked.connect(self.start_new_game)
         top_layout.addWidget(self.status_label)
         top_layout.addStretch()
+        top_layout.addWidget(self.score_label)
         top_layout.addWidget(self.start_button)
         self.main_layout.addLayout(top_layout)
-        
+
         self.controls_layout = QHBoxLayout()
         self.main_layout.addLayout(self.controls_layout)
 
@@ -42,22 +54,120 @@ class ShelemGameWidget(QWidget):
         self.player_hand_layout = QHBoxLayout()
         self.player_hand_layout.setAlignment(Qt.AlignCenter)
         self.main_layout.addLayout(self.player_hand_layout)
+        self.hand_view = HandView(self.make_hand_card_widget)
+        self.player_hand_layout.addWidget(self.hand_view)
 
     def start_new_game(self):
-        self.game = ShelemGame()
+        new_game = self.game is None or self.game.is_game_over
+        if new_game:
+            items_diff = ("آسان", "متوسط", "سخت")
+            difficulty_choice, ok = QInputDialog.getItem(self, "انتخاب سطح سختی", "سطح سختی ربات‌ها را انتخاب کنید:", items_diff, 1, False)
+            if not ok: return
+            difficulty = 'easy'
+            if "متوسط" in difficulty_choice: difficulty = 'medium'
+            if "سخت" in difficulty_choice: difficulty = 'hard'
+
+        self.reset_presenter()
+        self.clear_trick_widgets()
+        self.clear_layout(self.controls_layout)
+        if new_game:
+            if self.bid_evaluator is None:
+                # در رابط گرافیکی خواندن AI سخت با بودجه زمانی (نه تعداد نمونه ثابت) ارزیابی می‌شود
+                self.bid_evaluator = BidEvaluator(time_budget=self.BID_TIME_BUDGET)
+            self.attach_game(ShelemGame(difficulty=difficulty, bid_evaluator=self.bid_evaluator))
+            # دور اول در سازنده موتور شروع شده است؛ رویداد آن دستی به صف اضافه می‌شود
+            self.event_queue.append(GameEvent('round_started', {'dealer': self.game.players[self.game.dealer_index]}))
+        else:
+            self.game.apply_move({'action': 'new_round'})
         self.start_button.hide()
         self.audio_manager.play("shuffle")
-        self.game._deal_initial_cards()
-        self.setup_bidding_ui()
+        self.advance_engine()
+
+    # --- اجرای موتور و نمایش رویدادها ---
+
+    def human_to_move(self) -> bool:
+        """آیا موتور منتظر تصمیم بازیکن انسانی (یا شروع دور جدید) است؟"""
+        game = self.game
+        if game.is_round_over or game.is_game_over:
+            return True
+        return game.current_player_index == 0
+
+    def event_lead_time(self, event) -> int:
+        if event.kind in ('card_played', 'bid_placed', 'bid_passed') and event['player'] != self.game.players[0]:
+            return self.AI_MOVE_DELAY
+        return 0
+
+    def show_round_started(self, event):
         self.turn_phase = 'bidding'
-        self.process_bidding_turn()
+        self.update_player_hand_display()
+        self.status_label.setText("مرحله خواندن")
+
+    def show_round_redealt(self, event):
+        self.status_label.setText("همه پاس دادند؛ کارت‌ها دوباره پخش می‌شوند.")
+
+    def show_bid_placed(self, event):
+        self.status_label.setText(f"{event['player'].name} خواند: {event['amount']}")
+
+    def show_bid_passed(self, event):
+        self.status_label.setText(f"{event['player'].name} پاس داد.")
+
+    def show_bidding_over(self, event):
+        self.status_label.setText(f"مزایده تمام شد. حاکم: {event['hakem'].name} با خواندن {event['bid']}")
+        self.update_player_hand_display()
+
+    def show_hokm_set(self, event):
+        self.turn_phase = 'playing'
+        self.update_player_hand_display()
+        self.status_label.setText(f"حکم: {event['suit']} | حاکم: {event['hakem'].name}")
+
+    def show_card_played(self, event):
+        self.audio_manager.play("play")
+        self.update_trick_display([(event['player'], event['card'])])
+        if event['player'] == self.game.players[0]:
+            self.update_player_hand_display()
+
+    def show_trick_won(self, event):
+        self.status_label.setText(f"برنده دست: {event['winner'].name}")
+        self.audio_manager.play("win")
+        self.trick_done = True
+
+    def show_round_over(self, event):
+        result = "موفق شد" if event['contract_made'] else "شکست خورد"
+        points = " | ".join(f"{team}: {p}" for team, p in event['round_points'].items())
+        self.status_label.setText(f"حاکم ({event['bid']}) {result}. امتیاز دور: {points}")
+        self.score_label.setText(" | ".join(f"{team}: {s}" for team, s in event['team_scores'].items()))
+
+    def show_game_over(self, event):
+        self.status_label.setText(f"بازی تمام شد! برنده: {event['winner']}")
+
+    def await_human(self):
+        game = self.game
+        if game.is_round_over or game.is_game_over:
+            self.start_button.setText("شروع بازی جدید شلم" if game.is_game_over else "دور بعد")
+            self.start_button.show()
+        elif game.phase == 'bidding':
+            self.setup_bidding_ui()
+        elif game.phase == 'discarding':
+            self.turn_phase = 'discarding'
+            self.status_label.setText(f"زمین را برداشتید. لطفا {KITTY_SIZE} کارت برای رد کردن انتخاب کنید.")
+            self.setup_discard_ui()
+        elif game.phase == 'hokm':
+            self.turn_phase = 'hokm_selection'
+            self.prompt_for_hokm_ui()
+        else:
+            self.status_label.setText(f"حکم: {game.hokm_suit} | نوبت: {game.players[0].name}")
+            self.set_hand_buttons_enabled(True)
+
+    # --- خواندن ---
 
     def setup_bidding_ui(self):
         self.clear_layout(self.controls_layout)
-        self.bid_label = QLabel(f"بالاترین پیشنهاد: {self.game.highest_bid}")
+        bid_text = f"بالاترین پیشنهاد: {self.game.highest_bid}" if self.game.bid_winner else "هنوز کسی نخوانده است"
+        self.bid_label = QLabel(bid_text)
         self.bid_spinbox = QSpinBox()
-        self.bid_spinbox.setRange(100, 165)
+        self.bid_spinbox.setRange(self.game.min_bid(), TOTAL_POINTS)
         self.bid_spinbox.setSingleStep(5)
+        self.bid_spinbox.setValue(self.game.min_bid())
         self.bid_button = QPushButton("بخوان (Bid)")
         self.pass_button = QPushButton("پاس (Pass)")
         self.bid_button.clicked.connect(self.player_bids)
@@ -66,77 +176,24 @@ class ShelemGameWidget(QWidget):
         self.controls_layout.addWidget(self.bid_spinbox)
         self.controls_layout.addWidget(self.bid_button)
         self.controls_layout.addWidget(self.pass_button)
-        self.update_player_hand_display()
+        self.status_label.setText(f"نوبت خواندن: {self.game.players[0].name}")
 
-    def process_bidding_turn(self):
-        if len(self.game.players_in_bid) <= 1 and self.game.bid_winner is not None:
-            self.end_bidding_phase()
-            return
-
-        current_bidder = self.game.players[self.game.bidding_turn_index]
-        if current_bidder not in self.game.players_in_bid:
-            self.game.bidding_turn_index = (self.game.bidding_turn_index + 1) % 4
-            self.process_bidding_turn()
-            return
-            
-        self.status_label.setText(f"نوبت خواندن: {current_bidder.name}")
-        if self.game.bidding_turn_index == 0:
-            self.bid_spinbox.setMinimum(self.game.highest_bid + 5)
-            self.bid_spinbox.setValue(self.game.highest_bid + 5)
-            self.set_bidding_controls_enabled(True)
-        else:
-            self.set_bidding_controls_enabled(False)
-            QTimer.singleShot(1500, self.play_ai_bid_turn)
-
-    def play_ai_bid_turn(self):
-        player = self.game.players[self.game.bidding_turn_index]
-        hand_value = self.game._estimate_hand_value(player)
-        if hand_value >= self.game.highest_bid + 5:
-            self.game.highest_bid += 5
-            self.game.bid_winner = player
-            self.game.bids[player] = self.game.highest_bid
-            self.bid_label.setText(f"بالاترین پیشنهاد: {self.game.highest_bid} ({player.name})")
-        else:
-            self.game.players_in_bid.remove(player)
-        self.game.bidding_turn_index = (self.game.bidding_turn_index + 1) % 4
-        self.process_bidding_turn()
-        
     def player_bids(self):
-        bid_value = self.bid_spinbox.value()
-        self.game.highest_bid = bid_value
-        self.game.bid_winner = self.game.players[0]
-        self.game.bids[self.game.players[0]] = bid_value
-        self.bid_label.setText(f"بالاترین پیشنهاد: {self.game.highest_bid} (شما)")
-        self.game.bidding_turn_index = (self.game.bidding_turn_index + 1) % 4
-        self.process_bidding_turn()
-        
-    def player_passes(self):
-        self.game.players_in_bid.remove(self.game.players[0])
-        self.game.bidding_turn_index = (self.game.bidding_turn_index + 1) % 4
-        self.process_bidding_turn()
+        bid_value = self.bid_spinbox.value() - self.bid_spinbox.value() % 5
+        self.clear_layout(self.controls_layout)
+        self.game.apply_move({'action': 'bid', 'amount': bid_value})
+        self.advance_engine()
 
-    def end_bidding_phase(self):
+    def player_passes(self):
         self.clear_layout(self.controls_layout)
-        self.game.hakem = self.game.bid_winner
-        result_text = f"مزایده تمام شد. حاکم: {self.game.hakem.name} با خواندن {self.game.highest_bid}"
-        self.status_label.setText(result_text)
-        self.start_hakem_turn()
+        self.game.apply_move({'action': 'pass'})
+        self.advance_engine()
 
-    def start_hakem_turn(self):
-        for card in self.game.kitty:
-            self.game.hakem.add_card(card)
-
-        if self.game.hakem == self.game.players[0]:
-            self.turn_phase = 'discarding'
-            self.status_label.setText("زمین را برداشتید. لطفا ۴ کارت برای رد کردن انتخاب کنید.")
-            self.setup_discard_ui()
-        else:
-            self.status_label.setText(f"{self.game.hakem.name} در حال مدیریت کارت‌ها و انتخاب حکم است...")
-            QTimer.singleShot(2000, self.play_ai_hakem_turn)
+    # --- زمین و حکم ---
 
     def setup_discard_ui(self):
         self.update_player_hand_display()
-        self.discard_button = QPushButton("رد کردن ۴ کارت انتخاب شده")
+        self.discard_button = QPushButton(f"رد کردن {KITTY_SIZE} کارت انتخاب شده")
         self.discard_button.setEnabled(False)
         self.discard_button.clicked.connect(self.on_discard_clicked)
         self.controls_layout.addWidget(self.discard_button)
@@ -146,15 +203,15 @@ class ShelemGameWidget(QWidget):
             self.selected_cards_for_discard.append(card)
         else:
             self.selected_cards_for_discard.remove(card)
-        self.discard_button.setEnabled(len(self.selected_cards_for_discard) == 4)
+        self.discard_button.setEnabled(len(self.selected_cards_for_discard) == KITTY_SIZE)
 
     def on_discard_clicked(self):
-        for card in self.selected_cards_for_discard:
-            self.game.hakem.hand.remove(card)
+        cards = self.selected_cards_for_discard
         self.selected_cards_for_discard = []
         self.clear_layout(self.controls_layout)
         self.turn_phase = 'hokm_selection'
-        self.prompt_for_hokm_ui()
+        self.game.apply_move({'action': 'discard', 'cards': cards})
+        self.advance_engine()
 
     def prompt_for_hokm_ui(self):
         self.status_label.setText("حکم را انتخاب کنید:")
@@ -162,65 +219,68 @@ class ShelemGameWidget(QWidget):
         for suit in SUITS:
             btn = QPushButton(suit)
             btn.setStyleSheet("font-size: 24px; font-weight: bold;")
-            btn.clicked.connect(lambda _, s=suit: self.finalize_game_start(s))
+            btn.clicked.connect(lambda _, s=suit: self.set_hokm_and_start(s))
             self.hokm_buttons_layout.addWidget(btn)
         self.main_layout.insertLayout(1, self.hokm_buttons_layout)
         self.update_player_hand_display()
 
-    def play_ai_hakem_turn(self):
-        self.game._hakem_manages_kitty()
-        self.game.set_hokm()
-        self.finalize_game_start(self.game.hokm_suit)
-
-    def finalize_game_start(self, hokm_suit):
-        self.game.hokm_suit = hokm_suit
+    def set_hokm_and_start(self, hokm_suit):
         if hasattr(self, 'hokm_buttons_layout'):
             self.clear_layout(self.hokm_buttons_layout)
             self.main_layout.removeItem(self.hokm_buttons_layout)
-        self.turn_phase = 'playing'
-        self.game.current_player_index = self.players.index(self.game.hakem)
-        self.process_trick_turn()
+            del self.hokm_buttons_layout
+        self.game.apply_move({'action': 'set_hokm', 'suit': hokm_suit})
+        self.advance_engine()
+
+    # --- بازی دست‌ها ---
 
-    def process_trick_turn(self):
-        # This is the trick-taking logic, similar to Hokm
-        if len(self.game.players[0].hand) == 0:
-            # End of round logic
+    def on_card_clicked(self, card):
+        if self.presenting or not self.human_to_move() or self.game.phase != 'playing':
             return
-        if not self.game.trick_cards:
-            self.clear_trick_widgets()
-        self.update_displays()
-        # ... and so on
-    
-    def update_displays(self):
-        self.status_label.setText(f"حکم: {self.game.hokm_suit or '?'} | نوبت: {self.game.players[self.game.current_player_index].name}")
-        self.update_player_hand_display()
-        # self.update_trick_display()
+        self.set_hand_buttons_enabled(False)
+        self.game.apply_move({'action': 'play', 'card': card})
+        self.advance_engine()
 
     def update_player_hand_display(self):
-        self.clear_layout(self.player_hand_layout)
-        self.hand_card_widgets.clear()
         player = self.game.players[0]
-        for card in sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])):
-            btn = QPushButton("")
-            icon_path = f"resources/images/themes/default/cards/{card.image_filename}"
-            btn.setIcon(QIcon(icon_path))
-            btn.setIconSize(QSize(80, 110))
-            btn.setFixedSize(QSize(85, 115))
-            btn.setStyleSheet("QPushButton { border: none; background-color: transparent; } QPushButton:checked { border: 2px solid #007bff; border-radius: 5px; }")
-            if self.turn_phase == 'discarding':
-                btn.setCheckable(True)
-                btn.toggled.connect(lambda checked, c=card: self.on_card_toggled_for_discard(c, checked))
-            else:
-                btn.setCheckable(False)
-                # btn.clicked.connect(...)
-            self.player_hand_layout.addWidget(btn)
-            self.hand_card_widgets[card] = btn
-
-    def set_bidding_controls_enabled(self, enabled):
-        self.bid_spinbox.setEnabled(enabled)
-        self.bid_button.setEnabled(enabled)
-        self.pass_button.setEnabled(enabled)
-        
+        # در مرحله دور ریختن دکمه‌ها قابل انتخاب هستند، پس با عوض شدن مرحله دوباره ساخته می‌شوند
+        self.hand_view.set_cards(sorted(player.hand, key=lambda c: (c.suit, RANK_VALUES[c.rank])),
+                                 mode=self.turn_phase == 'discarding')
+        self.hand_view.set_checked(self.selected_cards_for_discard)
+
+    def make_hand_card_widget(self, card):
+        btn = QPushButton("")
+        btn.setIcon(self.pixmaps.card_icon(card))
+        btn.setIconSize(QSize(80, 110))
+        btn.setFixedSize(QSize(85, 115))
+        btn.setStyleSheet("QPushButton { border: none; background-color: transparent; } QPushButton:checked { border: 2px solid #007bff; border-radius: 5px; }")
+        if self.turn_phase == 'discarding':
+            btn.setCheckable(True)
+            btn.toggled.connect(lambda checked, c=card: self.on_card_toggled_for_discard(c, checked))
+        else:
+            btn.setCheckable(False)
+            btn.clicked.connect(lambda _, c=card: self.on_card_clicked(c))
+        return btn
+
+    def update_trick_display(self, trick_cards):
+        positions = {
+            0: (2, 1), # Bottom (Player 1)
+            1: (1, 2), # Right (Player 2)
+            2: (0, 1), # Top (Player 3)
+            3: (1, 0)  # Left (Player 4)
+        }
+        for player, card in trick_cards:
+            if card not in self.trick_card_widgets:
+                lbl = QLabel()
+                lbl.setPixmap(self.pixmaps.card_pixmap(card, (80, 110)))
+                row, col = positions[self.game.players.index(player)]
+                self.game_board_layout.addWidget(lbl, row, col, Qt.AlignCenter)
+                self.trick_card_widgets[card] = lbl
+
+    def set_hand_buttons_enabled(self, enabled):
+        valid_moves = self.game._get_valid_moves(self.game.players[0])
+        self.hand_view.set_enabled(lambda card: enabled and card in valid_moves)
+
     def clear_layout(self, layout):
         if layout is None: return
         while layout.count():
@@ -228,7 +288,7 @@ class ShelemGameWidget(QWidget):
             widget = item.widget()
             if widget is not None:
                 widget.deleteLater()
-                
+
     def clear_trick_widgets(self):
         self.clear_layout(self.game_board_layout)
         self.trick_card_widgets.clear()
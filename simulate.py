@@ -0,0 +1,336 @@
+"""
+اجرای دسته‌ای و بدون رابط گرافیکی بازی‌ها (AI در برابر AI).
+
+نمونه:
+    python simulate.py hokm bidel -n 500 --difficulty hard --seed 1
+    python simulate.py bluff -n 200 --difficulty hard --max-unfinished 0   # بررسی پایان‌پذیری
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+from hokm_game import HokmGame
+from chahar_barg_game import ChaharBargGame
+from haft_khaj_game import HaftKhajGame
+from rummy_game import RummyGame
+from bibi_salam_game import BibiSalamGame
+from bluff_game import BluffGame
+from haft_o_nim_game import HaftONimGame
+from bidel_game import BidelGame
+from nakhoda_game import NakhodaGame
+from chos_e_fil_game import ChosEFilGame
+from ganjifeh_game import GanjifehGame
+from amerikaii_game import AmerikaiiGame
+from shelem_game import ShelemGame
+
+DRAW = "مساوی"
+UNFINISHED = "ناتمام"
+MAX_TURNS = 1000  # سقف حرکت برای بازی‌هایی که ممکن است بی‌پایان شوند
+# جستجوی AI سخت (حکم، بیدل، گنجفه، شلم) در اجرای دسته‌ای به جای بودجه زمانی رابط گرافیکی با تعداد
+# ثابت determinization محدود می‌شود تا نتیجه با همان seed تکرارپذیر و مستقل از سرعت ماشین باشد؛
+# حل دقیق پایان دور هم از ۳ کارت شروع می‌شود چون بدون سقف زمانی برای ۵ کارت بیشتر وقت را می‌گیرد.
+HARD_SEARCH = {'ai_time_budget': None, 'ai_iterations': 16, 'ai_endgame_cards': 3}
+
+
+# --- اجراکننده‌های هر بازی ---
+# هر تابع یک بازی کامل را با مولد تصادفی rng اجرا کرده و (نتیجه، تعداد حرکت‌ها) را برمی‌گرداند.
+
+def _play_hokm(difficulty: str, rng) -> tuple[str, int]:
+    game = HokmGame(num_players=4, difficulty=difficulty, rng=rng, **HARD_SEARCH)
+    moves = 0
+    while True:
+        game.set_hokm(game.ai_choose_hokm())
+        while not game.is_round_over:
+            player = game.players[game.current_player_index]
+            game.play_card(player, game.ai_choose_card(player))
+            moves += 1
+        if game.is_game_over:
+            return max(game.team_scores, key=game.team_scores.get), moves
+        game._start_new_round()
+
+
+def _play_bidel(difficulty: str, rng) -> tuple[str, int]:
+    game = BidelGame(difficulty=difficulty, rng=rng, **HARD_SEARCH)
+    moves = 0
+    while not game.is_game_over:
+        game.start_new_round()
+        game.pass_cards({p.name: game.ai_choose_cards_to_pass(p) for p in game.players})
+        while not game.is_round_over:
+            player = game.players[game.current_player_index]
+            game.play_card(player, game.ai_choose_card(player))
+            moves += 1
+    # در بیدل کمترین امتیاز منفی برنده است
+    return min(game.total_scores, key=game.total_scores.get), moves
+
+
+def _play_ganjifeh(difficulty: str, rng) -> tuple[str, int]:
+    game = GanjifehGame(difficulty=difficulty, rng=rng, **HARD_SEARCH)
+    moves = 0
+    while not game.is_game_over:
+        player = game.players[game.current_player_index]
+        game.play_card(player, game.ai_choose_card(player))
+        moves += 1
+    wins = game.team_trick_wins
+    if wins["تیم ۱"] == wins["تیم ۲"]:
+        return DRAW, moves
+    return max(wins, key=wins.get), moves
+
+
+def _play_shelem(difficulty: str, rng) -> tuple[str, int]:
+    game = ShelemGame(difficulty=difficulty, rng=rng, **HARD_SEARCH)
+    moves = 0
+    while not game.is_game_over:
+        if game.is_round_over:
+            game.dealer_index = (game.dealer_index + 1) % len(game.players)
+            game._start_new_round()
+        player = game.players[game.current_player_index]
+        if game.phase == 'bidding':
+            bid = game.ai_bid(player)
+            if bid is None:
+                game.pass_bid(player)
+            else:
+                game.place_bid(player, bid)
+        elif game.phase == 'discarding':
+            game.discard_cards(game.ai_choose_discard(player))
+        elif game.phase == 'hokm':
+            game.set_hokm(game.ai_choose_hokm())
+        else:
+            game.play_card(player, game.ai_choose_card(player))
+            moves += 1
+    return max(game.team_scores, key=game.team_scores.get), moves
+
+
+def _play_chahar_barg(difficulty: str, rng) -> tuple[str, int]:
+    game = ChaharBargGame(num_players=2, difficulty=difficulty, rng=rng)
+    moves = 0
+    while True:
+        if all(len(p.hand) == 0 for p in game.players):
+            if len(game.deck) == 0:
+                break
+            game._deal_cards_to_players()
+        player = game.players[game.current_player_index]
+        move = game.ai_choose_move(player)
+        game.play_turn(player, move['card'], move['capture'])
+        moves += 1
+    game.end_round()
+    return _best_score(game.total_scores), moves
+
+
+def _play_shedding(game, moves_limit: int = MAX_TURNS) -> tuple[str, int]:
+    """حلقه مشترک بازی‌های «خلاص شدن از کارت» (هفت خاج، ناخدا، آمریکایی)."""
+    moves = 0
+    while not game.is_game_over and moves < moves_limit:
+        player = game.players[game.current_player_index]
+        move = game.ai_choose_card(player)
+        if move:
+            game.play_turn(player, move['card'], move['suit'])
+        else:
+            game.player_must_draw(player)
+        moves += 1
+    winner = next((p for p in game.players if not p.hand), None)
+    if not game.is_game_over:
+        return UNFINISHED, moves
+    return (winner.name if winner else DRAW), moves
+
+
+def _play_haft_khaj(difficulty: str, rng) -> tuple[str, int]:
+    return _play_shedding(HaftKhajGame(num_players=3, difficulty=difficulty, rng=rng))
+
+
+def _play_nakhoda(difficulty: str, rng) -> tuple[str, int]:
+    return _play_shedding(NakhodaGame(num_players=3, difficulty=difficulty, rng=rng))
+
+
+def _play_amerikaii(difficulty: str, rng) -> tuple[str, int]:
+    return _play_shedding(AmerikaiiGame(num_players=3, difficulty=difficulty, rng=rng))
+
+
+def _play_rummy(difficulty: str, rng) -> tuple[str, int]:
+    game = RummyGame(num_players=2, difficulty=difficulty, rng=rng)
+    moves = 0
+    while not game.is_game_over and moves < MAX_TURNS:
+        game.ai_play_turn(game.players[game.current_player_index])
+        moves += 1
+    if not game.is_game_over:
+        return UNFINISHED, moves
+    return (game.winner.name if game.winner else DRAW), moves
+
+
+def _play_bluff(difficulty: str, rng) -> tuple[str, int]:
+    game = BluffGame(num_players=3, difficulty=difficulty, rng=rng)
+    moves = 0
+    while not game.is_game_over and moves < MAX_TURNS:
+        player = game.players[game.current_player_index]
+        move = game.ai_choose_move(player)
+        if move['action'] == 'call_bluff':
+            game.call_bluff(player)
+        else:
+            game.play_cards(player, move['cards'], move['declared_rank'])
+        moves += 1
+    if not game.is_game_over:
+        return UNFINISHED, moves
+    return game.winner.name, moves
+
+
+def _play_bibi_salam(difficulty: str, rng) -> tuple[str, int]:
+    game = BibiSalamGame(num_players=4, difficulty=difficulty, rng=rng)
+    moves = 0
+    while not game.is_game_over:
+        card_needed = game.get_card_to_play()
+        player = game.play_next_card()
+        moves += 1
+        if player and card_needed and card_needed.rank == 'Q' and not game.is_game_over:
+            game._handle_salam_penalty(player)
+    return (game.winner.name if game.winner else DRAW), moves
+
+
+def _play_chos_e_fil(difficulty: str, rng) -> tuple[str, int]:
+    game = ChosEFilGame(num_players=4, difficulty=difficulty, rng=rng)
+    moves = 0
+    while not game.is_game_over and moves < MAX_TURNS:
+        game.play_turn()
+        moves += 1
+    if not game.is_game_over:
+        return UNFINISHED, moves
+    # در چُس فیل نتیجه، بازنده بازی است
+    return (f"بازنده: {game.loser.name}" if game.loser else DRAW), moves
+
+
+def _play_haft_o_nim(difficulty: str, rng) -> tuple[str, int]:
+    game = HaftONimGame(num_players=2, difficulty=difficulty, rng=rng)
+    player = game.players[0]
+    moves = 0
+    while game.player_status[player.name] == 'playing' and game.ai_should_hit(player):
+        game.player_hits(player)
+        moves += 1
+    if game.player_status[player.name] == 'playing':
+        game.player_stands(player)
+    game.dealer_plays()
+    game.determine_winners()
+    return game.player_outcomes[player.name], moves + 1
+
+
+def _best_score(scores: dict) -> str:
+    best = max(scores.values())
+    leaders = [name for name, score in scores.items() if score == best]
+    return leaders[0] if len(leaders) == 1 else DRAW
+
+
+RUNNERS = {
+    'hokm': _play_hokm,
+    'chahar_barg': _play_chahar_barg,
+    'haft_khaj': _play_haft_khaj,
+    'rummy': _play_rummy,
+    'bibi_salam': _play_bibi_salam,
+    'bluff': _play_bluff,
+    'haft_o_nim': _play_haft_o_nim,
+    'bidel': _play_bidel,
+    'nakhoda': _play_nakhoda,
+    'chos_e_fil': _play_chos_e_fil,
+    'ganjifeh': _play_ganjifeh,
+    'amerikaii': _play_amerikaii,
+    'shelem': _play_shelem,
+}
+
+
+class SimulationResult:
+    """نتیجه تجمیعی اجرای چند بازی از یک نوع."""
+    def __init__(self, game_name: str, difficulty: str):
+        self.game_name = game_name
+        self.difficulty = difficulty
+        self.games = 0
+        self.moves = 0
+        self.elapsed = 0.0
+        self.cpu_time = 0.0
+        self.outcomes = Counter()
+
+    def __repr__(self) -> str:
+        return f"SimulationResult({self.game_name}, games={self.games}, {self.games_per_second:.1f} games/s)"
+
+    def merge(self, other: "SimulationResult"):
+        """نتیجه یک تکه دیگر (مثلا از پردازه‌ای دیگر) را به این نتیجه اضافه می‌کند."""
+        self.games += other.games
+        self.moves += other.moves
+        self.cpu_time += other.cpu_time
+        self.outcomes.update(other.outcomes)
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def unfinished_share(self) -> float:
+        """سهم بازی‌هایی که به سقف حرکت رسیدند (مثلا AIهایی که در یک چرخه تکراری گیر کرده‌اند)."""
+        return self.outcomes[UNFINISHED] / self.games if self.games else 0.0
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves / self.elapsed if self.elapsed else 0.0
+
+    def report(self) -> str:
+        lines = [
+            f"{self.game_name} [{self.difficulty}]: {self.games} بازی در {self.elapsed:.2f} ثانیه "
+            f"({self.games_per_second:.1f} بازی/ثانیه، {self.moves_per_second:.0f} حرکت/ثانیه)"
+        ]
+        for outcome, count in self.outcomes.most_common():
+            lines.append(f"    {outcome}: {count} ({100.0 * count / self.games:.1f}%)")
+        return "\n".join(lines)
+
+
+def simulate(game_name: str, num_games: int, difficulty: str = 'medium', seed: int | None = None) -> SimulationResult:
+    """
+    num_games بازی کامل از game_name را بدون رابط گرافیکی اجرا می‌کند.
+    اگر seed داده شود، بازی i ام با random.Random(seed + i) اجرا می‌شود؛ بنابراین
+    اجرای بازه‌های seed به صورت جداگانه (مثلا در self_play) همان نتیجه را می‌دهد.
+    """
+    if game_name not in RUNNERS:
+        raise ValueError(f"بازی نامعتبر: {game_name}")
+
+    runner = RUNNERS[game_name]
+    result = SimulationResult(game_name, difficulty)
+    shared_rng = random.Random()
+    # برخی موتورها پیام‌های وضعیت را print می‌کنند؛ در اجرای دسته‌ای دور ریخته می‌شوند
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        for i in range(num_games):
+            rng = random.Random(seed + i) if seed is not None else shared_rng
+            outcome, moves = runner(difficulty, rng)
+            result.outcomes[outcome] += 1
+            result.moves += moves
+            result.games += 1
+        result.elapsed = time.perf_counter() - start
+        result.cpu_time = time.process_time() - cpu_start
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="شبیه‌سازی بدون رابط گرافیکی بازی‌های کارتی")
+    parser.add_argument("games", nargs="*", help=f"نام بازی‌ها از {', '.join(sorted(RUNNERS))} (پیش‌فرض: همه)")
+    parser.add_argument("-n", "--num-games", type=int, default=100)
+    parser.add_argument("-d", "--difficulty", choices=["easy", "medium", "hard"], default="medium")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-unfinished", type=float, default=None,
+                        help="بررسی پایان‌پذیری: اگر سهم بازی‌های ناتمام یک بازی بیشتر از این باشد، خروج با خطا")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.games if name not in RUNNERS]
+    if unknown:
+        parser.error(f"بازی نامعتبر: {', '.join(unknown)}")
+
+    status = 0
+    for game_name in args.games or sorted(RUNNERS):
+        result = simulate(game_name, args.num_games, args.difficulty, args.seed)
+        print(result.report())
+        if args.max_unfinished is not None and result.unfinished_share > args.max_unfinished:
+            print(f"خطا: {100.0 * result.unfinished_share:.1f}% بازی‌های {game_name} [{args.difficulty}] "
+                  f"به سقف {MAX_TURNS} حرکت رسیدند", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
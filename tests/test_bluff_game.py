@@ -0,0 +1,43 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluff_game import BluffGame
+
+
+def play(game, moves):
+    played = []
+    for _ in range(moves):
+        move = game.ai_move()
+        if move is None:
+            break
+        game.apply_move(move)
+        played.append(move)
+    return played
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_hard_restore_replays_the_same_moves(seed):
+    game = BluffGame(num_players=3, difficulty='hard', rng=random.Random(seed))
+    play(game, 30)
+    state = game.snapshot(include_rng=True)
+    expected = play(game, 40)
+    final = game.snapshot()
+
+    game.restore(state)
+    assert play(game, 40) == expected
+    assert game.snapshot() == final
+
+
+def test_restore_does_not_share_belief_counters():
+    game = BluffGame(num_players=3, difficulty='hard', rng=random.Random(0))
+    play(game, 10)
+    state = game.snapshot(include_rng=True)
+    game.restore(state)
+    play(game, 10)
+    game.restore(state)
+    assert game.snapshot() == state
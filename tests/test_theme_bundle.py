@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+pytest.importorskip("PyQt5")
+from PyQt5.QtGui import QColor, QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+import pixmap_cache
+import theme_bundle
+from game_basics import ALL_CARDS
+from theme_bundle import BLOB_ALIGN, ThemeBundle, build_bundle
+
+SIZES = ((80, 110), (61, 87))
+
+
+@pytest.fixture
+def theme_dir(tmp_path, monkeypatch):
+    app = QApplication.instance() or QApplication([])
+    themes = tmp_path / "themes"
+    cards = themes / "t" / "cards"
+    cards.mkdir(parents=True)
+    # اندازه‌ها و طول نام‌های متفاوت تا طول فهرست مضرب ۴ نباشد
+    for i, card in enumerate(ALL_CARDS[:5]):
+        image = QImage(78 + i, 110 - i, QImage.Format_ARGB32)
+        image.fill(QColor(40 * i, 100, 200))
+        image.save(str(cards / card.image_filename))
+    image = QImage(77, 109, QImage.Format_ARGB32)
+    image.fill(QColor(0, 0, 0))
+    image.save(str(themes / "t" / "back.png"))
+    monkeypatch.setattr(pixmap_cache, "THEMES_DIR", str(themes))
+    yield themes / "t"
+    del app
+
+
+def test_blobs_are_aligned_and_convert_to_pixmaps(theme_dir):
+    path = build_bundle("t", SIZES)
+    bundle = ThemeBundle(path)
+    assert len(bundle._entries) == 6 * len(SIZES)
+    for (name, width, height), (real_w, real_h, bpl, offset) in bundle._entries.items():
+        assert offset % BLOB_ALIGN == 0
+        assert (bundle._base + offset) % 4 == 0
+        pixmap = QPixmap.fromImage(bundle.image(name, width, height))
+        assert not pixmap.isNull()
+        assert (pixmap.width(), pixmap.height()) == (real_w, real_h)
+
+
+def test_open_ignores_bundle_with_old_magic(theme_dir):
+    path = build_bundle("t", SIZES)
+    with open(path, "r+b") as f:
+        f.write(b"ICGTHM01")
+    assert ThemeBundle.open("t") is None
+    assert theme_bundle.bundle_path("t") == path
@@ -0,0 +1,154 @@
+"""
+بسته‌بندی یک تم در یک فایل باینری با تصاویر از پیش رمزگشایی و مقیاس شده.
+
+ساخت بسته (یک بار، پس از تغییر تصاویر تم):
+    python theme_bundle.py default --sizes 80x110 100x140 60x88
+
+ساختار فایل (little-endian):
+    MAGIC, تعداد رکوردها (uint32)
+    برای هر رکورد: طول نام (uint16)، نام (utf-8)، عرض، ارتفاع، bytes_per_line (uint32)، offset (uint64)
+    سپس پیکسل‌های خام ARGB32 premultiplied هر رکورد؛ شروع هر رکورد مضرب BLOB_ALIGN است
+    (QImage روی حافظه نگاشت شده به آدرس هم‌تراز ۳۲ بیتی نیاز دارد و mmap از مرز صفحه شروع می‌شود).
+بارگذار فایل را memory-map می‌کند و QImageها مستقیما روی همان حافظه ساخته می‌شوند.
+"""
+import argparse
+import ctypes
+import mmap
+import os
+import struct
+import sys
+import time
+from PyQt5 import sip
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+from game_basics import ALL_CARDS
+
+MAGIC = b"ICGTHM02"  # ICGTHM01: رکوردها هم‌تراز نبودند
+BLOB_ALIGN = 16
+BUNDLE_FILENAME = "bundle.bin"
+DEFAULT_SIZES = ((80, 110), (100, 140), (60, 88))
+_HEADER = struct.Struct("<I")
+_ENTRY = struct.Struct("<IIIQ")
+_NAME_LEN = struct.Struct("<H")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // BLOB_ALIGN) * BLOB_ALIGN
+
+
+def bundle_path(theme: str) -> str:
+    from pixmap_cache import THEMES_DIR
+    return f"{THEMES_DIR}/{theme}/{BUNDLE_FILENAME}"
+
+
+def build_bundle(theme: str, sizes=DEFAULT_SIZES, path: str = None) -> str:
+    """تصاویر کارت‌ها و پشت کارت تم را در همه اندازه‌ها رمزگشایی، مقیاس و در یک فایل ذخیره می‌کند."""
+    from pixmap_cache import THEMES_DIR
+    path = path or bundle_path(theme)
+    sources = [(card.image_filename, f"{THEMES_DIR}/{theme}/cards/{card.image_filename}") for card in ALL_CARDS]
+    sources.append(("back.png", f"{THEMES_DIR}/{theme}/back.png"))
+
+    entries, blobs = [], []
+    for name, source_path in sources:
+        source = QImage(source_path)
+        if source.isNull():
+            print(f"هشدار: تصویر پیدا نشد: {source_path}")
+            continue
+        for width, height in sizes:
+            image = source.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+            data = image.constBits().asstring(image.sizeInBytes())
+            # اندازه درخواستی کلید است (نه اندازه واقعی پس از حفظ نسبت ابعاد)
+            entries.append((name, width, height, image.width(), image.height(), image.bytesPerLine()))
+            blobs.append(data)
+
+    index = bytearray(MAGIC + _HEADER.pack(len(entries)))
+    index_size = len(index) + sum(_NAME_LEN.size + len(e[0].encode()) + 8 + _ENTRY.size for e in entries)
+    offsets, offset = [], _align(index_size)
+    for blob in blobs:
+        offsets.append(offset)
+        offset = _align(offset + len(blob))
+    for (name, width, height, real_w, real_h, bpl), blob_offset in zip(entries, offsets):
+        encoded = name.encode()
+        index += _NAME_LEN.pack(len(encoded)) + encoded + struct.pack("<II", width, height)
+        index += _ENTRY.pack(real_w, real_h, bpl, blob_offset)
+
+    with open(path + ".tmp", "wb") as f:
+        f.write(index)
+        for blob, blob_offset in zip(blobs, offsets):
+            f.write(bytes(blob_offset - f.tell()))
+            f.write(blob)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+class ThemeBundle:
+    """بسته memory-map شده یک تم؛ image(name, size) بدون باز کردن فایل یا رمزگشایی PNG برمی‌گردد."""
+
+    @classmethod
+    def open(cls, theme: str):
+        """اگر بسته تم ساخته نشده یا قدیمی باشد None برمی‌گرداند تا فراخواننده به فایل‌های PNG برگردد."""
+        path = bundle_path(theme)
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except ValueError as e:
+            print(f"هشدار: {e}؛ بسته را دوباره بسازید: python theme_bundle.py {theme}")
+            return None
+
+    def __init__(self, path: str):
+        start = time.perf_counter()
+        self.path = path
+        with open(path, "rb") as f:
+            # ACCESS_COPY نگاشت قابل نوشتن (copy-on-write) می‌دهد که برای گرفتن آدرس بافر لازم است
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"فایل بسته تم نامعتبر است: {path}")
+
+        self._entries = {}  # (نام، عرض، ارتفاع) -> (عرض واقعی، ارتفاع واقعی، bytes_per_line، offset)
+        pos = len(MAGIC)
+        (count,) = _HEADER.unpack_from(self._map, pos)
+        pos += _HEADER.size
+        for _ in range(count):
+            (name_len,) = _NAME_LEN.unpack_from(self._map, pos)
+            pos += _NAME_LEN.size
+            name = self._map[pos:pos + name_len].decode()
+            pos += name_len
+            width, height = struct.unpack_from("<II", self._map, pos)
+            pos += 8
+            self._entries[(name, width, height)] = _ENTRY.unpack_from(self._map, pos)
+            pos += _ENTRY.size
+        self._base = ctypes.addressof(ctypes.c_char.from_buffer(self._map))
+        self.open_time = time.perf_counter() - start
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def image(self, name: str, width: int, height: int) -> QImage | None:
+        entry = self._entries.get((name, width, height))
+        if entry is None:
+            return None
+        real_w, real_h, bpl, offset = entry
+        # QImage روی حافظه نگاشت شده ساخته می‌شود؛ QPixmap.fromImage از آن کپی می‌گیرد
+        return QImage(sip.voidptr(self._base + offset), real_w, real_h, bpl, QImage.Format_ARGB32_Premultiplied)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ساخت بسته باینری تصاویر یک تم")
+    parser.add_argument("theme", nargs="?", default="default")
+    parser.add_argument("--sizes", nargs="+", default=[f"{w}x{h}" for w, h in DEFAULT_SIZES],
+                        help="اندازه‌ها به شکل WxH")
+    args = parser.parse_args(argv)
+    sizes = [tuple(int(v) for v in size.lower().split("x")) for size in args.sizes]
+
+    start = time.perf_counter()
+    path = build_bundle(args.theme, sizes)
+    print(f"بسته {path} ({os.path.getsize(path) / 1024:.0f} KB) در {time.perf_counter() - start:.2f} ثانیه ساخته شد.")
+    bundle = ThemeBundle(path)
+    print(f"بارگذاری با mmap: {bundle.open_time * 1000:.2f} ms برای {len(bundle._entries)} تصویر")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,369 @@
+"""
+جستجوی مونت‌کارلو با determinization برای بازی‌های دست‌گیری (حکم و مشابه آن).
+
+وضعیت جستجو یک کپی سبک از بازی است: دست هر صندلی یک bitmask است که بیت
+card_id برای هر کارت روشن است (card_id = suit_index * lane_bits + rank_index)،
+بنابراین کپی کردن وضعیت فقط کپی چند عدد صحیح است و نیازی به deepcopy موتور نیست.
+"""
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from hand_bitboard import LANE_BITS
+
+
+def mask_ids(mask: int) -> list[int]:
+    """شناسه بیت‌های روشن یک mask را به ترتیب صعودی برمی‌گرداند."""
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+
+def ids_mask(card_ids) -> int:
+    mask = 0
+    for card_id in card_ids:
+        mask |= 1 << card_id
+    return mask
+
+
+class TrickState:
+    """
+    وضعیت سبک یک دور دست‌گیری برای جستجو.
+    trump شماره خال حکم (یا None)، team_of تیم هر صندلی و won_tricks تعداد دست‌های هر تیم است.
+    unbroken_suit خالی است که تا بازی نشدنش نمی‌توان با آن دست را شروع کرد (مثل دل در بیدل).
+    """
+    __slots__ = ("hands", "trick", "turn", "trump", "team_of", "won_tricks", "won_cards", "lane_bits",
+                 "unbroken_suit")
+
+    def __init__(self, hands: list[int], turn: int, trump: int | None, team_of: tuple,
+                 trick=(), won_tricks=None, won_cards=None, lane_bits: int = LANE_BITS,
+                 unbroken_suit: int | None = None):
+        self.hands = list(hands)
+        self.trick = list(trick)  # لیستی از (صندلی، card_id)
+        self.turn = turn
+        self.trump = trump
+        self.team_of = team_of
+        num_teams = max(team_of) + 1
+        self.won_tricks = list(won_tricks) if won_tricks is not None else [0] * num_teams
+        self.won_cards = list(won_cards) if won_cards is not None else [0] * len(hands)
+        self.lane_bits = lane_bits
+        self.unbroken_suit = unbroken_suit
+
+    def copy(self) -> "TrickState":
+        state = TrickState.__new__(TrickState)
+        state.hands = self.hands[:]
+        state.trick = self.trick[:]
+        state.turn = self.turn
+        state.trump = self.trump
+        state.team_of = self.team_of
+        state.won_tricks = self.won_tricks[:]
+        state.won_cards = self.won_cards[:]
+        state.lane_bits = self.lane_bits
+        state.unbroken_suit = self.unbroken_suit
+        return state
+
+    def legal_mask(self) -> int:
+        """کارت‌های مجاز صندلی نوبت (با قانون پیروی از خال)."""
+        hand = self.hands[self.turn]
+        if not self.trick:
+            if self.unbroken_suit is not None:
+                others = hand & ~(((1 << self.lane_bits) - 1) << (self.unbroken_suit * self.lane_bits))
+                return others or hand
+            return hand
+        lead_suit = self.trick[0][1] // self.lane_bits
+        follow = hand & (((1 << self.lane_bits) - 1) << (lead_suit * self.lane_bits))
+        return follow or hand
+
+    def trick_winner(self) -> int:
+        lane_bits = self.lane_bits
+        lead_suit = self.trick[0][1] // lane_bits
+        best_seat, best_key = None, -1
+        for seat, card_id in self.trick:
+            suit, rank_index = divmod(card_id, lane_bits)
+            if suit == self.trump:
+                key = 2 * lane_bits + rank_index
+            elif suit == lead_suit:
+                key = lane_bits + rank_index
+            else:
+                continue
+            if key > best_key:
+                best_seat, best_key = seat, key
+        return best_seat
+
+    def play(self, card_id: int) -> int | None:
+        """کارت را برای صندلی نوبت بازی می‌کند؛ اگر دست کامل شود صندلی برنده را برمی‌گرداند."""
+        self.hands[self.turn] &= ~(1 << card_id)
+        self.trick.append((self.turn, card_id))
+        if self.unbroken_suit is not None and card_id // self.lane_bits == self.unbroken_suit:
+            self.unbroken_suit = None
+        if len(self.trick) < len(self.hands):
+            self.turn = (self.turn + 1) % len(self.hands)
+            return None
+
+        winner = self.trick_winner()
+        self.won_tricks[self.team_of[winner]] += 1
+        self.won_cards[winner] |= ids_mask(card_id for _, card_id in self.trick)
+        self.trick = []
+        self.turn = winner
+        return winner
+
+    def is_terminal(self) -> bool:
+        return not self.hands[self.turn]
+
+
+def random_playout(state: TrickState, rng, stop=None):
+    """وضعیت را با حرکت‌های تصادفی مجاز تا پایان دور (یا تا برقرار شدن stop) جلو می‌برد."""
+    while state.hands[state.turn]:
+        state.play(rng.choice(mask_ids(state.legal_mask())))
+        if stop is not None and not state.trick and stop(state):
+            return
+
+
+def sample_hands(rng, hands: list, unseen_mask: int, hand_sizes: list, voids: list, lane_bits: int = LANE_BITS,
+                 attempts: int = 20) -> list[int]:
+    """
+    یک determinization: کارت‌های دیده‌نشده را بین صندلی‌های ناشناخته (hands[seat] is None)
+    پخش می‌کند، طوری که با خال‌هایی که هر صندلی نشان داده ندارد (voids) سازگار باشد.
+    اگر پس از چند تلاش پخش سازگار پیدا نشود، محدودیت‌ها نادیده گرفته می‌شوند.
+    """
+    unknown_seats = sorted((seat for seat, hand in enumerate(hands) if hand is None),
+                           key=lambda seat: -len(voids[seat]))
+    unseen = mask_ids(unseen_mask)
+    for attempt in range(attempts + 1):
+        rng.shuffle(unseen)
+        dealt = list(hands)
+        pool = unseen
+        for seat in unknown_seats:
+            need = hand_sizes[seat]
+            seat_voids = voids[seat] if attempt < attempts else ()
+            taken, rest = [], []
+            for card_id in pool:
+                if len(taken) < need and card_id // lane_bits not in seat_voids:
+                    taken.append(card_id)
+                else:
+                    rest.append(card_id)
+            if len(taken) < need:
+                break
+            dealt[seat] = ids_mask(taken)
+            pool = rest
+        else:
+            return dealt
+    raise ValueError("کارت کافی برای پخش بین بازیکنان وجود ندارد.")
+
+
+def known_voids(tricks, num_seats: int, lane_bits: int = LANE_BITS) -> list[set]:
+    """
+    از روی دست‌های بازی شده (لیست‌هایی از (صندلی، card_id)) خال‌هایی را که
+    هر صندلی با پیروی نکردن نشان داده ندارد، استخراج می‌کند.
+    """
+    voids = [set() for _ in range(num_seats)]
+    for trick in tricks:
+        if not trick: continue
+        lead_suit = trick[0][1] // lane_bits
+        for seat, card_id in trick[1:]:
+            if card_id // lane_bits != lead_suit:
+                voids[seat].add(lead_suit)
+    return voids
+
+
+class Determinizer:
+    """
+    اطلاعات عمومی یک موقعیت از دید یک صندلی؛ با هر فراخوانی یک TrickState کامل
+    (با دست‌های نمونه‌گیری شده حریفان) می‌سازد. قابل pickle است تا به پردازه‌های دیگر فرستاده شود.
+    """
+    __slots__ = ("seat", "hands", "unseen_mask", "hand_sizes", "voids", "trick", "trump", "team_of",
+                 "won_tricks", "won_cards", "lane_bits", "unbroken_suit")
+
+    def __init__(self, seat: int, hands: list, unseen_mask: int, hand_sizes: list, voids: list, trick: list,
+                 trump: int | None, team_of: tuple, won_tricks=None, won_cards=None, lane_bits: int = LANE_BITS,
+                 unbroken_suit: int | None = None):
+        self.seat = seat
+        self.hands = hands
+        self.unseen_mask = unseen_mask
+        self.hand_sizes = hand_sizes
+        self.voids = voids
+        self.trick = trick
+        self.trump = trump
+        self.team_of = team_of
+        self.won_tricks = won_tricks
+        self.won_cards = won_cards
+        self.lane_bits = lane_bits
+        self.unbroken_suit = unbroken_suit
+
+    def __call__(self, rng) -> TrickState:
+        dealt = sample_hands(rng, self.hands, self.unseen_mask, self.hand_sizes, self.voids, self.lane_bits)
+        return TrickState(dealt, self.seat, self.trump, self.team_of, self.trick, self.won_tricks,
+                          self.won_cards, self.lane_bits, self.unbroken_suit)
+
+
+class TeamTricksGoal:
+    """ارزیابی برای بازی‌هایی مثل حکم و گنجفه: برد تیم با رسیدن به tricks_to_win دست."""
+    __slots__ = ("team", "tricks_to_win")
+
+    def __init__(self, team: int, tricks_to_win: int):
+        self.team = team
+        self.tricks_to_win = tricks_to_win
+
+    def __call__(self, state: TrickState) -> float:
+        mine = state.won_tricks[self.team]
+        best_other = max(t for i, t in enumerate(state.won_tricks) if i != self.team)
+        if mine >= self.tricks_to_win or mine > best_other:
+            return 1.0
+        if best_other >= self.tricks_to_win or mine < best_other:
+            return 0.0
+        return 0.5
+
+    def is_decided(self, state: TrickState) -> bool:
+        return max(state.won_tricks) >= self.tricks_to_win
+
+
+class PenaltyCardsGoal:
+    """ارزیابی برای بیدل: هرچه امتیاز منفی کارت‌های گرفته شده صندلی کمتر، بهتر."""
+    __slots__ = ("seat", "penalties", "max_penalty")
+
+    def __init__(self, seat: int, penalties: dict):
+        self.seat = seat
+        self.penalties = penalties  # card_id -> امتیاز منفی
+        self.max_penalty = sum(penalties.values())
+
+    def __call__(self, state: TrickState) -> float:
+        won = state.won_cards[self.seat]
+        points = sum(p for card_id, p in self.penalties.items() if won >> card_id & 1)
+        return 1.0 - points / self.max_penalty
+
+
+class TeamPointsGoal:
+    """ارزیابی برای شلم: سهم تیم از امتیاز کارت‌ها (card_points) و دست‌های (trick_points) گرفته شده."""
+    __slots__ = ("team", "card_points", "trick_points", "max_points")
+
+    def __init__(self, team: int, card_points: dict, trick_points: int, max_points: int):
+        self.team = team
+        self.card_points = card_points  # card_id -> امتیاز
+        self.trick_points = trick_points
+        self.max_points = max_points
+
+    def __call__(self, state: TrickState) -> float:
+        won = 0
+        for seat, cards in enumerate(state.won_cards):
+            if state.team_of[seat] == self.team:
+                won |= cards
+        points = sum(p for card_id, p in self.card_points.items() if won >> card_id & 1)
+        return (points + self.trick_points * state.won_tricks[self.team]) / self.max_points
+
+
+class SearchStats:
+    """آمار تجمیعی جستجو: تعداد بازدید و مجموع امتیاز هر حرکت."""
+    __slots__ = ("visits", "totals", "iterations", "elapsed")
+
+    def __init__(self):
+        self.visits = {}
+        self.totals = {}
+        self.iterations = 0
+        self.elapsed = 0.0
+
+    def __repr__(self) -> str:
+        return f"SearchStats(iterations={self.iterations}, elapsed={self.elapsed:.3f}s)"
+
+    def add(self, move: int, value: float):
+        self.visits[move] = self.visits.get(move, 0) + 1
+        self.totals[move] = self.totals.get(move, 0.0) + value
+
+    def merge(self, other: "SearchStats"):
+        for move, visits in other.visits.items():
+            self.visits[move] = self.visits.get(move, 0) + visits
+            self.totals[move] = self.totals.get(move, 0.0) + other.totals[move]
+        self.iterations += other.iterations
+
+    def mean(self, move: int) -> float:
+        return self.totals[move] / self.visits[move] if self.visits.get(move) else 0.0
+
+    def best_move(self) -> int:
+        return max(self.visits, key=self.mean)
+
+
+def monte_carlo_search(sample_root, candidates: list[int], evaluate, rng, time_budget: float | None = None,
+                       max_iterations: int | None = None, stop=None) -> SearchStats:
+    """
+    در هر تکرار یک determinization با sample_root(rng) ساخته می‌شود و همه حرکت‌های
+    candidates روی همان نمونه با playout تصادفی ارزیابی می‌شوند (evaluate(state) -> امتیاز).
+    جستجو با تمام شدن time_budget (ثانیه) یا max_iterations متوقف می‌شود؛ دست‌کم یک تکرار انجام می‌شود.
+    """
+    stats = SearchStats()
+    start = time.perf_counter()
+    deadline = start + time_budget if time_budget is not None else None
+    while True:
+        root = sample_root(rng)
+        for move in candidates:
+            state = root.copy()
+            state.play(move)
+            random_playout(state, rng, stop)
+            stats.add(move, evaluate(state))
+        stats.iterations += 1
+        if max_iterations is not None and stats.iterations >= max_iterations:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if deadline is None and max_iterations is None:
+            break
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+# --- اجرای موازی playoutها ---
+
+_pool = None
+_pool_workers = 0
+
+
+def _search_pool(workers: int) -> ProcessPoolExecutor:
+    """pool پردازه‌ها بین حرکت‌ها نگه داشته می‌شود تا هزینه راه‌اندازی فقط یک بار پرداخت شود."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def _search_worker(task: tuple) -> SearchStats:
+    sample_root, candidates, evaluate, stop, seed, time_budget, submitted_at, max_iterations = task
+    remaining = None
+    if time_budget is not None:
+        # زمان صف و ارسال هم از بودجه مشترک کم می‌شود
+        remaining = max(0.0, time_budget - (time.time() - submitted_at))
+    return monte_carlo_search(sample_root, candidates, evaluate, random.Random(seed), remaining, max_iterations, stop)
+
+
+def parallel_monte_carlo_search(sample_root, candidates: list[int], evaluate, rng, time_budget: float | None = None,
+                                max_iterations: int | None = None, stop=None, workers: int = 2) -> SearchStats:
+    """
+    مانند monte_carlo_search، اما تکرارها بین workers پردازه پخش می‌شوند. همه پردازه‌ها در
+    یک بودجه زمانی مشترک کار می‌کنند و آمار آن‌ها ادغام می‌شود. sample_root، evaluate و stop
+    باید قابل pickle باشند (مثل Determinizer و کلاس‌های Goal).
+    """
+    pool = _search_pool(workers)
+    per_worker = math.ceil(max_iterations / workers) if max_iterations is not None else None
+    start = time.perf_counter()
+    submitted_at = time.time()
+    futures = [pool.submit(_search_worker, (sample_root, candidates, evaluate, stop, rng.randrange(2 ** 63),
+                                            time_budget, submitted_at, per_worker))
+               for _ in range(workers)]
+    stats = SearchStats()
+    for future in futures:
+        stats.merge(future.result())
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def run_search(sample_root, candidates: list[int], evaluate, rng, time_budget: float | None = None,
+               max_iterations: int | None = None, stop=None, workers: int = 1) -> SearchStats:
+    """بسته به workers، جستجو را در همین پردازه یا به صورت موازی اجرا می‌کند."""
+    if workers > 1:
+        return parallel_monte_carlo_search(sample_root, candidates, evaluate, rng, time_budget, max_iterations,
+                                           stop, workers)
+    return monte_carlo_search(sample_root, candidates, evaluate, rng, time_budget, max_iterations, stop)
@@ -0,0 +1,111 @@
+"""
+Zobrist hashing و جدول جابجایی (transposition table) با اندازه ثابت برای جستجوهای بازی‌های دست‌گیری.
+
+کلید یک وضعیت XOR عددهای تصادفی ۶۴ بیتی این اجزاست:
+    مالکیت هر کارت (صندلی، کارت)، کارت‌های دست جاری (صندلی، کارت)، خال حکم، صندلی نوبت،
+    خال شکسته نشده (مثل دل در بیدل) و دیدگاه جستجو (تیمی که ارزش برای آن حساب می‌شود).
+چون هر جزء با یک XOR اضافه یا حذف می‌شود، کلید در طول جستجو با هر حرکت به‌روز می‌شود و
+نیازی به ساختن تاپل از کل وضعیت نیست.
+
+جدول جابجایی 2**size_bits خانه در سطل‌های دوتایی دارد: خانه اول «عمق‌محور» است (ورودی با
+زیردرخت بزرگ‌تر یا از جستجوی جاری می‌ماند) و خانه دوم همیشه جایگزین می‌شود. چون کلید کل
+وضعیت آینده را پوشش می‌دهد، ورودی‌ها بین حرکت‌ها معتبر می‌مانند و یک جدول در طول کل بازی نگه
+داشته می‌شود؛ new_search فقط ورودی‌های جستجوهای قبلی را برای جایگزینی در اولویت می‌گذارد.
+"""
+import random
+from functools import lru_cache
+
+
+class ZobristKeys:
+    """عددهای تصادفی ثابت برای num_seats صندلی، num_cards شناسه کارت و num_suits خال."""
+    def __init__(self, num_seats: int, num_cards: int, num_suits: int, seed: int = 0x1C6):
+        rng = random.Random(seed)
+        bits = lambda: rng.getrandbits(64)
+        self.owner = [[bits() for _ in range(num_cards)] for _ in range(num_seats)]
+        self.in_trick = [[bits() for _ in range(num_cards)] for _ in range(num_seats)]
+        self.turn = [bits() for _ in range(num_seats)]
+        self.perspective = [bits() for _ in range(num_seats)]
+        # اندیس num_suits یعنی «هیچ» (بدون حکم / همه خال‌ها آزاد)
+        self.trump = [bits() for _ in range(num_suits + 1)]
+        self.unbroken = [bits() for _ in range(num_suits + 1)]
+
+    def hash_state(self, hands, trick, turn: int, trump: int | None, unbroken_suit: int | None = None,
+                   perspective: int = 0) -> int:
+        """کلید کامل یک وضعیت (hands: bitmask هر صندلی، trick: لیست (صندلی، card_id))."""
+        key = self.turn[turn] ^ self.perspective[perspective]
+        key ^= self.trump[len(self.trump) - 1 if trump is None else trump]
+        key ^= self.unbroken[len(self.unbroken) - 1 if unbroken_suit is None else unbroken_suit]
+        for seat, hand in enumerate(hands):
+            owner = self.owner[seat]
+            while hand:
+                low = hand & -hand
+                key ^= owner[low.bit_length() - 1]
+                hand ^= low
+        for seat, card_id in trick:
+            key ^= self.in_trick[seat][card_id]
+        return key
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(num_seats: int, num_cards: int, num_suits: int) -> ZobristKeys:
+    """کلیدهای مشترک هر اندازه بازی (حکم و شلم: ۵۲ کارت، گنجفه: ۹۶)."""
+    return ZobristKeys(num_seats, num_cards, num_suits)
+
+
+class TranspositionTable:
+    """
+    جدول جابجایی با اندازه ثابت. هر ورودی (کلید، عمق، مقدار، شماره جستجو) است؛ عمق اندازه زیردرخت
+    (مثلا تعداد کارت‌های باقی‌مانده) است. شمارنده‌ها در stats نگه داشته می‌شوند.
+    """
+    def __init__(self, size_bits: int = 16):
+        self.size = 1 << size_bits
+        self.bucket_mask = (self.size - 1) & ~1
+        self.keys = [None] * self.size
+        self.depths = [0] * self.size
+        self.values = [None] * self.size
+        self.generations = [0] * self.size
+        self.generation = 0
+        self.stats = {"probes": 0, "hits": 0, "stores": 0, "overwrites": 0}
+
+    def __repr__(self) -> str:
+        return (f"TranspositionTable({self.size} خانه، {self.stats['probes']} جستجو، "
+                f"نرخ برخورد {self.hit_rate:.1%})")
+
+    @property
+    def hit_rate(self) -> float:
+        return self.stats["hits"] / self.stats["probes"] if self.stats["probes"] else 0.0
+
+    def new_search(self):
+        """ورودی‌های جستجوهای قبلی قابل استفاده می‌مانند اما در خانه عمق‌محور اول جایگزین می‌شوند."""
+        self.generation += 1
+
+    def clear(self):
+        self.keys = [None] * self.size
+        self.depths = [0] * self.size
+        self.values = [None] * self.size
+        self.generations = [0] * self.size
+
+    def probe(self, key: int):
+        """مقدار ذخیره شده برای key یا None."""
+        self.stats["probes"] += 1
+        index = key & self.bucket_mask
+        for slot in (index, index + 1):
+            if self.keys[slot] == key:
+                self.stats["hits"] += 1
+                return self.values[slot]
+        return None
+
+    def store(self, key: int, depth: int, value):
+        self.stats["stores"] += 1
+        index = key & self.bucket_mask
+        keys, generations = self.keys, self.generations
+        if keys[index] == key or generations[index] != self.generation or depth >= self.depths[index]:
+            slot = index  # خانه عمق‌محور
+        else:
+            slot = index + 1  # خانه همیشه-جایگزین
+        if keys[slot] is not None and keys[slot] != key and generations[slot] == self.generation:
+            self.stats["overwrites"] += 1
+        keys[slot] = key
+        self.depths[slot] = depth
+        self.values[slot] = value
+        generations[slot] = self.generation